@@ -7,8 +7,20 @@ __version__ = "1.0.0"
 __author__ = "Karan Gupta"
 __license__ = "MIT"
 
-from .main import EyeRemoteApp
-from .eye_detector import EyeDetector
-from .config import Config
-
 __all__ = ['EyeRemoteApp', 'EyeDetector', 'Config']
+
+# Exports are resolved on first access so that importing a submodule
+# (e.g. the native-messaging host) does not load the GUI toolkit.
+_EXPORTS = {
+    'EyeRemoteApp': '.main',
+    'EyeDetector': '.eye_detector',
+    'Config': '.config',
+}
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+        module = importlib.import_module(_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,50 @@
+"""
+Attention state smoothing for EyeRemote
+Turns noisy per-frame eye detections into a stable attention state
+"""
+
+from typing import Optional
+
+
+class AttentionSmoother:
+    def __init__(self, present_threshold: int = 2, absent_threshold: int = 3):
+        """
+        Initialize smoother
+
+        Args:
+            present_threshold: Consecutive frames with eyes to confirm eyes are present
+            absent_threshold: Consecutive frames without eyes to confirm eyes are gone
+        """
+        self.present_threshold = present_threshold
+        self.absent_threshold = absent_threshold
+        self.reset()
+
+    def reset(self):
+        """Reset to the 'no eyes' state"""
+        self.stable_state = False
+        self.eyes_present_counter = 0
+        self.no_eyes_counter = 0
+
+    def update(self, eyes_detected: bool) -> Optional[bool]:
+        """
+        Feed one frame's detection result
+
+        Args:
+            eyes_detected: Whether eyes were detected in the frame
+
+        Returns:
+            The new stable state if it changed on this frame, otherwise None
+        """
+        if eyes_detected:
+            self.no_eyes_counter = 0
+            self.eyes_present_counter += 1
+            if self.eyes_present_counter >= self.present_threshold and not self.stable_state:
+                self.stable_state = True
+                return True
+        else:
+            self.eyes_present_counter = 0
+            self.no_eyes_counter += 1
+            if self.no_eyes_counter >= self.absent_threshold and self.stable_state:
+                self.stable_state = False
+                return False
+        return None
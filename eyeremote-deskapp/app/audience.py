@@ -0,0 +1,237 @@
+"""
+Audience mode
+For classrooms and shared rooms: every face in the frame gets a stable ID
+from a lightweight IoU/centroid tracker, eyes are verified for all tracked
+faces in parallel on a thread pool (OpenCV releases the GIL inside
+detectMultiScale), and the result is the share of the audience that is
+watching, which a policy thresholds.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .eye_detector import cascade_params, find_eyes, find_faces
+
+Box = Tuple[int, int, int, int]  # x, y, w, h
+
+
+def iou(a: Box, b: Box) -> float:
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def centroid_distance(a: Box, b: Box) -> float:
+    """Distance between box centers relative to the size of box a"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    dx = (ax + aw / 2) - (bx + bw / 2)
+    dy = (ay + ah / 2) - (by + bh / 2)
+    return (dx * dx + dy * dy) ** 0.5 / max(aw, ah, 1)
+
+
+@dataclass
+class Track:
+    """One face followed across frames"""
+    track_id: int
+    box: Box
+    first_seen: float
+    last_seen: float
+    missed: int = 0
+    attentive: bool = False
+    attentive_frames: int = 0
+    frames: int = 0
+
+
+class FaceTracker:
+    def __init__(self, iou_threshold: float = 0.3, max_centroid_distance: float = 0.75, max_missed: int = 5):
+        """
+        Assign stable IDs to face boxes across frames
+
+        Boxes are matched to tracks greedily by IoU; a face that moved too fast
+        to overlap is matched by centroid distance instead.
+
+        Args:
+            iou_threshold: Minimum IoU for a match
+            max_centroid_distance: Centroid fallback, in face sizes
+            max_missed: Frames a track survives without a matching box
+        """
+        self.iou_threshold = iou_threshold
+        self.max_centroid_distance = max_centroid_distance
+        self.max_missed = max_missed
+        self.tracks: Dict[int, Track] = {}
+        self._next_id = 1
+
+    def update(self, boxes: Sequence[Box], now: Optional[float] = None) -> List[Track]:
+        """
+        Match this frame's boxes to tracks
+
+        Returns:
+            Tracks seen in this frame, in the order of boxes
+        """
+        now = time.monotonic() if now is None else now
+        boxes = [tuple(int(v) for v in box) for box in boxes]
+
+        # Candidate pairs, best first: IoU matches, then close centroids
+        pairs = []
+        for track_id, track in self.tracks.items():
+            for i, box in enumerate(boxes):
+                overlap = iou(track.box, box)
+                if overlap >= self.iou_threshold:
+                    pairs.append((0, -overlap, track_id, i))
+                else:
+                    distance = centroid_distance(track.box, box)
+                    if distance <= self.max_centroid_distance:
+                        pairs.append((1, distance, track_id, i))
+        pairs.sort()
+
+        assigned: Dict[int, Track] = {}
+        used_tracks = set()
+        for _, _, track_id, i in pairs:
+            if track_id in used_tracks or i in assigned:
+                continue
+            track = self.tracks[track_id]
+            track.box = boxes[i]
+            track.last_seen = now
+            track.missed = 0
+            assigned[i] = track
+            used_tracks.add(track_id)
+
+        for track_id, track in list(self.tracks.items()):
+            if track_id not in used_tracks:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    del self.tracks[track_id]
+
+        for i, box in enumerate(boxes):
+            if i not in assigned:
+                track = Track(self._next_id, box, first_seen=now, last_seen=now)
+                self._next_id += 1
+                self.tracks[track.track_id] = track
+                assigned[i] = track
+        return [assigned[i] for i in range(len(boxes))]
+
+
+class AudiencePolicy:
+    def __init__(self, min_ratio: float = 0.5, min_faces: int = 1):
+        """
+        Decide whether the audience counts as watching
+
+        Args:
+            min_ratio: Share of the faces that must be watching
+            min_faces: Faces that must be present at all
+        """
+        self.min_ratio = min_ratio
+        self.min_faces = min_faces
+
+    def is_attentive(self, watching: int, faces: int) -> bool:
+        if faces < self.min_faces or faces == 0:
+            return False
+        return watching / faces >= self.min_ratio
+
+
+@dataclass
+class AudienceResult:
+    """Outcome of one frame"""
+    faces: int
+    watching: int
+    ratio: float
+    attentive: bool
+    track_ids: List[int] = field(default_factory=list)
+    watching_ids: List[int] = field(default_factory=list)
+    eye_check_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'faces': self.faces, 'watching': self.watching, 'ratio': round(self.ratio, 3),
+                'attentive': self.attentive, 'watching_ids': self.watching_ids,
+                'eye_check_ms': round(self.eye_check_ms, 2)}
+
+
+class AudienceDetector:
+    def __init__(self, face_cascade: Any, eye_cascade_factory: Callable[[], Any],
+                 policy: Optional[AudiencePolicy] = None, max_faces: int = 30,
+                 workers: int = 0, tracker: Optional[FaceTracker] = None,
+                 params: Optional[Dict[str, Any]] = None):
+        """
+        Detect and track every face in a frame and verify eyes in parallel
+
+        Args:
+            face_cascade: Face cascade (used from the caller's thread only)
+            eye_cascade_factory: Creates an eye cascade; each pool thread gets
+                its own because a CascadeClassifier is not safe to share
+                between concurrent detectMultiScale calls
+            policy: Watching threshold (default: half the faces)
+            max_faces: Largest faces tracked per frame
+            workers: Eye verification threads (0 = one per CPU)
+            tracker: Face tracker (default: FaceTracker())
+            params: Cascade settings (default: the EyeDetector defaults)
+        """
+        self.face_cascade = face_cascade
+        self.eye_cascade_factory = eye_cascade_factory
+        self.policy = policy or AudiencePolicy()
+        self.max_faces = max_faces
+        self.workers = workers or os.cpu_count() or 1
+        self.tracker = tracker or FaceTracker()
+        self.params = params or cascade_params()
+        self.last_result: Optional[AudienceResult] = None
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='audience')
+
+    def _eye_cascade(self) -> Any:
+        cascade = getattr(self._local, 'eye_cascade', None)
+        if cascade is None:
+            cascade = self._local.eye_cascade = self.eye_cascade_factory()
+        return cascade
+
+    def _has_eyes(self, face_gray: Any) -> bool:
+        eyes = find_eyes(self._eye_cascade(), face_gray, self.params)
+        return len(eyes) >= 1
+
+    def detect_faces(self, gray: Any) -> List[Box]:
+        faces = find_faces(self.face_cascade, gray, self.params)
+        # Keep the largest (closest) faces when there are too many
+        faces = sorted((tuple(face) for face in faces), key=lambda f: f[2] * f[3], reverse=True)
+        return faces[:self.max_faces]
+
+    def analyze(self, gray: Any, faces: Optional[Sequence[Box]] = None) -> AudienceResult:
+        """
+        Track the faces in a grayscale frame and count who is watching
+
+        Args:
+            gray: Grayscale frame
+            faces: Face boxes if already detected (default: detect_faces(gray))
+        """
+        if faces is None:
+            faces = self.detect_faces(gray)
+        tracks = self.tracker.update(faces)
+
+        started = time.perf_counter()
+        rois = [gray[y:y + h, x:x + w] for x, y, w, h in (track.box for track in tracks)]
+        verdicts = list(self._pool.map(self._has_eyes, rois)) if rois else []
+        eye_check_ms = (time.perf_counter() - started) * 1000
+
+        for track, verdict in zip(tracks, verdicts):
+            track.attentive = verdict
+            track.frames += 1
+            track.attentive_frames += int(verdict)
+
+        watching = [track.track_id for track in tracks if track.attentive]
+        ratio = len(watching) / len(tracks) if tracks else 0.0
+        result = AudienceResult(faces=len(tracks), watching=len(watching), ratio=ratio,
+                                attentive=self.policy.is_attentive(len(watching), len(tracks)),
+                                track_ids=[track.track_id for track in tracks], watching_ids=watching,
+                                eye_check_ms=eye_check_ms)
+        self.last_result = result
+        return result
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,520 @@
+"""
+Camera broker
+Only one process can open a webcam. The broker owns the device and publishes
+its frames through a shared-memory FrameRing, so the desktop app, the
+native-messaging hub and the debug scripts can all watch the same camera.
+
+Consumers talk to the broker over a loopback TCP socket with the
+length-prefixed JSON messages of app/native_host.py:
+
+    -> {"type": "subscribe", "fps": 10}     frames at up to 10 per second (0 = all)
+    <- {"type": "ring", "name": ..., "slots": 8, "slot_bytes": ...}
+    <- {"type": "frame", "seq": 41, "slot": 1, "captured": 1234.5}
+    <- {"type": "status", "state": "camera_error", "message": ...}
+    -> {"type": "unsubscribe"} / {"type": "ping"}
+
+The device is opened when the first consumer subscribes and closed a moment
+after the last one leaves. Each consumer reads read-only views of the ring
+slots at its own rate; a consumer that falls behind misses frame messages
+instead of holding up the camera.
+
+Usage:
+    python -m app.camera_broker --camera 0
+"""
+
+import argparse
+import os
+import select
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .frame_ring import FrameRing
+from .native_host import encode_message, read_message
+
+DEFAULT_BROKER_PORT = 47740
+
+
+def broker_port(camera_index: int, base_port: int = DEFAULT_BROKER_PORT) -> int:
+    """Each camera has its own broker, on base_port + camera index"""
+    return base_port + camera_index
+
+
+class _Subscriber:
+    """One connected consumer, as seen by the broker"""
+
+    def __init__(self, sock: socket.socket, address):
+        self.sock = sock
+        self.address = address
+        self.send_lock = threading.Lock()
+        self.subscribed = False
+        self.fps = 0.0
+        self.last_sent = 0.0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+
+    def send(self, message: Dict[str, Any]) -> bool:
+        try:
+            with self.send_lock:
+                self.sock.sendall(encode_message(message))
+            return True
+        except OSError:
+            return False
+
+    def offer_frame(self, message: Dict[str, Any], captured: float) -> bool:
+        """Send a frame message if the consumer wants one now and can take it"""
+        if self.fps > 0 and captured - self.last_sent < 0.9 / self.fps:
+            return True
+        try:
+            _, writable, _ = select.select([], [self.sock], [], 0)
+        except (OSError, ValueError):
+            return False
+        if not writable:
+            self.frames_skipped += 1  # Behind: it gets a newer frame later
+            return True
+        self.last_sent = captured
+        self.frames_sent += 1
+        return self.send(message)
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class CameraBroker:
+    def __init__(self, camera_index: int = 0, port: Optional[int] = None,
+                 capture_factory: Optional[Callable[[int], Any]] = None,
+                 slots: int = 8, linger: float = 2.0, retry_interval: float = 2.0,
+                 idle_timeout: float = 30.0, log: Callable[[str], None] = print):
+        """
+        Initialize the camera broker
+
+        Args:
+            camera_index: Camera the broker owns
+            port: Loopback TCP port (default: broker_port(camera_index); 0 picks a free one)
+            capture_factory: Opens the device (default: cv2.VideoCapture)
+            slots: Frames kept in the ring; a view stays valid for this many frames
+            linger: Seconds the device stays open after the last consumer leaves
+            retry_interval: Seconds between attempts to open a failing camera
+            idle_timeout: Seconds without connections before serve_forever()
+                returns (0 keeps it running)
+            log: Receives progress messages
+        """
+        self.camera_index = camera_index
+        self.port = broker_port(camera_index) if port is None else port
+        self.capture_factory = capture_factory
+        self.slots = slots
+        self.linger = linger
+        self.retry_interval = retry_interval
+        self.idle_timeout = idle_timeout
+        self.log = log
+
+        self.clients: List[_Subscriber] = []
+        self.clients_lock = threading.Lock()
+        self.ring: Optional[FrameRing] = None
+        self.seq = 0
+        self.device_opens = 0
+        self.device_open = False
+
+        self._server: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self._clients_changed = threading.Condition(self.clients_lock)
+        self._capture_thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Bind the listening socket and start serving"""
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(('127.0.0.1', self.port))
+        self._server.listen()
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._capture_thread.start()
+
+    def serve_forever(self):
+        """Run until stopped or idle for idle_timeout seconds"""
+        self.start()
+        idle_since = time.monotonic()
+        while not self._stop.wait(1.0):
+            with self.clients_lock:
+                connected = len(self.clients)
+            if connected:
+                idle_since = time.monotonic()
+            elif self.idle_timeout and time.monotonic() - idle_since > self.idle_timeout:
+                break
+        self.stop()
+
+    def stop(self):
+        """Stop the broker, disconnecting all consumers and removing the ring"""
+        self._stop.set()
+        if self._server:
+            try:
+                self._server.close()
+            except OSError:
+                pass
+        with self.clients_lock:
+            clients, self.clients = self.clients, []
+            self._clients_changed.notify_all()
+        for client in clients:
+            client.close()
+        if self._capture_thread and self._capture_thread is not threading.current_thread():
+            self._capture_thread.join(timeout=2.0)
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+
+    def subscriber_count(self) -> int:
+        with self.clients_lock:
+            return sum(1 for client in self.clients if client.subscribed)
+
+    # --- Consumers -------------------------------------------------------------
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                sock, address = self._server.accept()
+            except OSError:
+                break
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = _Subscriber(sock, address)
+            with self.clients_lock:
+                self.clients.append(client)
+            threading.Thread(target=self._client_loop, args=(client,), daemon=True).start()
+
+    def _client_loop(self, client: _Subscriber):
+        """Handle requests from one consumer until it disconnects"""
+        try:
+            while not self._stop.is_set():
+                message = read_message(client.sock.recv)
+                if message is None:
+                    break
+                kind = message.get('type')
+                if kind == 'subscribe':
+                    client.fps = max(0.0, float(message.get('fps', 0) or 0))
+                    if self.ring:
+                        client.send(self._ring_message(self.ring))
+                    with self.clients_lock:
+                        client.subscribed = True
+                        self._clients_changed.notify_all()
+                elif kind == 'unsubscribe':
+                    with self.clients_lock:
+                        client.subscribed = False
+                        self._clients_changed.notify_all()
+                elif kind == 'ping':
+                    client.send({'type': 'pong', 'subscribers': self.subscriber_count(),
+                                 'device_open': self.device_open})
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._remove_client(client)
+
+    def _remove_client(self, client: _Subscriber):
+        with self.clients_lock:
+            if client in self.clients:
+                self.clients.remove(client)
+                self._clients_changed.notify_all()
+        client.close()
+
+    def _subscribers(self) -> List[_Subscriber]:
+        with self.clients_lock:
+            return [client for client in self.clients if client.subscribed]
+
+    def broadcast(self, message: Dict[str, Any]):
+        for client in self._subscribers():
+            if not client.send(message):
+                self._remove_client(client)
+
+    @staticmethod
+    def _ring_message(ring: FrameRing) -> Dict[str, Any]:
+        return {'type': 'ring', 'name': ring.name, 'slots': ring.slots, 'slot_bytes': ring.slot_bytes}
+
+    # --- Device ----------------------------------------------------------------
+
+    def _open_device(self) -> Any:
+        from .camera_modes import apply_mode, fallback_mode
+
+        if self.capture_factory is None:
+            import cv2
+            factory = cv2.VideoCapture
+        else:
+            factory = self.capture_factory
+        cap = factory(self.camera_index)
+        if not cap.isOpened():
+            cap.release()
+            raise Exception(f"Could not open camera {self.camera_index}")
+        apply_mode(cap, fallback_mode())
+        self.device_opens += 1
+        return cap
+
+    def _ensure_ring(self, frame: Any) -> FrameRing:
+        """Size the ring for the camera's frames; announce a new ring to every consumer"""
+        if self.ring and frame.nbytes <= self.ring.slot_bytes:
+            return self.ring
+        old = self.ring
+        # Consumers in unrelated processes attach too, so neither side tracks the block
+        self.ring = FrameRing(self.slots, frame.nbytes, track=False)
+        self.broadcast(self._ring_message(self.ring))
+        if old:
+            old.close()
+        return self.ring
+
+    def _capture_loop(self):
+        """Keep the device open while anyone is subscribed"""
+        while not self._stop.is_set():
+            with self.clients_lock:
+                while not any(client.subscribed for client in self.clients) and not self._stop.is_set():
+                    self._clients_changed.wait(timeout=1.0)
+            if self._stop.is_set():
+                break
+
+            try:
+                cap = self._open_device()
+            except Exception as e:
+                self.broadcast({'type': 'status', 'state': 'camera_error', 'message': str(e)})
+                self._stop.wait(self.retry_interval)
+                continue
+
+            self.device_open = True
+            self.log(f"Camera {self.camera_index} opened for {self.subscriber_count()} subscribers")
+            try:
+                self._publish_frames(cap)
+            finally:
+                cap.release()
+                self.device_open = False
+                self.log(f"Camera {self.camera_index} closed")
+
+    def _publish_frames(self, cap: Any):
+        """Read frames into the ring until the last consumer has been gone for linger seconds"""
+        idle_since: Optional[float] = None
+        while not self._stop.is_set():
+            subscribers = self._subscribers()
+            if not subscribers:
+                now = time.monotonic()
+                idle_since = idle_since or now
+                if now - idle_since >= self.linger:
+                    return
+                with self.clients_lock:
+                    self._clients_changed.wait(timeout=min(0.1, self.linger))
+                continue
+            idle_since = None
+
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                self.broadcast({'type': 'status', 'state': 'camera_error',
+                                'message': f"Camera {self.camera_index} delivered no frame"})
+                self._stop.wait(self.retry_interval)
+                return
+            captured = time.monotonic()
+            ring = self._ensure_ring(frame)
+            self.seq += 1
+            message = {'type': 'frame', 'seq': self.seq, 'slot': ring.write(self.seq, frame, captured),
+                       'captured': captured}
+            for client in subscribers:
+                if not client.offer_frame(message, captured):
+                    self._remove_client(client)
+
+
+class BrokerCapture:
+    def __init__(self, camera_index: int = 0, port: Optional[int] = None, fps: float = 0.0,
+                 spawn: bool = True, connect_timeout: float = 10.0, read_timeout: float = 2.0):
+        """
+        cv2.VideoCapture-style consumer of a camera broker
+
+        Args:
+            camera_index: Camera to watch
+            port: Broker port (default: broker_port(camera_index))
+            fps: Frames per second wanted (0 = every frame)
+            spawn: Start a broker if none is running
+            connect_timeout: Seconds to wait for the broker to come up
+            read_timeout: Seconds read() waits for the next frame
+        """
+        self.camera_index = camera_index
+        self.port = broker_port(camera_index) if port is None else port
+        self.fps = fps
+        self.read_timeout = read_timeout
+        self.ring: Optional[FrameRing] = None
+        self.last_error = ''
+        self.frames_read = 0
+
+        self._grabbed = None
+        self._latest: Optional[Dict[str, Any]] = None
+        self._consumed_seq = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._sock = self._connect(spawn, connect_timeout)
+        self._sock.sendall(encode_message({'type': 'subscribe', 'fps': fps}))
+        self._reader = threading.Thread(target=self._read_messages, daemon=True)
+        self._reader.start()
+
+    def _connect(self, spawn: bool, timeout: float) -> socket.socket:
+        """Connect to the broker, starting it if necessary"""
+        deadline = time.monotonic() + timeout
+        spawned = False
+        while True:
+            try:
+                sock = socket.create_connection(('127.0.0.1', self.port), timeout=1.0)
+                sock.settimeout(None)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                return sock
+            except OSError:
+                if spawn and not spawned:
+                    spawn_broker_process(self.camera_index, self.port)
+                    spawned = True
+                if not spawn or time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+    def _read_messages(self):
+        try:
+            while True:
+                message = read_message(self._sock.recv)
+                if message is None:
+                    break
+                kind = message.get('type')
+                if kind == 'frame':
+                    with self._cond:
+                        self._latest = message
+                        self._cond.notify_all()
+                elif kind == 'ring':
+                    ring = FrameRing(message['slots'], message['slot_bytes'], name=message['name'], track=False)
+                    with self._cond:
+                        old, self.ring = self.ring, ring
+                        self._latest = None
+                    if old:
+                        old.close()
+                elif kind == 'status':
+                    self.last_error = message.get('message', '')
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+
+    def read_view(self):
+        """
+        Wait for a frame newer than the last one read
+
+        Returns:
+            (ret, frame) where frame is a read-only view into shared memory,
+            valid until the broker has written `slots` more frames
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed or (self._latest is not None
+                                                         and self._latest['seq'] != self._consumed_seq),
+                                timeout=self.read_timeout)
+            latest, ring = self._latest, self.ring
+            if latest is None or ring is None or latest['seq'] == self._consumed_seq:
+                return False, None
+            self._consumed_seq = latest['seq']
+        found = ring.view(latest['slot'], latest['seq'])
+        if found is None:
+            return False, None
+        self.frames_read += 1
+        return True, found[2]
+
+    # --- cv2.VideoCapture interface ----------------------------------------
+
+    def isOpened(self) -> bool:
+        return not self._closed
+
+    def read(self):
+        """Next frame as a private copy (callers may draw on it)"""
+        ret, view = self.read_view()
+        return (True, view.copy()) if ret else (False, None)
+
+    def read_gray(self):
+        """Next frame in grayscale, converted straight from the shared view"""
+        import cv2
+
+        ret, view = self.read_view()
+        if not ret:
+            return False, None
+        return True, cv2.cvtColor(view, cv2.COLOR_BGR2GRAY) if view.ndim == 3 else view.copy()
+
+    def grab(self) -> bool:
+        ret, self._grabbed = self.read_view()
+        return ret
+
+    def retrieve(self):
+        view = getattr(self, '_grabbed', None)
+        return (True, view.copy()) if view is not None else (False, None)
+
+    def set(self, prop: int, value: float) -> bool:
+        return False  # The broker owns the device settings
+
+    def get(self, prop: int) -> float:
+        import cv2
+
+        latest, ring = self._latest, self.ring
+        found = ring.view(latest['slot'], latest['seq']) if latest and ring else None
+        if found is None:
+            return 0.0
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(found[2].shape[1])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(found[2].shape[0])
+        return 0.0
+
+    def release(self):
+        if self._closed and self.ring is None:
+            return
+        try:
+            self._sock.sendall(encode_message({'type': 'unsubscribe'}))
+        except OSError:
+            pass
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        self._reader.join(timeout=1.0)
+        self._grabbed = None
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+
+
+def spawn_broker_process(camera_index: int = 0, port: Optional[int] = None) -> subprocess.Popen:
+    """Start a detached broker process for a camera"""
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    kwargs = {}
+    if sys.platform == 'win32':
+        kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+    return subprocess.Popen(
+        [sys.executable, '-m', 'app.camera_broker', '--camera', str(camera_index),
+         '--port', str(broker_port(camera_index) if port is None else port)],
+        cwd=package_root,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **kwargs
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="EyeRemote camera broker")
+    parser.add_argument('--camera', type=int, default=0, help="Camera index the broker owns")
+    parser.add_argument('--port', type=int, help="Port on 127.0.0.1 (default: %d + camera)" % DEFAULT_BROKER_PORT)
+    parser.add_argument('--idle-timeout', type=float, default=30.0,
+                        help="Seconds the broker stays up without consumers")
+    args = parser.parse_args(argv)
+
+    broker = CameraBroker(camera_index=args.camera, port=args.port, idle_timeout=args.idle_timeout)
+    try:
+        broker.serve_forever()
+    except OSError:
+        # Another broker already owns the port
+        return 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""
+Camera capability negotiation
+Probes candidate pixel format / resolution / frame rate combinations on a
+camera, measures the frame rate each one really delivers and what a frame
+costs to decode into the grayscale image detection uses, and picks the
+cheapest mode that meets the detection requirements. The choice is cached
+per device so the probe only runs the first time a camera is used.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Candidate modes, probed in this order. Larger frames only cost more to
+# decode and detect, so nothing above 640x480 is tried.
+DEFAULT_FOURCCS = ('MJPG', 'YUYV')
+DEFAULT_RESOLUTIONS = ((320, 240), (640, 480))
+DEFAULT_FRAME_RATES = (30, 15)
+
+# What _open_camera always requested before negotiation existed
+FALLBACK_RESOLUTION = (640, 480)
+FALLBACK_FPS = 30
+
+
+@dataclass
+class CameraMode:
+    """A capture mode and what it cost when it was probed"""
+    fourcc: str
+    width: int
+    height: int
+    fps: float
+    delivered_fps: float = 0.0
+    decode_ms: float = 0.0
+
+    @property
+    def label(self) -> str:
+        return f"{self.fourcc or '?'} {self.width}x{self.height}@{self.fps:g}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CameraMode':
+        return cls(**{key: data[key] for key in cls.__dataclass_fields__ if key in data})
+
+
+def fourcc_code(fourcc: str) -> int:
+    """'MJPG' -> the integer OpenCV expects for CAP_PROP_FOURCC"""
+    fourcc = (fourcc + '    ')[:4]
+    return sum(ord(c) << (8 * i) for i, c in enumerate(fourcc))
+
+
+def fourcc_name(code: float) -> str:
+    """Inverse of fourcc_code; '' if the backend does not report a format"""
+    code = int(code)
+    if code <= 0:
+        return ''
+    return ''.join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00 ')
+
+
+def device_key(camera_index: int, sysfs_dir: str = '/sys/class/video4linux') -> str:
+    """
+    Identify a camera across runs for the mode cache
+
+    On Linux the key includes the device name and the USB port it is plugged
+    into, so a different webcam at the same index is probed again.
+    """
+    device_dir = os.path.join(sysfs_dir, f"video{camera_index}")
+    if sys.platform.startswith('linux') and os.path.isdir(device_dir):
+        try:
+            with open(os.path.join(device_dir, 'name')) as f:
+                name = f.read().strip()
+        except OSError:
+            name = ''
+        port = os.path.basename(os.path.realpath(os.path.join(device_dir, 'device')))
+        return f"{camera_index}:{name}:{port}"
+    return f"{camera_index}"
+
+
+class ModeProber:
+    def __init__(self, fourccs: Sequence[str] = DEFAULT_FOURCCS,
+                 resolutions: Sequence[Tuple[int, int]] = DEFAULT_RESOLUTIONS,
+                 frame_rates: Sequence[float] = DEFAULT_FRAME_RATES,
+                 min_height: int = 480, min_fps: float = 15.0, luma: bool = False,
+                 warmup_frames: int = 3, sample_frames: int = 12):
+        """
+        Measure candidate modes on an open capture
+
+        Args:
+            fourccs: Pixel formats to try
+            resolutions: (width, height) pairs to try
+            frame_rates: Requested frame rates to try
+            min_height: Smallest frame height detection accepts
+            min_fps: Lowest delivered frame rate detection accepts
+            luma: Frames are read luma-only (LumaCapture), which changes the costs
+            warmup_frames: Frames discarded after switching modes
+            sample_frames: Frames timed per mode
+        """
+        self.fourccs = list(fourccs)
+        self.resolutions = list(resolutions)
+        self.frame_rates = list(frame_rates)
+        self.min_height = min_height
+        self.min_fps = min_fps
+        self.luma = luma
+        self.warmup_frames = warmup_frames
+        self.sample_frames = sample_frames
+
+    @property
+    def requirements(self) -> Dict[str, Any]:
+        return {'min_height': self.min_height, 'min_fps': self.min_fps, 'luma': self.luma}
+
+    def candidates(self) -> List[CameraMode]:
+        # Resolutions below the requirement are never probed
+        return [CameraMode(fourcc, width, height, fps)
+                for width, height in self.resolutions if height >= self.min_height
+                for fourcc in self.fourccs
+                for fps in self.frame_rates]
+
+    def probe(self, cap: Any, interrupt: Optional[threading.Event] = None) -> List[CameraMode]:
+        """
+        Switch the capture through every candidate and measure it
+
+        Args:
+            cap: Open capture
+            interrupt: Stops probing before the next candidate when set
+
+        Returns:
+            The modes the camera actually ran, with measured rate and cost
+            (the driver may substitute a different mode than requested)
+        """
+        measured: Dict[Tuple[str, int, int, float], CameraMode] = {}
+        for candidate in self.candidates():
+            if interrupt is not None and interrupt.is_set():
+                break
+            mode = self.measure(cap, candidate)
+            if mode is None:
+                continue
+            key = (mode.fourcc, mode.width, mode.height, mode.fps)
+            if key not in measured:
+                measured[key] = mode
+        return list(measured.values())
+
+    def measure(self, cap: Any, mode: CameraMode) -> Optional[CameraMode]:
+        """Apply mode and time grab (delivery) and retrieve + grayscale (decode)"""
+        import cv2
+
+        apply_mode(cap, mode)
+        actual = CameraMode(fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)) or mode.fourcc,
+                            int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or mode.width,
+                            int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or mode.height,
+                            float(cap.get(cv2.CAP_PROP_FPS)) or mode.fps)
+
+        for _ in range(self.warmup_frames):
+            if not cap.grab():
+                return None
+
+        decode_seconds = 0.0
+        started = time.perf_counter()
+        for _ in range(self.sample_frames):
+            if not cap.grab():
+                return None
+            decode_start = time.perf_counter()
+            if hasattr(cap, 'retrieve_gray'):
+                ok, frame = cap.retrieve_gray()
+            else:
+                ok, frame = cap.retrieve()
+                if ok and frame is not None and frame.ndim == 3:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if not ok or frame is None:
+                return None
+            decode_seconds += time.perf_counter() - decode_start
+        elapsed = time.perf_counter() - started
+
+        actual.height, actual.width = frame.shape[:2]
+        actual.delivered_fps = round(self.sample_frames / elapsed, 1) if elapsed > 0 else 0.0
+        actual.decode_ms = round(decode_seconds / self.sample_frames * 1000, 3)
+        return actual
+
+    def qualifies(self, mode: CameraMode) -> bool:
+        return mode.height >= self.min_height and mode.delivered_fps >= self.min_fps
+
+    def choose(self, modes: Sequence[CameraMode]) -> Optional[CameraMode]:
+        """Cheapest qualifying mode; ties go to the smaller frame, then the higher rate"""
+        qualifying = [mode for mode in modes if self.qualifies(mode)]
+        if not qualifying:
+            return None
+        return min(qualifying, key=lambda m: (round(m.decode_ms, 1), m.width * m.height, -m.delivered_fps))
+
+
+def apply_mode(cap: Any, mode: CameraMode):
+    """Request mode on a capture (FOURCC first: it can reset the other properties)"""
+    import cv2
+
+    if mode.fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, fourcc_code(mode.fourcc))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode.width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode.height)
+    cap.set(cv2.CAP_PROP_FPS, mode.fps)
+
+
+def fallback_mode() -> CameraMode:
+    """The fixed mode used when negotiation is off or fails"""
+    return CameraMode('', FALLBACK_RESOLUTION[0], FALLBACK_RESOLUTION[1], FALLBACK_FPS)
+
+
+class CameraModeCache:
+    def __init__(self, path: str):
+        """
+        Chosen modes per device, stored as JSON
+
+        Args:
+            path: Cache file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Any]] = None
+
+    def _load(self) -> Dict[str, Any]:
+        if self._entries is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, key: str, requirements: Dict[str, Any]) -> Optional[CameraMode]:
+        """Cached mode for a device, if it was chosen under the same requirements"""
+        with self._lock:
+            entry = self._load().get(key)
+        if not entry or entry.get('requirements') != requirements:
+            return None
+        try:
+            return CameraMode.from_dict(entry['mode'])
+        except (KeyError, TypeError):
+            return None
+
+    def put(self, key: str, requirements: Dict[str, Any], mode: CameraMode, probed: Sequence[CameraMode],
+            qualified: bool = True):
+        """
+        Remember the mode chosen for a device
+
+        Args:
+            key: Device key
+            requirements: Requirements the mode was chosen under
+            mode: Mode to use
+            probed: Every mode that was measured
+            qualified: False if nothing met the requirements and mode is the fallback
+        """
+        with self._lock:
+            entries = self._load()
+            entries[key] = {
+                'requirements': requirements,
+                'mode': mode.to_dict(),
+                'qualified': qualified,
+                'probed': [m.to_dict() for m in probed],
+                'probed_at': time.time(),
+            }
+            try:
+                with open(self.path, 'w') as f:
+                    json.dump(entries, f, indent=2)
+            except OSError as e:
+                print(f"Warning: Could not save camera mode cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class ModeNegotiator:
+    def __init__(self, cache: CameraModeCache, prober: Optional[ModeProber] = None,
+                 log: Callable[[str], None] = print):
+        """
+        Choose and remember a capture mode per camera
+
+        Args:
+            cache: Where chosen modes are stored
+            prober: Candidate modes and requirements (default: ModeProber())
+            log: Receives progress messages
+        """
+        self.cache = cache
+        self.prober = prober or ModeProber()
+        self.log = log
+
+    def negotiate(self, camera_index: int, factory: Callable[[int], Any], key: Optional[str] = None,
+                  refresh: bool = False, interrupt: Optional[threading.Event] = None) -> Tuple[CameraMode, bool]:
+        """
+        Return the mode to use for a camera
+
+        Probing opens the camera through factory and releases it again, so call
+        this before the detector opens the device.
+
+        Args:
+            camera_index: Camera to negotiate for
+            factory: Opens a raw capture for an index
+            key: Cache key (default: device_key(camera_index))
+            refresh: Probe even if a mode (or that none qualified) is cached
+            interrupt: Abandons the probe when set (nothing is cached)
+
+        Returns:
+            Tuple of (mode, from_cache); the fallback mode if nothing qualified,
+            which is cached too so the camera is not probed on every start
+        """
+        key = key or device_key(camera_index)
+        requirements = self.prober.requirements
+        if not refresh:
+            cached = self.cache.get(key, requirements)
+            if cached is not None:
+                return cached, True
+
+        cap = factory(camera_index)
+        try:
+            if not cap.isOpened():
+                return fallback_mode(), False
+            started = time.perf_counter()
+            probed = self.prober.probe(cap, interrupt)
+        finally:
+            cap.release()
+        if interrupt is not None and interrupt.is_set():
+            return fallback_mode(), False
+
+        chosen = self.prober.choose(probed)
+        if chosen is None:
+            fallback = fallback_mode()
+            self.log(f"No camera mode met the requirements ({requirements}), using "
+                     f"{fallback.label} until they change")
+            self.cache.put(key, requirements, fallback, probed, qualified=False)
+            return fallback, False
+        self.log(f"Camera {camera_index}: chose {chosen.label} ({chosen.delivered_fps} fps delivered, "
+                 f"{chosen.decode_ms} ms/frame decode) from {len(probed)} modes in "
+                 f"{time.perf_counter() - started:.1f}s")
+        self.cache.put(key, requirements, chosen, probed)
+        return chosen, False
@@ -0,0 +1,124 @@
+"""
+Camera setup for detectors
+Opens cameras the way the configuration asks for: negotiated capture mode,
+luma-only frames where supported and a SupervisedCapture that reconnects.
+Used by the engine and by the out-of-process detector worker.
+"""
+
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import Config
+from .capture import CaptureIncident, SupervisedCapture
+
+
+class CameraSetup:
+    def __init__(self, config: Config, capture_factory: Optional[Callable[[int], Any]] = None,
+                 log: Callable[[str], None] = print,
+                 on_lost: Optional[Callable[[CaptureIncident], None]] = None,
+                 on_recovered: Optional[Callable[[CaptureIncident], None]] = None,
+                 interrupt: Optional[Callable[[], threading.Event]] = None):
+        """
+        Args:
+            config: Configuration with the camera_* settings
+            capture_factory: Opens a raw capture for an index (default: cv2.VideoCapture)
+            log: Receives progress messages
+            on_lost: Called when a camera stops delivering frames
+            on_recovered: Called when it delivers frames again
+            interrupt: Returns the event that aborts a probe in progress
+        """
+        self.config = config
+        self.capture_factory = capture_factory
+        self.log = log
+        self.on_lost = on_lost
+        self.on_recovered = on_recovered
+        self.interrupt = interrupt or (lambda: None)
+        # Negotiated mode per camera index, and whether it came from the cache
+        self.modes: Dict[int, Any] = {}
+        self.modes_cached: Dict[int, bool] = {}
+
+    def camera_indices(self) -> List[int]:
+        """camera_index followed by the cameras watched together with it"""
+        primary = int(self.config.get('camera_index', 0))
+        return [primary] + [int(i) for i in self.config.get('multicam_indices', []) if int(i) != primary]
+
+    def create_detector(self, camera_index: int, shared_cascades: bool = True):
+        from .eye_detector import EyeDetector, cascade_params
+
+        return EyeDetector(camera_index=camera_index, capture_factory=self.open_capture,
+                           configure_capture=self.configure_capture, params=cascade_params(self.config),
+                           shared_cascades=shared_cascades)
+
+    def open_capture(self, camera_index: int) -> SupervisedCapture:
+        """Capture factory for the detector: reconnects after read failures"""
+        # Probing needs the device to itself, so it runs before the capture opens
+        self.negotiate_mode(camera_index)
+        # Never fall back to a camera another multi-camera worker is using
+        in_use = set(self.camera_indices()) - {camera_index}
+        return SupervisedCapture(camera_index, factory=self.device_factory(),
+                                 fallback_indices=[i for i in self.config.get('camera_fallback_indices', [])
+                                                   if i not in in_use],
+                                 reconnect=bool(self.config.get('camera_reconnect', True)),
+                                 max_backoff=float(self.config.get('camera_reconnect_max_backoff', 10.0)),
+                                 on_lost=self.on_lost, on_recovered=self.on_recovered)
+
+    def negotiate_mode(self, camera_index: int):
+        """Pick the cheapest capture mode for the camera (cached per device after the first probe)"""
+        from .camera_modes import CameraModeCache, ModeNegotiator, ModeProber
+
+        self.modes.pop(camera_index, None)
+        self.modes_cached.pop(camera_index, None)
+        # The broker owns the device and its settings
+        if not self.config.get('camera_mode_negotiation', True) or self.use_broker():
+            return
+        cache_dir = os.path.dirname(os.path.abspath(self.config.config_file))
+        negotiator = ModeNegotiator(CameraModeCache(os.path.join(cache_dir, 'camera_modes.json')),
+                                    ModeProber(min_height=int(self.config.get('camera_min_height', 480)),
+                                               min_fps=float(self.config.get('camera_min_fps', 15)),
+                                               luma=self.use_luma_capture()),
+                                    log=self.log)
+        try:
+            mode, cached = negotiator.negotiate(camera_index, self.device_factory(), interrupt=self.interrupt())
+            self.modes[camera_index] = mode
+            self.modes_cached[camera_index] = cached
+        except Exception as e:
+            self.log(f"Camera mode negotiation failed, using defaults: {e}")
+
+    def use_luma_capture(self) -> bool:
+        # CAP_PROP_CONVERT_RGB = 0 only yields raw YUYV/MJPG buffers with the V4L2 backend
+        return (sys.platform.startswith('linux') and bool(self.config.get('camera_luma_capture', True))
+                and not self.use_broker())
+
+    def use_broker(self) -> bool:
+        return bool(self.config.get('camera_broker', False))
+
+    def device_factory(self) -> Callable[[int], Any]:
+        """Opens the raw device for an index, switched to luma-only frames where supported"""
+        if self.use_broker():
+            from .camera_broker import BrokerCapture, broker_port
+
+            base_port = int(self.config.get('camera_broker_port', 47740))
+            return lambda index: BrokerCapture(index, port=broker_port(index, base_port))
+        if self.capture_factory is None:
+            import cv2
+            factory = cv2.VideoCapture
+        else:
+            factory = self.capture_factory
+        if not self.use_luma_capture():
+            return factory
+        from .luma import LumaCapture
+        return lambda index: LumaCapture(factory(index))
+
+    def configure_capture(self, cap: Any):
+        """Apply the negotiated mode (or the fixed 640x480 at 30 FPS) to a new capture"""
+        from .camera_modes import apply_mode, fallback_mode
+
+        apply_mode(cap, self.modes.get(getattr(cap, 'camera_index', None)) or fallback_mode())
+
+    def mode_stats(self, camera_index: int) -> Optional[Dict[str, Any]]:
+        mode = self.modes.get(camera_index)
+        if mode is None:
+            return None
+        return dict(mode.to_dict(), label=mode.label, from_cache=self.modes_cached.get(camera_index, False))
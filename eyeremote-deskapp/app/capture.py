@@ -0,0 +1,217 @@
+"""
+Supervised camera capture
+Wraps a cv2.VideoCapture-style source and reconnects after read failures
+(USB hiccups, dock changes, unplugged webcams) with exponential backoff and
+optional fallback camera indices, recording the downtime of every incident.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+@dataclass
+class CaptureIncident:
+    """One period during which the camera delivered no frames"""
+    camera_index: int
+    started_at: float
+    ended_at: Optional[float] = None
+    recovered_index: Optional[int] = None
+    attempts: int = 0
+    last_error: str = ''
+
+    @property
+    def downtime_seconds(self) -> float:
+        return (self.ended_at or time.time()) - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['downtime_seconds'] = round(self.downtime_seconds, 3)
+        return data
+
+
+class SupervisedCapture:
+    def __init__(self, camera_index: int = 0, factory: Optional[Callable[[int], Any]] = None,
+                 fallback_indices: Sequence[int] = (), failure_threshold: int = 3,
+                 initial_backoff: float = 0.5, max_backoff: float = 10.0,
+                 reconnect: bool = True,
+                 on_lost: Optional[Callable[[CaptureIncident], None]] = None,
+                 on_recovered: Optional[Callable[[CaptureIncident], None]] = None):
+        """
+        Open a camera under supervision
+
+        Args:
+            camera_index: Preferred camera index
+            factory: Opens a capture for an index (default: cv2.VideoCapture)
+            fallback_indices: Other cameras to try while the preferred one is gone
+            failure_threshold: Failed reads in a row (within one call) before reconnecting
+            initial_backoff: Seconds before the second reconnect attempt
+            max_backoff: Upper bound for the doubling delay between attempts
+            reconnect: False to report failures without reconnecting
+            on_lost: Called when an incident starts
+            on_recovered: Called when frames flow again
+        """
+        if factory is None:
+            import cv2
+            factory = cv2.VideoCapture
+        self.camera_index = camera_index
+        self.factory = factory
+        self.fallback_indices = [i for i in fallback_indices if i != camera_index]
+        self.failure_threshold = max(1, failure_threshold)
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.reconnect = reconnect
+        self.on_lost = on_lost or (lambda incident: None)
+        self.on_recovered = on_recovered or (lambda incident: None)
+
+        # Set to abort a reconnect in progress (the owner's stop event)
+        self.interrupt = threading.Event()
+
+        self.active_index: Optional[int] = None
+        self.incidents: List[CaptureIncident] = []
+        self._cap = None
+        self._properties: Dict[int, float] = {}
+
+        # Initial open: try each candidate once, without backoff
+        for index in self._candidates():
+            if self._open(index):
+                break
+
+    def _candidates(self) -> List[int]:
+        return [self.camera_index] + self.fallback_indices
+
+    def _open(self, index: int) -> bool:
+        """Open index, re-apply properties and check that it delivers a frame"""
+        try:
+            cap = self.factory(index)
+        except Exception:
+            return False
+        if not cap.isOpened():
+            cap.release()
+            return False
+        for prop, value in self._properties.items():
+            cap.set(prop, value)
+        self._cap = cap
+        self.active_index = index
+        return True
+
+    def _release_device(self):
+        if self._cap is not None:
+            try:
+                self._cap.release()
+            except Exception:
+                pass
+        self._cap = None
+
+    # --- cv2.VideoCapture interface ----------------------------------------
+
+    def isOpened(self) -> bool:
+        return self._cap is not None and self._cap.isOpened()
+
+    def set(self, prop: int, value: float) -> bool:
+        # Remembered so a reconnected device gets the same settings
+        self._properties[prop] = value
+        return self._cap.set(prop, value) if self._cap is not None else False
+
+    def get(self, prop: int) -> float:
+        return self._cap.get(prop) if self._cap is not None else 0.0
+
+    def read(self):
+        return self._supervised(lambda cap: cap.read(), (False, None))
+
+    def grab(self) -> bool:
+        return self._supervised(lambda cap: cap.grab(), False)
+
+    def retrieve(self):
+        if self._cap is None:
+            return False, None
+        return self._cap.retrieve()
+
+    @property
+    def delivers_gray(self) -> bool:
+        """True if the device hands out grayscale itself (no read() + cvtColor)"""
+        return hasattr(self._cap, 'read_gray')
+
+    def read_gray(self):
+        """Grayscale frame; luma-only when the device is a LumaCapture"""
+        from .luma import read_gray
+        return self._supervised(read_gray, (False, None))
+
+    def release(self):
+        self.interrupt.set()
+        self._release_device()
+
+    # --- Supervision ----------------------------------------------------------
+
+    def _supervised(self, call: Callable[[Any], Any], failed: Any) -> Any:
+        # Retry transient failures (a single dropped frame) before reconnecting
+        for _ in range(self.failure_threshold if self._cap is not None else 0):
+            result = self._attempt(call)
+            if self._succeeded(result):
+                return result
+            if self.interrupt.is_set():
+                return failed
+        if not self.reconnect or self.interrupt.is_set():
+            return failed
+        if not self._recover():
+            return failed
+        result = self._attempt(call)
+        return result if self._succeeded(result) else failed
+
+    def _attempt(self, call: Callable[[Any], Any]) -> Any:
+        if self._cap is None:
+            return None
+        try:
+            return call(self._cap)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _succeeded(result: Any) -> bool:
+        if isinstance(result, tuple):
+            return bool(result[0]) and result[1] is not None
+        return bool(result)
+
+    def _recover(self) -> bool:
+        """
+        Release the device and reopen it (or a fallback) with exponential backoff
+
+        Returns:
+            True once a camera delivers frames again, False if interrupted
+        """
+        incident = CaptureIncident(camera_index=self.active_index if self.active_index is not None
+                                   else self.camera_index, started_at=time.time())
+        self.incidents.append(incident)
+        self._release_device()
+        self.on_lost(incident)
+
+        delay = self.initial_backoff
+        while not self.interrupt.is_set():
+            for index in self._candidates():
+                incident.attempts += 1
+                if self._open(index):
+                    ok, frame = self._attempt(lambda cap: cap.read()) or (False, None)
+                    if ok and frame is not None:
+                        incident.ended_at = time.time()
+                        incident.recovered_index = index
+                        self.on_recovered(incident)
+                        return True
+                    incident.last_error = f"camera {index} opened but delivered no frame"
+                    self._release_device()
+                else:
+                    incident.last_error = f"could not open camera {index}"
+            self.interrupt.wait(delay)
+            delay = min(delay * 2, self.max_backoff)
+        # Interrupted: the incident ends unresolved
+        incident.ended_at = time.time()
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Active camera, incident count and downtime"""
+        return {
+            'active_index': self.active_index,
+            'incidents': len(self.incidents),
+            'total_downtime_seconds': round(sum(i.downtime_seconds for i in self.incidents), 3),
+            'last_incident': self.incidents[-1].to_dict() if self.incidents else None,
+        }
@@ -0,0 +1,195 @@
+"""
+Command-line entry point for EyeRemote
+`eyeremote` opens the desktop window; `eyeremote --headless` runs the
+detection engine without loading any GUI toolkit and writes status lines to
+stdout or a log file.
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+from .config import Config
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='eyeremote',
+                                     description='Pause and resume media based on eye detection.')
+    parser.add_argument('--headless', action='store_true',
+                        help='Run without a window; status is written to stdout or --log-file')
+    parser.add_argument('--config', default='eyeremote_config.json',
+                        help='Configuration file (default: %(default)s)')
+    parser.add_argument('--timeout', type=int, help='Seconds without eyes before pausing')
+    parser.add_argument('--max-faces', type=int, help='Maximum faces to monitor')
+    parser.add_argument('--camera', type=int, help='Camera index')
+    parser.add_argument('--target', help="Application to focus before sending the media key (or 'Any')")
+    parser.add_argument('--media-target', action='append', dest='media_targets', metavar='BACKEND[:PLAYER]',
+                        help='Media backend target, e.g. mpris:spotify (repeatable)')
+    parser.add_argument('--status-socket', action='store_true',
+                        help='Serve status and control on the local status socket')
+    parser.add_argument('--log-file', help='Append status lines to this file instead of stdout')
+    parser.add_argument('--stats-interval', type=float, default=0.0,
+                        help='Seconds between statistics lines (0 = off)')
+    parser.add_argument('--dump-timings', metavar='FILE',
+                        help='Write per-stage pipeline timings as JSON to FILE on exit')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Write pause/resume latency traces (Chrome trace-event JSON) to FILE on exit')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='Trace allocations and log the sites that grew the most on exit')
+    parser.add_argument('--flight-dump', metavar='FILE',
+                        help='Write the flight recorder (recent frames and verdicts) to FILE (.npz) on exit')
+    parser.add_argument('--flight-dump-ring', metavar='RING',
+                        help='Turn a flight recorder ring file left by an earlier run (e.g. '
+                             'eyeremote_flight.previous.npy) into an .npz clip next to it and exit')
+    parser.add_argument('--list-cameras', action='store_true', help='Print the available cameras and exit')
+    return parser
+
+
+def apply_overrides(config: Config, args: argparse.Namespace):
+    """Copy command-line settings into the configuration (not saved to disk)"""
+    overrides = {
+        'timeout': args.timeout,
+        'max_faces': args.max_faces,
+        'camera_index': args.camera,
+        'target_app': args.target,
+        'media_targets': args.media_targets,
+        'status_socket': True if args.status_socket else None,
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            config.set(key, value)
+
+
+class StatusWriter:
+    def __init__(self, path: Optional[str] = None):
+        """
+        Timestamped line output for headless mode
+
+        Args:
+            path: File to append to (default: stdout)
+        """
+        self._stream = open(path, 'a', buffering=1) if path else sys.stdout
+        self._lock = threading.Lock()
+
+    def write(self, message: str):
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._stream.write(f"[{timestamp}] {message}\n")
+            self._stream.flush()
+
+    def close(self):
+        if self._stream is not sys.stdout:
+            self._stream.close()
+
+
+def run_headless(args: argparse.Namespace) -> int:
+    """Run the engine until interrupted or until detection stops"""
+    from .engine import EyeRemoteEngine
+    from .events import AttentionChanged, DetectionStateChanged
+
+    config = Config(args.config)
+    apply_overrides(config, args)
+    writer = StatusWriter(args.log_file)
+    engine = EyeRemoteEngine(config=config, log=writer.write)
+
+    done = threading.Event()
+    exit_code = [0]
+
+    def on_event(event):
+        if isinstance(event, AttentionChanged):
+            writer.write("Eyes detected" if event.attentive else "No eyes detected")
+        elif not event.detecting:
+            if event.error:
+                exit_code[0] = 1
+            # With the status socket on, detection can be restarted remotely
+            if not engine.status_server:
+                done.set()
+
+    engine.bus.subscribe(on_event, (AttentionChanged, DetectionStateChanged), name='cli')
+
+    def request_exit(signum, frame):
+        writer.write(f"Received signal {signum}, shutting down")
+        done.set()
+
+    signal.signal(signal.SIGINT, request_exit)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, request_exit)
+
+    engine.start_services()
+    if args.memory_report and engine.memory is not None:
+        engine.memory.take_snapshot()  # Starts tracemalloc; the report on exit compares against it
+    engine.start()
+    try:
+        # Wake up periodically so signals are handled promptly on every platform
+        interval = args.stats_interval if args.stats_interval > 0 else 0.5
+        while not done.wait(interval):
+            if args.stats_interval > 0:
+                stats = engine.get_stats()
+                writer.write(f"Stats: detecting={stats['detecting']} eyes={stats['eyes_detected']} "
+                             f"paused={stats['media_paused']} frames={stats['frames_processed']} "
+                             f"fps={stats['fps']}"
+                             + (f" mode={stats['camera_mode']['label']}" if stats['camera_mode'] else '')
+                             + (f" audience={stats['audience']['watching']}/{stats['audience']['faces']}"
+                                if stats['audience'] else '')
+                             + (f" rss={stats['memory']['rss_mb']}MB"
+                                if stats['memory'] and stats['memory']['rss_mb'] is not None else ''))
+    finally:
+        if args.dump_timings and engine.dump_timings(args.dump_timings):
+            writer.write(f"Pipeline timings written to {args.dump_timings}")
+        if args.trace and engine.export_trace(args.trace):
+            writer.write(f"Latency traces written to {args.trace}")
+        if args.memory_report and engine.memory is not None:
+            engine.memory.report_snapshot()
+        if args.flight_dump and engine.dump_flight(args.flight_dump, note='--flight-dump on exit'):
+            writer.write(f"Flight recorder written to {args.flight_dump}")
+        engine.shutdown()
+        writer.close()
+    return exit_code[0]
+
+
+def dump_flight_ring(ring_path: str) -> int:
+    """Write a ring file left by an earlier run, e.g. one that crashed, as a clip"""
+    from .flight_recorder import dump_path, dump_ring
+
+    path = dump_path(os.path.dirname(os.path.abspath(ring_path)))
+    try:
+        count = dump_ring(ring_path, path, note=f"Dumped from {os.path.basename(ring_path)}")
+    except (OSError, ValueError) as e:
+        print(f"Could not read the flight recorder ring {ring_path}: {e}", file=sys.stderr)
+        return 1
+    if not count:
+        print(f"{ring_path} holds no recorded frames", file=sys.stderr)
+        return 1
+    print(f"{count} frames and verdicts written to {path}")
+    return 0
+
+
+def run_gui() -> int:
+    from .main import EyeRemoteApp
+
+    app = EyeRemoteApp()
+    app.run()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.list_cameras:
+        from .utils import get_camera_list
+
+        for camera in get_camera_list():
+            print(f"{camera['index']}: {camera['name']}")
+        return 0
+    if args.flight_dump_ring:
+        return dump_flight_ring(args.flight_dump_ring)
+    if args.headless:
+        return run_headless(args)
+    return run_gui()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,7 +25,64 @@ class Config:
             'timeout': 3,
             'max_faces': 1,
             'target_app': 'Any',
+            'media_targets': [],
+            'status_socket': False,
+            'status_socket_path': '',
+            'room_mode': 'off',
+            'room_aggregator': '',
+            'room_port': 47731,
+            'room_min_watching': 1,
+            'room_hold_seconds': 0.0,
+            'room_node_timeout': 5.0,
             'camera_index': 0,
+            'standby_grace_seconds': 30,
+            'camera_reconnect': True,
+            'camera_fallback_indices': [],
+            'camera_reconnect_max_backoff': 10.0,
+            'camera_mode_negotiation': True,
+            'camera_min_height': 480,
+            'camera_min_fps': 15,
+            'camera_luma_capture': True,
+            'camera_broker': False,
+            'camera_broker_port': 47740,
+            'multicam_indices': [],
+            'multicam_fusion': 'any',
+            'multicam_weights': {},
+            'multicam_threshold': 0.5,
+            'multicam_max_fps': 10,
+            'audience_mode': False,
+            'audience_min_ratio': 0.5,
+            'audience_max_faces': 30,
+            'audience_workers': 0,
+            'detector_process': False,
+            'detector_process_max_fps': 10,
+            'detector_process_max_restarts': 5,
+            'instrumentation': True,
+            'instrumentation_window': 600,
+            'tracing': True,
+            'trace_max': 500,
+            'frame_delay': 0.1,
+            'flight_recorder': True,
+            'flight_recorder_seconds': 30,
+            'flight_recorder_width': 160,
+            'flight_recorder_file': 'eyeremote_flight.npy',
+            'memory_monitor': True,
+            'memory_sample_seconds': 60,
+            'ui_refresh_hz': 10,
+            'log_max_lines': 500,
+            'log_ui_level': 'INFO',
+            'log_file': 'eyeremote.log',
+            'log_file_level': 'DEBUG',
+            'log_file_max_bytes': 1000000,
+            'log_file_backups': 3,
+            'face_scale_factor': 1.1,
+            'face_min_neighbors': 5,
+            'face_min_size': 30,
+            'eye_scale_factor': 1.1,
+            'eye_min_neighbors': 3,
+            'eye_min_size': 20,
+            'eyes_present_frames': 2,
+            'no_eyes_frames': 3,
             'eye_ar_threshold': 0.25,
             'window_geometry': '600x500',
             'always_on_top': False,
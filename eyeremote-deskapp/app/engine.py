@@ -0,0 +1,1029 @@
+"""
+EyeRemote detection engine
+Detection, smoothing and media actuation without any GUI toolkit, shared by
+the desktop window (app/main.py) and the headless CLI (app/cli.py).
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Only lightweight modules are imported here. OpenCV, pyautogui, psutil, asyncio
+# (status socket) and the room sockets load on first use so the window can
+# appear first; see scripts/profile_startup.py.
+from .config import Config
+from .attention import AttentionSmoother
+from .media_backends import MediaBackendRegistry, ACTION_PAUSE, ACTION_RESUME, ACTION_TOGGLE
+from .capture import CaptureIncident, SupervisedCapture
+from .camera_setup import CameraSetup
+from .instrumentation import StageTimings
+from .tracing import Tracer, DecisionTracer, KIND_PAUSE, KIND_RESUME
+from .memory_monitor import MemoryMonitor
+from .events import (EventBus, FrameProcessed, AttentionChanged, PauseRequested, CameraLost,
+                     CameraRecovered, DetectionStateChanged, DetectionError, ConfigChanged)
+
+
+# Detection lifecycle states
+IDLE = 'idle'
+STARTING = 'starting'
+RUNNING = 'running'
+STOPPING = 'stopping'
+
+
+def _load_pyautogui():
+    """Import and configure pyautogui on first use (it needs a display)"""
+    import pyautogui
+    pyautogui.FAILSAFE = True
+    pyautogui.PAUSE = 0.1
+    return pyautogui
+
+
+def _positive_int(value: Any) -> int:
+    """Validate a remote setting that must be a whole number of at least 1, like timeout"""
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise TypeError("Expected a whole number")
+    if value < 1:
+        raise ValueError("Must be at least 1")
+    return value
+
+
+def _app_name(value: Any) -> str:
+    """Validate a remote setting that names an application, like target_app"""
+    if not isinstance(value, str) or not value.strip():
+        raise TypeError("Expected an application name")
+    return value.strip()
+
+
+def _string_list(value: Any) -> List[str]:
+    """Validate a remote setting that must be a list of strings, like media_targets"""
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise TypeError("Expected a list of strings")
+    return list(value)
+
+
+def _default_log(message: str):
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {message}", flush=True)
+
+
+class EyeRemoteEngine:
+    # Smoothing defaults; the eyes_present_frames and no_eyes_frames settings override them
+    EYES_PRESENT_THRESHOLD = 2  # Frames to confirm eyes are present
+    NO_EYES_THRESHOLD = 3       # Frames to confirm eyes are gone
+
+    # Settings that may be changed through the status socket
+    REMOTE_CONFIG_KEYS = {'timeout': _positive_int, 'max_faces': _positive_int, 'target_app': _app_name,
+                          'media_targets': _string_list}
+
+    def __init__(self, config: Optional[Config] = None,
+                 log: Optional[Callable[[str], None]] = None,
+                 notify: Optional[Callable[[str, str], None]] = None,
+                 capture_factory: Optional[Callable[[int], Any]] = None,
+                 debug_log: Optional[Callable[[str], None]] = None):
+        """
+        Initialize the engine
+
+        Args:
+            config: Configuration (default: Config() from the working directory)
+            log: Receives activity log messages; called from any thread
+            notify: Receives (title, message) warnings meant for the user;
+                called from any thread (default: logged)
+            capture_factory: Opens a capture for a camera index (default: cv2.VideoCapture)
+            debug_log: Receives step-by-step detail (focus attempts, key
+                delivery) the activity log may filter out (default: log)
+        """
+        self.config = config or Config()
+        self.capture_factory = capture_factory
+        self.log = log or _default_log
+        self.debug_log = debug_log or self.log
+        self.notify = notify or (lambda title, message: self.log(f"{title}: {message}"))
+
+        self.bus = EventBus(log=self.log)
+        self.eye_detector = None
+        self.detection_thread = None
+        self.state = IDLE
+        self.stop_timeout = 2.0  # Upper bound stop() waits for the camera to be released
+        self._stop_event = threading.Event()
+        self._release_on_exit = False
+        self._last_error = ''
+        self.camera_incidents: List[CaptureIncident] = []
+        # Opens cameras with the negotiated mode, luma capture and reconnects
+        self.camera_setup = CameraSetup(self.config, capture_factory, log=self.log,
+                                        on_lost=self._on_camera_lost, on_recovered=self._on_camera_recovered,
+                                        interrupt=lambda: self._stop_event)
+        self.audience = None
+        self.last_eye_seen = None
+        self.media_paused = False
+        self._actuated_action = ACTION_RESUME  # Last decision the player was sent (playing at first)
+        self.frames_processed = 0
+        self.detection_started_at = None
+        # Per-stage timings of the detection pipeline (None when instrumentation is off)
+        self.timings = (StageTimings(int(self.config.get('instrumentation_window', 600)))
+                        if self.config.get('instrumentation', True) else None)
+        # Look-away/look-back to pause/resume latency traces
+        self.tracer = Tracer(int(self.config.get('trace_max', 500))) if self.config.get('tracing', True) else None
+        self._decisions = DecisionTracer(self.tracer) if self.tracer is not None else None
+        # RSS sampling and on-demand tracemalloc snapshots (started with the services)
+        self.memory = (MemoryMonitor(interval=float(self.config.get('memory_sample_seconds', 60)), log=self.log)
+                       if self.config.get('memory_monitor', True) else None)
+        # Ring of recent frames and verdicts, created on the first start (see _setup_recorder)
+        self.recorder = None
+        self.last_start_ms = None
+        self.last_start_warm = False
+        self._start_requested_at = None
+        self.status_server = None
+        self.room_publisher = None
+        self.room_aggregator = None
+        self._last_focused_hwnd = None
+        self._state_lock = threading.Lock()
+
+        self.smoother = AttentionSmoother(*self._smoothing_thresholds())
+
+        # Media backends are probed once in the background and cached
+        self.media_registry = MediaBackendRegistry(log=self.log)
+        threading.Thread(target=self.media_registry.probe_all, daemon=True).start()
+
+        self._subscribe_handlers()
+
+    # --- Services -----------------------------------------------------------
+
+    def start_services(self):
+        """Start the memory monitor, the optional status socket and room coordination"""
+        if self.memory is not None:
+            self.memory.start()
+        self._start_status_server()
+        self._start_room()
+
+    def _start_status_server(self):
+        """Start the local status/control socket if enabled in config"""
+        if not self.config.get('status_socket', False):
+            return
+        from .status_server import StatusServer
+
+        if not StatusServer.is_supported():
+            self.log("Status socket is not supported on this platform")
+            return
+        try:
+            self.status_server = StatusServer(
+                socket_path=self.config.get('status_socket_path') or None,
+                stats_provider=self.get_stats,
+                command_handler=self.handle_remote_command,
+                log=self.log)
+            if not self.status_server.start():
+                self.status_server = None
+        except Exception as e:
+            self.status_server = None
+            self.log(f"Status server failed to start: {e}")
+
+    def _start_room(self):
+        """Join or coordinate a shared-display room if enabled in config"""
+        mode = self.config.get('room_mode', 'off')
+        if mode not in ('node', 'coordinator'):
+            return
+        from .room import HeartbeatPublisher, RoomAggregator, RoomPolicy, parse_address
+
+        port = int(self.config.get('room_port', 47731))
+        try:
+            if mode == 'coordinator':
+                policy = RoomPolicy(min_watching=int(self.config.get('room_min_watching', 1)),
+                                    hold_seconds=float(self.config.get('room_hold_seconds', 0.0)))
+                self.room_aggregator = RoomAggregator(
+                    bind=('0.0.0.0', port), policy=policy,
+                    actuator=lambda action: self.send_media_key(action=action),
+                    node_timeout=float(self.config.get('room_node_timeout', 5.0)),
+                    log=self.log)
+                self.room_aggregator.start()
+                # The coordinator's own viewer counts as a node too
+                aggregator = ('127.0.0.1', port)
+            else:
+                aggregator = parse_address(self.config.get('room_aggregator', ''), port)
+            self.room_publisher = HeartbeatPublisher(aggregator)
+            self.room_publisher.start()
+            self.log(f"Room mode: {mode} (aggregator {aggregator[0]}:{aggregator[1]})")
+        except (OSError, ValueError) as e:
+            self.log(f"Room mode failed to start: {e}")
+
+    def shutdown(self):
+        """Stop detection and all background services"""
+        # If the session thread is stuck, it still owns the detector and releases it on exit
+        if self.stop(standby=False) and self.eye_detector:
+            self.eye_detector.cleanup()
+            self.eye_detector = None
+        if self.audience:
+            self.audience.shutdown()
+            self.audience = None
+        self.media_registry.shutdown()
+        if self.status_server:
+            self.status_server.stop()
+        if self.room_publisher:
+            self.room_publisher.stop()
+        if self.room_aggregator:
+            self.room_aggregator.stop()
+        if self.memory is not None:
+            self.memory.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.bus.close()
+
+    # --- Event consumers ----------------------------------------------------
+
+    def _subscribe_handlers(self):
+        """Attach actuation, logging and remote consumers to the event bus"""
+        # If actuation falls behind, only the newest decision waits; _on_pause_requested
+        # compares it with what the player was last sent, so skipped toggles cancel out
+        self.bus.subscribe(self._on_pause_requested, (PauseRequested,), name='actuation', maxsize=1,
+                           on_drop=self._on_pause_dropped)
+        self.bus.subscribe(self._on_log_event, (PauseRequested, CameraLost, CameraRecovered, DetectionError),
+                           name='log')
+        self.bus.subscribe(self._on_remote_event, (AttentionChanged, PauseRequested, DetectionStateChanged),
+                           name='remote')
+
+    def _on_pause_dropped(self, event):
+        """A decision that actuation will never see: end its trace"""
+        if event.trace_id and self.tracer is not None:
+            self.tracer.discard(event.trace_id)
+
+    def _on_pause_requested(self, event):
+        """Deliver a pause/resume decision to the media player"""
+        start = time.perf_counter()
+        if event.action == self._actuated_action:
+            # Decisions in between were dropped and the player is already in this state;
+            # on the play/pause toggle path another key would flip it the wrong way
+            if event.trace_id:
+                self.tracer.discard(event.trace_id)
+            return
+        if event.trace_id:
+            self.tracer.span(event.trace_id, 'queue', end=start)
+        # Send media key (will focus target app automatically)
+        if self.send_media_key(action=event.action, trace_id=event.trace_id):
+            self._actuated_action = event.action
+        if self.timings is not None:
+            self.timings.lap('actuation', start)
+
+    def _on_log_event(self, event):
+        """Write detection events to the activity log"""
+        if isinstance(event, PauseRequested):
+            verb = "paused" if event.action == ACTION_PAUSE else "resumed"
+            message = f"Media {verb} - {event.reason}"
+        elif isinstance(event, CameraLost):
+            message = event.message
+        elif isinstance(event, CameraRecovered):
+            message = (f"Camera {event.camera_index} recovered after {event.downtime_seconds:.1f}s "
+                       f"({event.attempts} attempts)")
+        else:
+            message = f"Detection error: {event.message}"
+        self.log(message)
+
+    def _on_remote_event(self, event):
+        """Forward state transitions to the status socket and the room"""
+        if isinstance(event, AttentionChanged):
+            fields = {'eyes_detected': event.attentive}
+            watching = event.attentive
+        elif isinstance(event, PauseRequested):
+            fields = {'media_paused': event.action == ACTION_PAUSE}
+            watching = None
+        else:
+            fields = {'detecting': event.detecting}
+            watching = False if not event.detecting else None
+
+        if self.status_server:
+            self.status_server.publish(fields)
+        if self.room_publisher and watching is not None:
+            self.room_publisher.update(watching)
+
+    # --- Stats and remote control -------------------------------------------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshot of detection state and statistics (safe from any thread)"""
+        uptime = time.time() - self.detection_started_at if self.detection_started_at else 0.0
+        return {
+            'detecting': self.is_detecting,
+            'state': self.state,
+            'eyes_detected': self.smoother.stable_state,
+            'media_paused': self.media_paused,
+            'frames_processed': self.frames_processed,
+            'fps': round(self.frames_processed / uptime, 2) if uptime > 0 else 0.0,
+            'uptime_seconds': round(uptime, 1),
+            'last_start_ms': round(self.last_start_ms, 1) if self.last_start_ms is not None else None,
+            'last_start_warm': self.last_start_warm,
+            'camera_standby': bool(self.eye_detector and self.eye_detector.in_standby),
+            'camera_incidents': len(self.camera_incidents),
+            'camera_downtime_seconds': round(sum(i.downtime_seconds for i in self.camera_incidents), 3),
+            'camera_mode': self.camera_setup.mode_stats(self.camera_setup.camera_indices()[0])
+            or getattr(self.eye_detector, 'camera_mode', None),
+            'cameras': self.eye_detector.stats() if hasattr(self.eye_detector, 'stats') else None,
+            'audience': self.audience.last_result.to_dict()
+            if self.audience and self.audience.last_result else None,
+            'detector_process': self.eye_detector.process_stats()
+            if hasattr(self.eye_detector, 'process_stats') else None,
+            'media_targets': self.media_registry.get_stats(),
+            'event_bus': self.bus.stats(),
+            'timings': self.timings.snapshot() if self.timings is not None else None,
+            'latency': self.tracer.summary() if self.tracer is not None else None,
+            'memory': self.memory.stats() if self.memory is not None else None,
+            'flight_recorder': self.recorder.stats() if self.recorder is not None else None,
+        }
+
+    def export_trace(self, path: str) -> bool:
+        """Write the pause/resume decision traces as Chrome trace-event JSON"""
+        if self.tracer is None:
+            return False
+        self.tracer.export_chrome(path)
+        return True
+
+    def dump_flight(self, path: Optional[str] = None, note: str = '') -> Optional[str]:
+        """
+        Write the flight recorder's frames and verdicts as a replayable .npz clip
+
+        Args:
+            path: Output file (default: a timestamped name next to the ring file)
+            note: Stored with the clip
+
+        Returns:
+            The file written, or None if no frames were recorded
+        """
+        recorder = self.recorder
+        if recorder is None or not recorder.records:
+            return None
+        from .flight_recorder import dump_path
+
+        path = path or dump_path(os.path.dirname(recorder.path))
+        if not recorder.dump(path, seconds=float(self.config.get('flight_recorder_seconds', 30)), note=note):
+            return None
+        return path
+
+    def report_wrong_decision(self) -> Optional[str]:
+        """The user says the last pause/resume was wrong: keep what the camera saw"""
+        path = self.dump_flight(note=f"Marked wrong by the user; media {'paused' if self.media_paused else 'playing'}")
+        if path:
+            self.log(f"Saved the last {self.config.get('flight_recorder_seconds', 30)}s of frames and verdicts to {path}")
+        else:
+            self.log("No frames recorded (flight recorder is off, detection has not run, "
+                     "or frames are read in another process)")
+        return path
+
+    def _data_path(self, name: str) -> str:
+        """Relative file names are kept next to the config file"""
+        if os.path.isabs(name):
+            return name
+        return os.path.join(os.path.dirname(os.path.abspath(self.config.config_file)), name)
+
+    def dump_timings(self, path: str) -> bool:
+        """Write the per-stage timings to a JSON file"""
+        if self.timings is None:
+            return False
+        self.timings.dump(path)
+        return True
+
+    def handle_remote_command(self, cmd: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle start/stop/config from the status socket (runs on the server thread)"""
+        if cmd == 'start':
+            threading.Thread(target=self.start, daemon=True).start()
+        elif cmd == 'stop':
+            threading.Thread(target=self.stop, daemon=True).start()
+        elif cmd == 'config':
+            key = request.get('key')
+            if key not in self.REMOTE_CONFIG_KEYS:
+                return {'ok': False, 'error': f"Unsupported config key: {key}"}
+            if 'value' not in request:
+                return {'ok': False, 'error': f"Missing value for {key}"}
+            try:
+                value = self.REMOTE_CONFIG_KEYS[key](request['value'])
+            except (ValueError, TypeError) as e:
+                return {'ok': False, 'error': f"Invalid value for {key}: {e}"}
+            self.apply_config(key, value)
+        return {'ok': True, 'accepted': cmd}
+
+    def apply_config(self, key: str, value: Any):
+        """Change and persist a setting, announcing it on the bus"""
+        self.config.set(key, value)
+        self.config.save()
+        self.bus.publish(ConfigChanged(key, value))
+        self.log(f"Remote config: {key} = {value}")
+
+    # --- Detection lifecycle ------------------------------------------------
+
+    @property
+    def is_detecting(self) -> bool:
+        """True while detection is starting or running"""
+        return self.state in (STARTING, RUNNING)
+
+    def start(self) -> bool:
+        """
+        Start eye detection in the background
+
+        Returns:
+            False if detection is already running, or the previous session
+            did not finish shutting down within stop_timeout
+        """
+        with self._state_lock:
+            if self.state in (STARTING, RUNNING):
+                return False
+            previous = self.detection_thread
+        # A session that is still stopping owns the camera until it exits
+        if previous and previous.is_alive() and previous is not threading.current_thread():
+            previous.join(self.stop_timeout)
+            if previous.is_alive():
+                self.log("Previous detection session is still shutting down")
+                return False
+
+        with self._state_lock:
+            if self.state != IDLE:
+                return False
+            self.state = STARTING
+            self._stop_event = threading.Event()
+            self._release_on_exit = False
+            self._start_requested_at = time.perf_counter()
+            self.last_start_ms = None
+            self.log("Initializing camera and detector...")
+            # The session thread is the only one that touches the capture
+            self.detection_thread = threading.Thread(target=self._run_session, args=(self._stop_event,),
+                                                     name='detection', daemon=True)
+            self.detection_thread.start()
+        return True
+
+    def stop(self, standby: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Stop eye detection and wait for the session thread to let go of the camera
+
+        Args:
+            standby: Keep the camera open for standby_grace_seconds so that the
+                next start() is fast (False releases it)
+            timeout: Seconds to wait (default: stop_timeout)
+
+        Returns:
+            True if the session ended within the timeout (or was not running)
+        """
+        with self._state_lock:
+            if self.state in (STARTING, RUNNING):
+                self.state = STOPPING
+                self._release_on_exit = not standby
+                self._stop_event.set()
+            elif self.state == STOPPING and not standby:
+                self._release_on_exit = True
+            thread = self.detection_thread
+
+        if not thread or thread is threading.current_thread():
+            return True
+        thread.join(self.stop_timeout if timeout is None else timeout)
+        if thread.is_alive():
+            # Blocked inside a camera open/read; it releases the camera when that returns
+            self.log("Detection thread did not stop in time; the camera is released when it returns")
+            return False
+        return True
+
+    def _run_session(self, stop_event: threading.Event):
+        """Session thread: open or resume the detector, run the loop, then park it"""
+        started = False
+        error = ''
+        try:
+            if self._open_detector(stop_event):
+                with self._state_lock:
+                    if self.state == STARTING:
+                        self.state = RUNNING
+                        started = True
+                if started:
+                    # Once initialized, update state and start the main loop
+                    self.last_eye_seen = datetime.now()
+                    self.frames_processed = 0
+                    self.detection_started_at = time.time()
+                    if self.timings is not None:
+                        self.timings.reset()
+                    self.bus.publish(DetectionStateChanged(True))
+                    self.log("Eye detection started")
+                    if not self.detection_loop(stop_event):
+                        self._release_on_exit = True  # Camera lost
+            else:
+                error = self._last_error
+        finally:
+            self._park_detector(standby=not self._release_on_exit)
+            self.smoother.reset()
+            if self._decisions is not None:
+                self._decisions.reset()
+            self.detection_started_at = None
+            with self._state_lock:
+                self.state = IDLE
+            if started:
+                self.log("Eye detection stopped")
+            self.bus.publish(DetectionStateChanged(False, error=error))
+
+    def _open_detector(self, stop_event: threading.Event) -> bool:
+        """Create or resume the detector on the session thread"""
+        from .worker_process import ProcessDetector
+
+        cameras = self.camera_setup.camera_indices()
+        camera_key = cameras[0] if len(cameras) == 1 else tuple(cameras)
+        in_process = len(cameras) == 1 and bool(self.config.get('detector_process', False))
+        try:
+            detector = self.eye_detector
+            if detector and (detector.camera_index != camera_key
+                             or isinstance(detector, ProcessDetector) != in_process):
+                detector.cleanup()
+                detector = self.eye_detector = None
+            if detector:
+                # Warm standby: cascades loaded, camera usually still open
+                self.last_start_warm = detector.resume()
+            elif in_process:
+                self.eye_detector = self._create_process_detector(cameras[0])
+                self.last_start_warm = False
+            elif len(cameras) == 1:
+                # This is the long-running part
+                self.eye_detector = self.camera_setup.create_detector(cameras[0])
+                self.last_start_warm = False
+            else:
+                from .multicam import MultiCameraDetector
+
+                # The workers detect at the same time, so each gets its own cascades
+                self.eye_detector = MultiCameraDetector(
+                    cameras, lambda index: self.camera_setup.create_detector(index, shared_cascades=False),
+                    rule=self.config.get('multicam_fusion', 'any'),
+                    weights=self.config.get('multicam_weights', {}),
+                    threshold=float(self.config.get('multicam_threshold', 0.5)),
+                    max_rate=float(self.config.get('multicam_max_fps', 10)),
+                    max_faces=int(self.config.get('max_faces', 1)),
+                    log=self.log)
+                self.last_start_warm = False
+            self._setup_audience()
+            self._setup_recorder()
+            self._apply_detection_settings()
+            if hasattr(self.eye_detector, 'recorder'):
+                self.eye_detector.recorder = self.recorder  # One camera in this process only
+            for camera in getattr(self.eye_detector, 'detectors', [self.eye_detector]):
+                if hasattr(camera, 'timings'):
+                    camera.timings = self.timings  # Capture, conversion and cascade stages
+                if isinstance(camera.cap, (SupervisedCapture, ProcessDetector)):
+                    # Stopping the session aborts a reconnect (or worker restart) in progress
+                    camera.cap.interrupt = stop_event
+            return True
+        except Exception as e:
+            if self.eye_detector:
+                self.eye_detector.cleanup()
+                self.eye_detector = None
+            self._last_error = str(e)
+            self.log(f"Initialization failed: {e}")
+            self.notify("Error", f"Failed to start detection: {str(e)}")
+            return False
+
+    def _smoothing_thresholds(self) -> Tuple[int, int]:
+        return (max(1, int(self.config.get('eyes_present_frames', self.EYES_PRESENT_THRESHOLD))),
+                max(1, int(self.config.get('no_eyes_frames', self.NO_EYES_THRESHOLD))))
+
+    def _apply_detection_settings(self):
+        """Cascade and smoothing settings from the config, also for a detector resumed from standby"""
+        from .eye_detector import cascade_params
+
+        params = cascade_params(self.config)
+        for camera in getattr(self.eye_detector, 'detectors', [self.eye_detector]):
+            if hasattr(camera, 'params'):
+                camera.params = params
+        if self.audience is not None:
+            self.audience.params = params
+        self.smoother.present_threshold, self.smoother.absent_threshold = self._smoothing_thresholds()
+
+    def _setup_recorder(self):
+        """Create the flight recorder ring on first use"""
+        if self.recorder is not None or not self.config.get('flight_recorder', True):
+            return
+        from .flight_recorder import FlightRecorder, ring_capacity
+
+        path = self._data_path(self.config.get('flight_recorder_file', 'eyeremote_flight.npy'))
+        capacity = ring_capacity(float(self.config.get('flight_recorder_seconds', 30)),
+                                 float(self.config.get('frame_delay', 0.1)))
+        try:
+            self.recorder = FlightRecorder(path, capacity, int(self.config.get('flight_recorder_width', 160)))
+        except (OSError, ValueError) as e:
+            self.log(f"Flight recorder not available: {e}")
+            return
+        if self.recorder.previous:
+            self.log(f"Kept the previous run's flight recorder as {self.recorder.previous} "
+                     f"(eyeremote --flight-dump-ring turns it into a clip)")
+
+    def _create_process_detector(self, camera_index: int):
+        """Detector in a worker process; the window's process only reads its results"""
+        from .worker_process import ProcessDetector
+
+        return ProcessDetector(self.config, camera_index, max_faces=int(self.config.get('max_faces', 1)),
+                               max_rate=float(self.config.get('detector_process_max_fps', 10)),
+                               capture_factory=self.capture_factory,
+                               on_lost=self._on_camera_lost, on_recovered=self._on_camera_recovered,
+                               log=self.log,
+                               max_restarts=int(self.config.get('detector_process_max_restarts', 5)))
+
+    def _on_camera_lost(self, incident: CaptureIncident):
+        self.camera_incidents.append(incident)
+        self.bus.publish(CameraLost(f"Camera {incident.camera_index} stopped delivering frames, reconnecting"))
+
+    def _on_camera_recovered(self, incident: CaptureIncident):
+        # Resume the session where it was: the outage does not count as looking away
+        if self.last_eye_seen:
+            self.last_eye_seen += timedelta(seconds=incident.downtime_seconds)
+        self.bus.publish(CameraRecovered(incident.recovered_index, incident.downtime_seconds, incident.attempts))
+
+    def _park_detector(self, standby: bool):
+        """Put the detector into warm standby, or release it"""
+        if not self.eye_detector:
+            return
+        grace = float(self.config.get('standby_grace_seconds', 30))
+        if standby and grace > 0:
+            self.eye_detector.standby(grace)
+        else:
+            self.eye_detector.cleanup()
+            self.eye_detector = None
+
+    def detection_loop(self, stop_event: threading.Event) -> bool:
+        """
+        Main detection loop; publishes events and never calls consumers directly
+
+        Returns:
+            False if the loop ended because the camera was lost
+        """
+        try:
+            timeout_seconds = int(self.config.get('timeout', 3))
+        except (ValueError, TypeError):
+            timeout_seconds = 3 # Fallback to default
+            self.log("Invalid timeout value, using default 3s.")
+        timeout_duration = timedelta(seconds=timeout_seconds)
+        frame_delay = max(0.0, float(self.config.get('frame_delay', 0.1)))
+        timings = self.timings
+        recorder = self.recorder
+
+        while not stop_event.is_set():
+            try:
+                if not self.eye_detector:
+                    self.bus.publish(CameraLost("Eye detector not available, stopping detection"))
+                    return False
+
+                # Check if camera is still working (reconnects are handled by SupervisedCapture)
+                iteration_start = time.perf_counter()
+                if not self.eye_detector.is_camera_working():
+                    if stop_event.is_set():
+                        break  # Stopped during a reconnect
+                    self.bus.publish(CameraLost("Camera not working properly, stopping detection"))
+                    return False
+
+                # Detect eyes
+                frame_start = time.perf_counter()
+                if timings is not None:
+                    timings.add('camera_check', (frame_start - iteration_start) * 1000)
+                eyes_detected = self._detect_frame()
+                detected_at = time.perf_counter()
+                current_time = datetime.now()
+                self.frames_processed += 1
+                if self.frames_processed == 1:
+                    self._report_start_latency()
+                self.bus.publish(FrameProcessed(eyes_detected, self.frames_processed,
+                                                (detected_at - frame_start) * 1000))
+
+                # --- State smoothing logic ---
+                smoothing_start = time.perf_counter()
+                decisions = self._decisions
+                if decisions is not None:
+                    decisions.frame(eyes_detected, self.smoother.stable_state, frame_start, detected_at)
+                changed = self.smoother.update(eyes_detected)
+                if changed is not None:
+                    if decisions is not None:
+                        decisions.attention_changed(changed)
+                    self.bus.publish(AttentionChanged(changed))
+                if timings is not None:
+                    timings.add('detect', (detected_at - frame_start) * 1000)
+                    timings.lap('smoothing', smoothing_start)
+
+                # --- Media control logic based on stable state ---
+                # In a room the aggregator decides; this instance only reports attention
+                if not self.room_publisher:
+                    if self.smoother.stable_state:
+                        self.last_eye_seen = current_time
+
+                        # If media was paused, resume it
+                        if self.media_paused:
+                            self.media_paused = False
+                            trace_id = decisions.decided(KIND_RESUME) if decisions is not None else 0
+                            self.bus.publish(PauseRequested(ACTION_RESUME, "eyes detected", trace_id))
+                    else:
+                        # If eyes are not detected, check if we need to pause
+                        if not self.media_paused and self.last_eye_seen and (current_time - self.last_eye_seen > timeout_duration):
+                            self.media_paused = True
+                            trace_id = decisions.decided(KIND_PAUSE) if decisions is not None else 0
+                            self.bus.publish(PauseRequested(ACTION_PAUSE, f"eyes not detected for {timeout_seconds}s",
+                                                            trace_id))
+                if decisions is not None:
+                    decisions.end_frame()
+                if recorder is not None:
+                    recorder.commit(eyes_detected, self.smoother.stable_state, self.media_paused,
+                                    (detected_at - frame_start) * 1000, (time.perf_counter() - iteration_start) * 1000)
+
+                if timings is not None:
+                    timings.lap('frame', iteration_start)
+                    timings.frame_done()
+                stop_event.wait(frame_delay)  # Small delay to prevent excessive CPU usage; returns early on stop
+
+            except Exception as e:
+                self.bus.publish(DetectionError(str(e)))
+                stop_event.wait(1)
+        return True
+
+    def _detect_frame(self) -> bool:
+        """One detection: every tracked face in audience mode, else up to max_faces faces"""
+        if self.audience is None:
+            return self.eye_detector.detect_eyes(max_faces=int(self.config.get('max_faces', 1)))
+        from .luma import read_gray
+
+        start = time.perf_counter()
+        ret, gray = read_gray(self.eye_detector.cap)
+        if self.timings is not None:
+            start = self.timings.lap('capture', start)
+        if not ret:
+            return False
+        if self.recorder is not None:
+            self.recorder.frame(gray)
+        attentive = self.audience.analyze(gray).attentive
+        if self.timings is not None:
+            self.timings.lap('audience', start)
+        return attentive
+
+    def _setup_audience(self):
+        """Create or drop the audience detector to match the config"""
+        from .eye_detector import EyeDetector
+
+        enabled = bool(self.config.get('audience_mode', False)) and isinstance(self.eye_detector, EyeDetector)
+        if not enabled:
+            if self.audience:
+                self.audience.shutdown()
+                self.audience = None
+            return
+        from .audience import AudienceDetector, AudiencePolicy, FaceTracker
+        from .eye_detector import load_eye_cascade
+
+        policy = AudiencePolicy(min_ratio=float(self.config.get('audience_min_ratio', 0.5)))
+        if self.audience is None:
+            self.audience = AudienceDetector(self.eye_detector.face_cascade, load_eye_cascade, policy,
+                                             max_faces=int(self.config.get('audience_max_faces', 30)),
+                                             workers=int(self.config.get('audience_workers', 0)))
+        else:
+            self.audience.policy = policy
+            self.audience.face_cascade = self.eye_detector.face_cascade
+            self.audience.tracker = FaceTracker()  # IDs start over with each session
+
+    def _report_start_latency(self):
+        """Log the time from start() to the first processed frame"""
+        if self._start_requested_at is None:
+            return
+        self.last_start_ms = (time.perf_counter() - self._start_requested_at) * 1000
+        mode = "warm standby" if self.last_start_warm else "cold start"
+        self.log(f"First frame {self.last_start_ms:.0f} ms after start ({mode})")
+
+    # --- Media actuation ----------------------------------------------------
+
+    def send_media_key(self, action: str = ACTION_TOGGLE, is_test: bool = False, trace_id: int = 0) -> bool:
+        """
+        Finds the target app, focuses it, and sends a media play/pause keypress.
+
+        Returns:
+            False if the target app could not be focused and nothing was sent
+        """
+        # Several players selected: fan the action out through the backend registry
+        media_targets = self.config.get('media_targets', [])
+        if media_targets:
+            self.log(f"Sending '{action}' to media targets: {', '.join(media_targets)}")
+            futures = self.media_registry.dispatch(action, media_targets)
+            if trace_id:
+                self._trace_dispatch(trace_id, futures)
+            return True
+
+        target_app_name = self.config.get('target_app', 'Any')
+        target_app = target_app_name.lower()
+
+        if target_app != "any":
+            focus_start = time.perf_counter()
+            focused = self._focus_target_app(target_app, is_test)
+            if trace_id:
+                self.tracer.span(trace_id, 'focus', focus_start)
+            if not focused:
+                if trace_id:
+                    self.tracer.discard(trace_id)
+                return False  # Stop if we couldn't find or focus the app
+
+        self.log(f"Sending Media Play/Pause key (Target: {target_app_name})")
+        # Pass the target_hwnd to the send function for direct messaging on Windows
+        key_start = time.perf_counter()
+        self._send_keypress_with_fallback(self._last_focused_hwnd)
+        if trace_id:
+            self.tracer.span(trace_id, 'key', key_start)
+            self.tracer.finish(trace_id)
+        return True
+
+    def _trace_dispatch(self, trace_id: int, futures):
+        """Finish a trace when the last media backend has answered"""
+        if not futures:
+            self.tracer.discard(trace_id)
+            return
+        dispatched = time.perf_counter()
+        pending = [len(futures)]
+        lock = threading.Lock()
+
+        def on_done(_):
+            with lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            self.tracer.span(trace_id, 'backends', dispatched)
+            self.tracer.finish(trace_id)
+
+        for future in futures:
+            future.add_done_callback(on_done)
+
+    def _send_keypress_with_fallback(self, target_hwnd=None):
+        """Sends a media play/pause key using the most reliable method available."""
+        # On Windows, if we have a specific window handle, use PostMessage for reliability.
+        if sys.platform == "win32" and target_hwnd:
+            try:
+                import win32api
+                # Define constants manually in case they are not in all pywin32 versions
+                WM_APPCOMMAND = 0x0319
+                APPCOMMAND_MEDIA_PLAY_PAUSE = 14
+
+                # The command must be packed into the lParam
+                lparam = APPCOMMAND_MEDIA_PLAY_PAUSE << 16
+
+                win32api.PostMessage(target_hwnd, WM_APPCOMMAND, 0, lparam)
+                time.sleep(0.05) # Small delay between key down and up
+                self.debug_log(f"win32 PostMessage: Media key sent directly to window handle {target_hwnd}.")
+                return
+            except Exception as e:
+                self.log(f"win32 PostMessage failed: {e}. Falling back to pyautogui.")
+
+        # Fallback for other OS or if PostMessage fails
+        try:
+            _load_pyautogui().press('playpause')
+            self.debug_log("pyautogui: Media Play/Pause key sent successfully.")
+        except Exception as e1:
+            self.log(f"pyautogui failed: {str(e1)}. Trying fallback...")
+            try:
+                from pynput.keyboard import Key, Controller
+                keyboard = Controller()
+                keyboard.press(Key.media_play_pause)
+                keyboard.release(Key.media_play_pause)
+                self.debug_log("pynput fallback: Media key sent successfully.")
+            except Exception as e2:
+                self.log(f"pynput fallback failed: {str(e2)}")
+                self.notify("Input Error", "Failed to send media key. Please check OS permissions for accessibility/input monitoring.")
+
+    def _focus_target_app(self, target_app_name, is_test):
+        """Find and focus the window of the target application."""
+        import psutil
+
+        self.debug_log(f"Attempting to focus '{target_app_name}'...")
+        self._last_focused_hwnd = None # Reset the handle
+
+        # Find the process ID (PID) of the target application
+        target_pid = None
+        for proc in psutil.process_iter(['pid', 'name']):
+            if target_app_name in proc.info['name'].lower():
+                target_pid = proc.info['pid']
+                break
+
+        if not target_pid:
+            self.log(f"Application '{target_app_name}' is not running.")
+            if is_test:
+                self.notify("App Not Found", f"The application '{target_app_name}' does not appear to be running.")
+            return False
+
+        # Platform-specific window activation
+        try:
+            if sys.platform == "win32":
+                # Retry the entire find-and-focus logic to handle initialization race conditions.
+                for attempt in range(2):
+                    try:
+                        import win32gui
+                        import win32com.client
+                        import win32process
+
+                        target_hwnd = None
+
+                        def enum_windows_callback(hwnd, _):
+                            nonlocal target_hwnd
+                            if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd):
+                                _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                                try:
+                                    proc = psutil.Process(pid)
+                                    if target_app_name in proc.name().lower():
+                                        target_hwnd = hwnd
+                                        return False
+                                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                                    pass
+                            return True
+
+                        win32gui.EnumWindows(enum_windows_callback, None)
+
+                        if target_hwnd:
+                            self._last_focused_hwnd = target_hwnd
+                            shell = win32com.client.Dispatch("WScript.Shell")
+                            shell.AppActivate(target_hwnd)
+                            self.debug_log(f"Focused '{target_app_name}' on attempt {attempt + 1}.")
+                            break # Success, exit the retry loop
+                        elif attempt == 0: # If no window found on first try
+                            self.debug_log(f"Could not find window for '{target_app_name}' on attempt 1. Retrying...")
+                            time.sleep(0.5)
+                        else: # If no window found on second try
+                            self.log(f"Could not find a visible window for '{target_app_name}' after 2 attempts.")
+                            return False
+                    except Exception as e:
+                        if attempt == 0:
+                            self.debug_log(f"Focus attempt 1 failed with error: {e}. Retrying...")
+                            time.sleep(0.5)
+                        else:
+                            # If the second attempt also fails, re-raise the exception to be caught outside
+                            raise e
+                else: # This 'else' belongs to the for loop, executes if 'break' is not hit
+                    self.log("All focus attempts failed.")
+                    return False
+
+                # If we broke out of the loop, it was a success.
+                time.sleep(0.2) # Give OS a moment to process the focus change.
+                return True
+
+            elif sys.platform == "darwin": # macOS
+                from AppKit import NSWorkspace, NSRunningApplication
+                app = NSRunningApplication.runningApplicationWithProcessIdentifier_(target_pid)
+                if app:
+                    app.activateWithOptions_(0) # NSApplicationActivateIgnoringOtherApps
+                    self.debug_log(f"Activated '{target_app_name}' (PID: {target_pid}).")
+                    time.sleep(0.2) # Give OS a moment to process the focus change.
+                    return True
+                return False
+
+            elif sys.platform == "linux":
+                # This requires 'xdotool' to be installed (sudo apt-get install xdotool)
+                import subprocess
+                # Find window ID from PID and activate it
+                cmd = f"xdotool search --pid {target_pid} windowactivate"
+                subprocess.run(cmd, shell=True, check=True, capture_output=True)
+                self.debug_log(f"Activated '{target_app_name}' window (PID: {target_pid}).")
+                time.sleep(0.2)
+                return True
+
+        except (ImportError, Exception) as e:
+            self.log(f"Error focusing application: {e}")
+            if is_test:
+                self.notify("Focus Error", f"Could not focus '{target_app_name}'. Please ensure required libraries (e.g., pywin32, xdotool) are installed.")
+            return False # Fallback to prevent sending keypress to wrong window
+
+    def is_target_app_active(self):
+        """Check if target application is currently active"""
+        target_app = self.config.get('target_app', 'Any').lower()
+
+        # If "Any" is selected, we don't filter by application, so it's always considered active.
+        if target_app == "any":
+            return True
+
+        active_process_name = ""
+
+        try:
+            import psutil
+
+            if sys.platform == "win32":
+                import win32gui
+                import win32process
+
+                hwnd = win32gui.GetForegroundWindow()
+                _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                active_process_name = psutil.Process(pid).name().lower()
+
+            elif sys.platform == "darwin": # macOS
+                from AppKit import NSWorkspace
+                active_app = NSWorkspace.sharedWorkspace().frontmostApplication()
+                active_process_name = active_app.localizedName().lower()
+
+            elif sys.platform == "linux":
+                # This requires 'xdotool' to be installed (sudo apt-get install xdotool)
+                try:
+                    import subprocess
+                    cmd = 'xdotool getactivewindow getwindowname'
+                    # First, try to get the process name via PID
+                    cmd_pid = 'xdotool getactivewindow getwindowpid'
+                    pid = int(subprocess.check_output(cmd_pid, shell=True, text=True).strip())
+                    active_process_name = psutil.Process(pid).name().lower()
+                except (FileNotFoundError, subprocess.CalledProcessError):
+                    # Fallback to window title if xdotool or process lookup fails
+                    cmd = 'xdotool getactivewindow getwindowname'
+                    active_process_name = subprocess.check_output(cmd, shell=True, text=True).lower()
+                except (FileNotFoundError, subprocess.CalledProcessError):
+                    self.log("is_target_app_active: 'xdotool' not found on Linux. Falling back to allow.")
+                    return True # Fallback if xdotool is not installed
+            else:
+                # For other OS, assume it's okay
+                return True
+
+            if active_process_name:
+                self.debug_log(f"Active window process: '{active_process_name}'")
+                if target_app in active_process_name:
+                    return True # Target app found in active process name
+
+            return False # Target app is not "any" and not the active process
+
+        except Exception as e:
+            self.log(f"Could not check active app: {e}")
+            return True  # If we can't check, assume it's okay
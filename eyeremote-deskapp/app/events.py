@@ -0,0 +1,246 @@
+"""
+In-process event bus for EyeRemote
+The detection thread publishes typed events; UI, actuation, logging and
+remote interfaces consume them on their own threads, so no consumer adds
+latency to a frame.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
+
+# Queue overflow policies
+DROP_OLDEST = 'drop_oldest'  # Keep the newest events (state-like consumers)
+DROP_NEWEST = 'drop_newest'  # Keep the backlog, reject new events
+
+
+@dataclass
+class FrameProcessed:
+    """A camera frame went through detection"""
+    eyes_detected: bool
+    frame_index: int
+    processing_ms: float
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class AttentionChanged:
+    """The smoothed attention state changed"""
+    attentive: bool
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class PauseRequested:
+    """Media should be paused ('pause') or resumed ('resume')"""
+    action: str
+    reason: str = ''
+    trace_id: int = 0  # Latency trace of the decision (0 = not traced)
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class CameraLost:
+    """The camera stopped delivering frames"""
+    message: str
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class CameraRecovered:
+    """Frames flow again after a CameraLost incident"""
+    camera_index: int
+    downtime_seconds: float
+    attempts: int
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class DetectionStateChanged:
+    """Detection was started or stopped (error is set if starting failed)"""
+    detecting: bool
+    error: str = ''
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class ConfigChanged:
+    """A setting was changed from outside the settings panel"""
+    key: str
+    value: Any
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class DetectionError:
+    """A recoverable error occurred in the detection loop"""
+    message: str
+    timestamp: float = field(default_factory=time.monotonic)
+
+
+class Subscription:
+    def __init__(self, bus: 'EventBus', handler: Callable[[Any], None],
+                 event_types: Optional[Tuple[Type, ...]], name: str,
+                 maxsize: int, policy: str, on_drop: Optional[Callable[[Any], None]] = None):
+        """
+        One subscriber with its own queue and delivery thread
+
+        Args:
+            bus: Owning bus
+            handler: Called with each event on the delivery thread
+            event_types: Event classes to receive (None = all)
+            name: Name used in statistics
+            maxsize: Maximum queued events before the drop policy applies
+            policy: DROP_OLDEST or DROP_NEWEST
+            on_drop: Called with each event the drop policy discards, on the
+                publishing thread (must not block)
+        """
+        self.bus = bus
+        self.handler = handler
+        self.event_types = event_types
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self.on_drop = on_drop
+
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+        self._queue: Deque[Any] = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'event-{name}', daemon=True)
+        self._thread.start()
+
+    def accepts(self, event: Any) -> bool:
+        return self.event_types is None or isinstance(event, self.event_types)
+
+    def offer(self, event: Any):
+        """Queue an event without blocking, applying the drop policy when full"""
+        discarded = None
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._queue) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == DROP_NEWEST:
+                    discarded = event
+                else:
+                    discarded = self._queue.popleft()
+            if discarded is not event:
+                self._queue.append(event)
+                self._cond.notify()
+        if discarded is not None and self.on_drop is not None:
+            try:
+                self.on_drop(discarded)
+            except Exception as e:
+                self.bus.log(f"Drop handler of '{self.name}' failed: {e}")
+
+    def close(self, timeout: float = 1.0):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                event = self._queue.popleft()
+
+            lag_ms = (time.monotonic() - event.timestamp) * 1000
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            try:
+                self.handler(event)
+            except Exception as e:
+                self.errors += 1
+                self.bus.log(f"Event handler '{self.name}' failed: {e}")
+            self.delivered += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            'queued': queued,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'last_lag_ms': round(self.last_lag_ms, 2),
+            'max_lag_ms': round(self.max_lag_ms, 2),
+        }
+
+
+class EventBus:
+    def __init__(self, log: Optional[Callable[[str], None]] = None):
+        """
+        Initialize an empty bus
+
+        Args:
+            log: Receives handler failures; called from the delivery threads
+                (default: print)
+        """
+        self.log = log or print
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, handler: Callable[[Any], None], event_types: Optional[Tuple[Type, ...]] = None,
+                  name: Optional[str] = None, maxsize: int = 256,
+                  policy: str = DROP_OLDEST, on_drop: Optional[Callable[[Any], None]] = None) -> Subscription:
+        """
+        Register a handler that runs on its own delivery thread
+
+        Args:
+            handler: Called with each matching event
+            event_types: Tuple of event classes to receive (None = all)
+            name: Name used in statistics (default: handler name)
+            maxsize: Queue length before the drop policy applies
+            policy: DROP_OLDEST or DROP_NEWEST
+            on_drop: Called with each event the drop policy discards (for
+                cleanup such as ending a trace the event carried)
+
+        Returns:
+            The subscription, which can be passed to unsubscribe()
+        """
+        if policy not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy: {policy}")
+        subscription = Subscription(self, handler, event_types,
+                                    name or getattr(handler, '__name__', 'subscriber'),
+                                    maxsize, policy, on_drop)
+        with self._lock:
+            # Copy-on-write so publish() can iterate without the lock
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+        subscription.close()
+
+    def publish(self, event: Any):
+        """Hand an event to every matching subscriber; never blocks on handlers"""
+        self.published += 1
+        for subscription in self._subscriptions:
+            if subscription.accepts(event):
+                subscription.offer(event)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-subscriber queue depth, deliveries, drops and lag"""
+        return {subscription.name: subscription.stats() for subscription in self._subscriptions}
+
+    def close(self):
+        """Stop all delivery threads"""
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            subscription.close()
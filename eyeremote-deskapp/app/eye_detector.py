@@ -8,21 +8,145 @@ import cv2
 import numpy as np
 import threading
 import time
-from typing import List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Tuple, Optional
+
+from .luma import read_gray
+
+# Haar cascades are parsed once per process and shared by detectors that never
+# run at the same time; concurrent detectors (multi-camera workers) load their own
+_cascade_lock = threading.Lock()
+_cascades: Optional[Tuple[Any, Any]] = None
+
+# detectMultiScale settings; Config keys of the same names override them
+# (scripts/sweep.py measures accuracy against cost for other values)
+CASCADE_DEFAULTS = {
+    'face_scale_factor': 1.1,   # Image pyramid step; larger is faster but can miss faces
+    'face_min_neighbors': 5,    # Overlapping hits needed; larger rejects more false faces
+    'face_min_size': 30,        # Smallest face in pixels
+    'eye_scale_factor': 1.1,
+    'eye_min_neighbors': 3,
+    'eye_min_size': 20,         # Smallest eye in pixels
+}
+
+
+def cascade_params(config: Any = None) -> Dict[str, Any]:
+    """
+    The cascade settings in config (a Config or dict), defaults for those not set
+
+    Returns:
+        Dict with the CASCADE_DEFAULTS keys
+    """
+    get = config.get if config is not None else (lambda key, default: default)
+    params = {}
+    for key, default in CASCADE_DEFAULTS.items():
+        value = type(default)(get(key, default))
+        if key.endswith('scale_factor'):
+            value = max(1.01, value)  # 1.0 would never shrink the image
+        else:
+            value = max(0 if key.endswith('neighbors') else 1, value)
+        params[key] = value
+    return params
+
+
+def find_faces(face_cascade: Any, gray: np.ndarray, params: Dict[str, Any], flags: int = 0) -> Any:
+    """Face boxes (x, y, w, h) in a grayscale frame"""
+    size = params['face_min_size']
+    return face_cascade.detectMultiScale(
+        gray,
+        scaleFactor=params['face_scale_factor'],
+        minNeighbors=params['face_min_neighbors'],
+        minSize=(size, size),
+        flags=flags
+    )
+
+
+def find_eyes(eye_cascade: Any, face_gray: np.ndarray, params: Dict[str, Any]) -> Any:
+    """Eye boxes (x, y, w, h) in a face region"""
+    size = params['eye_min_size']
+    return eye_cascade.detectMultiScale(
+        face_gray,
+        scaleFactor=params['eye_scale_factor'],
+        minNeighbors=params['eye_min_neighbors'],
+        minSize=(size, size)
+    )
+
+
+def load_cascades(shared: bool = True) -> Tuple[Any, Any]:
+    """
+    Load the face and eye Haar cascades
+
+    Args:
+        shared: Reuse one pair per process (loaded on the first call). Pass
+            False for a detector that runs at the same time as others: a
+            CascadeClassifier must not run detectMultiScale on two threads at once
+
+    Returns:
+        Tuple of (face_cascade, eye_cascade)
+    """
+    global _cascades
+    if not shared:
+        return _read_cascades()
+    with _cascade_lock:
+        if _cascades is None:
+            _cascades = _read_cascades()
+        return _cascades
+
+
+def _read_cascades() -> Tuple[Any, Any]:
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+
+    # Verify cascades loaded successfully
+    if face_cascade.empty() or eye_cascade.empty():
+        raise Exception("Failed to load Haar cascades")
+    return face_cascade, eye_cascade
+
+
+def load_eye_cascade() -> Any:
+    """
+    A separate eye cascade instance, for threads that detect concurrently
+    (a CascadeClassifier must not run detectMultiScale on two threads at once)
+    """
+    eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+    if eye_cascade.empty():
+        raise Exception("Failed to load Haar cascades")
+    return eye_cascade
+
 
 class EyeDetector:
-    def __init__(self, camera_index: int = 0):
+    def __init__(self, camera_index: int = 0, capture_factory: Optional[Callable[[int], Any]] = None,
+                 configure_capture: Optional[Callable[[Any], None]] = None,
+                 params: Optional[Dict[str, Any]] = None, shared_cascades: bool = True):
         """
         Initialize eye detector with webcam
         
         Args:
             camera_index: Index of camera to use (default: 0)
+            capture_factory: Opens a capture for a camera index (default: cv2.VideoCapture)
+            configure_capture: Applies format/resolution/FPS to a newly opened
+                capture (default: 640x480 at 30 FPS)
+            params: Cascade settings (default: CASCADE_DEFAULTS, see cascade_params)
+            shared_cascades: Use the process-wide cascades; False loads a private
+                pair for a detector that runs alongside others
         """
         self.camera_index = camera_index
+        self.capture_factory = capture_factory or cv2.VideoCapture
+        self.configure_capture = configure_capture or self._default_capture_settings
         self.cap = None
         self.face_cascade = None
         self.eye_cascade = None
         self.is_initialized = False
+        self.timings = None  # StageTimings set by the engine; None records nothing
+        self.recorder = None  # FlightRecorder set by the engine; gets every frame read
+        self.params = params or cascade_params()
+        self.shared_cascades = shared_cascades
+
+        # Warm standby: a keeper thread holds the camera open after stop
+        self.in_standby = False
+        self.last_resume_warm = False
+        self._cap_lock = threading.Lock()
+        self._standby_stop = threading.Event()
+        self._standby_thread: Optional[threading.Thread] = None
         
         # Eye detection parameters
         self.eye_ar_threshold = 0.25  # Eye aspect ratio threshold
@@ -34,29 +158,91 @@ class EyeDetector:
     def _initialize_components(self):
         """Initialize OpenCV camera and face/eye cascades"""
         try:
-            # Initialize camera
-            self.cap = cv2.VideoCapture(self.camera_index)
-            if not self.cap.isOpened():
-                raise Exception(f"Could not open camera {self.camera_index}")
-                
-            # Set camera properties
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, 30)
-            
+            self._open_camera()
+
             # Initialize OpenCV Haar cascades
-            self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
-            
-            # Verify cascades loaded successfully
-            if self.face_cascade.empty() or self.eye_cascade.empty():
-                raise Exception("Failed to load Haar cascades")
+            self.face_cascade, self.eye_cascade = load_cascades(self.shared_cascades)
                 
             self.is_initialized = True
             print("Eye detector initialized successfully with OpenCV")
             
         except Exception as e:
+            self.cleanup()
             raise Exception(f"Failed to initialize eye detector: {str(e)}")
+
+    def _open_camera(self):
+        """Open the camera and apply capture properties"""
+        cap = self.capture_factory(self.camera_index)
+        if not cap.isOpened():
+            cap.release()
+            raise Exception(f"Could not open camera {self.camera_index}")
+
+        self.configure_capture(cap)
+        with self._cap_lock:
+            self.cap = cap
+
+    @staticmethod
+    def _default_capture_settings(cap: Any):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        cap.set(cv2.CAP_PROP_FPS, 30)
+
+    def standby(self, grace_seconds: float = 30.0, keepalive_interval: float = 0.5):
+        """
+        Pause processing but keep the camera session open for a grace period
+
+        A keeper thread grabs (without decoding) a frame every keepalive_interval
+        so the driver keeps streaming and the buffer stays fresh. After
+        grace_seconds without resume() the camera is released.
+
+        Args:
+            grace_seconds: How long to keep the camera open
+            keepalive_interval: Seconds between keepalive grabs
+        """
+        if self.in_standby:
+            return
+        self.in_standby = True
+        self._standby_stop.clear()
+        self._standby_thread = threading.Thread(target=self._keep_warm,
+                                                args=(grace_seconds, keepalive_interval),
+                                                name='camera-standby', daemon=True)
+        self._standby_thread.start()
+
+    def _keep_warm(self, grace_seconds: float, keepalive_interval: float):
+        deadline = time.monotonic() + grace_seconds
+        while not self._standby_stop.wait(keepalive_interval):
+            with self._cap_lock:
+                if time.monotonic() >= deadline:
+                    if self.cap:
+                        self.cap.release()
+                        self.cap = None
+                    print("Standby grace period over, camera released")
+                    return
+                if self.cap:
+                    self.cap.grab()
+
+    def resume(self) -> bool:
+        """
+        Leave standby, reopening the camera if the grace period ran out
+
+        Returns:
+            True if the camera session was still open (warm resume)
+        """
+        self._standby_stop.set()
+        if self._standby_thread:
+            self._standby_thread.join()
+            self._standby_thread = None
+        self.in_standby = False
+
+        with self._cap_lock:
+            warm = self.cap is not None and self.cap.isOpened()
+        if not warm:
+            if self.cap:
+                self.cap.release()
+                self.cap = None
+            self._open_camera()
+        self.last_resume_warm = warm
+        return warm
             
     def detect_eyes(self, max_faces: int = 1) -> bool:
         """
@@ -73,23 +259,59 @@ class EyeDetector:
             return False
             
         try:
-            # Capture frame
-            ret, frame = self.cap.read()
+            # Capture a grayscale frame (luma only, no BGR decode, with LumaCapture)
+            if self.timings is None:
+                ret, gray = read_gray(self.cap)
+            else:
+                ret, gray = self._read_gray_timed(self.timings)
             if not ret:
                 print("Failed to read frame from camera")
+                if self.timings is not None:
+                    self.timings.drop()
                 return False
-                
-            # Convert to grayscale for detection
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
+            if self.recorder is not None:
+                self.recorder.frame(gray)
+
+            return self.detect_eyes_in(gray, max_faces)
+
+        except Exception as e:
+            print(f"Eye detection error: {e}")
+            return False
+
+    def _read_gray_timed(self, timings) -> Tuple[bool, Optional[np.ndarray]]:
+        """read_gray() with capture and colour conversion timed separately"""
+        start = time.perf_counter()
+        if getattr(self.cap, 'delivers_gray', hasattr(self.cap, 'read_gray')):
+            # Luma capture or broker: no separate conversion step
+            found = self.cap.read_gray()
+            timings.lap('capture', start)
+            return found
+        ret, frame = self.cap.read()
+        start = timings.lap('capture', start)
+        if not ret or frame is None:
+            return False, None
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        timings.lap('convert', start)
+        return True, gray
+
+    def detect_eyes_in(self, gray: np.ndarray, max_faces: int = 1) -> bool:
+        """
+        Detect if eyes are visible in a grayscale frame that was already captured
+
+        Args:
+            gray: Grayscale frame
+            max_faces: Maximum number of faces to detect
+
+        Returns:
+            True if eyes are detected, False otherwise
+        """
+        timings = self.timings
+        try:
             # Detect faces
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30),
-                flags=cv2.CASCADE_SCALE_IMAGE
-            )
+            start = time.perf_counter() if timings is not None else 0.0
+            faces = find_faces(self.face_cascade, gray, self.params, cv2.CASCADE_SCALE_IMAGE)
+            if timings is not None:
+                start = timings.lap('face_cascade', start)
             
             if len(faces) == 0:
                 return False
@@ -99,21 +321,17 @@ class EyeDetector:
             for i, (x, y, w, h) in enumerate(faces[:max_faces]):
                 # Define face region
                 face_gray = gray[y:y+h, x:x+w]
-                face_color = frame[y:y+h, x:x+w]
                 
                 # Detect eyes within the face region
-                eyes = self.eye_cascade.detectMultiScale(
-                    face_gray,
-                    scaleFactor=1.1,
-                    minNeighbors=3,
-                    minSize=(20, 20)
-                )
+                eyes = find_eyes(self.eye_cascade, face_gray, self.params)
                 
                 # Check if we found at least one eye
                 if len(eyes) >= 1:
                     eyes_detected = True
                     break
-                        
+
+            if timings is not None:
+                timings.lap('eye_cascade', start)  # All faces checked this frame
             return eyes_detected
             
         except Exception as e:
@@ -131,8 +349,8 @@ class EyeDetector:
             return False
             
         try:
-            # Try to read a frame
-            ret, frame = self.cap.read()
+            # Try to read a frame (grayscale is enough and cheaper)
+            ret, frame = read_gray(self.cap)
             return ret and frame is not None
         except Exception:
             return False
@@ -151,22 +369,13 @@ class EyeDetector:
             return False, []
             
         try:
-            # Capture frame
-            ret, frame = self.cap.read()
+            # Capture a grayscale frame
+            ret, gray = read_gray(self.cap)
             if not ret:
                 return False, []
-                
-            # Convert to grayscale for detection
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
             # Detect faces
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30),
-                flags=cv2.CASCADE_SCALE_IMAGE
-            )
+            faces = find_faces(self.face_cascade, gray, self.params, cv2.CASCADE_SCALE_IMAGE)
             
             if len(faces) == 0:
                 return False, []
@@ -180,12 +389,7 @@ class EyeDetector:
                 face_gray = gray[y:y+h, x:x+w]
                 
                 # Detect eyes within the face region
-                eyes = self.eye_cascade.detectMultiScale(
-                    face_gray,
-                    scaleFactor=1.1,
-                    minNeighbors=3,
-                    minSize=(20, 20)
-                )
+                eyes = find_eyes(self.eye_cascade, face_gray, self.params)
                 
                 # Convert eye coordinates back to full frame coordinates
                 for (ex, ey, ew, eh) in eyes:
@@ -267,13 +471,7 @@ class EyeDetector:
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
         # Detect faces
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30),
-            flags=cv2.CASCADE_SCALE_IMAGE
-        )
+        faces = find_faces(self.face_cascade, gray, self.params, cv2.CASCADE_SCALE_IMAGE)
         
         # Draw face rectangles
         for (x, y, w, h) in faces:
@@ -281,12 +479,7 @@ class EyeDetector:
             
             # Detect eyes within face
             face_gray = gray[y:y+h, x:x+w]
-            eyes = self.eye_cascade.detectMultiScale(
-                face_gray,
-                scaleFactor=1.1,
-                minNeighbors=3,
-                minSize=(20, 20)
-            )
+            eyes = find_eyes(self.eye_cascade, face_gray, self.params)
             
             # Draw eye rectangles
             for (ex, ey, ew, eh) in eyes:
@@ -296,9 +489,19 @@ class EyeDetector:
         
     def cleanup(self):
         """Clean up resources"""
-        if self.cap:
-            self.cap.release()
-        cv2.destroyAllWindows()
+        self._standby_stop.set()
+        if self._standby_thread and self._standby_thread is not threading.current_thread():
+            self._standby_thread.join()
+        self._standby_thread = None
+        self.in_standby = False
+        with self._cap_lock:
+            if self.cap:
+                self.cap.release()
+                self.cap = None
+        try:
+            cv2.destroyAllWindows()
+        except cv2.error:
+            pass  # opencv-python-headless (used for headless installs) has no GUI backend
         self.is_initialized = False
         
     def __del__(self):
@@ -0,0 +1,196 @@
+"""
+Flight recorder for detection decisions
+The last N seconds of downsampled grayscale frames, with each frame's
+verdict and timings, are kept in a fixed-size ring of records in a
+memory-mapped .npy file. A write resizes the frame straight into its slot
+and sets a few scalars, so it allocates nothing and costs tens of
+microseconds. When a pause was wrong the ring is frozen and copied into an
+.npz clip, which FrameArraySource.from_file() replays. The ring file
+survives a crash; the next start keeps it as <name>.previous.npy, and
+dump_ring() (`eyeremote --flight-dump-ring`) turns either file into a clip.
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+DEFAULT_SECONDS = 30
+DEFAULT_WIDTH = 160
+MAX_RATE = 30  # Records per second the ring is sized for at most
+
+
+def record_dtype(width: int, height: int) -> np.dtype:
+    return np.dtype([
+        ('seq', '<i8'),         # 0 = never written
+        ('time', '<f8'),        # time.time() when the record was committed
+        ('eyes', 'u1'),         # This frame's detection
+        ('attentive', 'u1'),    # Smoothed attention state after it
+        ('paused', 'u1'),       # Media paused after it
+        ('has_frame', 'u1'),
+        ('detect_ms', '<f4'),
+        ('frame_ms', '<f4'),
+        ('frame', 'u1', (height, width)),
+    ])
+
+
+def previous_ring_path(path: str) -> str:
+    """Where a new recorder moves the ring file of the run before"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.previous{ext or '.npy'}"
+
+
+def ring_capacity(seconds: float, frame_delay: float) -> int:
+    """Records needed to cover seconds at the loop's highest rate"""
+    rate = min(MAX_RATE, 1.0 / frame_delay) if frame_delay > 0 else MAX_RATE
+    return max(2, int(seconds * rate))
+
+
+class FlightRecorder:
+    def __init__(self, path: str, capacity: int, width: int = DEFAULT_WIDTH, height: Optional[int] = None):
+        """
+        Create the ring file; one left by an earlier run is moved to previous_ring_path()
+
+        Args:
+            path: .npy file holding the ring
+            capacity: Records kept
+            width: Width frames are downsampled to
+            height: Height (default: 4:3 for width)
+        """
+        self.path = path
+        self.previous = None  # The earlier run's ring, if there was one
+        if os.path.exists(path):
+            self.previous = previous_ring_path(path)
+            os.replace(path, self.previous)
+        self.size = (width, height or width * 3 // 4)
+        self.ring = np.lib.format.open_memmap(path, mode='w+', dtype=record_dtype(*self.size), shape=(capacity,))
+        self.capacity = capacity
+        # Views made once, so writes allocate nothing
+        self._frames = [self.ring['frame'][i] for i in range(capacity)]
+        self._seq_view = self.ring['seq']
+        self._time = self.ring['time']
+        self._eyes = self.ring['eyes']
+        self._attentive = self.ring['attentive']
+        self._paused = self.ring['paused']
+        self._has_frame = self.ring['has_frame']
+        self._detect_ms = self.ring['detect_ms']
+        self._frame_ms = self.ring['frame_ms']
+        self._lock = threading.Lock()
+        self._slot = 0
+        self._seq = 0
+        self._dirty = False  # The current slot holds a frame whose record is not committed yet
+        self.frozen = False
+        self.dumps = 0
+
+    def frame(self, gray: np.ndarray):
+        """Downsample a grayscale frame into the current record"""
+        with self._lock:
+            if self.frozen:
+                return
+            cv2.resize(gray, self.size, dst=self._frames[self._slot], interpolation=cv2.INTER_LINEAR)
+            self._dirty = True
+
+    def commit(self, eyes: bool, attentive: bool, paused: bool, detect_ms: float, frame_ms: float):
+        """Complete the current record with the frame's verdict and move on"""
+        with self._lock:
+            if self.frozen:
+                return
+            slot = self._slot
+            self._seq += 1
+            self._time[slot] = time.time()
+            self._eyes[slot] = eyes
+            self._attentive[slot] = attentive
+            self._paused[slot] = paused
+            self._has_frame[slot] = self._dirty
+            self._detect_ms[slot] = detect_ms
+            self._frame_ms[slot] = frame_ms
+            self._seq_view[slot] = self._seq
+            self._slot = (slot + 1) % self.capacity
+            self._dirty = False
+
+    @property
+    def records(self) -> int:
+        return min(self._seq, self.capacity)
+
+    def dump(self, path: str, seconds: Optional[float] = None, note: str = '') -> int:
+        """
+        Freeze the ring and write its records, oldest first, as an .npz clip
+
+        Args:
+            path: Output file (.npz)
+            seconds: Only the last seconds (default: everything kept)
+            note: Stored with the clip, e.g. why it was saved
+
+        Returns:
+            Records written (0 and no file if none had a frame)
+        """
+        with self._lock:
+            was_frozen, self.frozen = self.frozen, True
+            skip = self._slot if self._dirty else None
+        try:
+            count = write_clip(self.ring, path, seconds=seconds, note=note, skip_slot=skip)
+        finally:
+            with self._lock:
+                self.frozen = was_frozen
+        self.dumps += 1
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        times = self._time[self._seq_view > 0]
+        return {
+            'file': self.path,
+            'records': self.records,
+            'capacity': self.capacity,
+            'seconds': round(float(times.max() - times.min()), 1) if len(times) > 1 else 0.0,
+            'frame_size': list(self.size),
+            'dumps': self.dumps,
+        }
+
+    def close(self):
+        with self._lock:
+            self.frozen = True  # A session thread that outlived shutdown writes nothing
+            self.ring.flush()
+
+
+def write_clip(ring: np.ndarray, path: str, seconds: Optional[float] = None, note: str = '',
+               skip_slot: Optional[int] = None) -> int:
+    """Write the committed records of a ring that have a frame, oldest first, as an .npz clip"""
+    # Records without a frame (detector in another process) would replay as black frames
+    valid = (ring['seq'] > 0) & (ring['has_frame'] > 0)
+    if skip_slot is not None:
+        valid[skip_slot] = False
+    order = np.flatnonzero(valid)
+    order = order[np.argsort(ring['seq'][order])]
+    if seconds is not None and len(order):
+        times = ring['time'][order]
+        order = order[times >= times[-1] - seconds]
+    if not len(order):
+        return 0
+    records = ring[order]  # A copy; the ring can be written again
+    times = records['time']
+    fps = (len(times) - 1) / (times[-1] - times[0]) if len(times) > 1 and times[-1] > times[0] else 0.0
+    np.savez_compressed(path, frames=records['frame'], fps=fps, time=times, eyes=records['eyes'],
+                        attentive=records['attentive'], paused=records['paused'],
+                        has_frame=records['has_frame'], detect_ms=records['detect_ms'],
+                        frame_ms=records['frame_ms'], note=note)
+    return len(records)
+
+
+def dump_ring(ring_path: str, path: str, seconds: Optional[float] = None, note: str = '') -> int:
+    """Dump a ring file left behind by an earlier run (e.g. after a crash)"""
+    ring = np.load(ring_path, mmap_mode='r')
+    return write_clip(ring, path, seconds=seconds, note=note)
+
+
+def dump_path(directory: str) -> str:
+    """A new timestamped clip name in directory"""
+    name = f"eyeremote_flight_{time.strftime('%Y%m%d_%H%M%S')}"
+    path = os.path.join(directory, name + '.npz')
+    suffix = 1
+    while os.path.exists(path):
+        suffix += 1
+        path = os.path.join(directory, f"{name}_{suffix}.npz")
+    return path
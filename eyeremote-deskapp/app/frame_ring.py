@@ -0,0 +1,149 @@
+"""
+Shared-memory frame ring
+Frames written by one process and read by others through a
+multiprocessing.shared_memory block: a fixed number of slots, each with a
+small header (sequence number, capture time, shape) followed by the pixels.
+Used by the detector worker process and the camera broker.
+"""
+
+import os
+import struct
+from typing import Any, Optional, Tuple
+
+# Per-slot header: seq (0 while the slot is written), captured at, height, width, channels
+SLOT_HEADER = struct.Struct('<Qdiii')
+
+DEFAULT_SLOTS = 4
+DEFAULT_SLOT_BYTES = 1920 * 1080
+
+
+class FrameRing:
+    def __init__(self, slots: int = DEFAULT_SLOTS, slot_bytes: int = DEFAULT_SLOT_BYTES,
+                 name: Optional[str] = None, track: bool = True):
+        """
+        Open a frame ring
+
+        The writer clears a slot's sequence number before copying a frame in
+        and sets it afterwards, so a reader that finds the same number before
+        and after using a frame got a whole one.
+
+        Args:
+            slots: Frames kept
+            slot_bytes: Largest frame (height * width * channels) a slot holds
+            name: Attach to an existing ring (default: create one)
+            track: Let the resource tracker unlink the block if the creator
+                dies. Rings shared with unrelated processes must not be
+                tracked on either side: a reader's tracker would unlink the
+                block when the reader exits.
+        """
+        from multiprocessing import shared_memory
+
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.stride = SLOT_HEADER.size + slot_bytes
+        self.owner = name is None
+        self.track = track
+        self._retrack = False
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=slots * self.stride,
+                                                  track=track)
+        except TypeError:
+            # Before Python 3.13 every open registers the block (with the
+            # tracker a spawned worker shares with its parent)
+            self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=slots * self.stride)
+            if not track and os.name == 'posix':
+                from multiprocessing import resource_tracker
+
+                resource_tracker.unregister(self.shm._name, 'shared_memory')
+                self._retrack = self.owner  # unlink() unregisters again
+        self._next = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, seq: int, frame: Any, captured: float) -> int:
+        """
+        Copy a frame (grayscale or BGR, uint8) into the next slot
+
+        Returns:
+            The slot, or -1 if the frame is larger than a slot
+        """
+        if frame.nbytes > self.slot_bytes:
+            return -1
+        slot = self._next
+        self._next = (slot + 1) % self.slots
+        offset = slot * self.stride
+        SLOT_HEADER.pack_into(self.shm.buf, offset, 0, 0.0, 0, 0, 0)
+        target = self._array(offset, frame.shape)
+        target[...] = frame
+        del target
+        height, width = frame.shape[:2]
+        channels = frame.shape[2] if frame.ndim == 3 else 1
+        SLOT_HEADER.pack_into(self.shm.buf, offset, seq, captured, height, width, channels)
+        return slot
+
+    def view(self, slot: int, seq: Optional[int] = None) -> Optional[Tuple[int, float, Any]]:
+        """
+        Read-only view of a slot, without copying
+
+        The view stays valid until the writer wraps around to the slot again
+        (`slots` frames later); check with is_current() after using it.
+
+        Args:
+            slot: Slot from a result or frame message
+            seq: Expected sequence number (default: whatever the slot holds)
+
+        Returns:
+            (seq, captured at, view), or None if the slot holds another frame
+        """
+        if not 0 <= slot < self.slots:
+            return None
+        offset = slot * self.stride
+        found, captured, height, width, channels = SLOT_HEADER.unpack_from(self.shm.buf, offset)
+        if found == 0 or (seq is not None and found != seq):
+            return None
+        view = self._array(offset, (height, width) if channels == 1 else (height, width, channels))
+        view.flags.writeable = False
+        return found, captured, view
+
+    def read(self, slot: int, seq: Optional[int] = None) -> Optional[Tuple[int, float, Any]]:
+        """
+        Copy the frame out of a slot
+
+        Returns:
+            (seq, captured at, frame), or None if the slot was overwritten
+        """
+        found = self.view(slot, seq)
+        if found is None:
+            return None
+        seq, captured, view = found
+        frame = view.copy()
+        del view
+        if not self.is_current(slot, seq):
+            return None
+        return seq, captured, frame
+
+    def is_current(self, slot: int, seq: int) -> bool:
+        """True while the slot still holds frame seq"""
+        return SLOT_HEADER.unpack_from(self.shm.buf, slot * self.stride)[0] == seq
+
+    def _array(self, offset: int, shape: Tuple[int, ...]) -> Any:
+        import numpy as np
+
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset + SLOT_HEADER.size)
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A reader still holds views; the mapping goes away with them
+        if self.owner:
+            if self._retrack:
+                from multiprocessing import resource_tracker
+
+                resource_tracker.register(self.shm._name, 'shared_memory')
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,163 @@
+"""
+Per-stage timing for the detection pipeline
+Each stage (capture, colour conversion, face cascade, eye cascade,
+smoothing, actuation, the whole frame) keeps a rolling window of recent
+durations from time.perf_counter(). Percentiles are computed only when
+someone asks, so recording a sample is one subtraction and one deque
+append.
+"""
+
+import json
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+# Stages in pipeline order; others may be recorded too and are listed after these
+STAGES = ('camera_check', 'capture', 'convert', 'face_cascade', 'eye_cascade', 'detect', 'smoothing',
+          'frame', 'actuation')
+
+DEFAULT_WINDOW = 600  # Samples kept per stage (a minute at 10 fps)
+
+
+def percentile(samples: Iterable[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile, or None without samples"""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+class StageTimings:
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        """
+        Rolling per-stage timings, safe to record from several threads
+
+        Args:
+            window: Samples kept per stage and frame times kept for the rate
+        """
+        self.window = window
+        self._stages: Dict[str, deque] = {}
+        self._frame_times = deque(maxlen=window)
+        self.frames = 0
+        self.drops = 0
+        self.samples = 0
+        self.started_at = time.monotonic()
+        self._lap_cost_us: Optional[float] = None
+
+    def lap(self, stage: str, start: float) -> float:
+        """
+        Record the time since start for a stage
+
+        Args:
+            stage: Stage name
+            start: time.perf_counter() when the stage began
+
+        Returns:
+            Now, to start the next stage from
+        """
+        now = time.perf_counter()
+        samples = self._stages.get(stage)
+        if samples is None:
+            samples = self._stages.setdefault(stage, deque(maxlen=self.window))
+        samples.append((now - start) * 1000.0)
+        self.samples += 1
+        return now
+
+    def add(self, stage: str, ms: float):
+        """Record a duration measured elsewhere (e.g. in a worker process)"""
+        samples = self._stages.get(stage)
+        if samples is None:
+            samples = self._stages.setdefault(stage, deque(maxlen=self.window))
+        samples.append(ms)
+        self.samples += 1
+
+    def frame_done(self):
+        """Count a processed frame for the achieved rate"""
+        self._frame_times.append(time.monotonic())
+        self.frames += 1
+
+    def drop(self, count: int = 1):
+        """Count frames the camera did not deliver"""
+        self.drops += count
+
+    def reset(self):
+        self._stages = {}
+        self._frame_times = deque(maxlen=self.window)
+        self.frames = self.drops = self.samples = 0
+        self.started_at = time.monotonic()
+
+    def rate(self) -> float:
+        """Frames per second over the window"""
+        times = list(self._frame_times)
+        if len(times) < 2 or times[-1] <= times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def lap_cost_us(self) -> float:
+        """What one lap() costs here, measured once"""
+        if self._lap_cost_us is None:
+            probe = StageTimings(window=64)
+            rounds = 2000
+            start = time.perf_counter()
+            for _ in range(rounds):
+                probe.lap('probe', start)
+            self._lap_cost_us = (time.perf_counter() - start) * 1e6 / rounds
+        return self._lap_cost_us
+
+    def overhead_pct(self) -> Optional[float]:
+        """Time spent recording as a share of the mean frame time"""
+        frame = self._stages.get('frame')
+        if not frame or not self.frames:
+            return None
+        frame_ms = sum(frame) / len(frame)
+        laps_per_frame = self.samples / self.frames
+        # perf_counter() calls around a stage are part of the cost too
+        cost_ms = laps_per_frame * self.lap_cost_us() / 1000.0
+        return 100.0 * cost_ms / frame_ms if frame_ms > 0 else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-stage p50/p95/p99/max/mean in ms, frames, drops, rate and overhead"""
+        stages = {}
+        names = [name for name in STAGES if name in self._stages]
+        names += sorted(name for name in list(self._stages) if name not in STAGES)
+        for name in names:
+            values: List[float] = list(self._stages[name])
+            if not values:
+                continue
+            stages[name] = {
+                'count': len(values),
+                'p50': _round(percentile(values, 0.5)),
+                'p95': _round(percentile(values, 0.95)),
+                'p99': _round(percentile(values, 0.99)),
+                'max': _round(max(values)),
+                'mean': _round(sum(values) / len(values)),
+            }
+        overhead = self.overhead_pct()
+        return {
+            'stages': stages,
+            'frames': self.frames,
+            'drops': self.drops,
+            'fps': round(self.rate(), 2),
+            'window': self.window,
+            'overhead_pct': round(overhead, 4) if overhead is not None else None,
+        }
+
+    def dump(self, path: str):
+        """Write the snapshot as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+def format_table(snapshot: Dict[str, Any]) -> str:
+    """Plain-text table of a snapshot, for the stats panel and scripts"""
+    lines = [f"{'stage':<14}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  ms"]
+    for name, stage in snapshot['stages'].items():
+        lines.append(f"{name:<14}" + ''.join(f"{stage[key]:>9.2f}" for key in ('p50', 'p95', 'p99', 'max')))
+    overhead = snapshot['overhead_pct']
+    lines.append(f"\n{snapshot['fps']:.1f} fps, {snapshot['frames']} frames, {snapshot['drops']} dropped, "
+                 f"overhead {'-' if overhead is None else f'{overhead:.3f}%'}")
+    return '\n'.join(lines)
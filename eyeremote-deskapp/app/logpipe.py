@@ -0,0 +1,185 @@
+"""
+Activity log pipeline
+Log messages may come from any thread (detection loop, event bus, camera
+supervisor). They are appended to a queue without taking a lock; the Tk
+thread drains it in batches on a timer and keeps only the newest lines in
+the textbox. A background listener writes every record, including debug
+chatter the window filters out, to a rotating log file.
+"""
+
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, List
+
+DEFAULT_MAX_LINES = 500
+DEFAULT_BATCH = 200
+DEFAULT_INTERVAL_MS = 100
+
+FILE_FORMAT = '%(asctime)s %(levelname)-7s %(message)s'
+
+
+def parse_level(level: Any, default: int = logging.INFO) -> int:
+    """Accept a logging level number or name ('debug', 'INFO', ...)"""
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    return value if isinstance(value, int) else default
+
+
+class LogPipe:
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES, ui_level: Any = logging.INFO,
+                 file_path: str = '', file_level: Any = logging.DEBUG,
+                 max_bytes: int = 1_000_000, backups: int = 3):
+        """
+        Create the pipeline
+
+        Args:
+            max_lines: Lines the window keeps; older records waiting to be
+                drained are dropped as well
+            ui_level: Lowest level shown in the window
+            file_path: Rotating log file (default: no file)
+            file_level: Lowest level written to the file
+            max_bytes: Size at which the file is rotated
+            backups: Rotated files kept
+        """
+        self.max_lines = max(1, int(max_lines))
+        self.ui_level = parse_level(ui_level)
+        self.file_level = parse_level(file_level, logging.DEBUG)
+        # deque.append/popleft are atomic, so producers never block on the Tk thread
+        self._pending = deque(maxlen=self.max_lines)
+        self.file_path = file_path
+        self._file_queue = None
+        self._listener = None
+        self._handler = None
+        if file_path:
+            self._start_file(file_path, max_bytes, backups)
+
+    def _start_file(self, path: str, max_bytes: int, backups: int):
+        import queue
+        from logging.handlers import QueueListener, RotatingFileHandler
+
+        try:
+            self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                encoding='utf-8', delay=True)
+        except OSError as e:
+            print(f"Warning: Could not open log file {path}: {e}")
+            return
+        self._handler.setFormatter(logging.Formatter(FILE_FORMAT))
+        self._handler.setLevel(self.file_level)
+        self._file_queue = queue.SimpleQueue()
+        self._listener = QueueListener(self._file_queue, self._handler, respect_handler_level=True)
+        self._listener.start()
+
+    def log(self, message: str, level: int = logging.INFO):
+        """Queue a message; safe to call from any thread"""
+        created = time.time()
+        if level >= self.ui_level:
+            self._pending.append((created, level, message))
+        if self._file_queue is not None and level >= self.file_level:
+            record = logging.LogRecord('eyeremote', level, '', 0, message, None, None)
+            record.created = created
+            record.msecs = (created - int(created)) * 1000
+            self._file_queue.put(record)
+
+    def debug(self, message: str):
+        self.log(message, logging.DEBUG)
+
+    def info(self, message: str):
+        self.log(message, logging.INFO)
+
+    def warning(self, message: str):
+        self.log(message, logging.WARNING)
+
+    def drain(self, max_batch: int = DEFAULT_BATCH) -> List[str]:
+        """
+        Take up to max_batch queued messages for the window
+
+        Returns:
+            Lines formatted as "[HH:MM:SS] message", oldest first
+        """
+        lines = []
+        while len(lines) < max_batch:
+            try:
+                created, level, message = self._pending.popleft()
+            except IndexError:
+                break
+            timestamp = datetime.fromtimestamp(created).strftime("%H:%M:%S")
+            prefix = '' if level < logging.WARNING else f"{logging.getLevelName(level)}: "
+            # One record per line keeps the line cap exact
+            lines.append(f"[{timestamp}] {prefix}{message}".replace("\n", " "))
+        return lines
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def close(self):
+        """Flush and close the log file"""
+        if self._listener is not None:
+            self._listener.stop()  # Writes what is still queued
+            self._listener = None
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+        self._file_queue = None
+
+
+class LogView:
+    def __init__(self, pipe: LogPipe, textbox: Any, schedule: Callable[[int, Callable], Any],
+                 interval_ms: int = DEFAULT_INTERVAL_MS, max_batch: int = DEFAULT_BATCH):
+        """
+        Show a LogPipe in a text widget, from the widget's own thread
+
+        Args:
+            pipe: Pipeline to drain
+            textbox: Widget with insert/delete/see (a CTkTextbox or tk.Text)
+            schedule: Runs a callback after a delay on the widget's thread (root.after)
+            interval_ms: Time between drains
+            max_batch: Lines inserted per drain at most
+        """
+        self.pipe = pipe
+        self.textbox = textbox
+        self.schedule = schedule
+        self.interval_ms = interval_ms
+        self.max_batch = max_batch
+        self.lines = 0
+        self.batches = 0
+        self.trimmed = 0
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self.schedule(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def _tick(self):
+        if not self._running:
+            return
+        try:
+            self.pump()
+        finally:
+            self.schedule(self.interval_ms, self._tick)
+
+    def pump(self) -> int:
+        """
+        Insert one batch in a single widget call and trim to the line cap
+
+        Returns:
+            Lines inserted
+        """
+        lines = self.pipe.drain(self.max_batch)
+        if not lines:
+            return 0
+        self.textbox.insert("end", "\n".join(lines) + "\n")
+        self.lines += len(lines)
+        excess = self.lines - self.pipe.max_lines
+        if excess > 0:
+            self.textbox.delete("1.0", f"{excess + 1}.0")
+            self.lines -= excess
+            self.trimmed += excess
+        self.textbox.see("end")
+        self.batches += 1
+        return len(lines)
@@ -0,0 +1,136 @@
+"""
+Luma-only capture
+Detection only needs grayscale, but cap.read() decodes every frame to BGR
+and detect_eyes then converts it back with cvtColor. With YUYV the camera
+already delivers the Y plane: LumaCapture asks OpenCV for the raw buffer
+(CAP_PROP_CONVERT_RGB = 0, honored by the V4L2 backend on Linux) and hands
+detection a strided view of the luma bytes without copying or converting.
+Color is only produced when read() is called, e.g. for a preview.
+"""
+
+from typing import Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def _size(cap: Any) -> Tuple[int, int]:
+    return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+
+def is_jpeg(raw: np.ndarray) -> bool:
+    return raw.size > 2 and raw.dtype == np.uint8 and raw.flat[0] == 0xFF and raw.flat[1] == 0xD8
+
+
+def yuyv_luma(raw: np.ndarray, width: int, height: int) -> Optional[np.ndarray]:
+    """
+    Y plane of a raw YUYV (Y0 U Y1 V) buffer as a view into the buffer
+
+    Accepts the (1, N) byte row the V4L2 backend returns as well as
+    (height, width, 2) and (height, width * 2) layouts.
+
+    Returns:
+        (height, width) uint8 view with a column stride of 2 bytes, or None
+        if the buffer is not YUYV of that size
+    """
+    if raw.dtype != np.uint8 or raw.size != width * height * 2 or not raw.flags.c_contiguous:
+        return None
+    return raw.reshape(height, width, 2)[:, :, 0]
+
+
+def raw_to_gray(raw: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Grayscale image from whatever the capture delivered, as cheaply as possible"""
+    if raw.ndim == 3 and raw.shape[2] == 3:
+        return cv2.cvtColor(raw, cv2.COLOR_BGR2GRAY)  # Backend ignored CONVERT_RGB
+    if raw.ndim == 2 and raw.shape == (height, width):
+        return raw  # Already single channel (GREY cameras)
+    luma = yuyv_luma(raw, width, height)
+    if luma is not None:
+        return luma
+    if is_jpeg(raw):
+        # libjpeg skips the chroma planes for a grayscale decode
+        gray = cv2.imdecode(raw.reshape(-1), cv2.IMREAD_GRAYSCALE)
+        if gray is not None:
+            return gray
+    raise ValueError(f"Unsupported raw frame layout {raw.shape} for {width}x{height}")
+
+
+def raw_to_bgr(raw: np.ndarray, width: int, height: int) -> np.ndarray:
+    """Color image from a raw frame (only needed for previews)"""
+    if raw.ndim == 3 and raw.shape[2] == 3:
+        return raw
+    if raw.ndim == 2 and raw.shape == (height, width):
+        return cv2.cvtColor(raw, cv2.COLOR_GRAY2BGR)
+    if yuyv_luma(raw, width, height) is not None:
+        return cv2.cvtColor(raw.reshape(height, width, 2), cv2.COLOR_YUV2BGR_YUYV)
+    if is_jpeg(raw):
+        bgr = cv2.imdecode(raw.reshape(-1), cv2.IMREAD_COLOR)
+        if bgr is not None:
+            return bgr
+    raise ValueError(f"Unsupported raw frame layout {raw.shape} for {width}x{height}")
+
+
+def read_gray(cap: Any) -> Tuple[bool, Optional[np.ndarray]]:
+    """Grayscale frame from any capture: luma-only if it supports it, else read() + cvtColor"""
+    if hasattr(cap, 'read_gray'):
+        return cap.read_gray()
+    ret, frame = cap.read()
+    if not ret or frame is None:
+        return False, None
+    return True, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+class LumaCapture:
+    def __init__(self, cap: Any):
+        """
+        Wrap an opened capture and switch it to raw frames
+
+        Args:
+            cap: cv2.VideoCapture (or anything with the same interface)
+        """
+        self._cap = cap
+        self.raw_frames = 0  # Frames that arrived raw (luma taken without conversion)
+        cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+
+    def isOpened(self) -> bool:
+        return self._cap.isOpened()
+
+    def set(self, prop: int, value: float) -> bool:
+        result = self._cap.set(prop, value)
+        if prop == cv2.CAP_PROP_FOURCC:
+            # Some backends re-enable conversion when the format changes
+            self._cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        return result
+
+    def get(self, prop: int) -> float:
+        return self._cap.get(prop)
+
+    def grab(self) -> bool:
+        return self._cap.grab()
+
+    def retrieve_gray(self) -> Tuple[bool, Optional[np.ndarray]]:
+        ret, raw = self._cap.retrieve()
+        if not ret or raw is None:
+            return False, None
+        if not (raw.ndim == 3 and raw.shape[2] == 3):
+            self.raw_frames += 1
+        return True, raw_to_gray(raw, *_size(self._cap))
+
+    def read_gray(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._cap.grab():
+            return False, None
+        return self.retrieve_gray()
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        ret, raw = self._cap.retrieve()
+        if not ret or raw is None:
+            return False, None
+        return True, raw_to_bgr(raw, *_size(self._cap))
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._cap.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self):
+        self._cap.release()
@@ -5,17 +5,19 @@ Automatically pauses/resumes media playback based on user's gaze detection.
 """
 
 import sys
-import customtkinter as ctk
-from tkinter import messagebox
 import threading
-import time
-from datetime import datetime, timedelta
-import cv2
-import numpy as np
-import pyautogui
-import psutil
-from .eye_detector import EyeDetector
+import customtkinter as ctk
+from tkinter import messagebox, filedialog
 from .config import Config
+from .engine import EyeRemoteEngine
+from .logpipe import LogPipe, LogView
+from .viewmodel import ViewModel, ViewBinder
+from .instrumentation import format_table
+from .tracing import format_summary
+from .memory_monitor import format_memory
+from .utils import get_camera_list
+from .events import (FrameProcessed, AttentionChanged, DetectionStateChanged, ConfigChanged,
+                     CameraLost, CameraRecovered)
 
 # Set appearance mode and color theme
 ctk.set_appearance_mode("light")
@@ -28,27 +30,36 @@ class EyeRemoteApp:
         self.root.geometry("520x520")
         self.root.resizable(True, True)
         
-        # Initialize components
+        # Log messages from any thread are queued; the Tk thread shows them in batches
         self.config = Config()
-        self.eye_detector = None
-        self.detection_thread = None
-        self.is_detecting = False
-        self.last_eye_seen = None
-        self.media_paused = False
+        self.logpipe = LogPipe(max_lines=self.config.get('log_max_lines', 500),
+                               ui_level=self.config.get('log_ui_level', 'INFO'),
+                               file_path=self.config.get('log_file', ''),
+                               file_level=self.config.get('log_file_level', 'DEBUG'),
+                               max_bytes=self.config.get('log_file_max_bytes', 1_000_000),
+                               backups=self.config.get('log_file_backups', 3))
 
-        # State management for smoothing detection results
-        self.eyes_detected_stable_state = False
-        self.eyes_present_counter = 0
-        self.no_eyes_counter = 0
-        self.EYES_PRESENT_THRESHOLD = 2  # Frames to confirm eyes are present
-        self.NO_EYES_THRESHOLD = 3       # Frames to confirm eyes are gone
-        
-        # Configure pyautogui
-        pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.1
+        # Detection, actuation and remote interfaces live in the engine; the window is a view
+        self.engine = EyeRemoteEngine(self.config, log=self.logpipe.info, debug_log=self.logpipe.debug,
+                                      notify=lambda title, m: self.root.after(0, messagebox.showwarning, title, m))
         
         self.setup_ui()
+        self.log_view = LogView(self.logpipe, self.log_text, self.root.after)
+        self.log_view.start()
+
+        # Engine events write the latest state here; the window samples it at ui_refresh_hz
+        self.view = ViewModel(status="Stopped", attentive=False, detecting=False)
+        self.view_binder = ViewBinder(self.view, self.root.after, self.config.get('ui_refresh_hz', 10))
+        self.view_binder.bind('status', self.status_var.set)
+        self.view_binder.bind('attentive', self.update_status_card)
+        self.view_binder.bind('detecting', self._show_detection_state)
+        self.view_binder.start()
         self.load_config()
+        self.engine.bus.subscribe(self._on_ui_event,
+                                  (FrameProcessed, AttentionChanged, DetectionStateChanged, ConfigChanged,
+                                   CameraLost, CameraRecovered),
+                                  name='ui', maxsize=64)
+        self.engine.start_services()
         
     def setup_ui(self):
         """Setup the modern user interface with CustomTkinter"""
@@ -127,8 +138,22 @@ class EyeRemoteApp:
                                       variable=self.target_app_var, width=150, height=32)
         target_combo.grid(row=3, column=1, sticky="w", pady=3, padx=(0, 15))
         
+        # Camera selection (filled in the background from the cached camera list)
+        camera_label = ctk.CTkLabel(config_frame, text="Camera:", 
+                                   font=ctk.CTkFont(size=14))
+        camera_label.grid(row=4, column=0, sticky="w", pady=3, padx=(15, 10))
+        
+        camera_row = ctk.CTkFrame(config_frame, fg_color="transparent")
+        camera_row.grid(row=4, column=1, sticky="w", pady=3, padx=(0, 15))
+        self.camera_var = ctk.StringVar(value="Camera 0")
+        self.camera_combo = ctk.CTkComboBox(camera_row, values=[], variable=self.camera_var, width=200, height=32)
+        self.camera_combo.grid(row=0, column=0)
+        ctk.CTkButton(camera_row, text="↻", width=32, height=32,
+                      command=lambda: self.refresh_cameras(refresh=True)).grid(row=0, column=1, padx=(5, 0))
+        self.camera_choices = {}
+        
         # Bottom padding for config frame
-        ctk.CTkLabel(config_frame, text="").grid(row=4, column=0, pady=(0, 10))
+        ctk.CTkLabel(config_frame, text="").grid(row=5, column=0, pady=(0, 10))
         
         # Control buttons frame
         button_frame = ctk.CTkFrame(main_container, fg_color="transparent")
@@ -148,6 +173,11 @@ class EyeRemoteApp:
                                         command=self.test_media_key, height=40, width=150,
                                         font=ctk.CTkFont(size=13))
         self.test_button.grid(row=0, column=2, padx=5)
+
+        self.wrong_button = ctk.CTkButton(button_frame, text="That Was Wrong",
+                                         command=self.report_wrong_decision, height=40, width=150,
+                                         font=ctk.CTkFont(size=13), fg_color="#B45309", hover_color="#92400E")
+        self.wrong_button.grid(row=0, column=3, padx=5)
         
         # Activity log frame
         log_frame = ctk.CTkFrame(main_container, corner_radius=10, fg_color="transparent")
@@ -160,6 +190,9 @@ class EyeRemoteApp:
         log_title = ctk.CTkLabel(log_frame, text="Activity Log", 
                                 font=ctk.CTkFont(size=16, weight="bold"))
         log_title.grid(row=0, column=0, pady=(0, 5), padx=0)
+        ctk.CTkButton(log_frame, text="Pipeline Stats", width=110, height=26,
+                      command=self.show_stats_panel).grid(row=0, column=0, sticky="e", pady=(0, 5))
+        self.stats_window = None
         
         # Log textbox
         self.log_text = ctk.CTkTextbox(log_frame, height=100, font=ctk.CTkFont(family="Consolas", size=11))
@@ -185,406 +218,201 @@ class EyeRemoteApp:
             self.eye_status_label.configure(text="NO EYES DETECTED", text_color="white")
         
     def log_message(self, message):
-        """Add message to log with timestamp"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
-        self.log_text.insert("end", log_entry)
-        self.log_text.see("end")
-        self.root.update_idletasks()
+        """Add message to log; shown with a timestamp on the next drain"""
+        self.logpipe.info(message)
         
     def load_config(self):
         """Load saved configuration"""
         self.timeout_var.set(self.config.get('timeout', 3))
         self.max_faces_var.set(self.config.get('max_faces', 1))
         self.target_app_var.set(self.config.get('target_app', 'Any'))
-        
+        self.camera_var.set(self._camera_label(self.config.get('camera_index', 0), None))
+        self.refresh_cameras()
+        
+    @staticmethod
+    def _camera_label(index, name):
+        return f"{index}: {name}" if name else f"Camera {index}"
+
+    def refresh_cameras(self, refresh=False):
+        """Enumerate cameras off the Tk thread and fill the camera list"""
+        def worker():
+            cameras = get_camera_list(refresh=refresh)
+            self.root.after(0, self._show_cameras, cameras)
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _show_cameras(self, cameras):
+        self.camera_choices = {self._camera_label(c['index'], c['name']): c['index'] for c in cameras}
+        self.camera_combo.configure(values=list(self.camera_choices))
+        selected = self.config.get('camera_index', 0)
+        for label, index in self.camera_choices.items():
+            if index == selected:
+                self.camera_var.set(label)
+
+    def _selected_camera_index(self):
+        label = self.camera_var.get()
+        if label in self.camera_choices:
+            return self.camera_choices[label]
+        # Typed in, or the list has not loaded yet: "2", "2: Name" or "Camera 2"
+        return int(label.split(':')[0].replace('Camera', '').strip())
+
     def save_config(self):
         """Save current configuration"""
         try:
             timeout = int(self.timeout_var.get())
             max_faces = int(self.max_faces_var.get())
+            camera_index = self._selected_camera_index()
 
+            self.config.set('camera_index', camera_index)
             self.config.set('timeout', timeout)
             self.config.set('max_faces', max_faces)
             self.config.set('target_app', self.target_app_var.get())
             self.config.save()
             return True
         except (ValueError, TypeError):
-            messagebox.showerror("Invalid Input", "Timeout and Max Faces must be valid numbers.")
+            messagebox.showerror("Invalid Input", "Timeout, Max Faces and Camera must be valid numbers.")
             return False
-        
+
+    def _on_ui_event(self, event):
+        """Reflect engine events in the view model (runs on the bus thread, no Tk calls)"""
+        if isinstance(event, AttentionChanged):
+            self.view.set(attentive=event.attentive)
+        elif isinstance(event, DetectionStateChanged):
+            if event.detecting:
+                self.view.set(detecting=True, status="Detecting")
+            else:
+                self.view.set(detecting=False, attentive=False, status="Error" if event.error else "Stopped")
+                self._log_ui_stats()
+        elif isinstance(event, ConfigChanged):
+            # Rare (status socket), so it goes straight to the Tk thread
+            self.root.after(0, self._show_config_change, event.key, event.value)
+        elif isinstance(event, CameraLost):
+            if self.engine.is_detecting:
+                self.view.set(status="Reconnecting camera...")
+        elif self.engine.is_detecting:
+            self.view.set(status="Detecting")
+
+    def _show_detection_state(self, detecting):
+        """Enable the buttons that apply while detection runs or not"""
+        self.start_button.configure(state="disabled" if detecting else "normal")
+        self.stop_button.configure(state="normal" if detecting else "disabled")
+
+    def _log_ui_stats(self):
+        stats = self.view_binder.stats()
+        self.logpipe.debug(f"UI: {stats['ticks_per_second']} refreshes/s, {stats['updates_per_second']} widget "
+                           f"updates/s for {stats['model_writes']} state writes")
+
+    def _show_config_change(self, key, value):
+        """Mirror a setting changed through the status socket in the settings panel"""
+        ui_vars = {'timeout': self.timeout_var, 'max_faces': self.max_faces_var, 'target_app': self.target_app_var}
+        if key in ui_vars:
+            ui_vars[key].set(value)
+
     def start_detection(self):
         """Start eye detection"""
-        if self.is_detecting:
+        if self.engine.is_detecting:
             return
             
         if not self.save_config():
             return # Don't start if config is invalid
 
-        self.is_detecting = True
-        self.start_button.configure(state="disabled")
-        self.stop_button.configure(state="normal")
-        self.status_var.set("Starting...")
-        self.log_message("Initializing camera and detector...")
-
-        # Run detector initialization in a separate thread to avoid UI freeze
-        self.detection_thread = threading.Thread(target=self._initialize_and_run_detector, daemon=True)
-        self.detection_thread.start()
-
-    def _initialize_and_run_detector(self):
-        """Initializes the detector and then starts the detection loop."""
-        try:
-            # This is the long-running part
-            self.eye_detector = EyeDetector(camera_index=self.config.get('camera_index', 0))
-            
-            # Once initialized, update state and start the main loop
-            self.last_eye_seen = datetime.now()
-            self.root.after(0, self.log_message, "Eye detection started")
-            self.root.after(0, lambda: self.status_var.set("Detecting"))
-            self.detection_loop()
-
-        except Exception as e:
-            # If initialization fails, update UI back on the main thread
-            def update_ui_on_error():
-                messagebox.showerror("Error", f"Failed to start detection: {str(e)}")
-                self.is_detecting = False
-                self.start_button.configure(state="normal")
-                self.stop_button.configure(state="disabled")
-                self.status_var.set("Error")
-                self.log_message(f"Initialization failed: {e}")
-            self.root.after(0, update_ui_on_error)
+        previous_status = self.view.get('status')
+        self.view.set(detecting=True, status="Starting...")
+        self.view_binder.refresh()
+        if not self.engine.start() and not self.engine.is_detecting:
+            # The previous session is still shutting down; nothing was started
+            self.view.set(detecting=False, status=previous_status)
+            self.view_binder.refresh()
+            self.log_message("Detection did not start because the previous session is still stopping. "
+                             "Try again in a moment.")
             
     def stop_detection(self):
         """Stop eye detection"""
-        self.is_detecting = False
-        
-        if self.eye_detector:
-            self.eye_detector.cleanup()
-            self.eye_detector = None
-            
-        # Update UI
-        self.start_button.configure(state="normal")
-        self.stop_button.configure(state="disabled")
-        self.status_var.set("Stopped")
-
-        # Reset detection state
-        self.eyes_detected_stable_state = False
-        self.eyes_present_counter = 0
-        self.no_eyes_counter = 0
-
-        self.update_status_card(False)
-        
-        self.log_message("Eye detection stopped")
-        
-    def detection_loop(self):
-        """Main detection loop"""
-        try:
-            timeout_seconds = int(self.timeout_var.get())
-        except (ValueError, TypeError):
-            timeout_seconds = 3 # Fallback to default
-            self.log_message("Invalid timeout value, using default 3s.")
-        timeout_duration = timedelta(seconds=timeout_seconds)
-        
-        while self.is_detecting:
-            try:
-                if not self.eye_detector:
-                    self.log_message("Eye detector not available, stopping detection")
-                    break
-                
-                # Check if camera is still working
-                if not self.eye_detector.is_camera_working():
-                    self.log_message("Camera not working properly, stopping detection")
-                    break
-                    
-                # Detect eyes
-                eyes_detected = self.eye_detector.detect_eyes()
-                current_time = datetime.now()
-
-                # --- State smoothing logic ---
-                if eyes_detected:
-                    self.no_eyes_counter = 0
-                    self.eyes_present_counter += 1
-                    if self.eyes_present_counter >= self.EYES_PRESENT_THRESHOLD and not self.eyes_detected_stable_state:
-                        self.eyes_detected_stable_state = True
-                        self.root.after(0, self.update_status_card, True)
-                else:
-                    self.eyes_present_counter = 0
-                    self.no_eyes_counter += 1
-                    if self.no_eyes_counter >= self.NO_EYES_THRESHOLD and self.eyes_detected_stable_state:
-                        self.eyes_detected_stable_state = False
-                        self.root.after(0, self.update_status_card, False)
-
-                # --- Media control logic based on stable state ---
-                if self.eyes_detected_stable_state:
-                    self.last_eye_seen = current_time
-
-                    # If media was paused, resume it
-                    if self.media_paused:
-                        # Send media key (will focus target app automatically)
-                        self.send_media_key_event()
-                        self.media_paused = False
-                        self.log_message("Media resumed - eyes detected")
-                else:
-                    # If eyes are not detected, check if we need to pause
-                    if not self.media_paused and self.last_eye_seen and (current_time - self.last_eye_seen > timeout_duration):
-                        # Send media key (will focus target app automatically)
-                        self.send_media_key_event()
-                        self.media_paused = True
-                        self.log_message(f"Media paused - eyes not detected for {timeout_seconds}s")
-                
-                # Update status
-                self.root.after(0, lambda: self.status_var.set("Detecting"))
-                
-                time.sleep(0.1)  # Small delay to prevent excessive CPU usage
-                
-            except Exception as e:
-                self.log_message(f"Detection error: {str(e)}")
-                time.sleep(1)
-        
-        # Clean up when detection loop exits
-        self._handle_detection_loop_exit()
-    
-    def _handle_detection_loop_exit(self):
-        """Handle cleanup when the detection loop exits"""
-        # Update UI state on the main thread
-        def update_ui():
-            if self.is_detecting:  # Only update if we're still supposed to be detecting
-                self.is_detecting = False
-                self.start_button.configure(state="normal")
-                self.stop_button.configure(state="disabled")
-                self.status_var.set("Stopped")
-                
-                # Reset detection state
-                self.eyes_detected_stable_state = False
-                self.eyes_present_counter = 0
-                self.no_eyes_counter = 0
-                
-                self.update_status_card(False)
-                self.log_message("Eye detection stopped")
-        
-        self.root.after(0, update_ui)
-                
-    def _execute_send_media_key(self, is_test=False):
-        """Finds the target app, focuses it, and sends a media play/pause keypress."""
-        target_app = self.target_app_var.get().lower()
-
-        if target_app != "any":
-            if not self._focus_target_app(target_app, is_test):
-                return  # Stop if we couldn't find or focus the app
-
-        self.log_message(f"Sending Media Play/Pause key (Target: {self.target_app_var.get()})")
-        # Pass the target_hwnd to the send function for direct messaging on Windows
-        self._send_keypress_with_fallback(getattr(self, '_last_focused_hwnd', None))
-
-    def _send_keypress_with_fallback(self, target_hwnd=None):
-        """Sends a media play/pause key using the most reliable method available."""
-        # On Windows, if we have a specific window handle, use PostMessage for reliability.
-        if sys.platform == "win32" and target_hwnd:
-            try:
-                import win32api
-                # Define constants manually in case they are not in all pywin32 versions
-                WM_APPCOMMAND = 0x0319
-                APPCOMMAND_MEDIA_PLAY_PAUSE = 14
-
-                # The command must be packed into the lParam
-                lparam = APPCOMMAND_MEDIA_PLAY_PAUSE << 16
-
-                win32api.PostMessage(target_hwnd, WM_APPCOMMAND, 0, lparam)
-                time.sleep(0.05) # Small delay between key down and up
-                self.log_message(f"win32 PostMessage: Media key sent directly to window handle {target_hwnd}.")
+        # Bounded by engine.stop_timeout; the buttons update on DetectionStateChanged
+        self.view.set(status="Stopping...")
+        self.view_binder.refresh()
+        self.engine.stop()
+
+    def show_stats_panel(self):
+        """Open (or raise) the per-stage timing panel, refreshed once a second"""
+        if self.stats_window is not None and self.stats_window.winfo_exists():
+            self.stats_window.focus()
+            return
+        window = ctk.CTkToplevel(self.root)
+        window.title("Pipeline Stats")
+        window.geometry("480x420")
+        window.grid_columnconfigure(0, weight=1)
+        window.grid_rowconfigure(0, weight=1)
+        text = ctk.CTkTextbox(window, font=ctk.CTkFont(family="Consolas", size=11))
+        text.grid(row=0, column=0, sticky="nsew", padx=10, pady=(10, 5))
+        buttons = ctk.CTkFrame(window, fg_color="transparent")
+        buttons.grid(row=1, column=0, sticky="e", padx=10, pady=(0, 10))
+        ctk.CTkButton(buttons, text="Memory Snapshot", width=120,
+                      command=self.memory_snapshot).grid(row=0, column=0, padx=(0, 5))
+        ctk.CTkButton(buttons, text="Save Trace...", width=120,
+                      command=self.save_trace).grid(row=0, column=1, padx=(0, 5))
+        ctk.CTkButton(buttons, text="Save JSON...", width=120,
+                      command=self.save_timings).grid(row=0, column=2)
+        self.stats_window = window
+
+        def refresh():
+            if not window.winfo_exists():
                 return
-            except Exception as e:
-                self.log_message(f"win32 PostMessage failed: {e}. Falling back to pyautogui.")
-
-        # Fallback for other OS or if PostMessage fails
-        try:
-            pyautogui.press('playpause')
-            self.log_message("pyautogui: Media Play/Pause key sent successfully.")
-        except Exception as e1:
-            self.log_message(f"pyautogui failed: {str(e1)}. Trying fallback...")
-            try:
-                from pynput.keyboard import Key, Controller
-                keyboard = Controller()
-                keyboard.press(Key.media_play_pause)
-                keyboard.release(Key.media_play_pause)
-                self.log_message("pynput fallback: Media key sent successfully.")
-            except Exception as e2:
-                self.log_message(f"pynput fallback failed: {str(e2)}")
-                messagebox.showwarning("Input Error", "Failed to send media key. Please check OS permissions for accessibility/input monitoring.")
-
-    def send_media_key_event(self, delay_seconds=0):
-        """
-        Schedules a media play/pause keypress.
-        A delay is used for testing to allow window focus to change.
-        """
-        if delay_seconds > 0:
-            self.log_message(f"Test: Sending media key in {delay_seconds} seconds...")
-            self.root.after(int(delay_seconds * 1000), lambda: self._execute_send_media_key(is_test=True))
-        else:
-            # For automatic detection, execute immediately.
-            self._execute_send_media_key(is_test=False)
-
-    def _focus_target_app(self, target_app_name, is_test):
-        """Find and focus the window of the target application."""
-        self.log_message(f"Attempting to focus '{target_app_name}'...")
-        self._last_focused_hwnd = None # Reset the handle
-
-        # Find the process ID (PID) of the target application
-        target_pid = None
-        for proc in psutil.process_iter(['pid', 'name']):
-            if target_app_name in proc.info['name'].lower():
-                target_pid = proc.info['pid']
-                break
-
-        if not target_pid:
-            self.log_message(f"Application '{target_app_name}' is not running.")
-            if is_test:
-                messagebox.showwarning("App Not Found", f"The application '{target_app_name}' does not appear to be running.")
-            return False
-
-        # Platform-specific window activation
-        try:
-            if sys.platform == "win32":
-                # Retry the entire find-and-focus logic to handle initialization race conditions.
-                for attempt in range(2):
-                    try:
-                        import win32gui
-                        import win32com.client
-                        import win32process
-
-                        target_hwnd = None
-
-                        def enum_windows_callback(hwnd, _):
-                            nonlocal target_hwnd
-                            if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd):
-                                _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                                try:
-                                    proc = psutil.Process(pid)
-                                    if target_app_name in proc.name().lower():
-                                        target_hwnd = hwnd
-                                        return False
-                                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                                    pass
-                            return True
-
-                        win32gui.EnumWindows(enum_windows_callback, None)
-
-                        if target_hwnd:
-                            self._last_focused_hwnd = target_hwnd
-                            shell = win32com.client.Dispatch("WScript.Shell")
-                            shell.AppActivate(target_hwnd)
-                            self.log_message(f"Focused '{target_app_name}' on attempt {attempt + 1}.")
-                            break # Success, exit the retry loop
-                        elif attempt == 0: # If no window found on first try
-                            self.log_message(f"Could not find window for '{target_app_name}' on attempt 1. Retrying...")
-                            time.sleep(0.5)
-                        else: # If no window found on second try
-                            self.log_message(f"Could not find a visible window for '{target_app_name}' after 2 attempts.")
-                            return False
-                    except Exception as e:
-                        if attempt == 0:
-                            self.log_message(f"Focus attempt 1 failed with error: {e}. Retrying...")
-                            time.sleep(0.5)
-                        else:
-                            # If the second attempt also fails, re-raise the exception to be caught outside
-                            raise e
-                else: # This 'else' belongs to the for loop, executes if 'break' is not hit
-                    self.log_message("All focus attempts failed.")
-                    return False
-                
-                # If we broke out of the loop, it was a success.
-                time.sleep(0.2) # Give OS a moment to process the focus change.
-                return True
-
-            elif sys.platform == "darwin": # macOS
-                from AppKit import NSWorkspace, NSRunningApplication
-                app = NSRunningApplication.runningApplicationWithProcessIdentifier_(target_pid)
-                if app:
-                    app.activateWithOptions_(0) # NSApplicationActivateIgnoringOtherApps
-                    self.log_message(f"Activated '{target_app_name}' (PID: {target_pid}).")
-                    time.sleep(0.2) # Give OS a moment to process the focus change.
-                    return True
-                return False
-
-            elif sys.platform == "linux":
-                # This requires 'xdotool' to be installed (sudo apt-get install xdotool)
-                import subprocess
-                # Find window ID from PID and activate it
-                cmd = f"xdotool search --pid {target_pid} windowactivate"
-                subprocess.run(cmd, shell=True, check=True, capture_output=True)
-                self.log_message(f"Activated '{target_app_name}' window (PID: {target_pid}).")
-                time.sleep(0.2)
-                return True
-
-        except (ImportError, Exception) as e:
-            self.log_message(f"Error focusing application: {e}")
-            if is_test:
-                messagebox.showwarning("Focus Error", f"Could not focus '{target_app_name}'. Please ensure required libraries (e.g., pywin32, xdotool) are installed.")
-            return False # Fallback to prevent sending keypress to wrong window
-
-    def is_target_app_active(self):
-        """Check if target application is currently active"""
-        target_app = self.target_app_var.get().lower()
-
-        # If "Any" is selected, we don't filter by application, so it's always considered active.
-        if target_app == "any":
-            return True
-
-        active_process_name = ""
-
-        try:
-            if sys.platform == "win32":
-                import win32gui
-                import win32process
-
-                hwnd = win32gui.GetForegroundWindow()
-                _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                active_process_name = psutil.Process(pid).name().lower()
-
-            elif sys.platform == "darwin": # macOS
-                from AppKit import NSWorkspace
-                active_app = NSWorkspace.sharedWorkspace().frontmostApplication()
-                active_process_name = active_app.localizedName().lower()
-
-            elif sys.platform == "linux":
-                # This requires 'xdotool' to be installed (sudo apt-get install xdotool)
-                try:
-                    import subprocess
-                    cmd = 'xdotool getactivewindow getwindowname'
-                    # First, try to get the process name via PID
-                    cmd_pid = 'xdotool getactivewindow getwindowpid'
-                    pid = int(subprocess.check_output(cmd_pid, shell=True, text=True).strip())
-                    active_process_name = psutil.Process(pid).name().lower()
-                except (FileNotFoundError, subprocess.CalledProcessError):
-                    # Fallback to window title if xdotool or process lookup fails
-                    cmd = 'xdotool getactivewindow getwindowname'
-                    active_process_name = subprocess.check_output(cmd, shell=True, text=True).lower()
-                except (FileNotFoundError, subprocess.CalledProcessError):
-                    self.log_message("is_target_app_active: 'xdotool' not found on Linux. Falling back to allow.")
-                    return True # Fallback if xdotool is not installed
+            stats = self.engine.get_stats()
+            text.delete("1.0", "end")
+            if stats['timings'] is None:
+                text.insert("end", "Instrumentation is off (config: instrumentation)")
+            elif not stats['timings']['stages']:
+                text.insert("end", "No frames yet - start detection")
             else:
-                # For other OS, assume it's okay
-                return True
-
-            if active_process_name:
-                self.log_message(f"Active window process: '{active_process_name}'")
-                if target_app in active_process_name:
-                    return True # Target app found in active process name
+                text.insert("end", format_table(stats['timings']))
+            if stats['latency'] is not None:
+                text.insert("end", "\n\nLook-away to pause / look-back to resume\n" + format_summary(stats['latency']))
+            if stats['memory'] is not None:
+                text.insert("end", "\n\n" + format_memory(stats['memory']))
+            window.after(1000, refresh)
+
+        refresh()
+
+    def save_timings(self):
+        """Write the current per-stage timings to a JSON file the user picks"""
+        path = filedialog.asksaveasfilename(parent=self.stats_window, defaultextension=".json",
+                                            initialfile="eyeremote_timings.json",
+                                            filetypes=[("JSON", "*.json")])
+        if path and self.engine.dump_timings(path):
+            self.log_message(f"Pipeline timings saved to {path}")
+
+    def memory_snapshot(self):
+        """Log the allocation sites that grew since the previous snapshot"""
+        if self.engine.memory is None:
+            self.log_message("Memory monitor is off (config: memory_monitor)")
+            return
+        # Snapshots of a large heap take a moment; keep the window responsive
+        threading.Thread(target=self.engine.memory.report_snapshot, daemon=True).start()
 
-            return False # Target app is not "any" and not the active process
+    def save_trace(self):
+        """Write the pause/resume latency traces as a Chrome trace file"""
+        path = filedialog.asksaveasfilename(parent=self.stats_window, defaultextension=".json",
+                                            initialfile="eyeremote_trace.json",
+                                            filetypes=[("Chrome trace", "*.json")])
+        if path and self.engine.export_trace(path):
+            self.log_message(f"Latency traces saved to {path} (open in chrome://tracing or ui.perfetto.dev)")
 
-        except Exception as e:
-            self.log_message(f"Could not check active app: {e}")
-            return True  # If we can't check, assume it's okay
+    def report_wrong_decision(self):
+        """Save what the camera saw before the last pause/resume, for replay"""
+        threading.Thread(target=self.engine.report_wrong_decision, daemon=True).start()
 
     def test_media_key(self):
         """Test media key functionality"""
-        self.send_media_key_event(delay_seconds=3)
+        # A delay is used for testing to allow window focus to change.
+        self.log_message("Test: Sending media key in 3 seconds...")
+        self.root.after(3000, lambda: self.engine.send_media_key(is_test=True))
         
     def on_closing(self):
         """Handle application closing"""
-        if self.is_detecting:
-            self.stop_detection()
+        self.view_binder.stop()
+        self.log_view.stop()
+        self.engine.shutdown()
+        self.logpipe.close()
         self.root.destroy()
         
     def run(self):
@@ -0,0 +1,377 @@
+"""
+Media backend registry for EyeRemote
+Probes the available media control backends once and fans play/pause
+decisions out to several players concurrently
+"""
+
+import importlib.util
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+# Backend capabilities
+CAP_EXPLICIT_PAUSE = 'explicit_pause'  # Can pause/play instead of toggling
+CAP_STATE_QUERY = 'state_query'        # Can report whether a player is playing
+CAP_TARGETING = 'targeting'            # Can address one specific player
+
+# Actions understood by every backend
+ACTION_PAUSE = 'pause'
+ACTION_RESUME = 'resume'
+ACTION_TOGGLE = 'toggle'
+
+
+class MediaBackend:
+    """Base class for a way of controlling media playback"""
+
+    name = 'base'
+    capabilities: FrozenSet[str] = frozenset()
+
+    def probe(self) -> bool:
+        """
+        Check whether this backend can be used on this machine
+
+        Returns:
+            True if the backend is usable
+        """
+        return False
+
+    def send(self, action: str, player: Optional[str] = None) -> bool:
+        """
+        Apply a media action
+
+        Args:
+            action: One of ACTION_PAUSE, ACTION_RESUME or ACTION_TOGGLE
+            player: Player to address (only used by targeting backends)
+
+        Returns:
+            True if the action was delivered
+        """
+        raise NotImplementedError
+
+
+class KeyPressBackend(MediaBackend):
+    """Global media Play/Pause key via pyautogui, falling back to pynput"""
+
+    name = 'key'
+    capabilities = frozenset()
+
+    def probe(self) -> bool:
+        # Check without importing: pyautogui pulls in tkinter and needs a display at import
+        for module in ('pyautogui', 'pynput'):
+            if importlib.util.find_spec(module) is not None:
+                return True
+        return False
+
+    def send(self, action: str, player: Optional[str] = None) -> bool:
+        try:
+            import pyautogui
+            pyautogui.press('playpause')
+            return True
+        except Exception:
+            from pynput.keyboard import Key, Controller
+            keyboard = Controller()
+            keyboard.press(Key.media_play_pause)
+            keyboard.release(Key.media_play_pause)
+            return True
+
+
+class Win32AppCommandBackend(MediaBackend):
+    """Posts WM_APPCOMMAND messages directly to a player's window (Windows)"""
+
+    name = 'win32'
+    capabilities = frozenset({CAP_EXPLICIT_PAUSE, CAP_TARGETING})
+
+    WM_APPCOMMAND = 0x0319
+    APPCOMMANDS = {
+        ACTION_TOGGLE: 14,  # APPCOMMAND_MEDIA_PLAY_PAUSE
+        ACTION_RESUME: 46,  # APPCOMMAND_MEDIA_PLAY
+        ACTION_PAUSE: 47,   # APPCOMMAND_MEDIA_PAUSE
+    }
+
+    def probe(self) -> bool:
+        if sys.platform != 'win32':
+            return False
+        try:
+            import win32api
+            import win32gui
+            import win32process
+            return True
+        except ImportError:
+            return False
+
+    def _find_window(self, player: str):
+        """Find the first visible window owned by a process matching player"""
+        import psutil
+        import win32gui
+        import win32process
+
+        found = None
+
+        def enum_windows_callback(hwnd, _):
+            nonlocal found
+            if win32gui.IsWindowVisible(hwnd) and win32gui.GetWindowText(hwnd):
+                _, pid = win32process.GetWindowThreadProcessId(hwnd)
+                try:
+                    if player in psutil.Process(pid).name().lower():
+                        found = hwnd
+                        return False
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+            return True
+
+        try:
+            win32gui.EnumWindows(enum_windows_callback, None)
+        except Exception:
+            # EnumWindows raises when the callback stops enumeration early
+            pass
+        return found
+
+    def send(self, action: str, player: Optional[str] = None) -> bool:
+        import win32api
+
+        if not player:
+            return False
+        hwnd = self._find_window(player.lower())
+        if not hwnd:
+            return False
+        lparam = self.APPCOMMANDS[action] << 16
+        win32api.PostMessage(hwnd, self.WM_APPCOMMAND, 0, lparam)
+        return True
+
+
+class MprisBackend(MediaBackend):
+    """Controls MPRIS players through playerctl (Linux)"""
+
+    name = 'mpris'
+    capabilities = frozenset({CAP_EXPLICIT_PAUSE, CAP_STATE_QUERY, CAP_TARGETING})
+
+    COMMANDS = {
+        ACTION_TOGGLE: 'play-pause',
+        ACTION_RESUME: 'play',
+        ACTION_PAUSE: 'pause',
+    }
+
+    def __init__(self, command_timeout: float = 2.0):
+        self.command_timeout = command_timeout
+
+    def probe(self) -> bool:
+        return sys.platform.startswith('linux') and shutil.which('playerctl') is not None
+
+    def _playerctl(self, args: List[str], player: Optional[str]) -> subprocess.CompletedProcess:
+        cmd = ['playerctl']
+        if player:
+            cmd.append(f'--player={player}')
+        return subprocess.run(cmd + args, capture_output=True, text=True,
+                              timeout=self.command_timeout)
+
+    def query_state(self, player: Optional[str] = None) -> Optional[str]:
+        """
+        Get the playback status of a player
+
+        Returns:
+            'playing', 'paused', 'stopped' or None if unknown
+        """
+        result = self._playerctl(['status'], player)
+        if result.returncode != 0:
+            return None
+        return result.stdout.strip().lower() or None
+
+    def send(self, action: str, player: Optional[str] = None) -> bool:
+        # Skip players that are already in the requested state
+        if action != ACTION_TOGGLE:
+            state = self.query_state(player)
+            if state is None:
+                return False
+            if (action == ACTION_PAUSE and state != 'playing') or \
+               (action == ACTION_RESUME and state == 'playing'):
+                return True
+        return self._playerctl([self.COMMANDS[action]], player).returncode == 0
+
+
+@dataclass
+class BackendStats:
+    """Delivery statistics for one media target"""
+    attempts: int = 0
+    successes: int = 0
+    failures: int = 0
+    skipped_busy: int = 0
+    last_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+    total_latency_ms: float = 0.0
+
+    @property
+    def mean_latency_ms(self) -> float:
+        completed = self.successes + self.failures
+        return self.total_latency_ms / completed if completed else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        data['mean_latency_ms'] = round(self.mean_latency_ms, 2)
+        return data
+
+
+def default_backends() -> List[MediaBackend]:
+    """Backends in order of preference"""
+    return [Win32AppCommandBackend(), MprisBackend(), KeyPressBackend()]
+
+
+class MediaBackendRegistry:
+    def __init__(self, backends: Optional[List[MediaBackend]] = None,
+                 max_workers: int = 8,
+                 log: Optional[Callable[[str], None]] = None):
+        """
+        Initialize the registry
+
+        Args:
+            backends: Backends to register (default: default_backends())
+            max_workers: Number of threads used to deliver actions
+            log: Optional callback receiving log messages
+        """
+        self.backends: Dict[str, MediaBackend] = {}
+        for backend in (backends if backends is not None else default_backends()):
+            self.register(backend)
+
+        self.log = log or (lambda message: None)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='media-backend')
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._available: Optional[Dict[str, bool]] = None
+        self._in_flight: Dict[str, Future] = {}
+        self._stats: Dict[str, BackendStats] = {}
+
+    def register(self, backend: MediaBackend):
+        """Register a backend under its name"""
+        self.backends[backend.name] = backend
+
+    def probe_all(self) -> Dict[str, bool]:
+        """
+        Probe every registered backend once and cache the result
+
+        Returns:
+            Mapping of backend name to availability
+        """
+        with self._probe_lock:
+            if self._available is None:
+                available = {}
+                for name, backend in self.backends.items():
+                    try:
+                        available[name] = bool(backend.probe())
+                    except Exception:
+                        available[name] = False
+                self._available = available
+                usable = [name for name, ok in available.items() if ok]
+                self.log(f"Media backends available: {', '.join(usable) or 'none'}")
+            return dict(self._available)
+
+    def available_backends(self) -> List[str]:
+        """Names of the backends that passed probing"""
+        return [name for name, ok in self.probe_all().items() if ok]
+
+    def capabilities(self, name: str) -> FrozenSet[str]:
+        """Capabilities declared by a backend"""
+        backend = self.backends.get(name)
+        return backend.capabilities if backend else frozenset()
+
+    @staticmethod
+    def parse_target(target: str) -> Tuple[str, Optional[str]]:
+        """
+        Split a target spec such as 'mpris:spotify' into (backend, player)
+
+        Args:
+            target: Backend name optionally followed by ':player'
+
+        Returns:
+            Tuple of (backend_name, player or None)
+        """
+        backend_name, _, player = target.partition(':')
+        return backend_name.strip().lower(), (player.strip() or None)
+
+    def dispatch(self, action: str, targets: List[str]) -> List[Future]:
+        """
+        Send an action to all targets concurrently without waiting for them
+
+        A target whose previous action is still running is skipped, so a
+        hung backend never queues work in front of the others.
+
+        Args:
+            action: One of ACTION_PAUSE, ACTION_RESUME or ACTION_TOGGLE
+            targets: Target specs, e.g. ['mpris:spotify', 'win32:chrome']
+
+        Returns:
+            Futures resolving to True/False per submitted target
+        """
+        available = self.probe_all()
+        futures = []
+
+        for target in targets:
+            backend_name, player = self.parse_target(target)
+            backend = self.backends.get(backend_name)
+            if not backend or not available.get(backend_name):
+                self.log(f"Media target '{target}' skipped: backend '{backend_name}' not available")
+                continue
+
+            # Backends that cannot pause explicitly can only toggle
+            backend_action = action
+            if CAP_EXPLICIT_PAUSE not in backend.capabilities:
+                backend_action = ACTION_TOGGLE
+            if CAP_TARGETING not in backend.capabilities:
+                player = None
+
+            with self._lock:
+                stats = self._stats.setdefault(target, BackendStats())
+                previous = self._in_flight.get(target)
+                if previous is not None and not previous.done():
+                    stats.skipped_busy += 1
+                    self.log(f"Media target '{target}' still busy, skipping '{action}'")
+                    continue
+                stats.attempts += 1
+                future = self._executor.submit(self._deliver, target, backend,
+                                               backend_action, player)
+                self._in_flight[target] = future
+            futures.append(future)
+
+        return futures
+
+    def _deliver(self, target: str, backend: MediaBackend, action: str,
+                 player: Optional[str]) -> bool:
+        """Run one backend action and record its outcome"""
+        start = time.perf_counter()
+        try:
+            success = bool(backend.send(action, player))
+            error = None
+        except Exception as e:
+            success = False
+            error = e
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            stats = self._stats[target]
+            if success:
+                stats.successes += 1
+            else:
+                stats.failures += 1
+            stats.last_latency_ms = latency_ms
+            stats.total_latency_ms += latency_ms
+            stats.max_latency_ms = max(stats.max_latency_ms, latency_ms)
+
+        if success:
+            self.log(f"Media target '{target}': {action} sent ({latency_ms:.0f} ms)")
+        else:
+            reason = f": {error}" if error else ""
+            self.log(f"Media target '{target}': {action} failed{reason}")
+        return success
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-target delivery statistics"""
+        with self._lock:
+            return {target: stats.to_dict() for target, stats in self._stats.items()}
+
+    def shutdown(self):
+        """Stop accepting work; running deliveries finish in the background"""
+        self._executor.shutdown(wait=False)
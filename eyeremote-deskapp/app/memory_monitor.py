@@ -0,0 +1,213 @@
+"""
+Memory accounting for long sessions
+A background thread samples the process RSS (psutil) at a fixed interval
+and keeps a rolling window for the current, peak and growth-rate figures.
+tracemalloc snapshots are taken on demand; each one is compared with the
+previous to list the source lines whose allocations grew the most.
+"""
+
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_INTERVAL = 60.0   # Seconds between RSS samples
+DEFAULT_SAMPLES = 1440    # A day at one sample a minute
+TRACE_FRAMES = 10         # Stack depth tracemalloc records per allocation
+TOP_SITES = 10
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    import psutil
+
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def growth_rate(samples: List[tuple]) -> Optional[float]:
+    """
+    Least-squares slope of (seconds, MB) samples in MB per hour
+
+    Args:
+        samples: (monotonic time, MB) pairs
+
+    Returns:
+        The slope, or None with fewer than three samples
+    """
+    if len(samples) < 3:
+        return None
+    n = len(samples)
+    mean_t = sum(t for t, _ in samples) / n
+    mean_m = sum(m for _, m in samples) / n
+    var_t = sum((t - mean_t) ** 2 for t, _ in samples)
+    if var_t <= 0:
+        return None
+    covariance = sum((t - mean_t) * (m - mean_m) for t, m in samples)
+    return covariance / var_t * 3600
+
+
+class MemoryMonitor:
+    def __init__(self, interval: float = DEFAULT_INTERVAL, max_samples: int = DEFAULT_SAMPLES,
+                 log: Optional[Callable[[str], None]] = None):
+        """
+        Sample RSS in the background and compare tracemalloc snapshots
+
+        Args:
+            interval: Seconds between RSS samples
+            max_samples: Samples kept for the growth rate
+            log: Where snapshot reports are written
+        """
+        self.interval = interval
+        self.log = log or print
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.baseline_mb: Optional[float] = None
+        self.peak_mb = 0.0
+        self._snapshot = None
+        self._started_tracing = False
+        self.snapshots = 0
+        self.top_sites: List[Dict[str, Any]] = []
+
+    # --- RSS ----------------------------------------------------------------
+
+    def sample(self) -> float:
+        """Record the current RSS and return it in MB"""
+        mb = rss_mb()
+        with self._lock:
+            self._samples.append((time.monotonic(), mb))
+            if self.baseline_mb is None:
+                self.baseline_mb = mb
+            self.peak_mb = max(self.peak_mb, mb)
+        return mb
+
+    def start(self):
+        """Start sampling every interval seconds"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='memory-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling, and tracemalloc if a snapshot started it"""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+            self._snapshot = None
+
+    def _run(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                self.log(f"Memory sample failed: {e}")
+                return
+            if self._stop_event.wait(self.interval):
+                return
+
+    def reset_baseline(self):
+        """Forget earlier samples, e.g. once the pipeline has warmed up"""
+        with self._lock:
+            self._samples.clear()
+            self.baseline_mb = None
+            self.peak_mb = 0.0
+
+    def growth_mb_per_hour(self) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples)
+        return growth_rate(samples)
+
+    # --- tracemalloc --------------------------------------------------------
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def take_snapshot(self, limit: int = TOP_SITES) -> List[Dict[str, Any]]:
+        """
+        Take a tracemalloc snapshot and compare it with the previous one
+
+        The first call starts tracemalloc (allocations made before then are
+        not seen) and returns the largest sites instead of the growth.
+
+        Args:
+            limit: Sites to report
+
+        Returns:
+            Dicts with site, size_kb, size_diff_kb, count and count_diff,
+            largest growth first
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            self._started_tracing = True
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+        if self._snapshot is None:
+            stats = snapshot.statistics('lineno')
+            sites = [{'site': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1),
+                      'size_diff_kb': round(stat.size / 1024, 1), 'count': stat.count,
+                      'count_diff': stat.count} for stat in stats[:limit]]
+        else:
+            stats = snapshot.compare_to(self._snapshot, 'lineno')
+            sites = [{'site': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1),
+                      'size_diff_kb': round(stat.size_diff / 1024, 1), 'count': stat.count,
+                      'count_diff': stat.count_diff} for stat in stats[:limit]]
+        self._snapshot = snapshot
+        self.snapshots += 1
+        self.top_sites = sites
+        return sites
+
+    def report_snapshot(self, limit: int = TOP_SITES) -> List[Dict[str, Any]]:
+        """Take a snapshot and log the top growth sites"""
+        started = not tracemalloc.is_tracing()
+        first = self._snapshot is None
+        sites = self.take_snapshot(limit)
+        if started:
+            self.log(f"Memory: RSS {self.sample():.1f} MB; allocation tracing started, "
+                     f"take another snapshot to see what grows")
+            return sites
+        self.log(f"Memory: RSS {self.sample():.1f} MB; "
+                 + ("largest allocation sites:" if first else "growth since the last snapshot:"))
+        for site in sites:
+            self.log(f"  {site['size_diff_kb']:+.1f} KB ({site['count_diff']:+d} blocks) {site['site']}")
+        return sites
+
+    # --- Reporting ----------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Current, baseline and peak RSS, growth rate and the last snapshot's top sites"""
+        with self._lock:
+            current = self._samples[-1][1] if self._samples else None
+            samples = len(self._samples)
+        growth = self.growth_mb_per_hour()
+        traced = tracemalloc.get_traced_memory()[0] / (1024 * 1024) if tracemalloc.is_tracing() else None
+        return {
+            'rss_mb': round(current, 1) if current is not None else None,
+            'baseline_mb': round(self.baseline_mb, 1) if self.baseline_mb is not None else None,
+            'peak_mb': round(self.peak_mb, 1),
+            'growth_mb_per_hour': round(growth, 2) if growth is not None else None,
+            'samples': samples,
+            'traced_mb': round(traced, 1) if traced is not None else None,
+            'snapshots': self.snapshots,
+            'top_sites': self.top_sites,
+        }
+
+
+def format_memory(stats: Dict[str, Any]) -> str:
+    """One-line memory summary, for the stats panel and the CLI"""
+    if stats['rss_mb'] is None:
+        return "Memory: no samples yet"
+    growth = stats['growth_mb_per_hour']
+    return (f"Memory: RSS {stats['rss_mb']:.1f} MB (start {stats['baseline_mb']:.1f}, peak {stats['peak_mb']:.1f}), "
+            f"growth {'-' if growth is None else f'{growth:+.1f} MB/h'}")
@@ -0,0 +1,252 @@
+"""
+Multi-camera attention fusion
+Runs one capture-and-detect worker per camera (e.g. the laptop camera and a
+camera on the external monitor) and fuses their latest verdicts, so looking
+at the "other" screen still counts as watching. All workers draw from one
+shared detection budget, so adding a camera does not add CPU.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .luma import read_gray
+
+# Fusion rules
+FUSION_ANY = 'any'            # Eyes on any camera
+FUSION_ALL = 'all'            # Eyes on every camera that has a verdict
+FUSION_WEIGHTED = 'weighted'  # Weighted vote of the cameras against a threshold
+FUSION_RULES = (FUSION_ANY, FUSION_ALL, FUSION_WEIGHTED)
+
+
+def fuse(verdicts: Dict[int, Optional[bool]], rule: str = FUSION_ANY,
+         weights: Optional[Dict[int, float]] = None, threshold: float = 0.5) -> bool:
+    """
+    Combine per-camera verdicts into one
+
+    Args:
+        verdicts: Camera index -> eyes detected (None: no fresh verdict, ignored)
+        rule: 'any', 'all' or 'weighted'
+        weights: Camera index -> weight for the weighted rule (default 1.0)
+        threshold: Share of the total weight that must see eyes
+
+    Returns:
+        True if the viewer counts as attentive
+    """
+    known = {index: verdict for index, verdict in verdicts.items() if verdict is not None}
+    if not known:
+        return False
+    if rule == FUSION_ALL:
+        return all(known.values())
+    if rule == FUSION_WEIGHTED:
+        weights = weights or {}
+        total = sum(float(weights.get(index, 1.0)) for index in known)
+        seen = sum(float(weights.get(index, 1.0)) for index, verdict in known.items() if verdict)
+        return total > 0 and seen / total >= threshold
+    return any(known.values())
+
+
+class DetectionBudget:
+    def __init__(self, max_rate: float):
+        """
+        Shared rate limit for all camera workers
+
+        Slots are handed out in request order, so the workers take turns and
+        together never run more than max_rate detections per second.
+
+        Args:
+            max_rate: Detections per second across all cameras (0 = unlimited)
+        """
+        self.interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self, stop_event: threading.Event) -> bool:
+        """
+        Wait for the next detection slot
+
+        Returns:
+            False if stop_event was set while waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            return not stop_event.wait(delay)
+        return not stop_event.is_set()
+
+
+class CameraWorker:
+    def __init__(self, detector: Any, budget: DetectionBudget, max_faces: int = 1):
+        """
+        Capture and detect on one camera in its own thread
+
+        Args:
+            detector: EyeDetector for the camera
+            budget: Shared detection budget
+            max_faces: Maximum faces to check per frame
+        """
+        self.detector = detector
+        self.camera_index = detector.camera_index
+        self.budget = budget
+        self.max_faces = max_faces
+        self.verdict: Optional[bool] = None
+        self.verdict_at = 0.0
+        self.working = True
+        self.detections = 0
+        self.failures = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop_event.clear()
+        self.working = True
+        self._thread = threading.Thread(target=self._run, name=f"camera-{self.camera_index}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop_event.set()
+        # A read in progress is aborted through the capture's own interrupt
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while self.budget.acquire(self._stop_event):
+            ret, gray = read_gray(self.detector.cap) if self.detector.cap else (False, None)
+            if self._stop_event.is_set():
+                break
+            if not ret:
+                # SupervisedCapture has already retried or reconnected; no verdict for now
+                self.failures += 1
+                self.working = False
+                self.verdict = None
+                self._stop_event.wait(0.5)
+                continue
+            self.working = True
+            self.verdict = self.detector.detect_eyes_in(gray, self.max_faces)
+            self.verdict_at = time.monotonic()
+            self.detections += 1
+
+    def fresh_verdict(self, max_age: float) -> Optional[bool]:
+        if self.verdict is None or time.monotonic() - self.verdict_at > max_age:
+            return None
+        return self.verdict
+
+
+class MultiCameraDetector:
+    def __init__(self, camera_indices: Sequence[int], detector_factory: Callable[[int], Any],
+                 rule: str = FUSION_ANY, weights: Optional[Dict[int, float]] = None,
+                 threshold: float = 0.5, max_rate: float = 10.0, max_faces: int = 1,
+                 stale_after: float = 1.0, log: Callable[[str], None] = print):
+        """
+        Several cameras behind the EyeDetector interface the engine uses
+
+        Args:
+            camera_indices: Cameras to open
+            detector_factory: Creates an EyeDetector for a camera index; the
+                workers detect concurrently, so each needs its own cascades
+                (shared_cascades=False)
+            rule: Fusion rule ('any', 'all' or 'weighted')
+            weights: Camera index -> weight for the weighted rule
+            threshold: Weighted rule threshold (share of the weight)
+            max_rate: Detections per second shared by all cameras
+            max_faces: Maximum faces to check per frame
+            stale_after: Seconds after which a camera's verdict is ignored
+            log: Receives progress messages
+        """
+        if rule not in FUSION_RULES:
+            raise ValueError(f"Unknown fusion rule: {rule}")
+        self.camera_index = tuple(camera_indices)
+        self.rule = rule
+        self.weights = {int(index): float(weight) for index, weight in (weights or {}).items()}
+        self.threshold = threshold
+        self.stale_after = stale_after
+        self.log = log
+        self.budget = DetectionBudget(max_rate)
+        self.in_standby = False
+        self.last_resume_warm = False
+
+        self.detectors = self._open_all(camera_indices, detector_factory)
+        self.workers = [CameraWorker(detector, self.budget, max_faces) for detector in self.detectors]
+        for worker in self.workers:
+            worker.start()
+
+    def _open_all(self, camera_indices: Sequence[int], detector_factory: Callable[[int], Any]) -> List[Any]:
+        """Open every camera at the same time; cameras that fail are left out"""
+        results: Dict[int, Any] = {}
+
+        def open_one(index: int):
+            try:
+                results[index] = detector_factory(index)
+            except Exception as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=open_one, args=(index,), daemon=True) for index in camera_indices]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        detectors = []
+        for index in camera_indices:
+            result = results.get(index)
+            if isinstance(result, Exception) or result is None:
+                self.log(f"Camera {index} could not be opened, continuing without it: {result}")
+            else:
+                detectors.append(result)
+        if not detectors:
+            raise Exception(f"None of the cameras {list(camera_indices)} could be opened")
+        return detectors
+
+    @property
+    def cap(self) -> Any:
+        # The first camera stands in for preview/debug code that expects one capture
+        return self.detectors[0].cap
+
+    def verdicts(self) -> Dict[int, Optional[bool]]:
+        return {worker.camera_index: worker.fresh_verdict(self.stale_after) for worker in self.workers}
+
+    def detect_eyes(self, max_faces: int = 1) -> bool:
+        """Fused verdict of the latest detections on every camera"""
+        return fuse(self.verdicts(), self.rule, self.weights, self.threshold)
+
+    def is_camera_working(self) -> bool:
+        # Detection goes on as long as one camera delivers frames
+        return any(worker.working for worker in self.workers)
+
+    def standby(self, grace_seconds: float = 30.0, keepalive_interval: float = 0.5):
+        if self.in_standby:
+            return
+        for worker in self.workers:
+            worker.stop()
+        for detector in self.detectors:
+            detector.standby(grace_seconds, keepalive_interval)
+        self.in_standby = True
+
+    def resume(self) -> bool:
+        warm = all([detector.resume() for detector in self.detectors])
+        for worker in self.workers:
+            worker.verdict = None
+            worker.start()
+        self.in_standby = False
+        self.last_resume_warm = warm
+        return warm
+
+    def cleanup(self):
+        for worker in self.workers:
+            worker.stop(timeout=2.0)
+        for detector in self.detectors:
+            detector.cleanup()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-camera verdict and detection counts"""
+        return [{
+            'camera_index': worker.camera_index,
+            'eyes_detected': worker.fresh_verdict(self.stale_after),
+            'working': worker.working,
+            'detections': worker.detections,
+            'failures': worker.failures,
+        } for worker in self.workers]
@@ -0,0 +1,434 @@
+"""
+Chrome native-messaging host for EyeRemote
+Lets every EyeRemote extension instance share one camera pipeline.
+
+Chrome starts one host process per extension connection and talks to it
+over stdio using length-prefixed JSON messages. Each host process is a thin
+relay: it connects to a single AttentionHub (started on demand) which owns
+the only EyeDetector and pushes debounced attention changes to every
+connected host.
+
+Usage:
+    python -m app.native_host            # stdio host, started by Chrome
+    python -m app.native_host --hub      # shared detection hub
+"""
+
+import argparse
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .attention import AttentionSmoother
+from .config import Config
+
+HOST_NAME = "com.eyeremote.host"
+DEFAULT_HUB_PORT = 47730
+
+# Chrome limits host -> extension messages to 1 MB
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+# Native messaging uses a 32-bit length in native byte order
+_LENGTH = struct.Struct('=I')
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """
+    Encode a message as length-prefixed UTF-8 JSON
+
+    Args:
+        message: JSON-serialisable message
+
+    Returns:
+        Encoded bytes ready to write to the stream
+    """
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    if len(payload) > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too large: {len(payload)} bytes")
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _read_exact(read: Callable[[int], bytes], size: int) -> Optional[bytes]:
+    """Read exactly size bytes, or return None on end of stream"""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = read(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_message(read: Callable[[int], bytes]) -> Optional[Dict[str, Any]]:
+    """
+    Read one length-prefixed JSON message
+
+    Args:
+        read: Function reading up to n bytes (e.g. stream.read or sock.recv)
+
+    Returns:
+        Decoded message, or None when the stream is closed
+    """
+    header = _read_exact(read, _LENGTH.size)
+    if header is None:
+        return None
+    (length,) = _LENGTH.unpack(header)
+    if length > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message too large: {length} bytes")
+    payload = _read_exact(read, length)
+    if payload is None:
+        return None
+    return json.loads(payload.decode('utf-8'))
+
+
+def write_message(stream, message: Dict[str, Any]):
+    """Write one length-prefixed JSON message to a binary stream and flush it"""
+    stream.write(encode_message(message))
+    stream.flush()
+
+
+class _HubClient:
+    """One connected native host, as seen by the hub"""
+
+    def __init__(self, sock: socket.socket, address):
+        self.sock = sock
+        self.address = address
+        self.send_lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]) -> bool:
+        try:
+            with self.send_lock:
+                self.sock.sendall(encode_message(message))
+            return True
+        except OSError:
+            return False
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class AttentionHub:
+    def __init__(self, port: int = DEFAULT_HUB_PORT, camera_index: int = 0,
+                 detector_factory: Optional[Callable[[], Any]] = None,
+                 frame_interval: float = 0.1, debounce_seconds: float = 0.5,
+                 idle_timeout: float = 30.0, config: Optional[Config] = None):
+        """
+        Initialize the shared detection hub
+
+        Args:
+            port: Loopback TCP port the hub listens on
+            camera_index: Camera used by the default detector
+            detector_factory: Callable returning an object with detect_eyes()
+                and cleanup() (default: EyeDetector on camera_index)
+            frame_interval: Seconds between detection frames
+            debounce_seconds: How long a new stable state must hold before
+                it is broadcast
+            idle_timeout: Seconds without clients before the hub exits
+                (0 keeps it running)
+            config: The app's settings; with camera_broker on, the default
+                detector watches the camera through the broker (default:
+                eyeremote_config.json, read when the detector is created)
+        """
+        self.port = port
+        self.camera_index = camera_index
+        self.detector_factory = detector_factory or self._default_detector
+        self.frame_interval = frame_interval
+        self.debounce_seconds = debounce_seconds
+        self.idle_timeout = idle_timeout
+        self.config = config
+
+        self.clients: List[_HubClient] = []
+        self.clients_lock = threading.Lock()
+        self.attentive: Optional[bool] = None
+        self.detectors_created = 0
+
+        self._server: Optional[socket.socket] = None
+        self._stop = threading.Event()
+        self._clients_changed = threading.Condition(self.clients_lock)
+        self._pipeline_thread: Optional[threading.Thread] = None
+
+    def capture_factory(self) -> Optional[Callable[[int], Any]]:
+        """BrokerCapture when the app shares its camera through the broker, else None (cv2.VideoCapture)"""
+        config = self.config or Config()
+        if not config.get('camera_broker', False):
+            return None
+        from .camera_setup import CameraSetup
+        return CameraSetup(config).device_factory()
+
+    def _default_detector(self):
+        from .eye_detector import EyeDetector
+        return EyeDetector(camera_index=self.camera_index, capture_factory=self.capture_factory())
+
+    def start(self):
+        """Bind the listening socket and start accepting clients"""
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(('127.0.0.1', self.port))
+        self._server.listen()
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        self._pipeline_thread = threading.Thread(target=self._pipeline_loop, daemon=True)
+        self._pipeline_thread.start()
+
+    def serve_forever(self):
+        """Run until stopped or idle for idle_timeout seconds"""
+        self.start()
+        idle_since = time.monotonic()
+        while not self._stop.wait(1.0):
+            with self.clients_lock:
+                connected = len(self.clients)
+            if connected:
+                idle_since = time.monotonic()
+            elif self.idle_timeout and time.monotonic() - idle_since > self.idle_timeout:
+                break
+        self.stop()
+
+    def stop(self):
+        """Stop the hub, disconnecting all clients"""
+        self._stop.set()
+        if self._server:
+            try:
+                self._server.close()
+            except OSError:
+                pass
+        with self.clients_lock:
+            clients, self.clients = self.clients, []
+            self._clients_changed.notify_all()
+        for client in clients:
+            client.close()
+        if self._pipeline_thread and self._pipeline_thread is not threading.current_thread():
+            self._pipeline_thread.join(timeout=2.0)
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                sock, address = self._server.accept()
+            except OSError:
+                break
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            client = _HubClient(sock, address)
+            with self.clients_lock:
+                self.clients.append(client)
+                self._clients_changed.notify_all()
+            # Bring the new client up to date straight away
+            if self.attentive is not None:
+                client.send(self._attention_message(self.attentive))
+            threading.Thread(target=self._client_loop, args=(client,), daemon=True).start()
+
+    def _client_loop(self, client: _HubClient):
+        """Handle requests from one client until it disconnects"""
+        try:
+            while not self._stop.is_set():
+                message = read_message(client.sock.recv)
+                if message is None:
+                    break
+                if message.get('type') == 'ping':
+                    client.send({'type': 'pong', 'clients': len(self.clients)})
+                elif message.get('type') == 'get_state':
+                    client.send(self._attention_message(self.attentive))
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._remove_client(client)
+
+    def _remove_client(self, client: _HubClient):
+        with self.clients_lock:
+            if client in self.clients:
+                self.clients.remove(client)
+                self._clients_changed.notify_all()
+        client.close()
+
+    def _attention_message(self, attentive: Optional[bool]) -> Dict[str, Any]:
+        return {'type': 'attention', 'attentive': attentive, 'timestamp': time.time()}
+
+    def broadcast(self, message: Dict[str, Any]):
+        """Send a message to every connected client, dropping dead ones"""
+        with self.clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            if not client.send(message):
+                self._remove_client(client)
+
+    def _pipeline_loop(self):
+        """Run one detection pipeline while at least one client is connected"""
+        while not self._stop.is_set():
+            # Wait for a client before touching the camera
+            with self.clients_lock:
+                while not self.clients and not self._stop.is_set():
+                    self._clients_changed.wait(timeout=1.0)
+            if self._stop.is_set():
+                break
+
+            try:
+                detector = self.detector_factory()
+                self.detectors_created += 1
+            except Exception as e:
+                self.broadcast({'type': 'status', 'state': 'camera_error', 'message': str(e)})
+                self._stop.wait(5.0)
+                continue
+
+            self.broadcast({'type': 'status', 'state': 'detecting'})
+            try:
+                self._run_detector(detector)
+            finally:
+                detector.cleanup()
+                self.attentive = None
+
+    def _run_detector(self, detector):
+        """Detect until the last client leaves, broadcasting debounced changes"""
+        smoother = AttentionSmoother()
+        pending_state: Optional[bool] = None
+        pending_since = 0.0
+
+        while not self._stop.is_set():
+            with self.clients_lock:
+                if not self.clients:
+                    return
+
+            changed = smoother.update(detector.detect_eyes())
+            now = time.monotonic()
+            if changed is not None:
+                pending_state, pending_since = changed, now
+
+            # Only publish a state that has held for debounce_seconds
+            if pending_state is not None and now - pending_since >= self.debounce_seconds:
+                if pending_state == smoother.stable_state and pending_state != self.attentive:
+                    self.attentive = pending_state
+                    self.broadcast(self._attention_message(pending_state))
+                pending_state = None
+
+            self._stop.wait(self.frame_interval)
+
+
+class NativeHost:
+    def __init__(self, port: int = DEFAULT_HUB_PORT, spawn_hub: bool = True,
+                 connect_timeout: float = 10.0):
+        """
+        Initialize the stdio relay started by Chrome
+
+        Args:
+            port: Port of the shared AttentionHub
+            spawn_hub: Start the hub if none is running
+            connect_timeout: Seconds to wait for the hub to come up
+        """
+        self.port = port
+        self.spawn_hub = spawn_hub
+        self.connect_timeout = connect_timeout
+        self.stdin = sys.stdin.buffer
+        self.stdout = sys.stdout.buffer
+        self.stdout_lock = threading.Lock()
+
+    def _send_to_extension(self, message: Dict[str, Any]):
+        with self.stdout_lock:
+            write_message(self.stdout, message)
+
+    def _connect(self) -> socket.socket:
+        """Connect to the hub, starting it if necessary"""
+        deadline = time.monotonic() + self.connect_timeout
+        spawned = False
+        while True:
+            try:
+                sock = socket.create_connection(('127.0.0.1', self.port), timeout=1.0)
+                sock.settimeout(None)
+                return sock
+            except OSError:
+                if self.spawn_hub and not spawned:
+                    spawn_hub_process(self.port)
+                    spawned = True
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+    def run(self) -> int:
+        """Relay messages between Chrome (stdio) and the hub until either side closes"""
+        try:
+            sock = self._connect()
+        except OSError as e:
+            self._send_to_extension({'type': 'status', 'state': 'hub_unavailable', 'message': str(e)})
+            return 1
+
+        def hub_to_extension():
+            try:
+                while True:
+                    message = read_message(sock.recv)
+                    if message is None:
+                        break
+                    self._send_to_extension(message)
+            except (OSError, ValueError):
+                pass
+            finally:
+                # Closing stdin's reader is not portable; exit the process instead
+                os._exit(0)
+
+        threading.Thread(target=hub_to_extension, daemon=True).start()
+
+        try:
+            while True:
+                message = read_message(self.stdin.read)
+                if message is None:
+                    break
+                sock.sendall(encode_message(message))
+        except (OSError, ValueError):
+            pass
+        finally:
+            sock.close()
+        return 0
+
+
+def spawn_hub_process(port: int = DEFAULT_HUB_PORT) -> subprocess.Popen:
+    """
+    Start a detached hub process
+
+    Its stdio is detached so it never writes into Chrome's message pipe.
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    kwargs = {}
+    if sys.platform == 'win32':
+        kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+    return subprocess.Popen(
+        [sys.executable, '-m', 'app.native_host', '--hub', '--port', str(port)],
+        cwd=package_root,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **kwargs
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="EyeRemote native-messaging host")
+    parser.add_argument('--hub', action='store_true', help="Run the shared detection hub")
+    parser.add_argument('--port', type=int, default=DEFAULT_HUB_PORT, help="Hub port on 127.0.0.1")
+    parser.add_argument('--camera', type=int, default=0, help="Camera index used by the hub")
+    parser.add_argument('--idle-timeout', type=float, default=30.0,
+                        help="Seconds the hub stays up without clients")
+    parser.add_argument('--no-spawn', action='store_true',
+                        help="Do not start a hub if none is running")
+    # Chrome passes the caller origin (and a window handle on Windows)
+    args, _ = parser.parse_known_args(argv)
+
+    if args.hub:
+        hub = AttentionHub(port=args.port, camera_index=args.camera, idle_timeout=args.idle_timeout)
+        try:
+            hub.serve_forever()
+        except OSError:
+            # Another hub already owns the port
+            return 0
+        return 0
+
+    return NativeHost(port=args.port, spawn_hub=not args.no_spawn).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""
+Room coordination for shared displays
+Several EyeRemote instances ("nodes") report attention to one aggregator on
+the LAN, which applies a room policy and drives a single media backend.
+
+Heartbeats are UDP datagrams. Each one carries the node's current state plus
+the batch of state changes since the previous heartbeat, with timestamps
+delta-encoded in milliseconds:
+
+    header  !2sBB8sIdBB  magic 'ER', version, flags, node id, sequence,
+                         send time, current state, change count
+    change  !HB          ms before the send time, state
+
+Because changes are relative to the send time, the aggregator can place them
+on its own clock without the clocks being in sync. It replays them in order,
+so the room's hold time starts when a viewer actually looked away rather than
+when the next heartbeat arrived.
+
+A node that sends nothing for node_timeout seconds is dropped.
+"""
+
+import os
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+MAGIC = b'ER'
+PROTOCOL_VERSION = 2
+DEFAULT_ROOM_PORT = 47731
+
+_HEADER = struct.Struct('!2sBB8sIdBB')
+_CHANGE = struct.Struct('!HB')
+MAX_CHANGES = 255
+
+
+@dataclass
+class Heartbeat:
+    """Decoded heartbeat datagram"""
+    node_id: bytes
+    seq: int
+    sent_at: float
+    watching: bool
+    changes: List[Tuple[float, bool]] = field(default_factory=list)
+
+
+def encode_heartbeat(node_id: bytes, seq: int, sent_at: float, watching: bool,
+                     changes: List[Tuple[float, bool]]) -> bytes:
+    """
+    Encode a heartbeat
+
+    Args:
+        node_id: 8-byte node identifier
+        seq: Heartbeat sequence number
+        sent_at: Sender wall-clock time the change deltas are relative to
+        watching: Current attention state
+        changes: (timestamp, state) changes since the previous heartbeat, oldest first
+
+    Returns:
+        Datagram bytes
+    """
+    changes = changes[-MAX_CHANGES:]
+    parts = [_HEADER.pack(MAGIC, PROTOCOL_VERSION, 0, node_id, seq & 0xFFFFFFFF,
+                          sent_at, int(watching), len(changes))]
+    for timestamp, state in changes:
+        age_ms = int(round((sent_at - timestamp) * 1000))
+        parts.append(_CHANGE.pack(max(0, min(age_ms, 0xFFFF)), int(state)))
+    return b''.join(parts)
+
+
+def decode_heartbeat(data: bytes) -> Optional[Heartbeat]:
+    """
+    Decode a heartbeat datagram
+
+    Returns:
+        Heartbeat, or None if the datagram is not a valid heartbeat
+    """
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, _, node_id, seq, sent_at, watching, count = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        return None
+    if len(data) != _HEADER.size + count * _CHANGE.size:
+        return None
+
+    changes = []
+    for i in range(count):
+        age_ms, state = _CHANGE.unpack_from(data, _HEADER.size + i * _CHANGE.size)
+        changes.append((sent_at - age_ms / 1000.0, bool(state)))
+    return Heartbeat(node_id, seq, sent_at, bool(watching), changes)
+
+
+def parse_address(address: str, default_port: int = DEFAULT_ROOM_PORT) -> Tuple[str, int]:
+    """Parse 'host' or 'host:port' into a (host, port) tuple"""
+    host, _, port = address.rpartition(':')
+    if not host:
+        return address, default_port
+    return host, int(port)
+
+
+class HeartbeatPublisher:
+    def __init__(self, aggregator: Tuple[str, int], node_id: Optional[bytes] = None,
+                 interval: float = 1.0):
+        """
+        Initialize the node side of a room
+
+        Args:
+            aggregator: (host, port) of the aggregator
+            node_id: 8-byte identifier (default: random per instance)
+            interval: Seconds between heartbeats
+        """
+        self.aggregator = aggregator
+        self.node_id = (node_id or os.urandom(8))[:8].ljust(8, b'\0')
+        self.interval = interval
+
+        self.watching = False
+        self.heartbeats_sent = 0
+        self.bytes_sent = 0
+
+        self._seq = 0
+        self._changes: List[Tuple[float, bool]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def update(self, watching: bool):
+        """Record the node's attention state (cheap; safe from any thread)"""
+        with self._lock:
+            if watching != self.watching:
+                self.watching = watching
+                self._changes.append((time.time(), watching))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='room-heartbeat', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1.0)
+        self._sock.close()
+
+    def send_heartbeat(self):
+        """Send the current state and the batch of changes since the last heartbeat"""
+        with self._lock:
+            changes, self._changes = self._changes, []
+            watching = self.watching
+            self._seq += 1
+            seq = self._seq
+        datagram = encode_heartbeat(self.node_id, seq, time.time(), watching, changes)
+        try:
+            self._sock.sendto(datagram, self.aggregator)
+            self.heartbeats_sent += 1
+            self.bytes_sent += len(datagram)
+        except OSError:
+            # Aggregator unreachable; the next heartbeat carries the current state anyway
+            pass
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.send_heartbeat()
+            self._stop.wait(self.interval)
+
+
+class RoomPolicy:
+    def __init__(self, min_watching: int = 1, hold_seconds: float = 0.0):
+        """
+        Pause when fewer than min_watching people are watching
+
+        Args:
+            min_watching: People who must be watching for playback to continue
+            hold_seconds: How long the room must be below the threshold before pausing
+        """
+        self.min_watching = min_watching
+        self.hold_seconds = hold_seconds
+
+    def should_pause(self, watching: int, total: int) -> bool:
+        return watching < self.min_watching
+
+
+@dataclass
+class _Node:
+    address: Tuple[str, int]
+    last_seen: float
+    seq: int
+    watching: bool
+
+
+class RoomAggregator:
+    def __init__(self, bind: Tuple[str, int] = ('0.0.0.0', DEFAULT_ROOM_PORT),
+                 policy: Optional[RoomPolicy] = None,
+                 actuator: Optional[Callable[[str], None]] = None,
+                 node_timeout: float = 5.0, tick_interval: float = 0.25,
+                 log: Optional[Callable[[str], None]] = None):
+        """
+        Initialize the room aggregator
+
+        Args:
+            bind: (host, port) to listen on for heartbeats
+            policy: Room policy (default: pause when nobody is watching)
+            actuator: Called with 'pause' or 'resume' when the room decision changes
+            node_timeout: Seconds of silence before a node is dropped
+            tick_interval: Seconds between timeout/policy checks
+            log: Optional callback receiving log messages
+        """
+        self.bind = bind
+        self.policy = policy or RoomPolicy()
+        self.actuator = actuator or (lambda action: None)
+        self.node_timeout = node_timeout
+        self.tick_interval = tick_interval
+        self.log = log or (lambda message: None)
+
+        self.nodes: Dict[bytes, _Node] = {}
+        self.paused = False
+        self.nodes_dropped = 0
+        self.heartbeats_received = 0
+
+        self._below_since: Optional[float] = None
+        self._first_heartbeat: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._sock.getsockname()
+
+    def start(self):
+        self._sock.bind(self.bind)
+        self._sock.settimeout(self.tick_interval)
+        for target in (self._receive_loop, self._tick_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.log(f"Room aggregator listening on {self.address[0]}:{self.address[1]}")
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+        self._sock.close()
+
+    def watching_count(self) -> Tuple[int, int]:
+        """Return (nodes watching, nodes connected)"""
+        with self._lock:
+            return sum(1 for node in self.nodes.values() if node.watching), len(self.nodes)
+
+    def handle_datagram(self, data: bytes, address: Tuple[str, int]):
+        heartbeat = decode_heartbeat(data)
+        if heartbeat is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self.heartbeats_received += 1
+            if self._first_heartbeat is None:
+                self._first_heartbeat = now
+            node = self.nodes.get(heartbeat.node_id)
+            if node is None:
+                self.nodes[heartbeat.node_id] = _Node(address, now, heartbeat.seq, heartbeat.watching)
+                self.log(f"Room: node {heartbeat.node_id.hex()} joined from {address[0]}")
+            elif heartbeat.seq > node.seq or heartbeat.seq < node.seq - 1000:
+                # Newer heartbeat (or the sender restarted its sequence). Replay the
+                # changes it carries at the time they happened on this clock; none can
+                # be older than the previous heartbeat from this node.
+                for timestamp, state in sorted(heartbeat.changes):
+                    node.watching = state
+                    self._track_room(max(node.last_seen, now - max(0.0, heartbeat.sent_at - timestamp)))
+                node.address, node.last_seen, node.seq = address, now, heartbeat.seq
+                node.watching = heartbeat.watching
+            self._track_room(now)
+        self._evaluate()
+
+    def _receive_loop(self):
+        while not self._stop.is_set():
+            try:
+                data, address = self._sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.handle_datagram(data, address)
+
+    def _tick_loop(self):
+        while not self._stop.wait(self.tick_interval):
+            self._expire_nodes()
+            self._evaluate()
+
+    def _expire_nodes(self):
+        cutoff = time.monotonic() - self.node_timeout
+        with self._lock:
+            expired = [node_id for node_id, node in self.nodes.items() if node.last_seen < cutoff]
+            for node_id in expired:
+                del self.nodes[node_id]
+                self.nodes_dropped += 1
+        for node_id in expired:
+            self.log(f"Room: node {node_id.hex()} timed out")
+
+    def _track_room(self, at: float) -> Tuple[int, int, bool]:
+        """
+        Note when the room went below the policy threshold (call with the lock held)
+
+        Args:
+            at: Monotonic time of the node change being applied
+
+        Returns:
+            (nodes watching, nodes connected, below threshold)
+        """
+        watching = sum(1 for node in self.nodes.values() if node.watching)
+        total = len(self.nodes)
+        below = self.policy.should_pause(watching, total)
+        if not below:
+            self._below_since = None
+        elif self._below_since is None:
+            self._below_since = at
+        return watching, total, below
+
+    def _evaluate(self):
+        """Apply the room policy and actuate on changes"""
+        now = time.monotonic()
+        # Give nodes one timeout period to join before acting on the room
+        if self._first_heartbeat is None or now - self._first_heartbeat < self.node_timeout:
+            return
+        action = None
+        with self._lock:
+            watching, total, below = self._track_room(now)
+            if below:
+                if not self.paused and now - self._below_since >= self.policy.hold_seconds:
+                    self.paused = True
+                    action = 'pause'
+            elif self.paused:
+                self.paused = False
+                action = 'resume'
+        if action:
+            self.log(f"Room: {action} ({watching}/{total} watching)")
+            self.actuator(action)
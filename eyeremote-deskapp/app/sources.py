@@ -0,0 +1,292 @@
+"""
+Recorded frame sources
+VideoFileSource and FrameArraySource replay a clip through the parts of the
+cv2.VideoCapture interface EyeRemote uses, so detection can run on the same
+frames every time: pass `VideoFileSource.factory(path)` wherever a
+capture_factory is accepted. Seeking is frame-accurate. By default frames
+are delivered as fast as they are read; with realtime=True the source keeps
+to the clip's frame rate like a live camera, waiting when the reader is
+early and skipping frames when it falls behind.
+"""
+
+import time
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+DEFAULT_FPS = 30.0
+
+
+class ReplaySource:
+    def __init__(self, fps: float = DEFAULT_FPS, realtime: bool = False, loop: bool = False):
+        """
+        Common replay logic; subclasses provide the frames
+
+        Args:
+            fps: Frame rate of the clip, used for realtime pacing
+            realtime: Deliver frames at fps, dropping those the reader is too slow for
+            loop: Start over at the end instead of failing reads
+        """
+        self.fps = fps if fps and fps > 0 else DEFAULT_FPS
+        self.realtime = realtime
+        self.loop = loop
+        self.position = 0      # Index of the next frame
+        self.frames_read = 0
+        self.dropped = 0       # Frames skipped in realtime mode
+        self.exhausted = False  # A read failed at the end of the clip
+        self._opened = True
+        self._grabbed = False
+        self._clock: Optional[Tuple[float, int]] = None  # (monotonic, position) pacing origin
+
+    # --- Provided by subclasses ---------------------------------------------
+
+    @property
+    def frame_count(self) -> Optional[int]:
+        """Frames in the clip, or None if the container does not say"""
+        raise NotImplementedError
+
+    def _grab_next(self) -> bool:
+        """Advance past frame self.position, keeping it for _retrieve()"""
+        raise NotImplementedError
+
+    def _retrieve(self) -> np.ndarray:
+        raise NotImplementedError
+
+    def _size(self) -> Tuple[int, int]:
+        """(width, height) of the frames"""
+        raise NotImplementedError
+
+    def _seek(self, index: int) -> bool:
+        """Position before frame index; the default reads forward from the start"""
+        if index < self.position and not self._rewind():
+            return False
+        while self.position < index:
+            if not self._grab_next():
+                return False
+            self.position += 1
+        return True
+
+    def _rewind(self) -> bool:
+        raise NotImplementedError
+
+    # --- Capture interface --------------------------------------------------
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def seek(self, index: int) -> bool:
+        """
+        Make frame index the next one read
+
+        Returns:
+            False if index is outside the clip
+        """
+        count = self.frame_count
+        if not self._opened or index < 0 or (count is not None and index >= count):
+            return False
+        if not self._seek(index):
+            return False
+        self.position = index
+        self._grabbed = False
+        self._clock = None
+        self.exhausted = False
+        return True
+
+    def grab(self) -> bool:
+        if not self._opened:
+            return False
+        if self.realtime:
+            self._pace()
+        if not self._advance():
+            if not self.loop or not self.seek(0) or not self._advance():
+                self.exhausted = True
+                self._grabbed = False
+                return False
+        self._grabbed = True
+        return True
+
+    def _advance(self) -> bool:
+        count = self.frame_count
+        if count is not None and self.position >= count:
+            return False
+        if not self._grab_next():
+            return False
+        self.position += 1
+        return True
+
+    def _pace(self):
+        """Wait for the next frame, or skip to the one a live camera would be showing"""
+        now = time.monotonic()
+        if self._clock is None:
+            self._clock = (now, self.position)
+            return
+        started, first = self._clock
+        due = first + int((now - started) * self.fps)
+        if due < self.position:
+            time.sleep(max(0.0, started + (self.position - first) / self.fps - now))
+            return
+        count = self.frame_count
+        if count is not None:
+            due = min(due, count - 1)
+        while self.position < due and self._grab_next():
+            self.position += 1
+            self.dropped += 1
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._grabbed:
+            return False, None
+        return True, self._retrieve()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        self.frames_read += 1
+        return self.retrieve()
+
+    def set(self, prop: int, value: float) -> bool:
+        # A recording's format is fixed; only the position can change
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return self.seek(int(value))
+        return False
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(self.frame_count or 0)
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self._size()[0])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self._size()[1])
+        return 0.0
+
+    def release(self):
+        self._opened = False
+        self._grabbed = False
+
+    @classmethod
+    def factory(cls, *args, **kwargs) -> Callable[[int], Any]:
+        """Return a capture_factory that opens this source (the camera index is ignored)"""
+        return lambda index: cls(*args, **kwargs)
+
+
+class FrameArraySource(ReplaySource):
+    def __init__(self, frames: Sequence[np.ndarray], fps: float = DEFAULT_FPS,
+                 realtime: bool = False, loop: bool = False):
+        """
+        Replay frames held in memory
+
+        Args:
+            frames: BGR (H x W x 3) or grayscale (H x W) frames, or an array of them
+            fps: Frame rate for realtime pacing and CAP_PROP_FPS
+            realtime: Deliver frames at fps
+            loop: Start over at the end
+        """
+        super().__init__(fps, realtime, loop)
+        self.frames = frames
+        self._gray = len(frames) > 0 and frames[0].ndim == 2
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'FrameArraySource':
+        """Load frames saved with numpy (.npy, or the 'frames' array of an .npz)"""
+        data = np.load(path)
+        frames = data['frames'] if isinstance(data, np.lib.npyio.NpzFile) else data
+        if isinstance(data, np.lib.npyio.NpzFile) and 'fps' in data and 'fps' not in kwargs:
+            kwargs['fps'] = float(data['fps'])
+        return cls(frames, **kwargs)
+
+    @property
+    def frame_count(self) -> Optional[int]:
+        return len(self.frames)
+
+    def _grab_next(self) -> bool:
+        return self.position < len(self.frames)
+
+    def _retrieve(self) -> np.ndarray:
+        frame = self.frames[self.position - 1]
+        if self._gray:
+            return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        return frame.copy()  # Callers may draw on it, like on a camera frame
+
+    def _size(self) -> Tuple[int, int]:
+        if not len(self.frames):
+            return 0, 0
+        return self.frames[0].shape[1], self.frames[0].shape[0]
+
+    def _seek(self, index: int) -> bool:
+        return True  # Random access
+
+    @property
+    def delivers_gray(self) -> bool:
+        return self._gray
+
+    def read_gray(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Grayscale frame; stored grayscale frames need no conversion"""
+        if not self.grab():
+            return False, None
+        self.frames_read += 1
+        frame = self.frames[self.position - 1]
+        if self._gray:
+            return True, frame
+        return True, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+class VideoFileSource(ReplaySource):
+    def __init__(self, path: str, realtime: bool = False, loop: bool = False,
+                 capture_factory: Optional[Callable[[str], Any]] = None):
+        """
+        Replay a video file
+
+        Seeking decodes forward from the current frame, or from the start
+        when going back, so the frame read after seek(n) is always frame n
+        even in codecs where OpenCV's own seek lands on a keyframe.
+
+        Args:
+            path: Video file OpenCV can decode
+            realtime: Deliver frames at the file's frame rate
+            loop: Start over at the end
+            capture_factory: Opens the file (default: cv2.VideoCapture)
+        """
+        self.path = path
+        self._open_file = capture_factory or cv2.VideoCapture
+        self._cap = self._open_file(path)
+        opened = self._cap.isOpened()
+        super().__init__(self._cap.get(cv2.CAP_PROP_FPS) if opened else DEFAULT_FPS, realtime, loop)
+        self._opened = opened
+        count = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT)) if opened else 0
+        self._count = count if count > 0 else None
+        self._width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH)) if opened else 0
+        self._height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) if opened else 0
+
+    @property
+    def frame_count(self) -> Optional[int]:
+        return self._count
+
+    def _grab_next(self) -> bool:
+        return self._cap.grab()
+
+    def _retrieve(self) -> np.ndarray:
+        ret, frame = self._cap.retrieve()
+        return frame if ret else None
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._grabbed:
+            return False, None
+        frame = self._retrieve()
+        return frame is not None, frame
+
+    def _size(self) -> Tuple[int, int]:
+        return self._width, self._height
+
+    def _rewind(self) -> bool:
+        self._cap.release()
+        self._cap = self._open_file(self.path)
+        self.position = 0
+        return self._cap.isOpened()
+
+    def release(self):
+        super().release()
+        self._cap.release()
@@ -0,0 +1,291 @@
+"""
+Local status and control API for EyeRemote
+Newline-delimited JSON over a Unix-domain socket.
+
+Requests (one JSON object per line, optional "id" is echoed back):
+    {"cmd": "subscribe"}                    stream state events and periodic stats
+    {"cmd": "status"}                       one-off stats snapshot
+    {"cmd": "start"} / {"cmd": "stop"}      start or stop detection
+    {"cmd": "config", "key": "timeout", "value": 5}
+
+Pushed to subscribers:
+    {"event": "state", ...}                 state transitions
+    {"event": "stats", ...}                 every stats_interval seconds
+
+The server runs its own asyncio loop on a background thread. publish() only
+schedules work on that loop, so the detection thread never waits on clients.
+Each subscriber has a bounded queue; a client that falls behind is dropped.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_STATS_INTERVAL = 5.0
+MAX_REQUEST_SIZE = 64 * 1024
+
+
+def default_socket_path() -> str:
+    """Per-user socket path, preferring XDG_RUNTIME_DIR"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'eyeremote.sock')
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(tempfile.gettempdir(), f'eyeremote-{uid}.sock')
+
+
+class _Subscriber:
+    """Connected client with its own bounded outgoing queue"""
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int):
+        self.writer = writer
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.subscribed = False
+        self.task: Optional[asyncio.Task] = None
+
+
+class StatusServer:
+    def __init__(self, socket_path: Optional[str] = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 stats_interval: float = DEFAULT_STATS_INTERVAL,
+                 stats_provider: Optional[Callable[[], Dict[str, Any]]] = None,
+                 command_handler: Optional[Callable[[str, Dict[str, Any]], Dict[str, Any]]] = None,
+                 log: Optional[Callable[[str], None]] = None):
+        """
+        Initialize the status server
+
+        Args:
+            socket_path: Unix socket path (default: default_socket_path())
+            queue_size: Maximum queued messages per client before it is dropped
+            stats_interval: Seconds between stats pushes (0 disables them)
+            stats_provider: Returns a JSON-serialisable stats dict; called on
+                the server thread, so it must be cheap and thread-safe
+            command_handler: Called with (cmd, request) for start/stop/config;
+                must not block and returns the response dict
+            log: Optional callback receiving log messages
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.queue_size = queue_size
+        self.stats_interval = stats_interval
+        self.stats_provider = stats_provider or (lambda: {})
+        self.command_handler = command_handler
+        self.log = log or (lambda message: None)
+
+        self.clients: Set[_Subscriber] = set()
+        self.dropped_clients = 0
+        self.events_published = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._startup_error: Optional[BaseException] = None
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Unix-domain sockets are not available to asyncio on Windows"""
+        return sys.platform != 'win32'
+
+    def start(self) -> bool:
+        """
+        Start the server thread and wait until the socket is listening
+
+        Returns:
+            False if another process is already serving socket_path; the
+            server is not started and that socket is left alone
+        """
+        if not self.is_supported():
+            raise Exception("Status socket is not supported on this platform")
+        if self._socket_in_use():
+            self.log(f"Status socket {self.socket_path} is in use by another instance, not starting the server")
+            return False
+        self._thread = threading.Thread(target=self._run, name='status-server', daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5.0)
+        if self._startup_error:
+            raise Exception(f"Could not start status server: {self._startup_error}")
+        self.log(f"Status server listening on {self.socket_path}")
+        return True
+
+    def stop(self):
+        """Stop the server and disconnect all clients"""
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self._thread = None
+
+    def publish(self, event: Dict[str, Any]):
+        """
+        Queue an event for all subscribers (safe to call from any thread)
+
+        Args:
+            event: JSON-serialisable event; 'event' defaults to 'state'
+        """
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+        event.setdefault('event', 'state')
+        event.setdefault('timestamp', time.time())
+        try:
+            loop.call_soon_threadsafe(self._fan_out, event)
+        except RuntimeError:
+            # Loop closed between the check and the call
+            pass
+
+    @property
+    def client_count(self) -> int:
+        return len(self.clients)
+
+    def _socket_in_use(self) -> bool:
+        """True if something accepts connections on socket_path; a stale socket file is removed"""
+        try:
+            if not stat.S_ISSOCK(os.stat(self.socket_path).st_mode):
+                return False  # Not ours to remove; binding reports the problem
+        except OSError:
+            return False
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        probe.settimeout(1.0)
+        try:
+            probe.connect(self.socket_path)
+            return True
+        except ConnectionRefusedError:
+            # Left behind by a previous run that did not shut down cleanly
+            os.unlink(self.socket_path)
+            return False
+        except socket.timeout:
+            # Listening, but too busy to accept right away
+            return True
+        except OSError:
+            return False
+        finally:
+            probe.close()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._start_server())
+        except BaseException as e:
+            self._startup_error = e
+            self._ready.set()
+            loop.close()
+            return
+
+        self._loop = loop
+        self._ready.set()
+        if self.stats_interval > 0:
+            loop.create_task(self._stats_loop())
+        try:
+            loop.run_forever()
+        finally:
+            self._loop = None
+            for client in list(self.clients):
+                self._drop(client)
+            self._server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+    async def _start_server(self):
+        self._server = await asyncio.start_unix_server(
+            self._handle_client, path=self.socket_path, limit=MAX_REQUEST_SIZE)
+        os.chmod(self.socket_path, 0o600)
+
+    async def _stats_loop(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            if not any(client.subscribed for client in self.clients):
+                continue
+            try:
+                stats = self.stats_provider()
+            except Exception as e:
+                stats = {'error': str(e)}
+            self._fan_out({'event': 'stats', 'timestamp': time.time(), **stats})
+
+    def _fan_out(self, event: Dict[str, Any]):
+        """Queue an event for every subscriber; runs on the server loop"""
+        self.events_published += 1
+        line = (json.dumps(event, separators=(',', ':')) + '\n').encode('utf-8')
+        for client in list(self.clients):
+            if client.subscribed:
+                self._enqueue(client, line)
+
+    def _enqueue(self, client: _Subscriber, line: bytes):
+        try:
+            client.queue.put_nowait(line)
+        except asyncio.QueueFull:
+            self.dropped_clients += 1
+            self.log("Status server: dropping slow client")
+            self._drop(client)
+
+    def _drop(self, client: _Subscriber):
+        self.clients.discard(client)
+        if client.task:
+            client.task.cancel()
+        client.writer.close()
+
+    async def _writer_loop(self, client: _Subscriber):
+        while True:
+            line = await client.queue.get()
+            client.writer.write(line)
+            await client.writer.drain()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _Subscriber(writer, self.queue_size)
+        client.task = asyncio.ensure_future(self._writer_loop(client))
+        self.clients.add(client)
+        try:
+            while client in self.clients:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = self._handle_request(client, line)
+                if response is not None:
+                    self._enqueue(client, (json.dumps(response) + '\n').encode('utf-8'))
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            if client in self.clients:
+                self._drop(client)
+
+    def _handle_request(self, client: _Subscriber, line: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            request = json.loads(line)
+            cmd = request['cmd']
+        except (ValueError, KeyError, TypeError):
+            return {'ok': False, 'error': 'Invalid request'}
+
+        if cmd == 'subscribe':
+            client.subscribed = True
+            response = {'ok': True, 'subscribed': True}
+        elif cmd == 'status':
+            try:
+                response = {'ok': True, 'stats': self.stats_provider()}
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+        elif cmd in ('start', 'stop', 'config') and self.command_handler:
+            try:
+                response = self.command_handler(cmd, request)
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+        else:
+            response = {'ok': False, 'error': f"Unknown command: {cmd}"}
+
+        if 'id' in request:
+            response['id'] = request['id']
+        return response
@@ -0,0 +1,255 @@
+"""
+Look-away-to-pause latency tracing
+Every pause/resume decision gets a trace id at the first frame that showed
+the new state. Spans follow it through smoothing, the timeout, the
+actuation queue, focusing the player and sending the key, so the latency a
+user feels can be taken apart. Finished traces export as Chrome trace-event
+JSON (chrome://tracing, Perfetto) and summarize as latency percentiles.
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from .instrumentation import percentile
+
+KIND_PAUSE = 'pause'
+KIND_RESUME = 'resume'
+
+DEFAULT_MAX_TRACES = 500
+
+
+class Trace:
+    def __init__(self, trace_id: int, kind: str, start: float):
+        self.trace_id = trace_id
+        self.kind = kind
+        self.start = start
+        self.end: Optional[float] = None
+        self.cursor = start  # End of the latest span
+        self.spans: List[Dict[str, Any]] = []
+
+    @property
+    def latency_ms(self) -> Optional[float]:
+        return (self.end - self.start) * 1000 if self.end is not None else None
+
+
+class Tracer:
+    def __init__(self, max_traces: int = DEFAULT_MAX_TRACES):
+        """
+        Collect decision traces (timestamps from time.perf_counter())
+
+        Args:
+            max_traces: Finished traces kept for export and the summary
+        """
+        self._ids = itertools.count(1)
+        self._open: Dict[int, Trace] = {}
+        self._finished = deque(maxlen=max_traces)
+        self._thread_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.discarded = 0
+
+    def begin(self, kind: str, start: float) -> int:
+        """
+        Open a trace
+
+        Args:
+            kind: KIND_PAUSE or KIND_RESUME
+            start: When the frame that first showed the new state was read
+
+        Returns:
+            The trace id
+        """
+        trace_id = next(self._ids)
+        with self._lock:
+            self._open[trace_id] = Trace(trace_id, kind, start)
+        return trace_id
+
+    def kind(self, trace_id: int) -> Optional[str]:
+        trace = self._open.get(trace_id)
+        return trace.kind if trace else None
+
+    def span(self, trace_id: int, name: str, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        Add a span to an open trace; does nothing for unknown or finished ids
+
+        Args:
+            trace_id: Trace to add to
+            name: Stage name
+            start: Defaults to the end of the previous span
+            end: Defaults to now
+        """
+        end = time.perf_counter() if end is None else end
+        thread = threading.current_thread()
+        with self._lock:
+            trace = self._open.get(trace_id)
+            if trace is None:
+                return
+            start = trace.cursor if start is None else start
+            trace.spans.append({'name': name, 'start': start, 'end': end, 'tid': thread.ident})
+            trace.cursor = max(trace.cursor, end)
+            self._thread_names.setdefault(thread.ident, thread.name)
+
+    def finish(self, trace_id: int, end: Optional[float] = None):
+        """Close a trace at actuation completion (a second call is ignored)"""
+        end = time.perf_counter() if end is None else end
+        with self._lock:
+            trace = self._open.pop(trace_id, None)
+            if trace is None:
+                return
+            trace.end = max(end, trace.cursor)
+            self._finished.append(trace)
+
+    def discard(self, trace_id: int):
+        """Drop a trace whose decision never happened (eyes came back before the timeout)"""
+        with self._lock:
+            if self._open.pop(trace_id, None) is not None:
+                self.discarded += 1
+
+    def traces(self) -> List[Trace]:
+        with self._lock:
+            return list(self._finished)
+
+    def clear(self):
+        with self._lock:
+            self._open.clear()
+            self._finished.clear()
+            self.discarded = 0
+
+    def summary(self) -> Dict[str, Any]:
+        """Latency distribution per decision kind, with the median of each span"""
+        result = {}
+        traces = self.traces()
+        for kind in (KIND_PAUSE, KIND_RESUME):
+            selected = [trace for trace in traces if trace.kind == kind]
+            latencies = [trace.latency_ms for trace in selected]
+            spans: Dict[str, List[float]] = {}
+            for trace in selected:
+                for span in trace.spans:
+                    spans.setdefault(span['name'], []).append((span['end'] - span['start']) * 1000)
+            result[kind] = {
+                'count': len(selected),
+                'p50': _round(percentile(latencies, 0.5)),
+                'p95': _round(percentile(latencies, 0.95)),
+                'p99': _round(percentile(latencies, 0.99)),
+                'max': _round(max(latencies) if latencies else None),
+                'span_p50': {name: _round(percentile(values, 0.5)) for name, values in spans.items()},
+            }
+        result['discarded'] = self.discarded
+        with self._lock:
+            result['open'] = len(self._open)
+        return result
+
+    def chrome_events(self) -> List[Dict[str, Any]]:
+        """
+        Trace events in the Chrome trace-event format
+
+        Each decision is an async slice ('b'/'e', one row per decision kind)
+        and each span a complete event ('X') on the thread that recorded it.
+        """
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = []
+        with self._lock:
+            thread_names = dict(self._thread_names)
+        for tid, name in thread_names.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        for trace in self.traces():
+            args = {'trace_id': trace.trace_id, 'latency_ms': round(trace.latency_ms, 2)}
+            name = f"{trace.kind} #{trace.trace_id}"
+            events.append({'name': name, 'cat': trace.kind, 'ph': 'b', 'id': trace.trace_id,
+                           'ts': _us(trace.start), 'pid': pid, 'tid': 0, 'args': args})
+            for span in trace.spans:
+                events.append({'name': span['name'], 'cat': trace.kind, 'ph': 'X', 'ts': _us(span['start']),
+                               'dur': _us(span['end'] - span['start']), 'pid': pid, 'tid': span['tid'],
+                               'args': {'trace_id': trace.trace_id}})
+            events.append({'name': name, 'cat': trace.kind, 'ph': 'e', 'id': trace.trace_id,
+                           'ts': _us(trace.end), 'pid': pid, 'tid': 0})
+        return events
+
+    def export_chrome(self, path: str):
+        """Write the finished traces as a Chrome trace file"""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.chrome_events(), 'displayTimeUnit': 'ms',
+                       'otherData': {'summary': self.summary()}}, f)
+
+
+class DecisionTracer:
+    def __init__(self, tracer: Tracer):
+        """
+        Follow the detection loop from the first frame of a change to the
+        pause/resume it causes (call from the detection thread only)
+
+        Args:
+            tracer: Where traces are kept
+        """
+        self.tracer = tracer
+        self._first = None     # (read started, detection done) of the first frame with the new state
+        self._open = 0         # Trace waiting for its decision
+        self._flipped_at = 0.0
+
+    def frame(self, eyes_detected: bool, stable_state: bool, frame_start: float, detected_at: float):
+        """Note a frame's verdict before it goes to the smoother"""
+        if eyes_detected == stable_state:
+            self._first = None  # A flicker, not a change
+        elif self._first is None:
+            self._first = (frame_start, detected_at)
+
+    def attention_changed(self, attentive: bool):
+        """The smoother confirmed a change: open its trace"""
+        now = time.perf_counter()
+        if self._open:
+            self.tracer.discard(self._open)  # A pause that never fired
+        first_start, first_done = self._first or (now, now)
+        self._open = self.tracer.begin(KIND_RESUME if attentive else KIND_PAUSE, first_start)
+        self.tracer.span(self._open, 'detect', first_start, first_done)
+        self.tracer.span(self._open, 'smoothing', first_done, now)
+        self._flipped_at = now
+        self._first = None
+
+    def decided(self, kind: str) -> int:
+        """
+        A pause/resume is about to be published
+
+        Returns:
+            The trace id to carry on the event (0 if nothing is traced)
+        """
+        if not self._open or self.tracer.kind(self._open) != kind:
+            return 0
+        trace_id, self._open = self._open, 0
+        self.tracer.span(trace_id, 'timeout' if kind == KIND_PAUSE else 'decide', self._flipped_at)
+        return trace_id
+
+    def end_frame(self):
+        """A resume is decided on the frame that confirmed the eyes, or not at all"""
+        if self._open and self.tracer.kind(self._open) == KIND_RESUME:
+            self.tracer.discard(self._open)
+            self._open = 0
+
+    def reset(self):
+        if self._open:
+            self.tracer.discard(self._open)
+        self._open = 0
+        self._first = None
+
+
+def _us(seconds: float) -> float:
+    return round(seconds * 1e6, 1)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Plain-text latency summary, for the stats panel and scripts"""
+    lines = [f"{'decision':<10}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  ms"]
+    for kind in (KIND_PAUSE, KIND_RESUME):
+        row = summary[kind]
+        values = ''.join('        -' if row[key] is None else f"{row[key]:>9.0f}" for key in ('p50', 'p95', 'p99', 'max'))
+        lines.append(f"{kind:<10}{row['count']:>7}{values}")
+        if row['span_p50']:
+            lines.append('    median: ' + ', '.join(f"{name} {ms:.0f}" for name, ms in row['span_p50'].items()))
+    return '\n'.join(lines)
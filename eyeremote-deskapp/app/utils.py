@@ -3,11 +3,13 @@ Utility functions for EyeRemote application
 """
 
 import os
+import re
 import sys
 import platform
 import subprocess
-import psutil
-from typing import List, Optional, Dict
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 def get_active_window_info() -> Dict[str, str]:
     """
@@ -24,6 +26,8 @@ def get_active_window_info() -> Dict[str, str]:
             hwnd = win32gui.GetForegroundWindow()
             window_title = win32gui.GetWindowText(hwnd)
             
+            import psutil
+
             _, pid = win32process.GetWindowThreadProcessId(hwnd)
             process = psutil.Process(pid)
             
@@ -78,47 +82,155 @@ def is_media_application(process_name: str) -> bool:
     process_lower = process_name.lower()
     return any(app in process_lower for app in media_apps)
 
-def get_camera_list() -> List[Dict[str, str]]:
+def _probe_camera(index: int) -> bool:
+    """Open and release a camera to see whether the index exists"""
+    import cv2
+    cap = cv2.VideoCapture(index)
+    try:
+        return cap.isOpened()
+    finally:
+        cap.release()
+
+
+class CameraEnumerator:
+    def __init__(self, probe: Optional[Callable[[int], bool]] = None, probe_timeout: float = 2.0,
+                 max_index: int = 10, cache_ttl: float = 30.0,
+                 dev_dir: str = '/dev', sysfs_dir: str = '/sys/class/video4linux'):
+        """
+        Camera enumeration with a cache
+
+        On Linux, devices are read from /dev/video* and their names from
+        sysfs, without opening them. Elsewhere every index is probed
+        concurrently, each probe with its own timeout.
+
+        Args:
+            probe: Returns True if a camera index opens (default: cv2.VideoCapture)
+            probe_timeout: Seconds to wait for each probe
+            max_index: Indices 0..max_index-1 are probed
+            cache_ttl: Seconds a probed list stays valid where device changes
+                cannot be observed (Linux uses the device nodes instead)
+            dev_dir: Device directory (Linux)
+            sysfs_dir: video4linux sysfs directory (Linux)
+        """
+        self.probe = probe or _probe_camera
+        self.probe_timeout = probe_timeout
+        self.max_index = max_index
+        self.cache_ttl = cache_ttl
+        self.dev_dir = dev_dir
+        self.sysfs_dir = sysfs_dir
+
+        self._lock = threading.Lock()
+        self._cache: Optional[List[Dict[str, Any]]] = None
+        self._cache_key: Optional[Tuple] = None
+        self._cache_time = 0.0
+
+    def _use_sysfs(self) -> bool:
+        return sys.platform.startswith('linux') and os.path.isdir(self.sysfs_dir)
+
+    def _device_key(self) -> Tuple:
+        """Fingerprint of the attached devices; changes when a camera is plugged in or out"""
+        if self._use_sysfs():
+            try:
+                return tuple(sorted(name for name in os.listdir(self.dev_dir) if name.startswith('video')))
+            except OSError:
+                return ()
+        return ()
+
+    def invalidate(self):
+        with self._lock:
+            self._cache = None
+
+    def list(self, refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Available cameras, from the cache while the devices are unchanged
+
+        Args:
+            refresh: Enumerate again even if the cache is valid
+
+        Returns:
+            List of {'index', 'name', 'available'} dictionaries
+        """
+        with self._lock:
+            key = self._device_key()
+            fresh = (self._cache is not None and key == self._cache_key
+                     and (self._use_sysfs() or time.monotonic() - self._cache_time < self.cache_ttl))
+            if fresh and not refresh:
+                return list(self._cache)
+
+            cameras = self._read_sysfs() if self._use_sysfs() else self._probe_all()
+            self._cache, self._cache_key, self._cache_time = cameras, key, time.monotonic()
+            return list(cameras)
+
+    def _read_sysfs(self) -> List[Dict[str, Any]]:
+        """List capture devices from /dev/video* and sysfs without opening them"""
+        cameras = []
+        for entry in os.listdir(self.sysfs_dir):
+            match = re.fullmatch(r'video(\d+)', entry)
+            if not match or not os.path.exists(os.path.join(self.dev_dir, entry)):
+                continue
+            device_dir = os.path.join(self.sysfs_dir, entry)
+            # UVC cameras expose a second node for metadata; its sysfs index is not 0
+            if _read_text(os.path.join(device_dir, 'index'), '0') != '0':
+                continue
+            index = int(match.group(1))
+            cameras.append({
+                'index': index,
+                'name': _read_text(os.path.join(device_dir, 'name'), f"Camera {index}"),
+                'available': True
+            })
+        return sorted(cameras, key=lambda camera: camera['index'])
+
+    def _probe_all(self) -> List[Dict[str, Any]]:
+        """Probe every index concurrently; a probe that hangs is abandoned after the timeout"""
+        results: Dict[int, bool] = {}
+        threads = []
+        for index in range(self.max_index):
+            # Daemon threads: a driver call that never returns cannot block exit
+            thread = threading.Thread(target=self._run_probe, args=(index, results),
+                                      name=f'camera-probe-{index}', daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        deadline = time.monotonic() + self.probe_timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        return [{'index': index, 'name': f"Camera {index}", 'available': True}
+                for index in sorted(results) if results[index]]
+
+    def _run_probe(self, index: int, results: Dict[int, bool]):
+        try:
+            results[index] = bool(self.probe(index))
+        except Exception:
+            results[index] = False
+
+
+def _read_text(path: str, default: str) -> str:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip() or default
+    except OSError:
+        return default
+
+
+_camera_enumerator = CameraEnumerator()
+
+
+def get_camera_list(refresh: bool = False) -> List[Dict[str, Any]]:
     """
     Get list of available cameras
     
+    Args:
+        refresh: Enumerate again instead of using the cached list
+
     Returns:
         List of dictionaries with camera info
     """
-    cameras = []
-    
     try:
-        import cv2
-        
-        # Test cameras 0-9
-        for i in range(10):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                # Try to get camera name (not always available)
-                camera_name = f"Camera {i}"
-                
-                # On Windows, try to get more specific info
-                if platform.system() == 'Windows':
-                    try:
-                        import win32api
-                        # This is a simplified approach - real camera enumeration would be more complex
-                        camera_name = f"Camera {i}"
-                    except:
-                        pass
-                
-                cameras.append({
-                    'index': i,
-                    'name': camera_name,
-                    'available': True
-                })
-                cap.release()
-            else:
-                break
-                
+        return _camera_enumerator.list(refresh)
     except Exception as e:
         print(f"Error enumerating cameras: {e}")
-        
-    return cameras
+        return []
 
 def check_camera_permissions() -> bool:
     """
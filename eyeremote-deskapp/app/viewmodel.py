@@ -0,0 +1,135 @@
+"""
+View model for the desktop window
+The engine side writes the latest UI state from any thread as often as it
+likes; the Tk thread samples it at a fixed refresh rate and touches only the
+widgets whose field changed. The number of Tk callbacks no longer grows
+with the frame rate.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+DEFAULT_REFRESH_HZ = 10
+
+_MISSING = object()
+
+
+class ViewModel:
+    def __init__(self, **fields: Any):
+        """
+        Latest UI state
+
+        Args:
+            **fields: Field names and their initial values
+        """
+        self._fields = dict(fields)
+        self._version = 0
+        self._lock = threading.Lock()
+        self.writes = 0
+
+    def set(self, **changes: Any):
+        """Update fields; safe to call from any thread and cheap when nothing changes"""
+        with self._lock:
+            self.writes += 1
+            for name, value in changes.items():
+                if self._fields.get(name, _MISSING) != value:
+                    self._fields[name] = value
+                    self._version += 1
+
+    def get(self, name: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._fields.get(name, default)
+
+    def snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        """(version, copy of the fields); the version changes whenever a field does"""
+        with self._lock:
+            return self._version, dict(self._fields)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+
+class ViewBinder:
+    def __init__(self, model: ViewModel, schedule: Callable[[int, Callable], Any],
+                 refresh_hz: float = DEFAULT_REFRESH_HZ):
+        """
+        Push view model changes to widgets from the widget thread
+
+        Args:
+            model: State to sample
+            schedule: Runs a callback after a delay in ms on the widget thread (root.after)
+            refresh_hz: Samples per second
+        """
+        self.model = model
+        self.schedule = schedule
+        self.interval_ms = max(1, int(1000 / max(0.1, refresh_hz)))
+        self._bindings: List[Tuple[Tuple[str, ...], Callable]] = []
+        self._applied: Dict[str, Any] = {}
+        self._seen_version = -1
+        self._running = False
+        self.ticks = 0
+        self.updates = 0
+        self._started_at = None
+
+    def bind(self, fields, apply: Callable):
+        """
+        Call apply(*values) whenever one of the fields changes
+
+        Args:
+            fields: Field name or tuple of names passed together
+            apply: Updates the widgets; runs on the widget thread
+        """
+        names = (fields,) if isinstance(fields, str) else tuple(fields)
+        self._bindings.append((names, apply))
+
+    def start(self):
+        self._running = True
+        self._started_at = time.monotonic()
+        self.refresh()
+        self.schedule(self.interval_ms, self._tick)
+
+    def stop(self):
+        self._running = False
+
+    def _tick(self):
+        if not self._running:
+            return
+        self.ticks += 1
+        try:
+            self.refresh()
+        finally:
+            self.schedule(self.interval_ms, self._tick)
+
+    def refresh(self) -> int:
+        """
+        Apply the fields that changed since the last refresh (widget thread only)
+
+        Returns:
+            Bindings applied
+        """
+        version, fields = self.model.snapshot()
+        if version == self._seen_version:
+            return 0
+        self._seen_version = version
+        changed = {name for name, value in fields.items() if self._applied.get(name, _MISSING) != value}
+        applied = 0
+        for names, apply in self._bindings:
+            if changed.intersection(names):
+                apply(*(fields.get(name) for name in names))
+                applied += 1
+        self._applied = fields
+        self.updates += applied
+        return applied
+
+    def stats(self) -> Dict[str, Any]:
+        """Refresh callbacks and widget updates, in total and per second"""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            'ticks': self.ticks,
+            'updates': self.updates,
+            'model_writes': self.model.writes,
+            'ticks_per_second': round(self.ticks / elapsed, 1) if elapsed else 0.0,
+            'updates_per_second': round(self.updates / elapsed, 1) if elapsed else 0.0,
+        }
@@ -0,0 +1,517 @@
+"""
+Out-of-process detector
+Runs capture and eye detection in a separate worker process so detection does
+not share the GIL with the window, and a crash inside OpenCV only takes the
+worker down. Grayscale frames are written to a shared-memory ring; verdicts
+come back as fixed-size records over a pipe. A supervisor thread restarts the
+worker with backoff when it dies and measures the latency the handoff adds.
+"""
+
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from .capture import CaptureIncident
+from .config import Config
+from .frame_ring import DEFAULT_SLOT_BYTES, DEFAULT_SLOTS, FrameRing
+
+# Records from the worker: the first byte is the kind
+KIND_READY = 0      # Detector created, frames follow
+KIND_FAILED = 1     # Detector could not be created (+ message)
+KIND_RESULT = 2     # One detection (RESULT)
+KIND_NO_FRAME = 3   # The camera delivered no frame (RESULT, no eyes)
+KIND_LOST = 4       # Camera incident started (INCIDENT)
+KIND_RECOVERED = 5  # Camera incident ended (INCIDENT)
+KIND_RESUMED = 6    # Answer to CMD_RESUME (+ 1 byte: camera was still open)
+KIND_LOG = 7        # Log message (+ text)
+KIND_MODE = 8       # Negotiated camera mode (+ JSON)
+
+# kind, seq, ring slot, captured at, detected at (time.monotonic, shared by
+# all processes on one machine), detection ms, eyes
+RESULT = struct.Struct('<BIiddf?')
+# kind, camera index, recovered index, started at, ended at (time.time), attempts
+INCIDENT = struct.Struct('<Biiddi')
+
+# Commands to the worker: command, argument
+COMMAND = struct.Struct('<Bd')
+CMD_STOP = 0
+CMD_PAUSE = 1   # Warm standby; argument: grace seconds
+CMD_RESUME = 2
+
+
+def _worker_main(conn: Any, config_file: str, config_data: Dict[str, Any], camera_index: int,
+                 ring_name: str, slots: int, slot_bytes: int, max_faces: int, max_rate: float,
+                 capture_factory: Optional[Callable[[int], Any]],
+                 detector_factory: Optional[Callable[[Any, int], Any]]):
+    """Worker process: open the camera, detect until told to stop or the pipe closes"""
+    import json
+
+    from .camera_setup import CameraSetup
+    from .luma import read_gray
+
+    stop = threading.Event()
+    send_lock = threading.Lock()
+
+    def send(data: bytes):
+        with send_lock:
+            conn.send_bytes(data)
+
+    def send_text(kind: int, text: str):
+        send(bytes([kind]) + text.encode('utf-8', 'replace'))
+
+    def send_incident(kind: int, incident: CaptureIncident):
+        send(INCIDENT.pack(kind, incident.camera_index,
+                           -1 if incident.recovered_index is None else incident.recovered_index,
+                           incident.started_at, incident.ended_at or 0.0, incident.attempts))
+
+    ring = FrameRing(slots, slot_bytes, name=ring_name)
+    config = Config(config_file)
+    config.config_data.update(config_data)
+    setup = CameraSetup(config, capture_factory, log=lambda message: send_text(KIND_LOG, message),
+                        on_lost=lambda incident: send_incident(KIND_LOST, incident),
+                        on_recovered=lambda incident: send_incident(KIND_RECOVERED, incident),
+                        interrupt=lambda: stop)
+    try:
+        detector = (detector_factory or CameraSetup.create_detector)(setup, camera_index)
+    except Exception as e:
+        send_text(KIND_FAILED, str(e))
+        ring.close()
+        conn.close()
+        return
+    if detector.cap is not None and hasattr(detector.cap, 'interrupt'):
+        detector.cap.interrupt = stop
+    mode = setup.mode_stats(camera_index)
+    if mode:
+        send_text(KIND_MODE, json.dumps(mode))
+    send(bytes([KIND_READY]))
+
+    interval = 1.0 / max_rate if max_rate > 0 else 0.0
+    seq = 0
+    paused = False
+    try:
+        while True:
+            # Paused: block until the next command; running: only check for one
+            if conn.poll(None if paused else 0):
+                command, argument = COMMAND.unpack(conn.recv_bytes())
+                if command == CMD_STOP:
+                    break
+                if command == CMD_PAUSE and not paused:
+                    detector.standby(argument)
+                    paused = True
+                elif command == CMD_RESUME:
+                    warm = detector.resume() if paused else True
+                    paused = False
+                    send(bytes([KIND_RESUMED, int(warm)]))
+                continue
+
+            captured = time.monotonic()
+            ret, gray = read_gray(detector.cap)
+            if not ret:
+                send(RESULT.pack(KIND_NO_FRAME, seq, -1, captured, time.monotonic(), 0.0, False))
+                time.sleep(interval)
+                continue
+            seq += 1
+            slot = ring.write(seq, gray, captured)
+            started = time.perf_counter()
+            try:
+                eyes = bool(detector.detect_eyes_in(gray, max_faces))
+            except Exception as e:
+                send_text(KIND_LOG, f"Detection error: {e}")
+                eyes = False
+            detect_ms = (time.perf_counter() - started) * 1000
+            send(RESULT.pack(KIND_RESULT, seq, slot, captured, time.monotonic(), detect_ms, eyes))
+            time.sleep(max(0.0, interval - (time.monotonic() - captured)))
+    except (EOFError, OSError):
+        pass  # The supervisor is gone
+    finally:
+        stop.set()
+        detector.cleanup()
+        ring.close()
+        conn.close()
+
+
+def _percentile(samples: Any, fraction: float) -> Optional[float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ProcessDetector:
+    def __init__(self, config: Config, camera_index: int = 0, max_faces: int = 1,
+                 max_rate: float = 10.0, capture_factory: Optional[Callable[[int], Any]] = None,
+                 detector_factory: Optional[Callable[[Any, int], Any]] = None,
+                 on_lost: Optional[Callable[[CaptureIncident], None]] = None,
+                 on_recovered: Optional[Callable[[CaptureIncident], None]] = None,
+                 log: Callable[[str], None] = print, max_restarts: int = 5,
+                 initial_backoff: float = 0.5, max_backoff: float = 10.0,
+                 stable_after: float = 30.0, start_timeout: float = 30.0, stale_after: float = 1.0,
+                 slots: int = DEFAULT_SLOTS, slot_bytes: int = DEFAULT_SLOT_BYTES):
+        """
+        A detector in a worker process behind the EyeDetector interface
+
+        Args:
+            config: Configuration passed to the worker
+            camera_index: Camera the worker opens
+            max_faces: Maximum faces to check per frame
+            max_rate: Detections per second in the worker
+            capture_factory: Opens a raw capture in the worker (must be picklable)
+            detector_factory: Creates the detector in the worker from a
+                CameraSetup and a camera index (must be picklable; default:
+                CameraSetup.create_detector)
+            on_lost: Called when the camera or the worker stops delivering
+            on_recovered: Called when results flow again
+            log: Receives progress messages, including the worker's
+            max_restarts: Restarts in a row before giving up
+            initial_backoff: Seconds before the first restart
+            max_backoff: Upper bound for the doubling delay between restarts
+            stable_after: Seconds a worker must run for the restart count to reset
+            start_timeout: Seconds to wait for a worker to open the camera
+            stale_after: Seconds detect_eyes waits for a new result
+            slots: Frames in the shared-memory ring
+            slot_bytes: Largest frame (height * width) the ring holds
+        """
+        self.config = config
+        self.camera_index = camera_index
+        self.max_faces = max_faces
+        self.max_rate = max_rate
+        self.capture_factory = capture_factory
+        self.detector_factory = detector_factory
+        self.on_lost = on_lost or (lambda incident: None)
+        self.on_recovered = on_recovered or (lambda incident: None)
+        self.log = log
+        self.max_restarts = max_restarts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.start_timeout = start_timeout
+        self.stale_after = stale_after
+
+        # Set to abort waiting for a restarted worker (the owner's stop event)
+        self.interrupt = threading.Event()
+        self.in_standby = False
+        self.last_resume_warm = False
+        self.camera_mode: Optional[Dict[str, Any]] = None
+        self.failed = False         # Gave up restarting
+        self.camera_failed = False  # The worker's camera delivered no frame
+        self.restarting = False
+        self.restarts = 0
+        self.incidents = []
+        self.results = 0
+        self.last_restart_ms: Optional[float] = None
+        self.handoff_ms: Deque[float] = deque(maxlen=1000)
+        self.frame_age_ms: Deque[float] = deque(maxlen=1000)
+        self.detect_ms: Deque[float] = deque(maxlen=1000)
+
+        self.process = None
+        self._conn = None
+        self._latest: Optional[Tuple[int, int, bool]] = None  # seq, slot, eyes
+        self._consumed_seq = 0
+        self._resumed: Optional[bool] = None
+        self._consecutive = 0
+        self._spawned_at = 0.0
+        self._send_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._stopping = threading.Event()
+        self._supervisor = None
+
+        self.ring = FrameRing(slots, slot_bytes)
+        try:
+            self._spawn()
+        except Exception:
+            self.ring.close()
+            raise
+        self._start_supervisor()
+
+    # --- Worker lifecycle ----------------------------------------------------
+
+    def _spawn(self):
+        """Start a worker and wait until its detector is ready"""
+        import multiprocessing
+
+        # spawn everywhere: a forked copy of a process running Tk and OpenCV threads is not safe
+        context = multiprocessing.get_context('spawn')
+        conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=_worker_main, name=f'eyeremote-detector-{self.camera_index}', daemon=True,
+            args=(child_conn, self.config.config_file, dict(self.config.config_data), self.camera_index,
+                  self.ring.name, self.ring.slots, self.ring.slot_bytes, self.max_faces, self.max_rate,
+                  self.capture_factory, self.detector_factory))
+        process.start()
+        child_conn.close()
+
+        deadline = time.monotonic() + self.start_timeout
+        try:
+            while True:
+                if not conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise Exception(f"Detector worker did not open camera {self.camera_index} "
+                                    f"within {self.start_timeout:.0f}s")
+                try:
+                    data = conn.recv_bytes()
+                except (EOFError, OSError):
+                    process.join(1.0)
+                    raise Exception(f"Detector worker exited during startup (code {process.exitcode})")
+                if data[0] == KIND_READY:
+                    break
+                if data[0] == KIND_FAILED:
+                    raise Exception(data[1:].decode('utf-8', 'replace'))
+                self._handle(data)
+        except Exception:
+            conn.close()
+            self._stop_process(process)
+            raise
+        self.process = process
+        self._conn = conn
+        self._spawned_at = time.monotonic()
+        self.camera_failed = False
+
+    def _start_supervisor(self):
+        self._supervisor = threading.Thread(target=self._supervise, name='detector-supervisor', daemon=True)
+        self._supervisor.start()
+
+    def _supervise(self):
+        """Read the worker's records; restart it when the pipe closes"""
+        while not self._stopping.is_set():
+            conn = self._conn
+            while True:
+                try:
+                    data = conn.recv_bytes()
+                except (EOFError, OSError):
+                    break
+                self._handle(data)
+            if self._stopping.is_set() or not self._restart():
+                break
+
+    def _restart(self) -> bool:
+        """
+        Start a new worker after the old one died, with exponential backoff
+
+        Returns:
+            True once a new worker runs, False if stopped or out of restarts
+        """
+        self.process.join(1.0)
+        code = self.process.exitcode
+        self._conn.close()
+        if time.monotonic() - self._spawned_at >= self.stable_after:
+            self._consecutive = 0
+        incident = CaptureIncident(camera_index=self.camera_index, started_at=time.time(),
+                                   last_error=f"detector worker exited with code {code}")
+        self.incidents.append(incident)
+        with self._cond:
+            self.restarting = True
+        self.on_lost(incident)
+
+        crashed_at = time.perf_counter()
+        delay = self.initial_backoff * (2 ** min(self._consecutive, 10))
+        self.log(f"Detector worker exited with code {code}, restarting")
+        try:
+            while not self._stopping.is_set():
+                if self._consecutive >= self.max_restarts:
+                    self.log(f"Detector worker keeps failing, giving up after {self.max_restarts} restarts")
+                    incident.ended_at = time.time()
+                    with self._cond:
+                        self.failed = True
+                    return False
+                if self._stopping.wait(min(delay, self.max_backoff)):
+                    break
+                delay *= 2
+                self._consecutive += 1
+                self.restarts += 1
+                incident.attempts += 1
+                try:
+                    self._spawn()
+                except Exception as e:
+                    incident.last_error = str(e)
+                    self.log(f"Detector worker restart failed: {e}")
+                    continue
+                self.last_restart_ms = (time.perf_counter() - crashed_at) * 1000
+                incident.ended_at = time.time()
+                incident.recovered_index = self.camera_index
+                self.log(f"Detector worker restarted after {self.last_restart_ms:.0f} ms")
+                if self.in_standby:
+                    self._send(CMD_PAUSE, float(self.config.get('standby_grace_seconds', 30)))
+                self.on_recovered(incident)
+                return True
+            incident.ended_at = time.time()
+            return False
+        finally:
+            with self._cond:
+                self.restarting = False
+                self._cond.notify_all()
+
+    def _stop_process(self, process: Any, timeout: float = 2.0):
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def _send(self, command: int, argument: float = 0.0) -> bool:
+        with self._send_lock:
+            try:
+                self._conn.send_bytes(COMMAND.pack(command, argument))
+                return True
+            except (OSError, AttributeError):
+                return False
+
+    # --- Records ---------------------------------------------------------------
+
+    def _handle(self, data: bytes):
+        import json
+
+        kind = data[0]
+        if kind in (KIND_RESULT, KIND_NO_FRAME):
+            received = time.monotonic()
+            _, seq, slot, captured, detected, detect_ms, eyes = RESULT.unpack(data)
+            with self._cond:
+                if kind == KIND_RESULT:
+                    self.handoff_ms.append((received - detected) * 1000)
+                    self.frame_age_ms.append((received - captured) * 1000)
+                    self.detect_ms.append(detect_ms)
+                    self.results += 1
+                    self._latest = (seq, slot, eyes)
+                    self.camera_failed = False
+                else:
+                    self.camera_failed = True
+                self._cond.notify_all()
+        elif kind in (KIND_LOST, KIND_RECOVERED):
+            _, camera_index, recovered_index, started_at, ended_at, attempts = INCIDENT.unpack(data)
+            incident = CaptureIncident(camera_index=camera_index, started_at=started_at,
+                                       ended_at=ended_at or None,
+                                       recovered_index=None if recovered_index < 0 else recovered_index,
+                                       attempts=attempts)
+            (self.on_lost if kind == KIND_LOST else self.on_recovered)(incident)
+        elif kind == KIND_RESUMED:
+            with self._cond:
+                self._resumed = bool(data[1])
+                self._cond.notify_all()
+        elif kind == KIND_LOG:
+            self.log(data[1:].decode('utf-8', 'replace'))
+        elif kind == KIND_MODE:
+            self.camera_mode = json.loads(data[1:].decode('utf-8'))
+
+    # --- EyeDetector interface -------------------------------------------------
+
+    @property
+    def cap(self) -> 'ProcessDetector':
+        # Frames are read from the ring, so the detector stands in for its capture
+        return self
+
+    def detect_eyes(self, max_faces: int = 1) -> bool:
+        """
+        Verdict of the worker's newest detection
+
+        Waits up to stale_after for a result the caller has not seen yet, and
+        for as long as a crashed worker is being restarted (like a capture
+        that is reconnecting).
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._fresh() or self.failed or self.interrupt.is_set()
+                                or self._stopping.is_set(), timeout=self.stale_after)
+            while self.restarting and not self.interrupt.is_set() and not self._stopping.is_set():
+                self._cond.wait(0.1)
+            if self._latest is None:
+                return False
+            self._consumed_seq = self._latest[0]
+            return self._latest[2]
+
+    def _fresh(self) -> bool:
+        return self._latest is not None and self._latest[0] != self._consumed_seq and not self.restarting
+
+    def is_camera_working(self) -> bool:
+        return not self.failed and not self.camera_failed
+
+    def isOpened(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def read_gray(self):
+        """Newest frame from the shared-memory ring, (ret, gray)"""
+        latest = self._latest
+        frame = self.ring.read(latest[1], latest[0]) if latest else None
+        return (True, frame[2]) if frame else (False, None)
+
+    def read(self):
+        import cv2
+
+        ret, gray = self.read_gray()
+        return (True, cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)) if ret else (False, None)
+
+    def standby(self, grace_seconds: float = 30.0, keepalive_interval: float = 0.5):
+        """Pause the worker; it keeps the camera open for grace_seconds"""
+        if self.in_standby:
+            return
+        self._send(CMD_PAUSE, grace_seconds)
+        self.in_standby = True
+
+    def resume(self) -> bool:
+        """
+        Resume detection, restarting the worker if it had been given up on
+
+        Returns:
+            True if the worker's camera was still open
+        """
+        if self.failed or not self.isOpened():
+            self.cleanup()
+            self._stopping.clear()
+            self.failed = False
+            self._consecutive = 0
+            self.ring = FrameRing(self.ring.slots, self.ring.slot_bytes)
+            self._spawn()
+            self._start_supervisor()
+            self.in_standby = False
+            self.last_resume_warm = False
+            return False
+        with self._cond:
+            self._resumed = None
+            self._latest = None
+        self._send(CMD_RESUME)
+        with self._cond:
+            self._cond.wait_for(lambda: self._resumed is not None or self.restarting, timeout=self.start_timeout)
+            warm = bool(self._resumed)
+        self.in_standby = False
+        self.last_resume_warm = warm
+        return warm
+
+    def cleanup(self):
+        """Stop the worker and release the shared memory"""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self.process is not None:
+            self._send(CMD_STOP)
+            self._stop_process(self.process)
+        if self._supervisor is not None and self._supervisor is not threading.current_thread():
+            self._supervisor.join(2.0)
+        if self._conn is not None:
+            self._conn.close()
+        self.ring.close()
+        self.in_standby = False
+
+    def process_stats(self) -> Dict[str, Any]:
+        """Worker state, restarts and the latency the process handoff adds"""
+        def summary(samples):
+            values = list(samples)
+            return {'p50': _round(_percentile(values, 0.5)), 'p95': _round(_percentile(values, 0.95)),
+                    'max': _round(max(values) if values else None)}
+
+        return {
+            'pid': self.process.pid if self.process else None,
+            'alive': self.isOpened(),
+            'failed': self.failed,
+            'restarts': self.restarts,
+            'last_restart_ms': _round(self.last_restart_ms),
+            'results': self.results,
+            'handoff_ms': summary(self.handoff_ms),
+            'frame_age_ms': summary(self.frame_age_ms),
+            'detect_ms': summary(self.detect_ms),
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
@@ -12,11 +12,10 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 if __name__ == "__main__":
     try:
-        from app.main import EyeRemoteApp
-        
-        # Create and run the application
-        app = EyeRemoteApp()
-        app.run()
+        from app.cli import main
+
+        # Opens the window, or runs without one when started with --headless
+        sys.exit(main())
     except ImportError as e:
         print(f"Import error: {e}")
         print("Make sure you're running from the EyeRemote directory and all dependencies are installed.")
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+EyeRemote - Chrome native-messaging host launcher
+Referenced by the host manifest (installers/com.eyeremote.host.json)
+"""
+
+import sys
+import os
+
+# Add the current directory to Python path to allow imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+if __name__ == "__main__":
+    from app.native_host import main
+    sys.exit(main())
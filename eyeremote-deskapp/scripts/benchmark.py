@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Detection benchmark on recorded clips.
+
+Runs the detection pipeline (capture, grayscale conversion, face and eye
+cascades, attention smoothing) over every clip in a directory. Reports
+frames per second, per-stage times and CPU for each clip, and compares them
+with a stored baseline. Clips are video files OpenCV can decode, or numpy
+frame arrays (.npy, or .npz with 'frames' and optionally 'fps'). Without a
+directory a synthetic clip is generated, so the script runs anywhere. That
+is enough to compare cascade cost, though no eyes are found in it.
+
+Exits with 1 when a clip is slower than the baseline by more than the
+tolerance, or when its detections differ. Baselines are per machine;
+record one with --save-baseline.
+
+Usage:
+    python scripts/benchmark.py [CLIPS_DIR] [--baseline FILE] [--save-baseline]
+                                [--tolerance 0.15] [--realtime] [--json FILE]
+"""
+
+import sys
+import os
+import argparse
+import json
+import platform
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from app.attention import AttentionSmoother
+from app.engine import EyeRemoteEngine
+from app.eye_detector import EyeDetector, load_cascades
+from app.instrumentation import StageTimings
+from app.sources import FrameArraySource, VideoFileSource
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.webm')
+ARRAY_EXTENSIONS = ('.npy', '.npz')
+SYNTHETIC = 'synthetic'
+STAGES = ('capture', 'convert', 'face_cascade', 'eye_cascade', 'smoothing', 'frame')
+
+
+def synthetic_frames(count=150, size=(480, 640), seed=7):
+    """Textured frames with a bright face-sized ellipse drifting across"""
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (size[0], size[1], 3), dtype=np.uint8), (9, 9), 0)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        center = (160 + (i * 2) % 320, 240)
+        cv2.ellipse(frame, center, (70, 90), 0, 0, 360, (180, 170, 200), -1)
+        cv2.circle(frame, (center[0] - 28, 215), 10, (40, 40, 40), -1)
+        cv2.circle(frame, (center[0] + 28, 215), 10, (40, 40, 40), -1)
+        frames.append(frame)
+    return frames
+
+
+def find_clips(directory):
+    """(name, capture_factory) for each clip in directory, or the synthetic clip"""
+    if not directory:
+        frames = synthetic_frames()
+        return [(SYNTHETIC, lambda realtime: FrameArraySource.factory(frames, realtime=realtime))]
+    clips = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        extension = os.path.splitext(name)[1].lower()
+        if extension in VIDEO_EXTENSIONS:
+            clips.append((name, lambda realtime, path=path: VideoFileSource.factory(path, realtime=realtime)))
+        elif extension in ARRAY_EXTENSIONS:
+            frames = FrameArraySource.from_file(path)
+            clips.append((name, lambda realtime, frames=frames: FrameArraySource.factory(
+                frames.frames, fps=frames.fps, realtime=realtime)))
+    return clips
+
+
+def run_clip(factory):
+    """Detect on every frame of one clip; returns the clip's results"""
+    detector = EyeDetector(capture_factory=factory, configure_capture=lambda cap: None)
+    source = detector.cap
+    timings = StageTimings(window=1_000_000)
+    detector.timings = timings
+    smoother = AttentionSmoother(EyeRemoteEngine.EYES_PRESENT_THRESHOLD, EyeRemoteEngine.NO_EYES_THRESHOLD)
+    eyes_frames = changes = 0
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    while True:
+        frame_start = time.perf_counter()
+        eyes = detector.detect_eyes()
+        if source.exhausted:
+            break
+        start = time.perf_counter()
+        if smoother.update(eyes) is not None:
+            changes += 1
+        timings.lap('smoothing', start)
+        timings.lap('frame', frame_start)
+        timings.frame_done()
+        eyes_frames += eyes
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    detector.cleanup()
+
+    snapshot = timings.snapshot()
+    return {
+        'frames': timings.frames,
+        'dropped': source.dropped,
+        'seconds': round(wall, 3),
+        'fps': round(timings.frames / wall, 2) if wall > 0 else 0.0,
+        'cpu_pct': round(100.0 * cpu / wall, 1) if wall > 0 else 0.0,
+        'eyes_frames': eyes_frames,
+        'attention_changes': changes,
+        'stages': {name: {key: snapshot['stages'][name][key] for key in ('p50', 'p95', 'mean')}
+                   for name in STAGES if name in snapshot['stages']},
+    }
+
+
+def environment():
+    return {'python': platform.python_version(), 'opencv': cv2.__version__,
+            'machine': f"{platform.system()} {platform.machine()} {platform.processor()}".strip(),
+            'cpus': os.cpu_count()}
+
+
+def change(value, reference):
+    return (value - reference) / reference if reference else 0.0
+
+
+def compare(name, result, reference, tolerance, realtime):
+    """Lines describing the difference from the baseline, and whether it regressed"""
+    problems = []
+    if realtime:
+        cpu = change(result['cpu_pct'], reference['cpu_pct'])
+        summary = f"CPU {result['cpu_pct']:.1f}% vs {reference['cpu_pct']:.1f}% ({cpu:+.0%})"
+        if cpu > tolerance:
+            problems.append(f"CPU up {cpu:.0%}")
+    else:
+        fps = change(result['fps'], reference['fps'])
+        summary = f"{result['fps']:.1f} vs {reference['fps']:.1f} FPS ({fps:+.0%})"
+        if fps < -tolerance:
+            problems.append(f"FPS down {-fps:.0%}")
+    if not realtime and (result['eyes_frames'], result['attention_changes']) != \
+            (reference['eyes_frames'], reference['attention_changes']):
+        problems.append(f"detections changed (eyes in {reference['eyes_frames']} -> {result['eyes_frames']} "
+                        f"frames, {reference['attention_changes']} -> {result['attention_changes']} changes)")
+    stages = ', '.join(f"{stage} {change(result['stages'][stage]['p50'], reference['stages'][stage]['p50']):+.0%}"
+                       for stage in STAGES
+                       if stage in result['stages'] and stage in reference.get('stages', {}))
+    return f"  {name}: {summary}; p50 {stages}", problems
+
+
+def print_results(results):
+    header = f"{'clip':<24}{'frames':>8}{'FPS':>9}{'CPU %':>8}{'eyes':>7}" + ''.join(f"{s:>14}" for s in STAGES)
+    print(header)
+    for name, result in results.items():
+        stages = ''.join(f"{result['stages'][s]['p50']:>11.2f} ms" if s in result['stages'] else f"{'-':>14}"
+                         for s in STAGES)
+        print(f"{name[:23]:<24}{result['frames']:>8}{result['fps']:>9.1f}{result['cpu_pct']:>8.1f}"
+              f"{result['eyes_frames']:>7}{stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark detection on recorded clips')
+    parser.add_argument('clips', nargs='?', help='Directory of clips (default: a synthetic clip)')
+    parser.add_argument('--baseline', help='Baseline JSON (default: benchmark_baseline.json next to the clips)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Allowed slowdown (0.15 = 15%%)')
+    parser.add_argument('--realtime', action='store_true',
+                        help='Pace clips at their frame rate and compare CPU instead of FPS')
+    parser.add_argument('--json', metavar='FILE', help='Also write the results to FILE')
+    args = parser.parse_args()
+
+    try:
+        load_cascades()
+    except Exception as e:
+        print(f"Haar cascades not available in this OpenCV build ({e}), cannot benchmark")
+        return 1
+    clips = find_clips(args.clips)
+    if not clips:
+        print(f"No clips in {args.clips} ({', '.join(VIDEO_EXTENSIONS + ARRAY_EXTENSIONS)})")
+        return 1
+    baseline_path = args.baseline or os.path.join(args.clips or os.path.dirname(os.path.abspath(__file__)),
+                                                  'benchmark_baseline.json')
+
+    print(f"Benchmarking {len(clips)} clip(s){' in real time' if args.realtime else ''}...")
+    results = {}
+    for name, factory in clips:
+        results[name] = run_clip(factory(args.realtime))
+    print()
+    print_results(results)
+    report = {'environment': environment(), 'realtime': args.realtime, 'clips': results}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {baseline_path}")
+        return 0
+    if not os.path.exists(baseline_path):
+        print(f"\nNo baseline at {baseline_path}; record one with --save-baseline")
+        return 0
+
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path}:")
+    if baseline.get('environment') != report['environment']:
+        print(f"  Note: baseline recorded on {baseline.get('environment')}")
+    if baseline.get('realtime') != args.realtime:
+        print("  Baseline was recorded in the other pacing mode; re-record it to compare")
+        return 0
+    regressions = []
+    for name, result in results.items():
+        reference = baseline['clips'].get(name)
+        if reference is None:
+            print(f"  {name}: not in the baseline")
+            continue
+        line, problems = compare(name, result, reference, args.tolerance, args.realtime)
+        print(line)
+        regressions += [f"{name}: {problem}" for problem in problems]
+
+    print("\nTest Summary:")
+    for regression in regressions:
+        print(f"[FAIL] {regression}")
+    if not regressions:
+        print(f"[OK] Within {args.tolerance:.0%} of the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
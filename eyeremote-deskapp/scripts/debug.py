@@ -17,7 +17,8 @@ import time
 from app.eye_detector import EyeDetector
 
 class DebugWindow:
-    def __init__(self):
+    def __init__(self, use_broker=False):
+        self.use_broker = use_broker
         self.root = tk.Tk()
         self.root.title("EyeRemote Debug - Camera Feed")
         self.root.geometry("800x600")
@@ -25,6 +26,9 @@ class DebugWindow:
         self.eye_detector = None
         self.is_running = False
         self.debug_thread = None
+        # Only the newest frame waits for the Tk thread; older ones are dropped
+        self._frame_lock = threading.Lock()
+        self._pending_frame = None
         
         self.setup_ui()
         
@@ -63,7 +67,12 @@ class DebugWindow:
             return
             
         try:
-            self.eye_detector = EyeDetector()
+            # Through the camera broker the feed can run next to the app
+            capture_factory = None
+            if self.use_broker:
+                from app.camera_broker import BrokerCapture
+                capture_factory = BrokerCapture
+            self.eye_detector = EyeDetector(capture_factory=capture_factory)
             self.is_running = True
             
             self.start_button.config(state="disabled")
@@ -151,8 +160,12 @@ class DebugWindow:
                 # Convert to PhotoImage
                 frame_tk = ImageTk.PhotoImage(frame_pil)
                 
-                # Update display
-                self.root.after(0, self.update_video, frame_tk)
+                # Update display; a frame not shown yet is replaced, not queued behind
+                with self._frame_lock:
+                    scheduled = self._pending_frame is not None
+                    self._pending_frame = frame_tk
+                if not scheduled:
+                    self.root.after(0, self.update_video)
                 
                 # Calculate FPS
                 fps_counter += 1
@@ -178,8 +191,12 @@ class DebugWindow:
         """Update FPS label"""
         self.fps_label.config(text=f"FPS: {fps:.1f}")
         
-    def update_video(self, frame_tk):
+    def update_video(self):
         """Update video display"""
+        with self._frame_lock:
+            frame_tk, self._pending_frame = self._pending_frame, None
+        if frame_tk is None or not self.is_running:
+            return
         self.video_label.config(image=frame_tk)
         self.video_label.image = frame_tk  # Keep a reference
         
@@ -191,7 +208,7 @@ def main():
     """Run debug application"""
     try:
         from PIL import Image, ImageTk
-        debug_app = DebugWindow()
+        debug_app = DebugWindow(use_broker='--broker' in sys.argv[1:])
         debug_app.run()
     except ImportError as e:
         print(f"Missing dependency: {e}")
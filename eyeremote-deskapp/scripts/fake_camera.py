@@ -0,0 +1,107 @@
+"""
+Fake camera for the test scripts.
+
+FakeCapture implements the parts of the cv2.VideoCapture interface that
+EyeRemote uses, with a configurable open delay and frame rate, and counts
+open handles so tests can check that every capture was released. Pass
+`FakeCapture.factory(...)` wherever a capture_factory is accepted.
+
+`FakeCapture.unplug(index)` makes reads on that camera fail and new opens
+of it fail until `FakeCapture.plug(index)`, like a USB webcam dropping off.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+class FakeCapture:
+    _lock = threading.Lock()
+    open_handles = 0
+    opened_total = 0
+    unplugged = set()
+
+    def __init__(self, index=0, open_delay=0.0, fps=30.0, size=(480, 640)):
+        """
+        Open a fake camera
+
+        Args:
+            index: Camera index (recorded only)
+            open_delay: Seconds the open takes, like a real webcam
+            fps: Frames delivered per second; read() and grab() block accordingly
+            size: (height, width) of the frames
+        """
+        time.sleep(open_delay)
+        self.index = index
+        self.fps = fps
+        self.frame = np.full((size[0], size[1], 3), 128, dtype=np.uint8)
+        self.frames_read = 0
+        self.frames_grabbed = 0
+        self.properties = {}
+        self._opened = index not in FakeCapture.unplugged
+        self._next_frame = time.monotonic()
+        if self._opened:
+            with FakeCapture._lock:
+                FakeCapture.open_handles += 1
+                FakeCapture.opened_total += 1
+
+    @classmethod
+    def factory(cls, **kwargs):
+        """Return a capture_factory that opens FakeCaptures with these settings"""
+        return lambda index: cls(index, **kwargs)
+
+    @staticmethod
+    def reset_counters():
+        with FakeCapture._lock:
+            FakeCapture.open_handles = 0
+            FakeCapture.opened_total = 0
+            FakeCapture.unplugged.clear()
+
+    @staticmethod
+    def unplug(index):
+        FakeCapture.unplugged.add(index)
+
+    @staticmethod
+    def plug(index):
+        FakeCapture.unplugged.discard(index)
+
+    def isOpened(self):
+        return self._opened
+
+    def _wait_for_frame(self):
+        now = time.monotonic()
+        if self._next_frame > now:
+            time.sleep(self._next_frame - now)
+        self._next_frame = max(now, self._next_frame) + 1.0 / self.fps
+
+    def grab(self):
+        if not self._opened or self.index in FakeCapture.unplugged:
+            return False
+        self._wait_for_frame()
+        self.frames_grabbed += 1
+        return True
+
+    def retrieve(self):
+        if not self._opened:
+            return False, None
+        return True, self.frame.copy()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        self.frames_read += 1
+        return self.retrieve()
+
+    def set(self, prop, value):
+        self.properties[prop] = value
+        return True
+
+    def get(self, prop):
+        return self.properties.get(prop, 0.0)
+
+    def release(self):
+        if self._opened:
+            self._opened = False
+            with FakeCapture._lock:
+                FakeCapture.open_handles -= 1
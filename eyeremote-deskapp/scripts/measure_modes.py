@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Compare startup time and resident memory of headless and GUI mode.
+
+Each mode is measured in a fresh interpreter: the time to import and
+construct the engine (headless) or the window (GUI), the resident set size
+afterwards, and whether a GUI toolkit was loaded. The camera is not opened.
+GUI construction needs a display; without one only the import is measured.
+"""
+
+import sys
+import os
+import json
+import subprocess
+
+# Add parent directory to path for imports
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUNS = 5
+
+PROBE = r'''
+import json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {app_dir!r})
+constructed = True
+if {mode!r} == 'headless':
+    from app.engine import EyeRemoteEngine
+    obj = EyeRemoteEngine(log=lambda m: None)
+else:
+    from app.main import EyeRemoteApp
+    try:
+        obj = EyeRemoteApp()
+        obj.root.update()
+    except Exception:
+        constructed = False
+elapsed = time.perf_counter() - start
+import psutil
+print(json.dumps({{
+    'startup_ms': elapsed * 1000,
+    'rss_mb': psutil.Process().memory_info().rss / 1e6,
+    'modules': len(sys.modules),
+    'gui_loaded': any(m in sys.modules for m in ('tkinter', 'customtkinter', 'pyautogui')),
+    'constructed': constructed,
+}}))
+os._exit(0)
+'''
+
+
+def measure(mode):
+    samples = []
+    for _ in range(RUNS):
+        result = subprocess.run([sys.executable, '-c', PROBE.format(app_dir=APP_DIR, mode=mode)],
+                                capture_output=True, text=True, cwd=APP_DIR, timeout=60)
+        if result.returncode != 0 or not result.stdout.strip():
+            print(f"{mode}: probe failed\n{result.stderr.strip()}")
+            return None
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    samples.sort(key=lambda s: s['startup_ms'])
+    return samples[len(samples) // 2]
+
+
+def main():
+    print(f"Measuring startup ({RUNS} runs per mode, median shown)...\n")
+    results = {mode: measure(mode) for mode in ('headless', 'gui')}
+
+    print(f"{'Mode':<10} {'Startup':>10} {'RSS':>10} {'Modules':>8}  GUI toolkit")
+    for mode, r in results.items():
+        if r is None:
+            continue
+        note = '' if r['constructed'] else '  (no display: import only)'
+        print(f"{mode:<10} {r['startup_ms']:>8.0f}ms {r['rss_mb']:>8.1f}MB {r['modules']:>8}  "
+              f"{'loaded' if r['gui_loaded'] else 'not loaded'}{note}")
+
+    headless = results['headless']
+    ok = headless is not None and not headless['gui_loaded']
+    print("\nTest Summary:")
+    print("[OK] Headless mode loads no GUI toolkit" if ok else "[FAIL] Headless mode loaded a GUI toolkit")
+    return ok
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
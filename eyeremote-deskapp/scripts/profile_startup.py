@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Startup import profile for EyeRemote.
+
+Imports a module (default: app.main, everything needed before the window
+is built) in fresh interpreters with `-X importtime` and reports the total
+import time, the most expensive modules, and which heavy modules were
+loaded. Modules that should only load on first use are listed in
+DEFERRED_MODULES.
+
+Usage:
+    python scripts/profile_startup.py [--module app.main] [--runs 5] [--top 15] [--json out.json]
+"""
+
+import sys
+import os
+import argparse
+import json
+import re
+import subprocess
+from typing import Dict, List
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy modules the window must not wait for
+DEFERRED_MODULES = ['cv2', 'numpy', 'pyautogui', 'pynput', 'psutil', 'asyncio']
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Parse `-X importtime` output
+
+    Returns:
+        List of {'module', 'self_us', 'cumulative_us', 'depth'} in import order
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({'module': module, 'self_us': int(self_us),
+                            'cumulative_us': int(cumulative_us), 'depth': len(indent) // 2})
+    return entries
+
+
+def profile_once(module: str) -> Dict:
+    """Import module in a fresh interpreter and return its import profile"""
+    code = (f"import sys; sys.path.insert(0, {APP_DIR!r}); import {module}; "
+            f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True, cwd=APP_DIR, timeout=120)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    total_us = next((e['cumulative_us'] for e in entries if e['module'] == module), 0)
+    loaded = [m for m in result.stdout.strip().split(',') if m]
+    return {'module': module, 'total_ms': total_us / 1000, 'entries': entries, 'deferred_loaded': loaded}
+
+
+def profile(module: str = 'app.main', runs: int = 5) -> Dict:
+    """Profile several runs and return the median one"""
+    samples = sorted((profile_once(module) for _ in range(runs)), key=lambda p: p['total_ms'])
+    median = samples[len(samples) // 2]
+    median['runs_ms'] = [round(p['total_ms'], 1) for p in samples]
+    return median
+
+
+def print_report(result: Dict, top: int = 15):
+    print(f"Import time for {result['module']}: {result['total_ms']:.1f} ms "
+          f"(median; runs: {result['runs_ms']})")
+
+    # Top-level packages by cumulative time
+    packages: Dict[str, int] = {}
+    for entry in result['entries']:
+        name = entry['module'].split('.')[0]
+        packages[name] = packages.get(name, 0) + entry['self_us']
+    print(f"\nTop {top} packages by import time:")
+    for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    print(f"\nTop {top} modules by self time:")
+    for entry in sorted(result['entries'], key=lambda e: -e['self_us'])[:top]:
+        print(f"  {entry['self_us'] / 1000:8.1f} ms  {entry['module']}")
+
+    loaded = result['deferred_loaded']
+    print(f"\nDeferred modules loaded at startup: {', '.join(loaded) if loaded else 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile EyeRemote startup imports')
+    parser.add_argument('--module', default='app.main', help='Module to import (default: %(default)s)')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to run (default: %(default)s)')
+    parser.add_argument('--top', type=int, default=15, help='Rows per table (default: %(default)s)')
+    parser.add_argument('--json', help='Also write the median profile to this file')
+    args = parser.parse_args()
+
+    result = profile(args.module, args.runs)
+    print_report(result, args.top)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"\nProfile written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Soak test: run the whole detection pipeline for hours of simulated frames
+against a fake camera and check that memory stays bounded.
+
+The engine runs with its timings, latency traces, event bus, activity log
+(with the rotating file) and a stand-in media backend. The camera delivers
+frames as fast as detection takes them, so an hour at 30 FPS (108,000
+frames) takes minutes. Detection is restarted every --session-frames frames,
+so each session also opens the camera, pauses the player and stops again.
+
+After a warm-up the RSS baseline is taken and tracemalloc starts. Fails if
+RSS or traced Python memory grows by more than the bounds by the end. The
+allocation sites that grew the most are printed either way. Also fails,
+rather than waiting, when detection stops or delivers no frame for 30 s.
+
+Usage:
+    python scripts/soak_test.py [--hours 1] [--max-growth-mb 20]
+"""
+
+import sys
+import os
+import argparse
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_camera import FakeCapture
+from app.config import Config
+from app.engine import EyeRemoteEngine
+from app.eye_detector import load_cascades
+from app.logpipe import LogPipe
+from app.media_backends import CAP_EXPLICIT_PAUSE, MediaBackend, MediaBackendRegistry
+from app.memory_monitor import MemoryMonitor, format_memory
+
+SIMULATED_FPS = 30
+WARMUP_FRAMES = 3000
+STALL_SECONDS = 30  # A session without a new frame for this long fails the test
+TRACED_BOUND_MB = 5.0
+
+
+class CountingPlayer(MediaBackend):
+    name = 'fake'
+    capabilities = frozenset({CAP_EXPLICIT_PAUSE})
+
+    def __init__(self):
+        self.actions = 0
+
+    def probe(self):
+        return True
+
+    def send(self, action, player=None):
+        self.actions += 1
+        return True
+
+
+def run_frames(engine, done, target, session_frames, pipe, monitor):
+    """
+    Run detection sessions of session_frames frames until target frames are done
+
+    Raises an Exception when detection stops, or makes no progress for
+    STALL_SECONDS, instead of waiting forever.
+
+    Returns:
+        Frames done in total
+    """
+    while done < target:
+        if not engine.start():
+            raise Exception("Detection could not be started")
+        session_start = done
+        session_end = min(target, done + session_frames)
+        progress_at = time.monotonic()
+        while done < session_end:
+            time.sleep(0.5)
+            frames = session_start + engine.frames_processed
+            if frames > done:
+                done, progress_at = frames, time.monotonic()
+            pipe.drain()  # What the window's log view does
+            monitor.sample()
+            if not engine.is_detecting:
+                raise Exception(f"Detection stopped after {done} frames")
+            if time.monotonic() - progress_at > STALL_SECONDS:
+                raise Exception(f"No frames for {STALL_SECONDS} s after {done} frames")
+        engine.stop(standby=False)
+    return done
+
+
+def run_soak(hours, max_growth_mb, session_frames):
+    try:
+        load_cascades()
+    except Exception as e:
+        print(f"Haar cascades not available in this OpenCV build ({e}), skipping")
+        return True
+
+    frames = int(hours * 3600 * SIMULATED_FPS)
+    print(f"Starting soak test: {hours} h at {SIMULATED_FPS} FPS = {frames} frames, "
+          f"restarting every {session_frames}...")
+    directory = tempfile.mkdtemp()
+    try:
+        config = Config(os.path.join(directory, 'config.json'))
+        config.set('timeout', 1)
+        config.set('frame_delay', 0)
+        config.set('media_targets', ['fake:player'])
+        config.set('camera_mode_negotiation', False)
+        config.set('camera_luma_capture', False)
+        pipe = LogPipe(max_lines=500, file_path=os.path.join(directory, 'eyeremote.log'),
+                       max_bytes=200000, backups=2)
+        engine = EyeRemoteEngine(config=config, log=pipe.info, debug_log=pipe.debug,
+                                 capture_factory=FakeCapture.factory(fps=10000))
+        player = CountingPlayer()
+        engine.media_registry = MediaBackendRegistry(backends=[player])
+        monitor = MemoryMonitor(interval=3600, log=print)
+        started = time.monotonic()
+
+        error = None
+        try:
+            done = run_frames(engine, 0, min(frames, WARMUP_FRAMES), session_frames, pipe, monitor)
+            monitor.reset_baseline()
+            monitor.take_snapshot()
+            baseline = monitor.sample()
+            traced_baseline = tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+
+            done = run_frames(engine, done, frames, session_frames, pipe, monitor)
+        except Exception as e:
+            error = e
+        finally:
+            final = monitor.sample()
+            traced_final = tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+            sites = monitor.take_snapshot(limit=8)
+            stats = monitor.stats()
+            elapsed = time.monotonic() - started
+            engine.shutdown()
+            pipe.close()
+            monitor.stop()
+        if error is not None:
+            print(f"\n{error}; last log lines:")
+            with open(pipe.file_path) as f:
+                for line in f.readlines()[-10:]:
+                    print(f"  {line.rstrip()}")
+            print("\nTest Summary:")
+            print("[FAIL] Soak test did not run to the end")
+            return False
+    finally:
+        shutil.rmtree(directory)
+
+    rss_growth = final - baseline
+    traced_growth = traced_final - traced_baseline
+    print(f"\n{done} frames in {elapsed:.0f} s ({done / elapsed:.0f} frames/s), "
+          f"{player.actions} pause/resume actions, {FakeCapture.opened_total} camera opens")
+    print(format_memory(stats) + " (growth per hour of real time)")
+    print(f"After warm-up: RSS {baseline:.1f} -> {final:.1f} MB ({rss_growth:+.1f}, bound {max_growth_mb}), "
+          f"traced {traced_baseline:.1f} -> {traced_final:.1f} MB ({traced_growth:+.2f}, bound {TRACED_BOUND_MB})")
+    print("Largest growth since warm-up:")
+    for site in sites:
+        print(f"  {site['size_diff_kb']:+.1f} KB ({site['count_diff']:+d} blocks) {site['site']}")
+
+    ok = rss_growth <= max_growth_mb and traced_growth <= TRACED_BOUND_MB and FakeCapture.open_handles == 0
+    print("\nTest Summary:")
+    print("[OK] Memory bounded over the soak" if ok else "[FAIL] Memory grew over the soak")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the pipeline for hours of simulated frames')
+    parser.add_argument('--hours', type=float, default=1.0, help='Simulated hours at 30 FPS')
+    parser.add_argument('--max-growth-mb', type=float, default=20.0, help='RSS growth allowed after warm-up')
+    parser.add_argument('--session-frames', type=int, default=5000, help='Frames per detection session')
+    args = parser.parse_args()
+    success = run_soak(args.hours, args.max_growth_mb, args.session_frames)
+    sys.exit(0 if success else 1)
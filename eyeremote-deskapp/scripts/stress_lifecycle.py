@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Stress the detection lifecycle: toggle Start/Stop hundreds of times from two
+threads (like the window and the status socket) against a fake camera.
+
+Fails on any exception, on a stop() that exceeds its bound, if more than one
+camera handle is ever open at once, or if cameras or threads are left behind
+after shutdown.
+
+Usage:
+    python scripts/stress_lifecycle.py [--toggles 400]
+"""
+
+import sys
+import os
+import argparse
+import random
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_camera import FakeCapture
+from app.config import Config
+from app.engine import EyeRemoteEngine, IDLE
+from app.eye_detector import load_cascades
+
+STOP_BOUND_MS = 500
+
+
+class CountingCapture(FakeCapture):
+    """FakeCapture that also records the most handles open at the same time"""
+    max_open = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        with FakeCapture._lock:
+            CountingCapture.max_open = max(CountingCapture.max_open, FakeCapture.open_handles)
+
+
+def toggler(engine, toggles, seed, stop_times, errors):
+    rng = random.Random(seed)
+    try:
+        for _ in range(toggles):
+            engine.start()
+            time.sleep(rng.uniform(0, 0.03))
+            start = time.perf_counter()
+            engine.stop(standby=rng.random() < 0.7)
+            stop_times.append((time.perf_counter() - start) * 1000)
+            time.sleep(rng.uniform(0, 0.01))
+    except Exception as e:
+        errors.append(repr(e))
+
+
+def run_lifecycle(toggles):
+    try:
+        load_cascades()
+    except Exception as e:
+        print(f"Haar cascades not available in this OpenCV build ({e}), skipping")
+        return True
+
+    print(f"Starting lifecycle stress test ({toggles} toggles from 2 threads)...")
+    config = Config(os.path.join(tempfile.mkdtemp(), 'config.json'))
+    config.set('standby_grace_seconds', 0.2)
+    FakeCapture.reset_counters()
+    threads_before = threading.active_count()
+
+    engine = EyeRemoteEngine(config=config, log=lambda m: None,
+                             capture_factory=CountingCapture.factory(open_delay=0.02, fps=60))
+    stop_times, errors = [], []
+    workers = [threading.Thread(target=toggler, args=(engine, toggles // 2, seed, stop_times, errors))
+               for seed in (1, 2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    engine.shutdown()
+    time.sleep(0.5)  # Let delivery and standby threads wind down
+    leaked_threads = threading.active_count() - threads_before
+
+    stop_times.sort()
+    p99 = stop_times[int(len(stop_times) * 0.99) - 1]
+    print(f"\nstop() latency: median {stop_times[len(stop_times) // 2]:.1f} ms, "
+          f"p99 {p99:.1f} ms, max {stop_times[-1]:.1f} ms (bound {STOP_BOUND_MS} ms)")
+    print(f"Cameras opened: {FakeCapture.opened_total}, most open at once: {CountingCapture.max_open}, "
+          f"open after shutdown: {FakeCapture.open_handles}")
+    print(f"Final state: {engine.state}, threads left behind: {leaked_threads}")
+    for error in errors[:5]:
+        print(f"Error: {error}")
+
+    ok = (not errors and stop_times[-1] < STOP_BOUND_MS and CountingCapture.max_open <= 1
+          and FakeCapture.open_handles == 0 and engine.state == IDLE and leaked_threads <= 0)
+
+    print("\nTest Summary:")
+    print("[OK] Lifecycle stress test passed" if ok else "[FAIL] Lifecycle stress test failed")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Toggle detection on and off against a fake camera')
+    parser.add_argument('--toggles', type=int, default=400)
+    args = parser.parse_args()
+    success = run_lifecycle(args.toggles)
+    sys.exit(0 if success else 1)
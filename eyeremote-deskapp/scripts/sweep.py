@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Cascade and smoothing parameter sweep on labeled clips.
+
+Runs detection over labeled clips for a grid of cascade settings (scale
+factor, min neighbours and min size for the face and eye cascades), or for
+--random N settings drawn from it. Each setting runs on a pool of worker
+processes, one per CPU, and each worker is limited to one OpenCV thread. The
+smoothing thresholds are then applied to the per-frame detections, which
+costs almost nothing. Each configuration gets two scores:
+
+- accuracy: share of frames where the smoothed attention state matches the
+  label (the smoother's delay at each change counts against it)
+- ms/frame: CPU time of the face and eye cascades per frame
+
+The configurations no other one beats on both (the Pareto frontier) are
+printed, cheapest first. --apply writes the most accurate of them within
+--max-ms into the config file.
+
+Clips are video files or frame arrays, as for benchmark.py. Frames are taken
+at --fps (default: the engine's rate, 1 / frame_delay), because the
+smoothing thresholds count frames. A clip is labeled either by a 'labels'
+array (1 = watching, one per frame) in its .npz, or by a file next to it
+named <clip>.labels.json:
+
+    {"watching": [[0, 120], [300, 450]]}
+
+listing [first, end) frame ranges in which the viewer is watching. Clips
+without labels are skipped. A flight recorder dump becomes a labeled clip
+once a 'labels' array is added to it.
+
+Usage:
+    python scripts/sweep.py CLIPS_DIR [--random N] [--seed 1] [--param NAME=V1,V2,...]
+                            [--workers 0] [--fps 10] [--max-faces 1] [--json FILE]
+                            [--config FILE] [--apply] [--max-ms MS]
+"""
+
+import sys
+import os
+import argparse
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from app.attention import AttentionSmoother
+from app.config import Config
+from app.eye_detector import CASCADE_DEFAULTS, EyeDetector, cascade_params, load_cascades
+from app.luma import read_gray
+from app.sources import FrameArraySource, VideoFileSource
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.webm')
+ARRAY_EXTENSIONS = ('.npy', '.npz')
+SMOOTHING = ('eyes_present_frames', 'no_eyes_frames')
+
+# Values tried for each setting; the current ones are always tried as well
+GRID = {
+    'face_scale_factor': [1.05, 1.1, 1.2, 1.3],
+    'face_min_neighbors': [3, 5, 7],
+    'face_min_size': [30, 60, 90],
+    'eye_scale_factor': [1.1, 1.2],
+    'eye_min_neighbors': [2, 3, 5],
+    'eye_min_size': [15, 20],
+    'eyes_present_frames': [1, 2, 3],
+    'no_eyes_frames': [2, 3, 5],
+}
+
+
+# --- Clips and labels -------------------------------------------------------
+
+def read_labels(path):
+    """
+    The labels of a clip: a per-frame array, a list of [first, end) watching
+    ranges, or None if the clip is not labeled
+    """
+    sidecar = path + '.labels.json'
+    if os.path.exists(sidecar):
+        with open(sidecar) as f:
+            return [tuple(span) for span in json.load(f)['watching']]
+    if path.lower().endswith('.npz'):
+        with np.load(path) as data:
+            if 'labels' in data:
+                return data['labels'].astype(bool)
+    return None
+
+
+def expand_labels(labels, count):
+    """Per-frame booleans for count frames"""
+    if isinstance(labels, np.ndarray):
+        if len(labels) < count:
+            raise Exception(f"{len(labels)} labels for {count} frames")
+        return labels[:count]
+    watching = np.zeros(count, dtype=bool)
+    for first, end in labels:
+        watching[first:end] = True
+    return watching
+
+
+def find_labeled_clips(directory):
+    """(name, path) of the labeled clips in directory, and the names of the others"""
+    clips, unlabeled = [], []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.splitext(name)[1].lower() not in VIDEO_EXTENSIONS + ARRAY_EXTENSIONS:
+            continue
+        if read_labels(path) is None:
+            unlabeled.append(name)
+        else:
+            clips.append((name, path))
+    return clips, unlabeled
+
+
+def load_clip(path, fps):
+    """
+    Grayscale frames of a clip taken at fps, with their labels
+
+    Returns:
+        (frames, labels) with one boolean label per frame
+    """
+    if path.lower().endswith(ARRAY_EXTENSIONS):
+        source = FrameArraySource.from_file(path)
+    else:
+        source = VideoFileSource(path)
+    step = max(1, int(round(source.fps / fps))) if fps > 0 else 1
+    frames, indices = [], []
+    index = 0
+    while True:
+        ret, gray = read_gray(source)
+        if not ret:
+            break
+        if index % step == 0:
+            frames.append(gray)
+            indices.append(index)
+        index += 1
+    source.release()
+    labels = expand_labels(read_labels(path), index)
+    return frames, labels[indices]
+
+
+# --- Search space -----------------------------------------------------------
+
+def cascade_grid(grid):
+    """Every combination of the cascade settings in grid"""
+    keys = list(CASCADE_DEFAULTS)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+
+
+def smoothing_grid(grid):
+    return [dict(zip(SMOOTHING, values)) for values in itertools.product(*(grid[key] for key in SMOOTHING))]
+
+
+def search_space(grid, current, samples=None, seed=1):
+    """
+    Cascade settings to run and smoothing settings to score them with
+
+    Args:
+        grid: Values per setting
+        current: The settings in use, always included
+        samples: Draw this many cascade settings at random instead of all
+        seed: Random seed for the draw
+    """
+    cascades = cascade_grid(grid)
+    if samples is not None and samples < len(cascades):
+        cascades = random.Random(seed).sample(cascades, samples)
+    current_cascade = {key: current[key] for key in CASCADE_DEFAULTS}
+    if current_cascade not in cascades:
+        cascades.insert(0, current_cascade)
+    smoothing = smoothing_grid(grid)
+    current_smoothing = {key: current[key] for key in SMOOTHING}
+    if current_smoothing not in smoothing:
+        smoothing.insert(0, current_smoothing)
+    return cascades, smoothing
+
+
+def current_settings(config):
+    settings = cascade_params(config)
+    settings['eyes_present_frames'] = int(config.get('eyes_present_frames', 2))
+    settings['no_eyes_frames'] = int(config.get('no_eyes_frames', 3))
+    return settings
+
+
+# --- Workers ----------------------------------------------------------------
+
+_clips = {}         # name -> (frames, labels), loaded once per worker process
+_detector = None
+_max_faces = 1
+
+
+def load_worker(clips, fps, max_faces):
+    """Pool initializer: load the clips and cascades once per process"""
+    global _detector, _max_faces
+    cv2.setNumThreads(1)  # One core per worker; the pool provides the parallelism
+    load_cascades()
+    for name, path in clips:
+        _clips[name] = load_clip(path, fps)
+    first = next(iter(_clips.values()))[0]
+    _detector = EyeDetector(capture_factory=FrameArraySource.factory(first[:1]),
+                            configure_capture=lambda cap: None)
+    _max_faces = max_faces
+
+
+def detect_clips(params):
+    """
+    Detect on every clip with one cascade setting
+
+    Returns:
+        {clip: (eyes per frame, labels per frame, CPU seconds)}
+    """
+    _detector.params = params
+    results = {}
+    for name, (frames, labels) in _clips.items():
+        eyes = np.zeros(len(frames), dtype=bool)
+        start = time.process_time()
+        for i, gray in enumerate(frames):
+            eyes[i] = _detector.detect_eyes_in(gray, _max_faces)
+        results[name] = (eyes, labels, time.process_time() - start)
+    return results
+
+
+# --- Scoring ----------------------------------------------------------------
+
+def score(eyes, labels, present_frames, absent_frames):
+    """
+    Smooth the detections and compare them with the labels
+
+    Returns:
+        (frames where the state matches the label, false pauses: changes to
+        "not watching" while the viewer was watching)
+    """
+    smoother = AttentionSmoother(present_frames, absent_frames)
+    correct = false_pauses = 0
+    for detected, watching in zip(eyes.tolist(), labels.tolist()):
+        changed = smoother.update(detected)
+        correct += smoother.stable_state == watching
+        false_pauses += changed is False and watching
+    return correct, false_pauses
+
+
+def score_detections(params, detections, smoothing):
+    """One result per smoothing setting for the detections of one cascade setting"""
+    frames = sum(len(eyes) for eyes, _, _ in detections.values())
+    cpu = sum(seconds for _, _, seconds in detections.values())
+    ms_per_frame = cpu / frames * 1000 if frames else 0.0
+    results = []
+    for thresholds in smoothing:
+        correct = false_pauses = 0
+        for eyes, labels, _ in detections.values():
+            clip_correct, clip_false = score(eyes, labels, thresholds['eyes_present_frames'],
+                                             thresholds['no_eyes_frames'])
+            correct += clip_correct
+            false_pauses += clip_false
+        results.append({'params': dict(params, **thresholds),
+                        'accuracy': round(correct / frames, 4) if frames else 0.0,
+                        'ms_per_frame': round(ms_per_frame, 3),
+                        'false_pauses': false_pauses})
+    return results
+
+
+def pareto_frontier(results):
+    """
+    The results that no other is both more accurate and cheaper than
+
+    Returns:
+        Those results, cheapest (and least accurate) first
+    """
+    frontier = []
+    for result in sorted(results, key=lambda r: (r['ms_per_frame'], -r['accuracy'], r['false_pauses'])):
+        if not frontier or result['accuracy'] > frontier[-1]['accuracy']:
+            frontier.append(result)
+    return frontier
+
+
+def choose(frontier, max_ms=None):
+    """The most accurate frontier point within max_ms per frame, or None"""
+    within = [r for r in frontier if max_ms is None or r['ms_per_frame'] <= max_ms]
+    return within[-1] if within else None
+
+
+def apply_to_config(result, config_file):
+    """Write a result's settings into the config file"""
+    config = Config(config_file)
+    for key, value in result['params'].items():
+        config.set(key, value)
+    config.save()
+
+
+# --- Running ----------------------------------------------------------------
+
+def run_sweep(clips, cascades, smoothing, workers=0, fps=10.0, max_faces=1, progress=None):
+    """
+    Detect with every cascade setting and score every smoothing setting
+
+    Args:
+        clips: (name, path) of the labeled clips
+        cascades: Cascade settings to run
+        smoothing: Smoothing settings to score each with
+        workers: Processes (0 = one per CPU, 1 = in this process)
+        fps: Rate frames are taken from the clips at
+        max_faces: Faces checked for eyes per frame
+        progress: Called with (done, total) after each cascade setting
+
+    Returns:
+        All results
+    """
+    workers = workers or os.cpu_count() or 1
+    results = []
+    if workers == 1:
+        load_worker(clips, fps, max_faces)
+        for done, params in enumerate(cascades, 1):
+            results += score_detections(params, detect_clips(params), smoothing)
+            if progress:
+                progress(done, len(cascades))
+        return results
+
+    import multiprocessing
+
+    # Spawn, like the detector worker: forking a process that runs OpenCV threads can deadlock
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(cascades)), mp_context=context,
+                             initializer=load_worker, initargs=(clips, fps, max_faces)) as pool:
+        futures = {pool.submit(detect_clips, params): params for params in cascades}
+        for done, future in enumerate(as_completed(futures), 1):
+            results += score_detections(futures[future], future.result(), smoothing)
+            if progress:
+                progress(done, len(cascades))
+    return results
+
+
+def parse_param(text):
+    """NAME=V1,V2,... into (name, values)"""
+    name, _, values = text.partition('=')
+    if name not in GRID or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2,... with NAME one of {', '.join(GRID)}")
+    kind = type(CASCADE_DEFAULTS.get(name, 0))
+    try:
+        return name, [kind(value) for value in values.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{name} takes {kind.__name__} values")
+
+
+def describe(params):
+    return (f"face {params['face_scale_factor']:g}/{params['face_min_neighbors']}/{params['face_min_size']}  "
+            f"eye {params['eye_scale_factor']:g}/{params['eye_min_neighbors']}/{params['eye_min_size']}  "
+            f"smooth {params['eyes_present_frames']}/{params['no_eyes_frames']}")
+
+
+def print_frontier(frontier, current, chosen):
+    print(f"{'ms/frame':>9}{'accuracy':>10}{'false pauses':>14}  settings "
+          f"(scale/neighbours/min size, present/absent frames)")
+    for result in frontier:
+        marks = (' <- chosen' if result is chosen else '') + (' (current)' if result['params'] == current else '')
+        print(f"{result['ms_per_frame']:>9.2f}{result['accuracy']:>10.1%}{result['false_pauses']:>14}  "
+              f"{describe(result['params'])}{marks}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep cascade and smoothing settings on labeled clips')
+    parser.add_argument('clips', help='Directory of labeled clips')
+    parser.add_argument('--random', type=int, metavar='N', help='Try N random cascade settings from the grid')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for --random')
+    parser.add_argument('--param', type=parse_param, action='append', default=[], metavar='NAME=V1,V2,...',
+                        help='Values to try for one setting instead of the built-in ones (repeatable)')
+    parser.add_argument('--workers', type=int, default=0, help='Processes (0 = one per CPU, 1 = no pool)')
+    parser.add_argument('--config', default='eyeremote_config.json', help='Config file read and --apply written')
+    parser.add_argument('--fps', type=float, help='Rate frames are taken from the clips at (default: 1 / frame_delay)')
+    parser.add_argument('--max-faces', type=int, help='Faces checked for eyes (default: max_faces)')
+    parser.add_argument('--json', metavar='FILE', help='Write every result and the frontier to FILE')
+    parser.add_argument('--apply', action='store_true', help='Write the chosen settings into the config file')
+    parser.add_argument('--max-ms', type=float, help='Most CPU per frame the chosen settings may cost')
+    args = parser.parse_args()
+
+    try:
+        load_cascades()
+    except Exception as e:
+        print(f"Haar cascades not available in this OpenCV build ({e}), cannot sweep")
+        return 1
+    clips, unlabeled = find_labeled_clips(args.clips)
+    if unlabeled:
+        print(f"Skipping clips without labels: {', '.join(unlabeled)}")
+    if not clips:
+        print(f"No labeled clips in {args.clips} (see the labels format in {os.path.basename(__file__)})")
+        return 1
+
+    config = Config(args.config)
+    current = current_settings(config)
+    fps = args.fps or 1.0 / max(0.01, float(config.get('frame_delay', 0.1)))
+    max_faces = args.max_faces or int(config.get('max_faces', 1))
+    grid = dict(GRID, **dict(args.param))
+    cascades, smoothing = search_space(grid, current, args.random, args.seed)
+
+    print(f"Sweeping {len(cascades)} cascade x {len(smoothing)} smoothing settings on {len(clips)} clip(s) "
+          f"at {fps:g} FPS...")
+    started = time.monotonic()
+    results = run_sweep(clips, cascades, smoothing, args.workers, fps, max_faces,
+                        progress=lambda done, total: print(f"  {done}/{total} cascade settings", end='\r'))
+    frontier = pareto_frontier(results)
+    chosen = choose(frontier, args.max_ms)
+    print(f"\n{len(results)} configurations scored in {time.monotonic() - started:.0f} s; Pareto frontier:\n")
+    print_frontier(frontier, current, chosen)
+    baseline = next(r for r in results if r['params'] == current)
+    print(f"\nCurrent settings: {baseline['ms_per_frame']:.2f} ms/frame, {baseline['accuracy']:.1%} accurate, "
+          f"{baseline['false_pauses']} false pauses")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'clips': [name for name, _ in clips], 'fps': fps, 'current': current,
+                       'results': results, 'frontier': frontier}, f, indent=2)
+    if args.apply:
+        if chosen is None:
+            print(f"Nothing on the frontier within {args.max_ms} ms/frame; config not changed")
+            return 1
+        apply_to_config(chosen, args.config)
+        print(f"Wrote {describe(chosen['params'])} to {args.config}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
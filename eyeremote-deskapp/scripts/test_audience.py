@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test audience mode: face tracking, parallel eye verification and the
+attention ratio.
+
+1. Tracker: a dozen faces drift across the frame, one moves too fast for
+   IoU matching once, one leaves and a newcomer arrives. Every person
+   must keep one ID, the newcomer must get a new one, and the one who left
+   must be dropped after max_missed frames.
+2. Ratio and policy: a frame with 10, 20 and 30 faces, two thirds of them
+   watching, must give a ratio of 2/3 and the same verdicts with one worker
+   as with one worker per CPU.
+3. Throughput: eye checks for 30 faces per frame with 1 worker and with one
+   per CPU. OpenCV releases the GIL, so more workers must be faster on a
+   machine with more than one core.
+
+The eye cascade here is a stand-in that does real OpenCV work on the face
+region (so the GIL is released the way detectMultiScale releases it) and
+"finds" eyes in bright faces. It does not need Haar cascade files.
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from app.audience import AudienceDetector, AudiencePolicy, FaceTracker
+
+FACE = 60
+
+
+class BlurEyeCascade:
+    """Eye cascade stand-in: a few large blurs on the face, eyes if it is bright"""
+    instances = set()
+    lock = threading.Lock()
+
+    def __init__(self):
+        with BlurEyeCascade.lock:
+            BlurEyeCascade.instances.add(id(self))
+
+    def detectMultiScale(self, face_gray, **kwargs):
+        roi = np.ascontiguousarray(face_gray)
+        for _ in range(6):
+            roi = cv2.GaussianBlur(roi, (31, 31), 0)
+        return [(10, 10, 20, 20)] if float(face_gray.mean()) > 128 else []
+
+
+class ListFaceCascade:
+    """Face cascade stand-in that returns the boxes it was given"""
+
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+    def detectMultiScale(self, gray, **kwargs):
+        return list(self.boxes)
+
+
+def audience_frame(faces, watching):
+    """A grid of face boxes; the first `watching` are bright"""
+    columns = 8
+    gray = np.full((FACE * 5, FACE * 2 * columns), 40, dtype=np.uint8)
+    boxes = []
+    for i in range(faces):
+        x, y = (i % columns) * FACE * 2, (i // columns) * FACE
+        boxes.append((x, y, FACE, FACE))
+        gray[y:y + FACE, x:x + FACE] = 220 if i < watching else 40
+    return gray, boxes
+
+
+def check_tracker():
+    tracker = FaceTracker(max_missed=3)
+    people = {p: (100 + (p % 4) * 150, 100 + (p // 4) * 150) for p in range(12)}
+    ids = {p: set() for p in range(13)}
+    newcomer_id = None
+    for frame in range(20):
+        boxes, owners = [], []
+        for p, (x, y) in people.items():
+            if p == 11 and frame >= 10:
+                continue  # Left the room
+            dx = 40 if p == 5 and frame == 8 else 3  # Person 5 moves too fast for IoU once
+            people[p] = (x + dx, y + 1)
+            boxes.append((people[p][0], people[p][1], FACE, FACE))
+            owners.append(p)
+        if frame >= 12:
+            boxes.append((900, 600, FACE, FACE))
+            owners.append(12)
+        for owner, track in zip(owners, tracker.update(boxes, now=float(frame))):
+            ids[owner].add(track.track_id)
+        if frame == 12:
+            newcomer_id = next(iter(ids[12]))
+
+    stable = all(len(ids[p]) == 1 for p in range(13))
+    distinct = len({next(iter(ids[p])) for p in range(13)}) == 13
+    dropped = next(iter(ids[11])) not in tracker.tracks
+    print(f"Tracker: stable IDs {stable}, distinct IDs {distinct}, newcomer got ID {newcomer_id}, "
+          f"person who left dropped {dropped}, tracks now {len(tracker.tracks)}")
+    return stable and distinct and dropped and len(tracker.tracks) == 12
+
+
+def check_ratio():
+    policy = AudiencePolicy(min_ratio=0.6)
+    ok = True
+    for faces in (10, 20, 30):
+        watching = faces * 2 // 3
+        gray, boxes = audience_frame(faces, watching)
+        results = []
+        for workers in (1, os.cpu_count() or 1):
+            detector = AudienceDetector(ListFaceCascade(boxes), BlurEyeCascade, policy, workers=workers)
+            results.append(detector.analyze(gray))
+            detector.shutdown()
+        single, parallel = results
+        same = single.watching_ids == parallel.watching_ids
+        print(f"{faces} faces: watching {parallel.watching}/{parallel.faces} (ratio {parallel.ratio:.2f}, "
+              f"attentive {parallel.attentive}), same verdicts with 1 worker: {same}")
+        ok = ok and same and parallel.faces == faces and parallel.watching == watching and parallel.attentive
+    quiet = AudiencePolicy(min_ratio=0.6).is_attentive(5, 10)
+    empty = AudiencePolicy().is_attentive(0, 0)
+    print(f"Policy: 5/10 watching with min_ratio 0.6 -> {quiet}, empty room -> {empty}")
+    return ok and not quiet and not empty
+
+
+def throughput(workers, gray, boxes, frames=20):
+    detector = AudienceDetector(ListFaceCascade(boxes), BlurEyeCascade, workers=workers)
+    detector.analyze(gray)  # Start the pool threads
+    start = time.perf_counter()
+    for _ in range(frames):
+        detector.analyze(gray)
+    elapsed = time.perf_counter() - start
+    detector.shutdown()
+    return frames * len(boxes) / elapsed
+
+
+def check_scaling():
+    cores = os.cpu_count() or 1
+    gray, boxes = audience_frame(30, 20)
+    BlurEyeCascade.instances.clear()
+    single = throughput(1, gray, boxes)
+    parallel = throughput(cores, gray, boxes)
+    speedup = parallel / single
+    print(f"30 faces/frame: 1 worker {single:.0f} faces/s, {cores} workers {parallel:.0f} faces/s "
+          f"({speedup:.2f}x), eye cascades created {len(BlurEyeCascade.instances)}")
+    if cores < 2:
+        print("Only one CPU available, scaling not checked")
+        return len(BlurEyeCascade.instances) <= 1 + cores
+    return speedup > min(1.4, cores * 0.6) and len(BlurEyeCascade.instances) <= 1 + cores
+
+
+def run_audience():
+    print("Starting audience mode test...")
+    results = {
+        'tracker': check_tracker(),
+        'ratio and policy': check_ratio(),
+        'scaling': check_scaling(),
+    }
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_audience():
+    assert run_audience()
+
+
+if __name__ == "__main__":
+    success = run_audience()
+    sys.exit(0 if success else 1)
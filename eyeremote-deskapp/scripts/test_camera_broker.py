@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Test the camera broker with a fake camera.
+
+1. Sharing: three consumers (every frame, 10 fps and 5 fps) watch one camera
+   at the same time. The device must be opened once and each consumer must
+   get frames at its own rate.
+2. Zero copy: read_view() returns a read-only view into the shared ring
+   holding the frame the broker wrote.
+3. Slow consumer: a consumer that takes 200 ms per frame always gets the
+   newest frame and does not slow the others down.
+4. Another process: a consumer in a separate process reads frames through
+   the same ring.
+5. Browser hub: with camera_broker on, the native-messaging hub's detector
+   opens the camera through the broker instead of the device.
+6. Idle: the device closes shortly after the last consumer leaves and opens
+   again for the next one; stopping the broker removes the shared memory.
+"""
+
+import sys
+import os
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.camera_broker import BrokerCapture, CameraBroker
+from app.config import Config
+from app.frame_ring import FrameRing
+from app.native_host import AttentionHub
+from fake_camera import FakeCapture
+
+CAMERA_FPS = 30
+
+
+class CountingCapture(FakeCapture):
+    """Fake camera that stamps a frame counter into the first pixels"""
+
+    def __init__(self, index=0):
+        super().__init__(index, fps=CAMERA_FPS)
+        self.count = 0
+
+    def read(self):
+        ret, frame = super().read()
+        if ret:
+            self.count += 1
+            frame[0, 0, :] = (self.count & 0xFF, (self.count >> 8) & 0xFF, 0)
+        return ret, frame
+
+
+def stamp(frame):
+    return int(frame[0, 0, 0]) | int(frame[0, 0, 1]) << 8
+
+
+def consume(capture, seconds, delay=0.0):
+    """Read for a while; returns the stamps seen"""
+    stamps = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        ret, view = capture.read_view()
+        if ret:
+            stamps.append(stamp(view))
+        if delay:
+            time.sleep(delay)
+    return stamps
+
+
+def remote_consumer(port, frames, results):
+    """Runs in another process"""
+    capture = BrokerCapture(0, port=port, spawn=False)
+    stamps = []
+    while len(stamps) < frames:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        stamps.append(stamp(frame))
+    capture.release()
+    results.put(stamps)
+
+
+def check_sharing(broker):
+    captures = [BrokerCapture(0, port=broker.port, fps=fps, spawn=False) for fps in (0, 10, 5)]
+    runs = [None] * 3
+    threads = [threading.Thread(target=lambda i=i: runs.__setitem__(i, consume(captures[i], 2.0)))
+               for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    handles = FakeCapture.open_handles
+    ret, view = captures[0].read_view()
+    zero_copy = ret and not view.flags.writeable and not view.flags.owndata
+    for capture in captures:
+        capture.release()
+
+    rates = [len(stamps) / 2.0 for stamps in runs]
+    ordered = all(stamps == sorted(stamps) for stamps in runs)
+    print(f"Sharing: rates {rates[0]:.1f}/{rates[1]:.1f}/{rates[2]:.1f} fps (asked all/10/5), "
+          f"device opens {broker.device_opens}, open handles {handles}, frames in order {ordered}")
+    print(f"Zero copy: read-only view into shared memory {zero_copy}")
+    return ((abs(rates[0] - CAMERA_FPS) < CAMERA_FPS * 0.25 and abs(rates[1] - 10) < 3 and abs(rates[2] - 5) < 2
+             and broker.device_opens == 1 and handles == 1 and ordered), zero_copy)
+
+
+def check_slow_consumer(broker):
+    fast = BrokerCapture(0, port=broker.port, spawn=False)
+    slow = BrokerCapture(0, port=broker.port, spawn=False)
+    runs = {}
+    threads = [threading.Thread(target=lambda: runs.__setitem__('fast', consume(fast, 2.0))),
+               threading.Thread(target=lambda: runs.__setitem__('slow', consume(slow, 2.0, delay=0.2)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    fast.release()
+    slow.release()
+    gaps = [b - a for a, b in zip(runs['slow'], runs['slow'][1:])]
+    fast_rate = len(runs['fast']) / 2.0
+    print(f"Slow consumer: {len(runs['slow'])} frames, skipped ahead by {min(gaps)}-{max(gaps)} frames; "
+          f"fast consumer {fast_rate:.1f} fps")
+    return len(runs['slow']) >= 5 and min(gaps) >= 4 and fast_rate > CAMERA_FPS * 0.75
+
+
+def check_other_process(broker):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=remote_consumer, args=(broker.port, 20, results))
+    process.start()
+    stamps = results.get(timeout=30)
+    process.join(5)
+    ordered = len(stamps) == 20 and stamps == sorted(stamps) and len(set(stamps)) == 20
+    print(f"Other process: read {len(stamps)} frames in order {ordered}, exit code {process.exitcode}")
+    return ordered and process.exitcode == 0
+
+
+def check_hub(broker, directory):
+    config = Config(os.path.join(directory, 'config.json'))
+    direct = AttentionHub(port=0, config=config).capture_factory()
+    config.set('camera_broker', True)
+    config.set('camera_broker_port', broker.port)
+    capture = AttentionHub(port=0, config=config).capture_factory()(0)
+    ret, _ = capture.read()
+    shared = isinstance(capture, BrokerCapture) and ret
+    capture.release()
+    print(f"Browser hub: camera opened directly without camera_broker {direct is None}, "
+          f"through the broker with it {shared}")
+    return direct is None and shared
+
+
+def check_idle(broker):
+    time.sleep(broker.linger + 0.5)
+    closed = not broker.device_open and FakeCapture.open_handles == 0
+    opens_before = broker.device_opens
+    capture = BrokerCapture(0, port=broker.port, spawn=False)
+    ret, _ = capture.read()
+    reopened = ret and broker.device_opens == opens_before + 1
+    capture.release()
+    name = broker.ring.name
+    broker.stop()
+    try:
+        FrameRing(name=name, track=False).close()
+        removed = False
+    except FileNotFoundError:
+        removed = True
+    print(f"Idle: device closed after the last consumer {closed}, reopened for a new one {reopened}, "
+          f"shared memory removed on stop {removed}")
+    return closed and reopened and removed
+
+
+def run_camera_broker():
+    print("Starting camera broker test...")
+    FakeCapture.reset_counters()
+    broker = CameraBroker(0, port=0, capture_factory=CountingCapture, linger=0.3, log=lambda message: None)
+    broker.start()
+    directory = tempfile.mkdtemp()
+    try:
+        sharing, zero_copy = check_sharing(broker)
+        results = {
+            'sharing': sharing,
+            'zero copy': zero_copy,
+            'slow consumer': check_slow_consumer(broker),
+            'other process': check_other_process(broker),
+            'browser hub': check_hub(broker, directory),
+            'idle close': check_idle(broker),
+        }
+    finally:
+        broker.stop()
+        shutil.rmtree(directory)
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_camera_broker():
+    assert run_camera_broker()
+
+
+if __name__ == "__main__":
+    success = run_camera_broker()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test camera enumeration.
+
+1. Probing: cameras at 0, 2 and 5 (a hole at 1), a probe at 3 that hangs
+   for 10 s and slow probes elsewhere. Every camera after the hole must be
+   found, the hanging probe must be abandoned after the timeout, and the whole
+   enumeration must take about one timeout, not the sum of the probes.
+2. Linux sysfs: a fake /dev and /sys/class/video4linux tree with a camera,
+   its metadata node and a second camera. Names come from sysfs, metadata
+   nodes are skipped, nothing is opened, and plugging in a camera
+   invalidates the cache.
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import CameraEnumerator
+
+PROBE_TIMEOUT = 1.0
+
+
+def fake_probe(index):
+    if index == 3:
+        time.sleep(10)  # A driver that never answers
+    time.sleep(0.3)  # Every open takes a while
+    return index in (0, 2, 5)
+
+
+def check_probing():
+    enumerator = CameraEnumerator(probe=fake_probe, probe_timeout=PROBE_TIMEOUT, max_index=10,
+                                  sysfs_dir='/nonexistent')
+    start = time.monotonic()
+    cameras = enumerator.list()
+    elapsed = time.monotonic() - start
+
+    start = time.monotonic()
+    cached = enumerator.list()
+    cached_elapsed = time.monotonic() - start
+
+    indices = [camera['index'] for camera in cameras]
+    print(f"Probing: found {indices} in {elapsed:.2f}s (sequential would take >13s), "
+          f"cached call {cached_elapsed * 1000:.2f} ms")
+    return indices == [0, 2, 5] and elapsed < PROBE_TIMEOUT + 0.3 and cached == cameras and cached_elapsed < 0.01
+
+
+def make_device(root, number, name, node_index=0):
+    open(os.path.join(root, 'dev', f'video{number}'), 'w').close()
+    device_dir = os.path.join(root, 'sys', f'video{number}')
+    os.makedirs(device_dir)
+    with open(os.path.join(device_dir, 'name'), 'w') as f:
+        f.write(name + '\n')
+    with open(os.path.join(device_dir, 'index'), 'w') as f:
+        f.write(f"{node_index}\n")
+
+
+def check_sysfs():
+    if not sys.platform.startswith('linux'):
+        print("sysfs enumeration is Linux only, skipping")
+        return True
+
+    root = tempfile.mkdtemp()
+    os.makedirs(os.path.join(root, 'dev'))
+    os.makedirs(os.path.join(root, 'sys'))
+    make_device(root, 0, 'Integrated Camera')
+    make_device(root, 1, 'Integrated Camera', node_index=1)  # Metadata node
+    make_device(root, 4, 'USB Webcam')
+
+    probed = []
+    enumerator = CameraEnumerator(probe=lambda index: probed.append(index) or True,
+                                  dev_dir=os.path.join(root, 'dev'), sysfs_dir=os.path.join(root, 'sys'))
+    first = enumerator.list()
+    make_device(root, 6, 'Dock Camera')
+    after_plug = enumerator.list()
+
+    print(f"sysfs: {[(c['index'], c['name']) for c in first]}, after plugging in: "
+          f"{[c['index'] for c in after_plug]}, devices opened: {len(probed)}")
+    return ([(c['index'], c['name']) for c in first] == [(0, 'Integrated Camera'), (4, 'USB Webcam')]
+            and [c['index'] for c in after_plug] == [0, 4, 6] and not probed)
+
+
+def run_camera_list():
+    print("Starting camera enumeration test...")
+    results = {'probing': check_probing(), 'sysfs': check_sysfs()}
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_camera_list():
+    assert run_camera_list()
+
+
+if __name__ == "__main__":
+    success = run_camera_list()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test camera mode negotiation with a fake camera whose cost depends on the mode.
+
+The fake camera behaves like a typical USB 2 webcam:
+- YUYV at 640x480 is bandwidth-limited to 40 fps but cheap to decode
+- YUYV at 320x240 runs at 120 fps and is cheap to decode
+- MJPG runs at 120 fps at any size, but every frame costs a JPEG decode
+
+1. Requiring 480 lines at 60 fps must choose MJPG 640x480 (YUYV is too slow).
+2. Requiring 240 lines must choose YUYV 320x240 (cheapest decode).
+3. The engine must negotiate once, cache the choice per device, apply it
+   to the capture and report it in the stats; a second start must reuse the
+   cache without probing.
+4. When no mode qualifies, the fallback is cached too: the camera is probed
+   again only with refresh=True or different requirements.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from fake_camera import FakeCapture
+from app.camera_modes import (CameraModeCache, ModeNegotiator, ModeProber, fallback_mode, fourcc_code,
+                              fourcc_name)
+from app.config import Config
+from app.engine import EyeRemoteEngine
+
+# (fourcc, height) -> (delivered fps, decode seconds per frame)
+PROFILES = {
+    ('YUYV', 480): (40, 0.0002),
+    ('YUYV', 240): (120, 0.0001),
+    ('MJPG', 480): (120, 0.003),
+    ('MJPG', 240): (120, 0.001),
+}
+SIZES = {480: 640, 240: 320}
+
+
+class ModalFakeCapture(FakeCapture):
+    def __init__(self, index=0):
+        super().__init__(index, fps=120)
+        self.properties = {cv2.CAP_PROP_FOURCC: fourcc_code('YUYV'), cv2.CAP_PROP_FRAME_WIDTH: 640,
+                           cv2.CAP_PROP_FRAME_HEIGHT: 480, cv2.CAP_PROP_FPS: 30}
+        self._apply()
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT and value not in SIZES:
+            value = 480  # Unsupported size: the driver keeps 640x480
+        if prop == cv2.CAP_PROP_FRAME_WIDTH and value not in SIZES.values():
+            value = 640
+        self.properties[prop] = value
+        self._apply()
+        return True
+
+    def _apply(self):
+        height = int(self.properties[cv2.CAP_PROP_FRAME_HEIGHT])
+        fourcc = fourcc_name(self.properties[cv2.CAP_PROP_FOURCC])
+        self.fps, self.decode_seconds = PROFILES[(fourcc, height)]
+        self.frame = np.full((height, SIZES[height], 3), 128, dtype=np.uint8)
+
+    def retrieve(self):
+        time.sleep(self.decode_seconds)
+        return super().retrieve()
+
+
+def probe(min_height):
+    cap = ModalFakeCapture()
+    prober = ModeProber(min_height=min_height, min_fps=60, sample_frames=10)
+    modes = prober.probe(cap)
+    cap.release()
+    return prober.choose(modes), modes
+
+
+def check_high_resolution():
+    chosen, modes = probe(480)
+    print(f"min 480 lines: probed {[m.label for m in modes]}")
+    print(f"  chose {chosen.label if chosen else None} "
+          f"({chosen.delivered_fps if chosen else 0} fps, {chosen.decode_ms if chosen else 0} ms/frame)")
+    return chosen is not None and (chosen.fourcc, chosen.height) == ('MJPG', 480)
+
+
+def check_low_resolution():
+    chosen, modes = probe(240)
+    print(f"min 240 lines: chose {chosen.label if chosen else None} "
+          f"({chosen.delivered_fps if chosen else 0} fps, {chosen.decode_ms if chosen else 0} ms/frame)")
+    return chosen is not None and (chosen.fourcc, chosen.height) == ('YUYV', 240)
+
+
+def open_with_engine(config_dir):
+    config = Config(os.path.join(config_dir, 'eyeremote_config.json'))
+    config.set('camera_min_height', 240)
+    config.set('camera_min_fps', 60)
+    engine = EyeRemoteEngine(config=config, log=lambda message: None, capture_factory=ModalFakeCapture)
+    opened_before = FakeCapture.opened_total
+    cap = engine.camera_setup.open_capture(0)
+    engine.camera_setup.configure_capture(cap)
+    mode = engine.get_stats()['camera_mode']
+    applied = (fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    opens = FakeCapture.opened_total - opened_before
+    cap.release()
+    engine.shutdown()
+    return mode, applied, opens
+
+
+def check_engine_cache():
+    FakeCapture.reset_counters()
+    config_dir = tempfile.mkdtemp()
+    try:
+        first, first_applied, first_opens = open_with_engine(config_dir)
+        second, second_applied, second_opens = open_with_engine(config_dir)
+        cached = os.path.exists(os.path.join(config_dir, 'camera_modes.json'))
+    finally:
+        shutil.rmtree(config_dir)
+
+    print(f"Engine: first start {first['label'] if first else None} from_cache={first and first['from_cache']} "
+          f"({first_opens} opens), second start from_cache={second and second['from_cache']} "
+          f"({second_opens} opens), applied {second_applied}, cache file written: {cached}")
+    return (first is not None and second is not None and not first['from_cache'] and second['from_cache']
+            and first['label'] == second['label'] and first_applied == second_applied == ('YUYV', 240)
+            and first_opens == 2 and second_opens == 1 and cached and FakeCapture.open_handles == 0)
+
+
+def check_nothing_qualifies():
+    config_dir = tempfile.mkdtemp()
+    cache = CameraModeCache(os.path.join(config_dir, 'camera_modes.json'))
+    opens = []
+
+    def negotiate(min_fps, refresh=False):
+        negotiator = ModeNegotiator(cache, ModeProber(min_height=480, min_fps=min_fps, sample_frames=5),
+                                    log=lambda message: None)
+        before = FakeCapture.opened_total
+        mode, cached = negotiator.negotiate(0, ModalFakeCapture, key='fake', refresh=refresh)
+        opens.append(FakeCapture.opened_total - before)
+        return mode, cached
+
+    try:
+        results = [negotiate(500), negotiate(500), negotiate(500, refresh=True), negotiate(400)]
+    finally:
+        shutil.rmtree(config_dir)
+    fallback = fallback_mode()
+    from_cache = [cached for _, cached in results]
+    print(f"Nothing qualifies: modes {[mode.label for mode, _ in results]}, from cache {from_cache}, "
+          f"camera opened {opens} (first, again, refresh, new requirements)")
+    return (all(mode == fallback for mode, _ in results) and from_cache == [False, True, False, False]
+            and opens == [1, 0, 1, 1])
+
+
+def run_camera_modes():
+    print("Starting camera mode negotiation test...")
+    results = {
+        'high resolution': check_high_resolution(),
+        'low resolution': check_low_resolution(),
+        'engine cache': check_engine_cache(),
+        'cached when nothing qualifies': check_nothing_qualifies(),
+    }
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_camera_modes():
+    assert run_camera_modes()
+
+
+if __name__ == "__main__":
+    success = run_camera_modes()
+    sys.exit(0 if success else 1)
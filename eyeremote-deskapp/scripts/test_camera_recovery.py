@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test camera reconnects with a fake camera that can be unplugged on demand.
+
+1. Camera 0 drops out for 1.5 s while frames are being read: the capture
+   must reconnect to it with backoff and record the incident's downtime.
+2. Camera 0 drops out for good with camera 1 as fallback: frames must
+   continue from camera 1.
+3. A reconnect in progress must stop promptly when interrupted.
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_camera import FakeCapture
+from app.capture import SupervisedCapture
+
+OUTAGE = 1.5
+
+
+def read_for(capture, seconds, frames):
+    """Read frames for a while, recording when each one arrived"""
+    end = time.monotonic() + seconds
+    while time.monotonic() < end and not capture.interrupt.is_set():
+        ok, frame = capture.read()
+        if ok:
+            frames.append(time.monotonic())
+
+
+def make_capture(**kwargs):
+    events = []
+    capture = SupervisedCapture(0, factory=FakeCapture.factory(fps=60), initial_backoff=0.1, max_backoff=0.8,
+                                on_lost=lambda i: events.append('lost'),
+                                on_recovered=lambda i: events.append('recovered'), **kwargs)
+    return capture, events
+
+
+def check_reconnect():
+    FakeCapture.reset_counters()
+    capture, events = make_capture()
+    frames = []
+    reader = threading.Thread(target=read_for, args=(capture, 3.5, frames))
+    reader.start()
+    time.sleep(0.5)
+    FakeCapture.unplug(0)
+    unplugged_at = time.monotonic()
+    time.sleep(OUTAGE)
+    FakeCapture.plug(0)
+    reader.join()
+    capture.release()
+
+    incident = capture.incidents[0] if capture.incidents else None
+    gap = max(b - a for a, b in zip(frames, frames[1:])) if len(frames) > 1 else 0
+    print(f"Reconnect: events {events}, incidents {len(capture.incidents)}, "
+          f"downtime {incident.downtime_seconds if incident else 0:.2f}s, attempts {incident.attempts if incident else 0}, "
+          f"longest frame gap {gap:.2f}s, open handles {FakeCapture.open_handles}")
+    return (events == ['lost', 'recovered'] and incident.recovered_index == 0
+            and OUTAGE - 0.2 < incident.downtime_seconds < OUTAGE + 1.0
+            and incident.attempts >= 3 and any(t > unplugged_at + OUTAGE for t in frames)
+            and FakeCapture.open_handles == 0)
+
+
+def check_fallback():
+    FakeCapture.reset_counters()
+    capture, events = make_capture(fallback_indices=[1])
+    frames = []
+    read_for(capture, 0.3, frames)
+    FakeCapture.unplug(0)
+    before = len(frames)
+    read_for(capture, 0.5, frames)
+    capture.release()
+
+    incident = capture.incidents[0] if capture.incidents else None
+    print(f"Fallback: active camera {capture.active_index}, events {events}, "
+          f"downtime {incident.downtime_seconds if incident else 0:.3f}s, frames after outage {len(frames) - before}")
+    return (capture.active_index == 1 and events == ['lost', 'recovered']
+            and incident.recovered_index == 1 and len(frames) - before > 10)
+
+
+def check_interrupt():
+    FakeCapture.reset_counters()
+    capture, events = make_capture()
+    FakeCapture.unplug(0)
+    results = []
+
+    def blocked_read():
+        for _ in range(capture.failure_threshold):
+            results.append(capture.read()[0])
+        results.append(time.monotonic())
+
+    reader = threading.Thread(target=blocked_read)
+    reader.start()
+    time.sleep(0.5)
+    capture.interrupt.set()
+    interrupted_at = time.monotonic()
+    reader.join(timeout=5)
+    returned_after = results[-1] - interrupted_at if results and not reader.is_alive() else None
+    capture.release()
+
+    print(f"Interrupt: read returned {returned_after * 1000 if returned_after is not None else -1:.0f} ms "
+          f"after interrupt, events {events}")
+    return returned_after is not None and returned_after < 0.2 and events == ['lost']
+
+
+def run_camera_recovery():
+    print("Starting camera recovery test...")
+    results = {
+        'reconnect': check_reconnect(),
+        'fallback': check_fallback(),
+        'interrupt': check_interrupt(),
+    }
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_camera_recovery():
+    assert run_camera_recovery()
+
+
+if __name__ == "__main__":
+    success = run_camera_recovery()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test the in-process event bus.
+
+1. Drop policies: while a subscriber's handler is held up on one event, ten
+   more arrive with room for four. DROP_OLDEST keeps the newest four,
+   DROP_NEWEST the first four, and both count six drops and hand the
+   dropped events to on_drop.
+2. Lag: events that waited in the queue show up in last_lag_ms/max_lag_ms.
+3. Isolation: a stuck subscriber and one whose handler raises do not hold up
+   publish() or another subscriber. The failure is counted and reported
+   through the bus's log callback, and delivery carries on.
+4. Filtering and unsubscribe: only the requested event types arrive, and
+   nothing arrives after unsubscribe().
+"""
+
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.events import DROP_NEWEST, DROP_OLDEST, AttentionChanged, EventBus, FrameProcessed
+
+HOLD_SECONDS = 0.2
+
+
+def frame(index):
+    return FrameProcessed(eyes_detected=True, frame_index=index, processing_ms=1.0)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class HeldHandler:
+    """Records frame numbers; blocks in the handler until released"""
+
+    def __init__(self):
+        self.received = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, event):
+        self.started.set()
+        self.release.wait(5)
+        self.received.append(event.frame_index)
+
+
+def check_policy(policy):
+    bus = EventBus(log=lambda m: None)
+    handler = HeldHandler()
+    dropped = []
+    subscription = bus.subscribe(handler, name=policy, maxsize=4, policy=policy,
+                                 on_drop=lambda event: dropped.append(event.frame_index))
+    bus.publish(frame(0))
+    handler.started.wait(5)  # Frame 0 is in the handler, so the queue is empty
+    for i in range(1, 11):
+        bus.publish(frame(i))
+    time.sleep(HOLD_SECONDS)
+    handler.release.set()
+    wait_for(lambda: subscription.delivered == 5)
+    stats = subscription.stats()
+    bus.close()
+    print(f"{policy}: received {handler.received}, {stats['delivered']} delivered, {stats['dropped']} dropped "
+          f"{dropped}, max lag {stats['max_lag_ms']:.0f} ms")
+    return handler.received, dropped, stats
+
+
+def check_drop_policies():
+    oldest, oldest_dropped, oldest_stats = check_policy(DROP_OLDEST)
+    newest, newest_dropped, newest_stats = check_policy(DROP_NEWEST)
+    return (oldest == [0, 7, 8, 9, 10] and newest == [0, 1, 2, 3, 4]
+            and oldest_dropped == [1, 2, 3, 4, 5, 6] and newest_dropped == [5, 6, 7, 8, 9, 10]
+            and oldest_stats['dropped'] == 6 and newest_stats['dropped'] == 6
+            and oldest_stats['delivered'] == newest_stats['delivered'] == 5)
+
+
+def check_lag():
+    bus = EventBus(log=lambda m: None)
+    seen = threading.Event()
+    subscription = bus.subscribe(lambda event: seen.set(), name='lag')
+    bus.publish(FrameProcessed(True, 0, 1.0, timestamp=time.monotonic() - 0.5))
+    seen.wait(5)
+    wait_for(lambda: subscription.delivered == 1)
+    stale = subscription.stats()
+    seen.clear()
+    bus.publish(frame(1))
+    seen.wait(5)
+    wait_for(lambda: subscription.delivered == 2)
+    fresh = subscription.stats()
+    bus.close()
+    print(f"Lag: event published 0.5 s late {stale['last_lag_ms']:.0f} ms, then a fresh one "
+          f"{fresh['last_lag_ms']:.1f} ms (max {fresh['max_lag_ms']:.0f} ms)")
+    return stale['last_lag_ms'] >= 500 and fresh['last_lag_ms'] < 100 and fresh['max_lag_ms'] >= 500
+
+
+def check_isolation():
+    logged = []
+    bus = EventBus(log=logged.append)
+    stuck = HeldHandler()
+    fast = []
+    handler_threads = set()
+
+    def failing(event):
+        handler_threads.add(threading.current_thread().name)
+        if event.frame_index % 10 == 0:
+            raise RuntimeError(f"bad frame {event.frame_index}")
+
+    def quick(event):
+        handler_threads.add(threading.current_thread().name)
+        fast.append(event.frame_index)
+
+    bus.subscribe(stuck, name='stuck', maxsize=8)
+    failing_sub = bus.subscribe(failing, name='failing')
+    bus.subscribe(quick, name='fast')
+
+    start = time.perf_counter()
+    for i in range(100):
+        bus.publish(frame(i))
+    publish_ms = (time.perf_counter() - start) * 1000
+    all_delivered = wait_for(lambda: len(fast) == 100 and failing_sub.delivered == 100)
+    stuck_waiting = not stuck.received
+    stuck.release.set()
+    stats = bus.stats()
+    bus.close()
+    print(f"Isolation: 100 publishes took {publish_ms:.1f} ms; fast subscriber got {len(fast)} in order "
+          f"{fast == list(range(100))} while the stuck one was still waiting {stuck_waiting}; "
+          f"failing handler errors {stats['failing']['errors']}, delivered {stats['failing']['delivered']}, "
+          f"{len(logged)} logged (e.g. \"{logged[0] if logged else ''}\"); threads {sorted(handler_threads)}")
+    return (all_delivered and stuck_waiting and fast == list(range(100)) and publish_ms < 100
+            and stats['failing']['errors'] == 10 and len(logged) == 10 and "bad frame 0" in logged[0]
+            and stats['stuck']['dropped'] > 0 and handler_threads == {'event-failing', 'event-fast'})
+
+
+def check_filter_and_unsubscribe():
+    bus = EventBus(log=lambda m: None)
+    received = []
+    subscription = bus.subscribe(received.append, (AttentionChanged,), name='attention')
+    bus.publish(frame(0))
+    bus.publish(AttentionChanged(True))
+    wait_for(lambda: subscription.delivered == 1)
+    bus.unsubscribe(subscription)
+    bus.publish(AttentionChanged(False))
+    time.sleep(0.05)
+    thread_stopped = not subscription._thread.is_alive()
+    bus.close()
+    print(f"Filter and unsubscribe: received {[type(e).__name__ for e in received]}, "
+          f"delivery thread stopped {thread_stopped}")
+    return len(received) == 1 and received[0].attentive and thread_stopped and 'attention' not in bus.stats()
+
+
+def run_events():
+    print("Starting event bus test...")
+    results = {
+        'drop policies': check_drop_policies(),
+        'lag counters': check_lag(),
+        'subscribers are isolated': check_isolation(),
+        'filtering and unsubscribe': check_filter_and_unsubscribe(),
+    }
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_events():
+    assert run_events()
+
+
+if __name__ == "__main__":
+    success = run_events()
+    sys.exit(0 if success else 1)
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 Quick test script to verify eye detection functionality
+
+Pass --broker to watch the camera through the camera broker, so the test
+can run while EyeRemote itself is using the camera.
 """
 
 import sys
@@ -8,10 +11,10 @@ import os
 import cv2
 import time
 
-# Add app directory to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from eye_detector import EyeDetector
+from app.eye_detector import EyeDetector
 
 def test_eye_detection():
     """Test eye detection with live camera feed"""
@@ -20,7 +23,11 @@ def test_eye_detection():
     
     try:
         # Initialize eye detector
-        detector = EyeDetector()
+        capture_factory = None
+        if '--broker' in sys.argv[1:]:
+            from app.camera_broker import BrokerCapture
+            capture_factory = BrokerCapture
+        detector = EyeDetector(capture_factory=capture_factory)
         
         show_visualization = False
         frame_count = 0
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Test the flight recorder.
+
+Each test frame stamps its number into the pixels, so the order of the
+frames in a dump can be checked.
+
+1. Ring: more frames than the ring holds are written. The dump keeps the
+   newest ones, oldest first, with each frame's verdicts. A frame still
+   waiting for its verdict has overwritten the oldest record, which is left
+   out.
+2. Writes: recording a frame and its verdict allocates nothing once the ring
+   exists. The cost per write is printed.
+3. Replay: a dump loads with FrameArraySource.from_file() and replays the
+   recorded frames at the recorded rate.
+4. After a crash: the ring file on its own can be dumped by dump_ring().
+   The next recorder on the same path keeps it as the previous ring, and
+   `eyeremote --flight-dump-ring` writes that one as a clip.
+5. No frames: records without a frame are left out of a dump, and a ring
+   that has none writes no clip.
+6. Engine: "That Was Wrong" (report_wrong_decision) saves the frames the
+   detection loop saw. Skipped when the Haar cascades are missing.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.cli import main as cli_main
+from app.flight_recorder import FlightRecorder, dump_ring, previous_ring_path
+from app.sources import FrameArraySource
+
+CAPACITY = 50
+WRITTEN = 80
+WRITES = 2000
+
+
+def stamped_frame(i, size=(480, 640)):
+    """A camera-sized grayscale frame whose brightness is 2 x (i mod 100)"""
+    return np.full(size, 2 * (i % 100), dtype=np.uint8)
+
+
+def frame_numbers(frames):
+    return [int(round(float(frame.mean()) / 2)) for frame in frames]
+
+
+def record(recorder, count, start=0):
+    for i in range(start, start + count):
+        recorder.frame(stamped_frame(i))
+        recorder.commit(eyes=i % 2 == 0, attentive=i % 3 == 0, paused=i >= 70, detect_ms=i, frame_ms=i + 1)
+        time.sleep(0.001)
+
+
+def check_ring(directory):
+    recorder = FlightRecorder(os.path.join(directory, 'ring.npy'), CAPACITY)
+    record(recorder, WRITTEN)
+    recorder.frame(stamped_frame(99))  # A frame whose verdict never came
+    path = os.path.join(directory, 'dump.npz')
+    count = recorder.dump(path, note='test')
+    data = np.load(path)
+    expected = list(range(WRITTEN - CAPACITY + 1, WRITTEN))
+    order = frame_numbers(data['frames']) == expected
+    verdicts = (list(data['eyes']) == [i % 2 == 0 for i in expected]
+                and list(data['paused']) == [i >= 70 for i in expected]
+                and list(data['detect_ms']) == expected and data['has_frame'].all())
+    size = data['frames'].shape[1:] == (120, 160)
+    print(f"Ring: {WRITTEN} frames into {CAPACITY} slots, dump of {count} keeps frames "
+          f"{expected[0]}..{expected[-1]} in order {order}, verdicts {verdicts}, 160x120 {size}, "
+          f"note '{data['note']}'")
+    recorder.close()
+    return count == CAPACITY - 1 and order and verdicts and size and recorder.stats()['dumps'] == 1
+
+
+def check_writes(directory):
+    recorder = FlightRecorder(os.path.join(directory, 'writes.npy'), CAPACITY)
+    frames = [stamped_frame(i) for i in range(10)]
+    record(recorder, CAPACITY)  # Every slot touched once
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(WRITES):
+        recorder.frame(frames[i % 10])
+        recorder.commit(True, True, False, 1.0, 2.0)
+    per_write_us = (time.perf_counter() - start) / WRITES * 1e6
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    recorder.close()
+    print(f"Writes: {per_write_us:.0f} us per frame and verdict, {current} bytes held, "
+          f"peak {peak} bytes over {WRITES} writes")
+    return current < 1024 and peak < 4096
+
+
+def check_replay(directory):
+    path = os.path.join(directory, 'dump.npz')
+    source = FrameArraySource.from_file(path)
+    numbers = []
+    while True:
+        ret, frame = source.read_gray()
+        if not ret:
+            break
+        numbers.append(frame_numbers([frame])[0])
+    print(f"Replay: {len(numbers)} frames at {source.fps:.0f} FPS, grayscale {source.delivers_gray}, "
+          f"frames {numbers[0]}..{numbers[-1]}")
+    return numbers == list(range(WRITTEN - CAPACITY + 1, WRITTEN)) and source.delivers_gray and source.fps > 0
+
+
+def check_after_crash(directory):
+    ring_path = os.path.join(directory, 'crashed.npy')
+    recorder = FlightRecorder(ring_path, CAPACITY)
+    record(recorder, 20)
+    recorder.close()
+    del recorder  # Only the file is left
+    path = os.path.join(directory, 'crashed.npz')
+    count = dump_ring(ring_path, path, note='after crash')
+    numbers = frame_numbers(np.load(path)['frames'])
+
+    # The next start keeps the crashed ring instead of wiping it
+    restarted = FlightRecorder(ring_path, CAPACITY)
+    kept = restarted.previous == previous_ring_path(ring_path) and restarted.records == 0
+    restarted.close()
+    clip_dir = os.path.join(directory, 'previous')
+    os.mkdir(clip_dir)
+    previous = os.path.join(clip_dir, os.path.basename(restarted.previous))
+    shutil.move(restarted.previous, previous)
+    exit_code = cli_main(['--flight-dump-ring', previous])
+    clips = [name for name in os.listdir(clip_dir) if name.endswith('.npz')]
+    cli_numbers = frame_numbers(np.load(os.path.join(clip_dir, clips[0]))['frames']) if clips else []
+    print(f"After a crash: {count} records dumped from the ring file, frames {numbers[0]}..{numbers[-1]}; "
+          f"kept as {os.path.basename(previous)} on restart {kept}, --flight-dump-ring exit code {exit_code} "
+          f"wrote {clips}")
+    return (count == 20 and numbers == list(range(20)) and kept and exit_code == 0
+            and cli_numbers == list(range(20)))
+
+
+def check_no_frames(directory):
+    recorder = FlightRecorder(os.path.join(directory, 'verdicts.npy'), CAPACITY)
+    recorder.commit(True, True, False, 1.0, 2.0)  # Detector in another process: verdicts only
+    empty_path = os.path.join(directory, 'verdicts.npz')
+    empty = recorder.dump(empty_path)
+    record(recorder, 5)
+    recorder.commit(False, True, False, 1.0, 2.0)
+    mixed_path = os.path.join(directory, 'mixed.npz')
+    mixed = recorder.dump(mixed_path)
+    recorder.close()
+    data = np.load(mixed_path)
+    print(f"No frames: ring of verdicts only dumped {empty} records (file written "
+          f"{os.path.exists(empty_path)}); mixed ring dumped {mixed} records, frames {frame_numbers(data['frames'])}")
+    return (empty == 0 and not os.path.exists(empty_path) and mixed == 5
+            and frame_numbers(data['frames']) == list(range(5)) and data['has_frame'].all())
+
+
+def check_engine(directory):
+    from fake_camera import FakeCapture
+    from app.config import Config
+    from app.engine import EyeRemoteEngine
+    from app.eye_detector import load_cascades
+
+    try:
+        load_cascades()
+    except Exception as e:
+        print(f"Engine: Haar cascades not available in this OpenCV build ({e}), skipping")
+        return True
+    config = Config(os.path.join(directory, 'config.json'))
+    config.set('camera_mode_negotiation', False)
+    config.set('frame_delay', 0.02)
+    config.set('flight_recorder_seconds', 2)
+    engine = EyeRemoteEngine(config=config, log=lambda m: None, capture_factory=FakeCapture.factory(fps=100))
+    engine.start()
+    time.sleep(1.5)
+    path = engine.report_wrong_decision()
+    stats = engine.get_stats()['flight_recorder']
+    engine.shutdown()
+    if path is None:
+        print("Engine: nothing was recorded")
+        return False
+    data = np.load(path)
+    frames = len(data['frames'])
+    ring_next_to_config = os.path.dirname(stats['file']) == directory
+    print(f"Engine: {stats['records']} of {stats['capacity']} records, 'That Was Wrong' saved {frames} frames "
+          f"at {float(data['fps']):.0f} FPS to {os.path.basename(path)} ('{data['note']}')")
+    return frames > 10 and data['has_frame'].all() and ring_next_to_config and os.path.dirname(path) == directory
+
+
+def run_flight_recorder():
+    print("Starting flight recorder test...")
+    directory = tempfile.mkdtemp()
+    try:
+        results = {
+            'ring keeps the newest records in order': check_ring(directory),
+            'writes allocate nothing': check_writes(directory),
+            'dump replays through FrameArraySource': check_replay(directory),
+            'ring file dumped after a crash': check_after_crash(directory),
+            'records without frames left out': check_no_frames(directory),
+            'engine "That Was Wrong" dump': check_engine(directory),
+        }
+    finally:
+        shutil.rmtree(directory)
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_flight_recorder():
+    assert run_flight_recorder()
+
+
+if __name__ == "__main__":
+    success = run_flight_recorder()
+    sys.exit(0 if success else 1)
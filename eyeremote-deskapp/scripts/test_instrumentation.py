@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Test the per-stage pipeline timings.
+
+1. Percentiles: known samples give the expected p50/p95/p99, the window
+   keeps only the newest samples and the achieved rate is measured.
+2. Overhead: a stand-in detection workload on a 640x480 frame (colour
+   conversion and a blur in place of the cascades) is timed, and so are the
+   recording calls of a frame made on their own. Both that measured cost and
+   the estimate StageTimings reports must stay under 1% of the frame time.
+   (Timing the workload with and without the calls differs by a few percent
+   either way on a shared machine, far more than the calls cost.)
+3. Engine: detection on a fake camera fills the capture, conversion,
+   cascade, smoothing and frame stages, get_stats() includes them and the
+   JSON dump reads back. Skipped when the Haar cascades are missing.
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from app.config import Config
+from app.instrumentation import StageTimings, format_table
+
+FRAMES = 200
+ROUNDS = 7
+
+
+def check_percentiles():
+    timings = StageTimings(window=100)
+    for ms in range(1, 101):
+        timings.add('detect', float(ms))
+    stage = timings.snapshot()['stages']['detect']
+    exact = (stage['p50'], stage['p95'], stage['p99'], stage['max']) == (51.0, 96.0, 100.0, 100.0)
+    for ms in range(1000, 1050):
+        timings.add('detect', float(ms))
+    rolled = timings.snapshot()['stages']['detect']
+    rolling = rolled['count'] == 100 and rolled['max'] == 1049.0 and rolled['p50'] == 1000.0
+    for _ in range(21):
+        timings.frame_done()
+        time.sleep(0.02)
+    rate = timings.rate()
+    print(f"Percentiles: p50/p95/p99 {stage['p50']}/{stage['p95']}/{stage['p99']} exact {exact}, "
+          f"window keeps newest {rolling}, rate {rate:.1f} fps (paced at ~50)")
+    return exact and rolling and 35 < rate < 55
+
+
+def workload(frame, timings=None):
+    """One frame of stand-in work, with the laps the real pipeline records"""
+    frame_start = start = time.perf_counter()
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if timings is not None:
+        timings.add('camera_check', 0.0)
+        start = timings.lap('convert', start)
+    blurred = cv2.GaussianBlur(gray, (31, 31), 0)
+    if timings is not None:
+        start = timings.lap('face_cascade', start)
+    small = cv2.resize(blurred, (320, 240))
+    if timings is not None:
+        start = timings.lap('eye_cascade', start)
+        timings.add('detect', 0.0)
+        timings.lap('smoothing', start)
+        timings.lap('frame', frame_start)
+        timings.frame_done()
+    return small
+
+
+def record_only(timings):
+    """The recording calls of one workload() frame, with no work between them"""
+    frame_start = start = time.perf_counter()
+    timings.add('camera_check', 0.0)
+    start = timings.lap('convert', start)
+    start = timings.lap('face_cascade', start)
+    start = timings.lap('eye_cascade', start)
+    timings.add('detect', 0.0)
+    timings.lap('smoothing', start)
+    timings.lap('frame', frame_start)
+    timings.frame_done()
+
+
+def check_overhead():
+    frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+    timings, probe = StageTimings(), StageTimings()
+    plain, recording = [], []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            workload(frame)
+        plain.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(FRAMES):
+            record_only(probe)
+        recording.append(time.perf_counter() - start)
+    for _ in range(FRAMES):
+        workload(frame, timings)  # Real frame times for the estimate
+    frame_ms = min(plain) / FRAMES * 1000
+    measured = 100.0 * min(recording) / min(plain)
+    estimate = timings.overhead_pct()
+    print(f"Overhead: frame {frame_ms:.2f} ms, measured {measured:.3f}%, reported estimate {estimate:.3f}% "
+          f"({timings.lap_cost_us():.2f} us per lap, {timings.samples // timings.frames} laps per frame)")
+    return measured < 1.0 and estimate < 1.0
+
+
+def check_engine():
+    from app.engine import EyeRemoteEngine
+    from app.eye_detector import load_cascades
+    from fake_camera import FakeCapture
+
+    try:
+        load_cascades()
+    except Exception as e:
+        print(f"Engine: Haar cascades not available in this OpenCV build ({e}), skipping")
+        return True
+
+    directory = tempfile.mkdtemp()
+    try:
+        config = Config(os.path.join(directory, 'config.json'))
+        config.set('camera_mode_negotiation', False)
+        config.set('camera_luma_capture', False)
+        engine = EyeRemoteEngine(config=config, log=lambda m: None, capture_factory=FakeCapture)
+        engine.start()
+        time.sleep(2.0)
+        stats = engine.get_stats()
+        path = os.path.join(directory, 'timings.json')
+        dumped = engine.dump_timings(path)
+        engine.shutdown()
+        with open(path) as f:
+            loaded = json.load(f)
+    finally:
+        shutil.rmtree(directory)
+
+    timings = stats['timings']
+    expected = {'camera_check', 'capture', 'convert', 'face_cascade', 'detect', 'smoothing', 'frame'}
+    stages = set(timings['stages'])
+    print(f"Engine: stages {sorted(stages)}, {timings['frames']} frames at {timings['fps']} fps, "
+          f"overhead {timings['overhead_pct']}%, JSON dump {dumped and set(loaded['stages']) >= expected}")
+    print(format_table(timings))
+    return expected <= stages and dumped and set(loaded['stages']) >= expected and timings['frames'] > 5
+
+
+def run_instrumentation():
+    print("Starting pipeline instrumentation test...")
+    results = {
+        'percentiles and rate': check_percentiles(),
+        'overhead under 1%': check_overhead(),
+        'engine stages and JSON dump': check_engine(),
+    }
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_instrumentation():
+    assert run_instrumentation()
+
+
+if __name__ == "__main__":
+    success = run_instrumentation()
+    sys.exit(0 if success else 1)
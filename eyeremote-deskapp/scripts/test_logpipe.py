@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test the activity log pipeline without a window.
+
+1. Flood: eight threads log 20,000 messages while a drain loop on the
+   "Tk" thread empties the queue. Producers never wait on the drain, each
+   drain is one insert and leaves the textbox at max_lines at most.
+2. Level filter: debug chatter is kept out of the window but written to the
+   file; warnings are marked.
+3. Rotation: the log file is rotated at max_bytes, keeps `backups` old files
+   and is flushed by close().
+"""
+
+import sys
+import os
+import glob
+import shutil
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.logpipe import LogPipe, LogView
+
+THREADS = 8
+MESSAGES = 2500
+MAX_LINES = 300
+
+
+class FakeTextbox:
+    """Just enough of a Tk text widget: lines, insert at end, delete from the top"""
+
+    def __init__(self):
+        self.lines = []
+        self.inserts = 0
+        self.largest = 0
+
+    def insert(self, index, text):
+        assert index == "end"
+        self.lines.extend(text.splitlines())
+        self.inserts += 1
+        self.largest = max(self.largest, len(self.lines))
+
+    def delete(self, start, end):
+        assert start == "1.0"
+        del self.lines[:int(end.split('.')[0]) - 1]
+
+    def see(self, index):
+        pass
+
+
+def check_flood():
+    pipe = LogPipe(max_lines=MAX_LINES)
+    textbox = FakeTextbox()
+    view = LogView(pipe, textbox, schedule=lambda delay, callback: None, max_batch=200)
+    call_times = []
+
+    def produce(thread):
+        slowest = 0.0
+        for i in range(MESSAGES):
+            started = time.perf_counter()
+            pipe.info(f"thread {thread} message {i}")
+            slowest = max(slowest, time.perf_counter() - started)
+            if i % 50 == 0:
+                time.sleep(0.001)  # Spread the flood over many drains
+        call_times.append(slowest)
+
+    producers = [threading.Thread(target=produce, args=(t,)) for t in range(THREADS)]
+    for thread in producers:
+        thread.start()
+    while any(thread.is_alive() for thread in producers):
+        view.pump()
+        time.sleep(0.01)  # Like root.after(10)
+    while view.pump():
+        pass
+
+    last = [line.split('] ', 1)[1] for line in textbox.lines]
+    in_order = all(int(a.split()[-1]) < int(b.split()[-1])
+                   for a, b in zip(last, last[1:]) if a.split()[1] == b.split()[1])
+    slowest_ms = max(call_times) * 1000
+    print(f"Flood: {THREADS * MESSAGES} messages, {view.batches} batches, textbox peak {textbox.largest} lines "
+          f"(cap {MAX_LINES}), kept {len(textbox.lines)}, trimmed {view.trimmed}, slowest log() "
+          f"{slowest_ms:.2f} ms, per-thread order kept {in_order}")
+    return (textbox.largest <= MAX_LINES + view.max_batch and len(textbox.lines) == MAX_LINES
+            and view.lines == MAX_LINES and textbox.inserts == view.batches and in_order
+            and last[-1].endswith(f"message {MESSAGES - 1}"))
+
+
+def check_levels(directory):
+    path = os.path.join(directory, 'levels.log')
+    pipe = LogPipe(ui_level='INFO', file_path=path)
+    pipe.debug("Active window process: 'vlc'")
+    pipe.info("Media paused - eyes not detected for 3s")
+    pipe.warning("Camera 0 lost")
+    shown = pipe.drain()
+    pipe.close()
+    with open(path) as f:
+        written = f.read()
+    filtered = len(shown) == 2 and not any('Active window' in line for line in shown)
+    marked = shown[-1].endswith("WARNING: Camera 0 lost")
+    in_file = all(text in written for text in ("Active window", "Media paused", "Camera 0 lost"))
+    print(f"Levels: window got {len(shown)} of 3 (debug filtered {filtered}, warning marked {marked}), "
+          f"file got all three {in_file}")
+    return filtered and marked and in_file
+
+
+def check_rotation(directory):
+    path = os.path.join(directory, 'rotate.log')
+    pipe = LogPipe(file_path=path, max_bytes=4096, backups=2)
+    for i in range(1000):
+        pipe.debug(f"frame {i} " + "x" * 40)
+    pipe.close()
+    files = sorted(glob.glob(path + '*'))
+    sizes_ok = all(os.path.getsize(name) <= 4096 for name in files)
+    with open(path) as f:
+        last_line = f.read().splitlines()[-1]
+    flushed = "frame 999 " in last_line
+    print(f"Rotation: {len(files)} files ({', '.join(os.path.basename(name) for name in files)}), "
+          f"all under max_bytes {sizes_ok}, last record flushed on close {flushed}")
+    return len(files) == 3 and sizes_ok and flushed
+
+
+def run_logpipe():
+    print("Starting activity log pipeline test...")
+    directory = tempfile.mkdtemp()
+    try:
+        results = {
+            'flood from many threads': check_flood(),
+            'level filter': check_levels(directory),
+            'file rotation': check_rotation(directory),
+        }
+    finally:
+        shutil.rmtree(directory)
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_logpipe():
+    assert run_logpipe()
+
+
+if __name__ == "__main__":
+    success = run_logpipe()
+    sys.exit(0 if success else 1)
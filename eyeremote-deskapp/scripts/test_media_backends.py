@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test the media backend registry with stand-in players.
+
+1. Fan-out: one pause goes to a fast, a slow (0.5 s) and a failing player
+   and to a backend that is not available. dispatch() returns at once; the
+   fast player is done long before the slow one, and the missing backend is
+   skipped.
+2. Busy targets: a second action while the slow player is still busy skips
+   it and reaches the others.
+3. Actions: a player that cannot pause explicitly gets a toggle, and only
+   targeting backends get the player name.
+4. Probing: backends are probed once, also when many threads ask at once.
+5. Stats: attempts, successes, failures, busy skips and latency per target.
+"""
+
+import sys
+import os
+import threading
+import time
+from concurrent.futures import wait
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.media_backends import (ACTION_PAUSE, ACTION_RESUME, ACTION_TOGGLE, CAP_EXPLICIT_PAUSE,
+                                CAP_TARGETING, MediaBackend, MediaBackendRegistry)
+
+SLOW_SECONDS = 0.5
+
+
+class StandInPlayer(MediaBackend):
+    capabilities = frozenset({CAP_EXPLICIT_PAUSE, CAP_TARGETING})
+
+    def __init__(self, name, delay=0.0, fails=False, available=True, capabilities=None):
+        self.name = name
+        self.delay = delay
+        self.fails = fails
+        self.available = available
+        if capabilities is not None:
+            self.capabilities = capabilities
+        self.probes = 0
+        self.received = []
+        self.finished_at = None
+
+    def probe(self):
+        self.probes += 1
+        time.sleep(0.01)  # Give concurrent probe_all() calls a chance to overlap
+        return self.available
+
+    def send(self, action, player=None):
+        time.sleep(self.delay)
+        self.received.append((action, player))
+        self.finished_at = time.perf_counter()
+        if self.fails:
+            raise RuntimeError("player went away")
+        return True
+
+
+def make_registry():
+    players = {
+        'fast': StandInPlayer('fast'),
+        'slow': StandInPlayer('slow', delay=SLOW_SECONDS),
+        'broken': StandInPlayer('broken', fails=True),
+        'absent': StandInPlayer('absent', available=False),
+        'toggler': StandInPlayer('toggler', capabilities=frozenset()),
+    }
+    return MediaBackendRegistry(backends=list(players.values())), players
+
+
+def check_fan_out(registry, players):
+    registry.probe_all()
+    start = time.perf_counter()
+    futures = registry.dispatch(ACTION_PAUSE, ['fast:a', 'slow:b', 'broken', 'absent'])
+    dispatch_ms = (time.perf_counter() - start) * 1000
+    wait(futures, timeout=5)
+    fast_ms = (players['fast'].finished_at - start) * 1000
+    slow_ms = (players['slow'].finished_at - start) * 1000
+    results = [future.result() for future in futures]
+    print(f"Fan-out: dispatch returned in {dispatch_ms:.1f} ms, fast player done at {fast_ms:.0f} ms, "
+          f"slow at {slow_ms:.0f} ms, results {results}, unavailable backend skipped "
+          f"{not players['absent'].received}")
+    # Well under the slow player's delay, with room for a loaded machine
+    quick_ms = SLOW_SECONDS * 1000 / 2
+    return (dispatch_ms < quick_ms and fast_ms < quick_ms and slow_ms >= SLOW_SECONDS * 1000
+            and results == [True, True, False] and not players['absent'].received)
+
+
+def check_busy(registry, players):
+    registry.dispatch(ACTION_PAUSE, ['slow:b'])
+    time.sleep(0.05)
+    futures = registry.dispatch(ACTION_RESUME, ['fast:a', 'slow:b'])
+    skipped = len(futures) == 1
+    wait(futures, timeout=5)
+    fast_resumed = players['fast'].received[-1] == (ACTION_RESUME, 'a')
+    time.sleep(SLOW_SECONDS + 0.1)
+    slow_actions = [action for action, _ in players['slow'].received]
+    print(f"Busy: resume while the slow player is busy reaches {len(futures)} target(s); "
+          f"slow player received {slow_actions}")
+    return skipped and fast_resumed and slow_actions == [ACTION_PAUSE, ACTION_PAUSE]
+
+
+def check_actions(registry, players):
+    futures = registry.dispatch(ACTION_PAUSE, ['toggler:chrome', 'fast:spotify'])
+    wait(futures, timeout=5)
+    toggled = players['toggler'].received[-1]
+    targeted = players['fast'].received[-1]
+    print(f"Actions: non-pausing player got {toggled}, targeting player got {targeted}")
+    return toggled == (ACTION_TOGGLE, None) and targeted == (ACTION_PAUSE, 'spotify')
+
+
+def check_probing():
+    registry, players = make_registry()
+    threads = [threading.Thread(target=registry.probe_all) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.dispatch(ACTION_PAUSE, ['fast'])
+    available = registry.available_backends()
+    probes = {name: player.probes for name, player in players.items()}
+    registry.shutdown()
+    print(f"Probing: 8 threads, a dispatch and a lookup probed {probes}; available {available}")
+    return all(count == 1 for count in probes.values()) and 'absent' not in available
+
+
+def check_stats(registry):
+    stats = registry.get_stats()
+    summary = {target: (s['attempts'], s['successes'], s['failures'], s['skipped_busy'])
+               for target, s in stats.items()}
+    print(f"Stats (attempts, successes, failures, busy skips): {summary}; "
+          f"slow player max latency {stats['slow:b']['max_latency_ms']:.0f} ms")
+    return (summary['fast:a'] == (2, 2, 0, 0) and summary['slow:b'] == (2, 2, 0, 1)
+            and summary['broken'] == (1, 0, 1, 0) and 'absent' not in summary
+            and stats['slow:b']['max_latency_ms'] >= SLOW_SECONDS * 1000
+            and stats['fast:a']['mean_latency_ms'] < SLOW_SECONDS * 1000 / 2)
+
+
+def run_media_backends():
+    print("Starting media backend registry test...")
+    registry, players = make_registry()
+    results = {
+        'fan-out does not wait for the slow player': check_fan_out(registry, players),
+        'busy targets are skipped': check_busy(registry, players),
+        'toggle and player targeting': check_actions(registry, players),
+        'probing is done once': check_probing(),
+        'per-target stats': check_stats(registry),
+    }
+    registry.shutdown()
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_media_backends():
+    assert run_media_backends()
+
+
+if __name__ == "__main__":
+    success = run_media_backends()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Test multi-camera fusion with file-backed fake cameras.
+
+Two short clips are written with cv2.VideoWriter and replayed through
+VideoFileSource (looping), one per camera. A bright frame stands in for
+"eyes on this camera", since the test does not depend on Haar cascades:
+
+- laptop camera: eyes for the first half of the clip, then away
+- monitor camera: away for the first half, then eyes (the viewer turned
+  to the other screen)
+
+1. 'any' must report attention throughout; 'all' almost never; 'weighted'
+   with the laptop weighted 0.7 must follow the laptop camera.
+2. Both workers together must stay within the shared budget, each getting
+   about half of it.
+3. A camera that cannot be opened is left out and the rest keep working.
+4. Two real EyeDetectors run through the workers at the same time, each
+   with its own cascades. Skipped when the Haar cascades are missing.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from app.multicam import MultiCameraDetector, fuse
+from app.sources import VideoFileSource
+
+CLIP_FRAMES = 40
+BUDGET_FPS = 40
+RUN_SECONDS = 3.0
+
+
+class BrightnessDetector:
+    """EyeDetector stand-in: 'eyes' when the frame is bright"""
+
+    def __init__(self, camera_index, path):
+        if path is None:
+            raise Exception(f"Could not open camera {camera_index}")
+        self.camera_index = camera_index
+        self.cap = VideoFileSource(path, loop=True)
+        self.frames = 0
+
+    def detect_eyes_in(self, gray, max_faces=1):
+        self.frames += 1
+        return float(gray.mean()) > 128
+
+    def standby(self, grace_seconds=30.0, keepalive_interval=0.5):
+        pass
+
+    def resume(self):
+        return True
+
+    def cleanup(self):
+        self.cap.release()
+
+
+def write_clip(path, eyes_first_half):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (160, 120))
+    for i in range(CLIP_FRAMES):
+        eyes = (i < CLIP_FRAMES // 2) == eyes_first_half
+        writer.write(np.full((120, 160, 3), 220 if eyes else 30, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def run(rule, clips, weights=None, cameras=(0, 1)):
+    detector = MultiCameraDetector(list(cameras), lambda index: BrightnessDetector(index, clips.get(index)),
+                                   rule=rule, weights=weights, threshold=0.5, max_rate=BUDGET_FPS,
+                                   log=lambda message: None)
+    samples = []
+    end = time.monotonic() + RUN_SECONDS
+    time.sleep(0.2)  # First verdicts
+    while time.monotonic() < end:
+        verdicts = detector.verdicts()
+        samples.append((verdicts.get(0), verdicts.get(1), detector.detect_eyes()))
+        time.sleep(0.02)
+    stats = detector.stats()
+    detector.cleanup()
+    return samples, stats
+
+
+def share(samples, column):
+    values = [sample[column] for sample in samples if sample[column] is not None]
+    return sum(values) / len(values) if values else 0.0
+
+
+def agreement(samples, column):
+    pairs = [(sample[column], sample[2]) for sample in samples if sample[column] is not None]
+    return sum(a == b for a, b in pairs) / len(pairs) if pairs else 0.0
+
+
+def check_fuse_rules():
+    cases = [
+        (fuse({0: True, 1: False}, 'any'), True),
+        (fuse({0: True, 1: False}, 'all'), False),
+        (fuse({0: True, 1: None}, 'all'), True),  # No fresh verdict: ignored
+        (fuse({0: True, 1: False}, 'weighted', {0: 0.7, 1: 0.3}), True),
+        (fuse({0: False, 1: True}, 'weighted', {0: 0.7, 1: 0.3}), False),
+        (fuse({0: None, 1: None}, 'any'), False),
+    ]
+    ok = all(result == expected for result, expected in cases)
+    print(f"Fusion rules: {sum(r == e for r, e in cases)}/{len(cases)} cases")
+    return ok
+
+
+def check_fusion(clips):
+    any_samples, stats = run('any', clips)
+    all_samples, _ = run('all', clips)
+    weighted_samples, _ = run('weighted', clips, weights={0: 0.7, 1: 0.3})
+
+    print(f"'any': attentive {share(any_samples, 2):.0%} of the time "
+          f"(laptop alone {share(any_samples, 0):.0%}, monitor alone {share(any_samples, 1):.0%})")
+    print(f"'all': attentive {share(all_samples, 2):.0%} of the time")
+    print(f"'weighted' (laptop 0.7): follows the laptop camera {agreement(weighted_samples, 0):.0%} of the time")
+    return (share(any_samples, 2) > 0.9 and share(all_samples, 2) < 0.2
+            and agreement(weighted_samples, 0) > 0.9 and 0.3 < share(any_samples, 0) < 0.7)
+
+
+def check_budget(clips):
+    samples, stats = run('any', clips)
+    rates = [camera['detections'] / RUN_SECONDS for camera in stats]
+    total = sum(rates)
+    per_camera = ', '.join(f"camera {camera['camera_index']} {rate:.1f}/s" for camera, rate in zip(stats, rates))
+    print(f"Budget {BUDGET_FPS}/s shared: {per_camera}, total {total:.1f}/s")
+    return total <= BUDGET_FPS * 1.1 and min(rates) > BUDGET_FPS * 0.35
+
+
+def check_missing_camera(clips):
+    samples, stats = run('any', {0: clips[0]}, cameras=(0, 3))
+    print(f"Camera 3 missing: cameras running {[c['camera_index'] for c in stats]}, "
+          f"attentive {share(samples, 2):.0%} (laptop camera alone)")
+    return [c['camera_index'] for c in stats] == [0] and 0.3 < share(samples, 2) < 0.7
+
+
+def check_real_detectors(clips):
+    from app.eye_detector import EyeDetector, load_cascades
+
+    try:
+        shared = load_cascades()
+    except Exception as e:
+        print(f"Real detectors: Haar cascades not available in this OpenCV build ({e}), skipping")
+        return True
+    detector = MultiCameraDetector(
+        [0, 1], lambda index: EyeDetector(index, capture_factory=lambda i: VideoFileSource(clips[i], loop=True),
+                                          shared_cascades=False),
+        max_rate=BUDGET_FPS, log=lambda message: None)
+    cascades = [(camera.face_cascade, camera.eye_cascade) for camera in detector.detectors]
+    time.sleep(RUN_SECONDS / 2)
+    running = all(worker._thread is not None and worker._thread.is_alive() for worker in detector.workers)
+    stats = detector.stats()
+    detector.cleanup()
+    objects = [id(cascade) for pair in cascades for cascade in pair]
+    private = len(set(objects)) == 4 and not set(objects) & {id(cascade) for cascade in shared}
+    print(f"Real detectors: own cascades per camera {private}, workers still running {running}, "
+          f"detections {[c['detections'] for c in stats]}, read failures {[c['failures'] for c in stats]}")
+    return private and running and all(c['detections'] > 0 and c['failures'] == 0 for c in stats)
+
+
+def run_multicam():
+    print("Starting multi-camera fusion test...")
+    clip_dir = tempfile.mkdtemp()
+    try:
+        clips = {
+            0: write_clip(os.path.join(clip_dir, 'laptop.avi'), eyes_first_half=True),
+            1: write_clip(os.path.join(clip_dir, 'monitor.avi'), eyes_first_half=False),
+        }
+        threads_before = threading.active_count()
+        results = {
+            'fusion rules': check_fuse_rules(),
+            'fusion over cameras': check_fusion(clips),
+            'shared budget': check_budget(clips),
+            'missing camera': check_missing_camera(clips),
+            'real detectors side by side': check_real_detectors(clips),
+        }
+        results['workers stopped'] = threading.active_count() == threads_before
+    finally:
+        shutil.rmtree(clip_dir)
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_multicam():
+    assert run_multicam()
+
+
+if __name__ == "__main__":
+    success = run_multicam()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test the native-messaging host without Chrome or a webcam.
+
+Runs an AttentionHub with a scripted detector, then starts several stdio
+host processes and talks to each one the way Chrome does (length-prefixed
+JSON on stdin/stdout). Every client must see the same attention changes
+while only one detector pipeline runs.
+"""
+
+import sys
+import os
+import subprocess
+import threading
+
+# Add parent directory to path for imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.native_host import AttentionHub, read_message, write_message
+
+NUM_CLIENTS = 3
+
+
+class ScriptedDetector:
+    """Stand-in for EyeDetector that replays a fixed eye pattern"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.position = 0
+
+    def detect_eyes(self, max_faces: int = 1) -> bool:
+        value = self.pattern[self.position % len(self.pattern)]
+        self.position += 1
+        return value
+
+    def cleanup(self):
+        pass
+
+
+def start_client(port):
+    """Start one stdio host process, as Chrome would"""
+    return subprocess.Popen(
+        [sys.executable, '-m', 'app.native_host', '--port', str(port), '--no-spawn',
+         'chrome-extension://test/'],
+        cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+
+
+def collect_messages(proc, messages, stop_after):
+    """Read messages from a host's stdout until stop_after attention messages arrived"""
+    attention = 0
+    while attention < stop_after:
+        message = read_message(proc.stdout.read)
+        if message is None:
+            break
+        messages.append(message)
+        if message.get('type') == 'attention':
+            attention += 1
+
+
+def run_native_host():
+    print("Starting native host test...")
+    # Eyes for 10 frames, then away for 10 frames, repeated
+    pattern = [True] * 10 + [False] * 10
+    hub = AttentionHub(port=0, detector_factory=lambda: ScriptedDetector(pattern),
+                       frame_interval=0.02, debounce_seconds=0.05, idle_timeout=0)
+    hub.start()
+    print(f"Hub listening on 127.0.0.1:{hub.port}")
+
+    clients = [start_client(hub.port) for _ in range(NUM_CLIENTS)]
+    received = [[] for _ in clients]
+    readers = []
+    for proc, messages in zip(clients, received):
+        write_message(proc.stdin, {'type': 'ping'})
+        reader = threading.Thread(target=collect_messages, args=(proc, messages, 3), daemon=True)
+        reader.start()
+        readers.append(reader)
+
+    for reader in readers:
+        reader.join(timeout=10)
+
+    for proc in clients:
+        proc.stdin.close()
+        proc.wait(timeout=5)
+    hub.stop()
+
+    ok = True
+    for i, messages in enumerate(received):
+        states = [m['attentive'] for m in messages if m.get('type') == 'attention']
+        pongs = [m for m in messages if m.get('type') == 'pong']
+        print(f"Client {i}: attention changes {states}, pong: {bool(pongs)}")
+        if len(states) < 3 or not pongs:
+            ok = False
+        elif any(a == b for a, b in zip(states, states[1:])):
+            print(f"[FAIL] Client {i} received a repeated state")
+            ok = False
+
+    print(f"Detector pipelines created: {hub.detectors_created}")
+    if hub.detectors_created != 1:
+        ok = False
+
+    print("\nTest Summary:")
+    print("[OK] Native host test passed" if ok else "[FAIL] Native host test failed")
+    return ok
+
+
+def test_native_host():
+    assert run_native_host()
+
+
+if __name__ == "__main__":
+    success = run_native_host()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test room coordination with several node processes on loopback.
+
+Three nodes report attention to one aggregator with a "pause when fewer
+than 2 are watching" policy. One node looks away, then a second one (pause),
+the second one looks back (resume), and finally a watching node's process
+is killed so it goes silent and must be dropped on timeout (pause).
+
+Crafted heartbeats then check that change times survive encoding, and that
+the aggregator's hold time starts when a viewer looked away (as reported in
+the heartbeat), not when the heartbeat arrived.
+"""
+
+import sys
+import os
+import multiprocessing
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.room import HeartbeatPublisher, RoomAggregator, RoomPolicy, decode_heartbeat, encode_heartbeat
+
+HEARTBEAT_INTERVAL = 0.1
+NODE_TIMEOUT = 0.6
+HOLD_SECONDS = 1.0
+
+
+def run_node(port, name, schedule):
+    """Node process: replay (seconds, watching) steps, then keep heartbeating"""
+    publisher = HeartbeatPublisher(('127.0.0.1', port), node_id=name.encode(),
+                                   interval=HEARTBEAT_INTERVAL)
+    publisher.start()
+    start = time.monotonic()
+    for at, watching in schedule:
+        time.sleep(max(0.0, at - (time.monotonic() - start)))
+        publisher.update(watching)
+    time.sleep(30)
+
+
+def check_codec():
+    now = time.time()
+    changes = [(now - 0.75, False), (now - 0.25, True)]
+    heartbeat = decode_heartbeat(encode_heartbeat(b'node0001', 7, now, True, changes))
+    ages = [round(heartbeat.sent_at - timestamp, 3) for timestamp, _ in heartbeat.changes]
+    states = [state for _, state in heartbeat.changes]
+    print(f"Codec: changes decoded {ages} s before sending, states {states}")
+    return heartbeat.seq == 7 and ages == [0.75, 0.25] and states == [False, True]
+
+
+def send(aggregator, seq, watching, changes=()):
+    """Deliver a heartbeat from one node, with changes given as (seconds ago, state)"""
+    now = time.time()
+    data = encode_heartbeat(b'viewer01', seq, now, watching, [(now - ago, state) for ago, state in changes])
+    aggregator.handle_datagram(data, ('127.0.0.1', 1))
+
+
+def time_to_pause(aggregator, limit=3.0):
+    start = time.monotonic()
+    while not aggregator.paused and time.monotonic() - start < limit:
+        aggregator._evaluate()
+        time.sleep(0.01)
+    return time.monotonic() - start
+
+
+def check_hold():
+    # Looked away 0.8 s before the heartbeat: 0.2 s of the hold are left
+    aggregator = RoomAggregator(policy=RoomPolicy(hold_seconds=HOLD_SECONDS), node_timeout=0)
+    send(aggregator, 1, True)
+    time.sleep(0.9)
+    send(aggregator, 2, False, [(0.8, False)])
+    late_report = time_to_pause(aggregator)
+    aggregator.stop()
+
+    # Looked away, then back for a moment just before the heartbeat: the hold restarts
+    aggregator = RoomAggregator(policy=RoomPolicy(hold_seconds=HOLD_SECONDS), node_timeout=0)
+    send(aggregator, 1, True)
+    time.sleep(0.9)
+    send(aggregator, 2, False, [(0.8, False), (0.3, True), (0.2, False)])
+    glance_back = time_to_pause(aggregator)
+    aggregator.stop()
+    print(f"Hold of {HOLD_SECONDS}s: paused {late_report:.2f}s after a heartbeat reporting a look away "
+          f"0.8s earlier; {glance_back:.2f}s when the viewer looked back 0.3s before it")
+    return late_report < 0.5 and 0.6 < glance_back < 1.1
+
+
+def run_room():
+    print("Starting room aggregator test...")
+    codec_ok = check_codec()
+    hold_ok = check_hold()
+    actions = []
+    aggregator = RoomAggregator(bind=('127.0.0.1', 0), policy=RoomPolicy(min_watching=2),
+                                actuator=lambda action: actions.append((action, time.monotonic())),
+                                node_timeout=NODE_TIMEOUT, tick_interval=0.05, log=print)
+    aggregator.start()
+    port = aggregator.address[1]
+
+    schedules = {
+        'alice': [(0.0, True)],
+        'bob': [(0.0, True), (1.0, False)],
+        'carol': [(0.0, True), (2.0, False), (3.0, True)],
+    }
+    processes = {}
+    for name, schedule in schedules.items():
+        proc = multiprocessing.Process(target=run_node, args=(port, name, schedule), daemon=True)
+        proc.start()
+        processes[name] = proc
+
+    start = time.monotonic()
+    time.sleep(4.0)
+    # alice goes silent; only carol is still watching
+    processes['alice'].kill()
+    killed_at = time.monotonic()
+    time.sleep(NODE_TIMEOUT + 0.5)
+
+    watching, total = aggregator.watching_count()
+    aggregator.stop()
+    for proc in processes.values():
+        proc.kill()
+
+    names = [action for action, _ in actions]
+    print(f"\nActions: {[(a, round(t - start, 2)) for a, t in actions]}")
+    print(f"Nodes remaining: {total}, watching: {watching}, dropped: {aggregator.nodes_dropped}")
+    print(f"Heartbeats received: {aggregator.heartbeats_received}")
+
+    ok = (names == ['pause', 'resume', 'pause'] and aggregator.nodes_dropped == 1 and total == 2
+          and codec_ok and hold_ok)
+    if ok:
+        drop_delay = actions[-1][1] - killed_at
+        print(f"Silent node dropped and room paused {drop_delay:.2f}s after it went quiet")
+
+    print("\nTest Summary:")
+    print("[OK] Room test passed" if ok else "[FAIL] Room test failed")
+    return ok
+
+
+def test_room():
+    assert run_room()
+
+
+if __name__ == "__main__":
+    success = run_room()
+    sys.exit(0 if success else 1)
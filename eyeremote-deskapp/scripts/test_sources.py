@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test the recorded frame sources.
+
+Each test clip stamps its frame number into the pixels, so any frame read
+can be checked against the one expected.
+
+1. Frame arrays: sequential reads, seeking back and forth, the end of the
+   clip and looping.
+2. Video files: an MJPG clip is written and replayed, and seeking to
+   random frames always lands on the right one.
+3. Realtime pacing: a 30 FPS clip read in a tight loop is delivered at
+   30 FPS. A reader that takes 100 ms per frame gets every third frame,
+   with the rest counted as dropped.
+4. Detector: EyeDetector reads the clip through capture_factory. Skipped
+   when the Haar cascades are missing.
+"""
+
+import sys
+import os
+import random
+import shutil
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from app.sources import FrameArraySource, VideoFileSource
+
+FRAMES = 60
+
+
+def stamped_frames(count, size=(240, 320)):
+    """Frames whose brightness is 4 x their index"""
+    return [np.full((size[0], size[1], 3), 4 * i, dtype=np.uint8) for i in range(count)]
+
+
+def frame_number(frame):
+    return int(round(float(frame.mean()) / 4))
+
+
+def read_numbers(source, count):
+    numbers = []
+    for _ in range(count):
+        ret, frame = source.read()
+        numbers.append(frame_number(frame) if ret else None)
+    return numbers
+
+
+def check_frame_array():
+    source = FrameArraySource(stamped_frames(FRAMES))
+    sequential = read_numbers(source, 5) == [0, 1, 2, 3, 4]
+    source.seek(40)
+    forward = read_numbers(source, 2) == [40, 41]
+    source.set(cv2.CAP_PROP_POS_FRAMES, 10)
+    back = read_numbers(source, 1) == [10] and source.get(cv2.CAP_PROP_POS_FRAMES) == 11
+    source.seek(FRAMES - 1)
+    end = read_numbers(source, 2) == [FRAMES - 1, None] and source.exhausted
+    bad_seek = not source.seek(FRAMES) and not source.seek(-1)
+    looping = FrameArraySource(stamped_frames(3), loop=True)
+    looped = read_numbers(looping, 7) == [0, 1, 2, 0, 1, 2, 0]
+    gray = FrameArraySource([np.full((240, 320), 7, dtype=np.uint8)])
+    ret, luma = gray.read_gray()
+    gray_ok = gray.delivers_gray and ret and luma.ndim == 2
+    print(f"Frame array: sequential {sequential}, seek forward {forward}, back {back}, end {end}, "
+          f"out of range refused {bad_seek}, loop {looped}, grayscale frames {gray_ok}")
+    return sequential and forward and back and end and bad_seek and looped and gray_ok
+
+
+def write_clip(path, frames, fps=30):
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, (width, height))
+    if not writer.isOpened():
+        return False
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    return True
+
+
+def check_video_file(directory):
+    path = os.path.join(directory, 'clip.avi')
+    if not write_clip(path, stamped_frames(FRAMES)):
+        print("Video file: this OpenCV build cannot write MJPG, skipping")
+        return True
+    source = VideoFileSource(path)
+    info = (source.frame_count, source.fps, source.get(cv2.CAP_PROP_FRAME_WIDTH))
+    sequential = read_numbers(source, 3) == [0, 1, 2]
+    rng = random.Random(4)
+    targets = [rng.randrange(FRAMES) for _ in range(20)]
+    landed = []
+    for target in targets:
+        source.seek(target)
+        landed.append(read_numbers(source, 1)[0])
+    accurate = landed == targets
+    source.seek(FRAMES - 2)
+    end = read_numbers(source, 3) == [FRAMES - 2, FRAMES - 1, None]
+    source.release()
+    print(f"Video file: {info[0]} frames at {info[1]:.0f} FPS, width {info[2]:.0f}, sequential {sequential}, "
+          f"20 random seeks exact {accurate}, end {end}")
+    return info[0] == FRAMES and sequential and accurate and end and not source.isOpened()
+
+
+def check_realtime():
+    fast = FrameArraySource(stamped_frames(FRAMES), fps=30, realtime=True)
+    start = time.monotonic()
+    numbers = read_numbers(fast, 30)
+    rate = 29 / (time.monotonic() - start)
+    in_order = numbers == list(range(30)) and fast.dropped == 0
+
+    slow = FrameArraySource(stamped_frames(FRAMES), fps=30, realtime=True)
+    seen = []
+    for _ in range(10):
+        ret, frame = slow.read()
+        seen.append(frame_number(frame))
+        time.sleep(0.1)
+    steps = [b - a for a, b in zip(seen, seen[1:])]
+    skipping = all(2 <= step <= 4 for step in steps) and slow.dropped == seen[-1] - 9
+    print(f"Realtime: tight loop gets {rate:.1f} FPS in order {in_order}; "
+          f"100 ms reader gets frames {seen} ({slow.dropped} dropped)")
+    return 27 < rate < 31 and in_order and skipping
+
+
+def check_detector():
+    from app.eye_detector import EyeDetector, load_cascades
+
+    try:
+        load_cascades()
+    except Exception as e:
+        print(f"Detector: Haar cascades not available in this OpenCV build ({e}), skipping")
+        return True
+    detector = EyeDetector(capture_factory=FrameArraySource.factory(stamped_frames(10)))
+    results = [detector.detect_eyes() for _ in range(10)]
+    source = detector.cap
+    end = not detector.is_camera_working() and source.exhausted
+    detector.cleanup()
+    print(f"Detector: read {source.frames_read} frames through capture_factory, "
+          f"eyes in {sum(results)}, end of clip reported {end}")
+    return source.frames_read == 10 and end
+
+
+def run_sources():
+    print("Starting frame source test...")
+    directory = tempfile.mkdtemp()
+    try:
+        results = {
+            'frame array': check_frame_array(),
+            'video file seeking': check_video_file(directory),
+            'realtime pacing': check_realtime(),
+            'EyeDetector capture_factory': check_detector(),
+        }
+    finally:
+        shutil.rmtree(directory)
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_sources():
+    assert run_sources()
+
+
+if __name__ == "__main__":
+    success = run_sources()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test warm-standby restarts against a fake camera that takes 1 s to open.
+
+Start (cold), Stop, Start again within the grace period (warm: must reach
+the first frame in well under 100 ms), then Stop and wait out a short grace
+period so the camera is released, and Start once more (cold again).
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_camera import FakeCapture
+from app.config import Config
+from app.engine import EyeRemoteEngine
+from app.eye_detector import load_cascades
+
+OPEN_DELAY = 1.0
+WARM_BUDGET_MS = 100
+GRACE_SECONDS = 1.0
+
+
+def start_and_wait(engine, timeout=10.0):
+    """Start detection and return (ms to first frame, warm)"""
+    engine.start()
+    deadline = time.monotonic() + timeout
+    while engine.last_start_ms is None and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return engine.last_start_ms, engine.last_start_warm
+
+
+def run_standby():
+    try:
+        load_cascades()
+    except Exception as e:
+        print(f"Haar cascades not available in this OpenCV build ({e}), skipping")
+        return True
+
+    print("Starting warm standby test...")
+    config = Config(os.path.join(tempfile.mkdtemp(), 'config.json'))
+    config.set('standby_grace_seconds', GRACE_SECONDS)
+    config.set('camera_mode_negotiation', False)  # Its one-time probe would add an extra open
+    FakeCapture.reset_counters()
+    engine = EyeRemoteEngine(config=config, log=lambda m: None,
+                             capture_factory=FakeCapture.factory(open_delay=OPEN_DELAY))
+
+    cold_ms, cold_warm = start_and_wait(engine)
+    engine.stop()
+    open_in_standby = FakeCapture.open_handles
+
+    warm_ms, warm_warm = start_and_wait(engine)
+    engine.stop()
+
+    time.sleep(GRACE_SECONDS + 1.0)
+    open_after_grace = FakeCapture.open_handles
+
+    recold_ms, recold_warm = start_and_wait(engine)
+    engine.shutdown()
+
+    print(f"\nCold start:            {cold_ms:.0f} ms (warm={cold_warm})")
+    print(f"Restart in standby:    {warm_ms:.0f} ms (warm={warm_warm})")
+    print(f"Restart after grace:   {recold_ms:.0f} ms (warm={recold_warm})")
+    print(f"Open handles: in standby {open_in_standby}, after grace {open_after_grace}, "
+          f"after shutdown {FakeCapture.open_handles}; cameras opened {FakeCapture.opened_total}")
+
+    ok = (not cold_warm and warm_warm and not recold_warm
+          and warm_ms < WARM_BUDGET_MS and cold_ms > OPEN_DELAY * 1000
+          and open_in_standby == 1 and open_after_grace == 0
+          and FakeCapture.open_handles == 0 and FakeCapture.opened_total == 2)
+
+    print("\nTest Summary:")
+    print("[OK] Warm standby test passed" if ok else "[FAIL] Warm standby test failed")
+    return ok
+
+
+def test_standby():
+    assert run_standby()
+
+
+if __name__ == "__main__":
+    success = run_standby()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Test the status socket with many subscribers and one client that never reads.
+
+Fast subscribers must receive every event in order, the stalled client must
+be dropped, and publishing must never block the caller. A second server on
+the same path must leave the running one alone, while a socket file left by
+a crashed run is replaced. A status request whose stats provider raises gets
+an error reply and the connection stays usable. The engine's config command rejects missing,
+mistyped and out-of-range values without changing the setting.
+"""
+
+import sys
+import os
+import json
+import socket
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from app.engine import EyeRemoteEngine
+from app.status_server import StatusServer
+
+NUM_SUBSCRIBERS = 40
+NUM_EVENTS = 2000
+
+
+def connect(path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(path)
+    return sock
+
+
+def request(sock_file, sock, message):
+    sock.sendall((json.dumps(message) + '\n').encode())
+    return json.loads(sock_file.readline())
+
+
+def subscriber(path, results, index):
+    sock = connect(path)
+    sock_file = sock.makefile('r')
+    request(sock_file, sock, {'cmd': 'subscribe'})
+    results[index] = []
+    for line in sock_file:
+        event = json.loads(line)
+        if event.get('event') != 'state':
+            continue
+        results[index].append(event['seq'])
+        if event['seq'] == NUM_EVENTS - 1:
+            break
+    sock.close()
+
+
+def check_second_instance(path):
+    """A second server must not take over a socket that is still being served"""
+    second = StatusServer(socket_path=path, stats_interval=0)
+    started = second.start()
+    control = connect(path)
+    control_file = control.makefile('r')
+    reply = request(control_file, control, {'cmd': 'status'})
+    control.close()
+    print(f"Second instance on a live socket started: {started}; first still answers: {reply.get('ok')}")
+    return not started and reply.get('ok')
+
+
+def check_stale_socket():
+    """A socket file nobody listens on is removed and the server starts"""
+    path = os.path.join(tempfile.mkdtemp(), 'eyeremote-stale.sock')
+    crashed = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    crashed.bind(path)
+    crashed.close()  # The file stays behind, like after a crash
+    server = StatusServer(socket_path=path, stats_interval=0)
+    started = server.start()
+    control = connect(path)
+    control_file = control.makefile('r')
+    reply = request(control_file, control, {'cmd': 'status'})
+    control.close()
+    server.stop()
+    print(f"Server on a stale socket file started: {started}; answers: {reply.get('ok')}")
+    return started and reply.get('ok')
+
+
+def check_failing_stats():
+    """A stats provider that raises answers the status request with an error"""
+    path = os.path.join(tempfile.mkdtemp(), 'eyeremote-stats.sock')
+
+    def stats_provider():
+        raise RuntimeError("stats unavailable")
+
+    server = StatusServer(socket_path=path, stats_interval=0, stats_provider=stats_provider)
+    server.start()
+    control = connect(path)
+    control_file = control.makefile('r')
+    reply = request(control_file, control, {'cmd': 'status', 'id': 3})
+    after = request(control_file, control, {'cmd': 'subscribe'})
+    control.close()
+    server.stop()
+    print(f"Failing stats provider: status reply {reply}; next request answered {after.get('ok')}")
+    return reply == {'ok': False, 'error': 'stats unavailable', 'id': 3} and after.get('ok')
+
+
+def check_remote_config():
+    """Bad config values are refused and leave the setting as it was"""
+    directory = tempfile.mkdtemp()
+    engine = EyeRemoteEngine(config=Config(os.path.join(directory, 'config.json')), log=lambda m: None)
+    rejected = [
+        {'key': 'target_app'},
+        {'key': 'target_app', 'value': None},
+        {'key': 'target_app', 'value': '  '},
+        {'key': 'timeout', 'value': True},
+        {'key': 'timeout', 'value': -1},
+        {'key': 'timeout', 'value': '5'},
+        {'key': 'max_faces', 'value': 0},
+        {'key': 'media_targets', 'value': 'vlc'},
+    ]
+    replies = [engine.handle_remote_command('config', dict(request, cmd='config')) for request in rejected]
+    unchanged = (engine.config.get('target_app', 'Any') == 'Any' and engine.config.get('timeout', 3) == 3
+                 and engine.config.get('max_faces', 1) == 1)
+    accepted = engine.handle_remote_command('config', {'cmd': 'config', 'key': 'timeout', 'value': 5})
+    engine.shutdown()
+    print(f"Remote config: {sum(not reply['ok'] for reply in replies)}/{len(rejected)} bad values refused "
+          f"(e.g. \"{replies[0].get('error')}\", \"{replies[3].get('error')}\"); setting unchanged {unchanged}; "
+          f"timeout=5 accepted {accepted.get('ok')}")
+    return (not any(reply['ok'] for reply in replies) and unchanged
+            and accepted.get('ok') and engine.config.get('timeout') == 5)
+
+
+def run_status_server():
+    if not StatusServer.is_supported():
+        print("Status socket not supported on this platform, skipping")
+        return True
+
+    print("Starting status server test...")
+    path = os.path.join(tempfile.mkdtemp(), 'eyeremote-test.sock')
+    commands = []
+    server = StatusServer(socket_path=path, queue_size=256, stats_interval=0.2,
+                          stats_provider=lambda: {'frames_processed': 1},
+                          command_handler=lambda cmd, req: commands.append(cmd) or {'ok': True})
+    server.start()
+
+    # Command round trip
+    control = connect(path)
+    control_file = control.makefile('r')
+    start_reply = request(control_file, control, {'cmd': 'start', 'id': 7})
+    status_reply = request(control_file, control, {'cmd': 'status'})
+    control.close()
+    second_refused = check_second_instance(path)
+
+    # A client that subscribes and then never reads
+    stalled = connect(path)
+    stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    stalled.sendall(b'{"cmd": "subscribe"}\n')
+
+    results = {}
+    threads = [threading.Thread(target=subscriber, args=(path, results, i), daemon=True)
+               for i in range(NUM_SUBSCRIBERS)]
+    for thread in threads:
+        thread.start()
+    while server.client_count < NUM_SUBSCRIBERS + 1:
+        time.sleep(0.01)
+    time.sleep(0.2)
+
+    # Publish ~1000 events/s with padding so the stalled client's buffers fill up
+    slowest_publish = 0.0
+    padding = 'x' * 200
+    for seq in range(NUM_EVENTS):
+        start = time.perf_counter()
+        server.publish({'seq': seq, 'padding': padding})
+        slowest_publish = max(slowest_publish, time.perf_counter() - start)
+        time.sleep(0.001)
+
+    for thread in threads:
+        thread.join(timeout=20)
+    server.stop()
+    stalled.close()
+    stale_replaced = check_stale_socket()
+    stats_failure_answered = check_failing_stats()
+    config_checked = check_remote_config()
+
+    complete = sum(1 for seqs in results.values() if seqs == list(range(NUM_EVENTS)))
+    print(f"Command replies: {start_reply}, stats: {status_reply.get('stats')}")
+    print(f"Subscribers with every event in order: {complete}/{NUM_SUBSCRIBERS}")
+    print(f"Events received per subscriber: {sorted(len(seqs) for seqs in results.values())[:3]}...")
+    print(f"Dropped clients: {server.dropped_clients}")
+    print(f"Slowest publish() call: {slowest_publish * 1000:.3f} ms")
+
+    ok = (start_reply.get('ok') and start_reply.get('id') == 7 and commands == ['start']
+          and complete == NUM_SUBSCRIBERS and server.dropped_clients >= 1
+          and second_refused and stale_replaced and stats_failure_answered
+          and config_checked)
+
+    print("\nTest Summary:")
+    print("[OK] Status server test passed" if ok else "[FAIL] Status server test failed")
+    return ok
+
+
+def test_status_server():
+    assert run_status_server()
+
+
+if __name__ == "__main__":
+    success = run_status_server()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Test the parameter sweep.
+
+1. Labels: a 'labels' array in an .npz and a <clip>.labels.json of watching
+   ranges give the same per-frame labels. Frames are taken at the
+   requested rate.
+2. Scoring: the smoother's delay counts against accuracy, and a change to
+   "not watching" during a watching stretch counts as a false pause.
+3. Frontier: dominated configurations are dropped, and --max-ms picks the
+   most accurate point within the budget.
+4. Search space: the grid, a random draw and the current settings.
+5. Config: the chosen settings are written to the config file, and the
+   engine and detectors read them.
+6. Sweep: two worker processes run a small grid on a synthetic labeled clip.
+   Skipped when the Haar cascades are missing.
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import sweep
+from app.config import Config
+from app.eye_detector import CASCADE_DEFAULTS, cascade_params
+
+FRAMES = 90
+WATCHING = [(15, 45), (60, 90)]
+
+
+def labeled_frames():
+    labels = np.zeros(FRAMES, dtype=bool)
+    for first, end in WATCHING:
+        labels[first:end] = True
+    frames = np.zeros((FRAMES, 120, 160), dtype=np.uint8)
+    frames[labels] = 200
+    return frames, labels
+
+
+def check_labels(directory):
+    frames, labels = labeled_frames()
+    np.savez(os.path.join(directory, 'array.npz'), frames=frames, fps=30.0, labels=labels)
+    np.save(os.path.join(directory, 'ranges.npy'), frames)
+    with open(os.path.join(directory, 'ranges.npy.labels.json'), 'w') as f:
+        json.dump({'watching': WATCHING}, f)
+    np.save(os.path.join(directory, 'unlabeled.npy'), frames)
+
+    clips, unlabeled = sweep.find_labeled_clips(directory)
+    _, array_labels = sweep.load_clip(os.path.join(directory, 'array.npz'), fps=30)
+    _, range_labels = sweep.load_clip(os.path.join(directory, 'ranges.npy'), fps=30)
+    sampled_frames, sampled_labels = sweep.load_clip(os.path.join(directory, 'array.npz'), fps=10)
+    same = np.array_equal(array_labels, labels) and np.array_equal(range_labels, labels)
+    sampled = len(sampled_frames) == FRAMES // 3 and np.array_equal(sampled_labels, labels[::3])
+    print(f"Labels: clips {[name for name, _ in clips]}, unlabeled {unlabeled}, array and ranges agree {same}, "
+          f"{len(sampled_frames)} frames at 10 of 30 FPS {sampled}")
+    return [name for name, _ in clips] == ['array.npz', 'ranges.npy'] and unlabeled == ['unlabeled.npy'] \
+        and same and sampled
+
+
+def check_scoring():
+    labels = np.array([False] * 4 + [True] * 8 + [False] * 4)
+    # Eyes found while watching, except for a two-frame miss
+    eyes = labels.copy()
+    eyes[7:9] = False
+    fast = sweep.score(eyes, labels, 1, 1)
+    steady = sweep.score(eyes, labels, 1, 3)
+    print(f"Scoring: absent after 1 frame {fast[0]}/16 correct, {fast[1]} false pauses; "
+          f"after 3 frames {steady[0]}/16 correct, {steady[1]} false pauses")
+    # 1/1: wrong during the miss (2) and false pause; 1/3: the miss is ridden out, but the
+    # end is noticed 2 frames late
+    return fast == (14, 1) and steady == (14, 0)
+
+
+def result(ms, accuracy, false_pauses=0):
+    return {'params': {'id': f"{ms}/{accuracy}"}, 'ms_per_frame': ms, 'accuracy': accuracy,
+            'false_pauses': false_pauses}
+
+
+def check_frontier():
+    results = [result(1.0, 0.80), result(2.0, 0.90), result(2.5, 0.85), result(3.0, 0.90),
+               result(4.0, 0.97), result(1.0, 0.70), result(5.0, 0.96)]
+    frontier = sweep.pareto_frontier(results)
+    points = [(r['ms_per_frame'], r['accuracy']) for r in frontier]
+    budget = sweep.choose(frontier, max_ms=3.5)
+    best = sweep.choose(frontier)
+    nothing = sweep.choose(frontier, max_ms=0.5)
+    print(f"Frontier: {points}; within 3.5 ms {budget['ms_per_frame']} ms, unlimited {best['ms_per_frame']} ms")
+    return points == [(1.0, 0.80), (2.0, 0.90), (4.0, 0.97)] and budget['ms_per_frame'] == 2.0 \
+        and best['ms_per_frame'] == 4.0 and nothing is None
+
+
+def check_search_space():
+    current = sweep.current_settings(Config(os.path.join(tempfile.mkdtemp(), 'config.json')))
+    grid = dict(sweep.GRID, face_scale_factor=[1.2, 1.3])
+    full, smoothing = sweep.search_space(grid, current)
+    size = np.prod([len(grid[key]) for key in CASCADE_DEFAULTS])
+    drawn, _ = sweep.search_space(grid, current, samples=10, seed=3)
+    again, _ = sweep.search_space(grid, current, samples=10, seed=3)
+    current_cascade = {key: current[key] for key in CASCADE_DEFAULTS}
+    print(f"Search space: {len(full)} cascade settings ({size} in the grid + current), "
+          f"{len(smoothing)} smoothing; random draw {len(drawn)}, repeatable {drawn == again}")
+    return len(full) == size + 1 and full[0] == current_cascade and len(smoothing) == 9 \
+        and len(drawn) == 11 and drawn == again and all(params in full for params in drawn)
+
+
+def check_config(directory):
+    from app.engine import EyeRemoteEngine
+
+    path = os.path.join(directory, 'config.json')
+    chosen = {'params': dict(face_scale_factor=1.2, face_min_neighbors=4, face_min_size=60,
+                             eye_scale_factor=1.15, eye_min_neighbors=2, eye_min_size=15,
+                             eyes_present_frames=1, no_eyes_frames=5)}
+    sweep.apply_to_config(chosen, path)
+    config = Config(path)
+    params = cascade_params(config)
+    engine = EyeRemoteEngine(config=config, log=lambda m: None)
+    thresholds = (engine.smoother.present_threshold, engine.smoother.absent_threshold)
+    engine.shutdown()
+    clamped = cascade_params({'face_scale_factor': 1.0, 'eye_min_size': 0, 'face_min_neighbors': -2})
+    print(f"Config: cascades {params}, smoothing {thresholds}; out of range values clamped to "
+          f"{clamped['face_scale_factor']}, {clamped['eye_min_size']}, {clamped['face_min_neighbors']}")
+    return params == {key: chosen['params'][key] for key in CASCADE_DEFAULTS} and thresholds == (1, 5) \
+        and (clamped['face_scale_factor'], clamped['eye_min_size'], clamped['face_min_neighbors']) == (1.01, 1, 0)
+
+
+def check_sweep(directory):
+    from app.eye_detector import load_cascades
+
+    try:
+        load_cascades()
+    except Exception as e:
+        print(f"Sweep: Haar cascades not available in this OpenCV build ({e}), skipping")
+        return True
+    clips = [('array.npz', os.path.join(directory, 'array.npz'))]
+    grid = dict(sweep.GRID, face_scale_factor=[1.1, 1.3], face_min_neighbors=[5], face_min_size=[30],
+                eye_scale_factor=[1.1], eye_min_neighbors=[3], eye_min_size=[20])
+    current = sweep.current_settings(Config(os.path.join(directory, 'sweep.json')))
+    cascades, smoothing = sweep.search_space(grid, current)
+    results = sweep.run_sweep(clips, cascades, smoothing, workers=2, fps=10)
+    frontier = sweep.pareto_frontier(results)
+    print(f"Sweep: {len(results)} configurations from {len(cascades)} cascade settings on 2 workers, "
+          f"{len(frontier)} on the frontier, {frontier[0]['ms_per_frame']:.2f}-{frontier[-1]['ms_per_frame']:.2f} "
+          f"ms/frame")
+    return len(results) == len(cascades) * len(smoothing) and frontier \
+        and all(r['ms_per_frame'] > 0 and 0 <= r['accuracy'] <= 1 for r in results)
+
+
+def run_sweep():
+    print("Starting parameter sweep test...")
+    directory = tempfile.mkdtemp()
+    try:
+        results = {
+            'labels': check_labels(directory),
+            'scoring': check_scoring(),
+            'Pareto frontier and choice': check_frontier(),
+            'search space': check_search_space(),
+            'settings written to the config': check_config(directory),
+            'sweep on worker processes': check_sweep(directory),
+        }
+    finally:
+        shutil.rmtree(directory)
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_sweep():
+    assert run_sweep()
+
+
+if __name__ == "__main__":
+    success = run_sweep()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Test look-away-to-pause latency tracing.
+
+A scripted detector looks away and back on a timeline while the engine's
+detection loop runs with a 1 s timeout and a stand-in media backend that
+takes 50 ms per action:
+
+1. Decisions: two pauses and two resumes are traced from the first frame of
+   the change to the backend's answer; a glance away shorter than the
+   timeout leaves no pause trace.
+2. Spans: every trace has detect, smoothing, timeout/decide, queue and
+   backends spans, in order and adding up to the reported latency.
+3. Export: the Chrome trace file loads as JSON, with one async slice per
+   decision and the spans as complete events.
+4. Dropped decisions: while actuation is held up, ten traced pauses arrive
+   and only the newest waits. The dropped ones are discarded, and so is the
+   waiting one, since the player is already paused; no trace is left open.
+5. Toggle path: with no media targets every decision is a play/pause
+   toggle. Decisions that pile up while a key is being sent collapse into
+   the newest, and a key is only sent when it differs from what the player
+   was last sent, so the player ends up in the last decided state.
+
+The pause and resume latency summary is printed.
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from app.engine import EyeRemoteEngine
+from app.media_backends import CAP_EXPLICIT_PAUSE, MediaBackend, MediaBackendRegistry
+from app.events import PauseRequested
+from app.tracing import KIND_PAUSE, KIND_RESUME, format_summary
+
+TIMEOUT = 1
+BACKEND_MS = 50
+# (seconds from start, eyes visible from then on)
+TIMELINE = [(0.0, True), (1.0, False), (3.0, True), (4.0, False), (4.4, True), (5.4, False), (7.4, True)]
+RUN_SECONDS = 8.4
+
+
+class ScriptedDetector:
+    """EyeDetector stand-in: a 30 fps camera and verdicts from TIMELINE"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.cap = None
+        self.in_standby = False
+        self.camera_index = 0
+
+    def is_camera_working(self):
+        return True
+
+    def detect_eyes(self, max_faces=1):
+        time.sleep(1 / 30)  # Waiting for the next frame
+        elapsed = time.monotonic() - self.started
+        return [eyes for at, eyes in TIMELINE if at <= elapsed][-1]
+
+    def standby(self, grace_seconds=30.0):
+        pass
+
+    def cleanup(self):
+        pass
+
+
+class SlowPlayer(MediaBackend):
+    name = 'fake'
+    capabilities = frozenset({CAP_EXPLICIT_PAUSE})
+
+    def __init__(self):
+        self.actions = []
+
+    def probe(self):
+        return True
+
+    def send(self, action, player=None):
+        time.sleep(BACKEND_MS / 1000)
+        self.actions.append(action)
+        return True
+
+
+def run_session(directory):
+    config = Config(os.path.join(directory, 'config.json'))
+    config.set('timeout', TIMEOUT)
+    config.set('media_targets', ['fake:player'])
+    engine = EyeRemoteEngine(config=config, log=lambda m: None)
+    player = SlowPlayer()
+    engine.media_registry = MediaBackendRegistry(backends=[player])
+    engine.eye_detector = ScriptedDetector()
+    stop_event = threading.Event()
+    loop = threading.Thread(target=engine.detection_loop, args=(stop_event,))
+    loop.start()
+    time.sleep(RUN_SECONDS)
+    stop_event.set()
+    loop.join()
+    time.sleep(0.3)  # Let the last actuation finish
+    path = os.path.join(directory, 'trace.json')
+    engine.export_trace(path)
+    traces = engine.tracer.traces()
+    summary = engine.tracer.summary()
+    engine.shutdown()
+    with open(path) as f:
+        exported = json.load(f)
+    return traces, summary, exported, player
+
+
+def check_dropped_decisions(directory):
+    config = Config(os.path.join(directory, 'dropped.json'))
+    config.set('media_targets', ['fake:player'])
+    held = threading.Event()
+    release = threading.Event()
+
+    def log(message):
+        # Hold actuation up in its first delivery
+        if message.startswith('Sending') and not release.is_set():
+            held.set()
+            release.wait(5)
+
+    engine = EyeRemoteEngine(config=config, log=log)
+    engine.media_registry = MediaBackendRegistry(backends=[SlowPlayer()])
+    engine.bus.publish(PauseRequested('pause', trace_id=engine.tracer.begin(KIND_PAUSE, time.perf_counter())))
+    held.wait(5)
+    for _ in range(9):
+        engine.bus.publish(PauseRequested('pause', trace_id=engine.tracer.begin(KIND_PAUSE, time.perf_counter())))
+    release.set()
+    time.sleep(0.5)
+    summary = engine.tracer.summary()
+    dropped = engine.bus.stats()['actuation']['dropped']
+    engine.shutdown()
+    finished = summary[KIND_PAUSE]['count']
+    print(f"Dropped decisions: actuation queue dropped {dropped}, {finished} traces finished, "
+          f"{summary['discarded']} discarded, {summary['open']} left open")
+    return dropped == 8 and summary['open'] == 0 and finished == 1 and summary['discarded'] == 9
+
+
+def check_toggle_path(directory):
+    config = Config(os.path.join(directory, 'toggle.json'))
+    config.set('target_app', 'Any')
+    engine = EyeRemoteEngine(config=config, log=lambda m: None)
+    held = threading.Event()
+    release = threading.Event()
+    toggles = []
+
+    def send_keypress(target_hwnd=None):
+        # Stand-in for the play/pause key; holds up the first one
+        toggles.append(time.perf_counter())
+        held.set()
+        release.wait(5)
+
+    engine._send_keypress_with_fallback = send_keypress
+    engine.bus.publish(PauseRequested('pause'))
+    held.wait(5)
+    for action in ['resume', 'pause', 'resume', 'pause']:
+        engine.bus.publish(PauseRequested(action))
+    release.set()
+    time.sleep(0.3)
+    while_held = len(toggles)
+    engine.bus.publish(PauseRequested('resume'))
+    engine.bus.publish(PauseRequested('resume'))
+    time.sleep(0.3)
+    engine.shutdown()
+    # The player starts out playing, so an odd number of toggles leaves it paused
+    print(f"Toggle path: 5 decisions ending in pause sent {while_held} key(s), "
+          f"then two resumes brought it to {len(toggles)}")
+    return while_held == 1 and len(toggles) == 2
+
+
+def run_tracing():
+    print("Starting latency tracing test...")
+    directory = tempfile.mkdtemp()
+    try:
+        traces, summary, exported, player = run_session(directory)
+    finally:
+        shutil.rmtree(directory)
+
+    kinds = [trace.kind for trace in traces]
+    pauses = [trace for trace in traces if trace.kind == KIND_PAUSE]
+    resumes = [trace for trace in traces if trace.kind == KIND_RESUME]
+    decisions = (kinds == [KIND_PAUSE, KIND_RESUME, KIND_PAUSE, KIND_RESUME]
+                 and player.actions == ['pause', 'resume', 'pause', 'resume'])
+    pause_ok = all(TIMEOUT * 1000 < trace.latency_ms < TIMEOUT * 1000 + 800 for trace in pauses)
+    resume_ok = all(BACKEND_MS < trace.latency_ms < 600 for trace in resumes)
+    print(f"Decisions: {kinds}, player got {player.actions}, discarded {summary['discarded']} "
+          f"(the first look, and the short glance away and back)")
+    for trace in traces:
+        print(f"  {trace.kind} #{trace.trace_id}: {trace.latency_ms:.0f} ms = "
+              + ' + '.join(f"{span['name']} {(span['end'] - span['start']) * 1000:.0f}" for span in trace.spans))
+
+    expected = {KIND_PAUSE: ['detect', 'smoothing', 'timeout', 'queue', 'backends'],
+                KIND_RESUME: ['detect', 'smoothing', 'decide', 'queue', 'backends']}
+    names_ok = all([span['name'] for span in trace.spans] == expected[trace.kind] for trace in traces)
+    ordered = all(a['end'] <= b['start'] + 1e-6 for trace in traces for a, b in zip(trace.spans, trace.spans[1:]))
+    covered = all(abs(sum(span['end'] - span['start'] for span in trace.spans) - (trace.end - trace.start)) < 0.005
+                  for trace in traces)
+    print(f"Spans: expected stages {names_ok}, in order {ordered}, add up to the latency {covered}")
+
+    events = exported['traceEvents']
+    slices = [event for event in events if event['ph'] in ('b', 'e')]
+    complete = [event for event in events if event['ph'] == 'X']
+    export_ok = (len(slices) == 2 * len(traces) and len(complete) == sum(len(t.spans) for t in traces)
+                 and all(event['dur'] >= 0 for event in complete) and 'summary' in exported['otherData'])
+    print(f"Export: {len(events)} events, {len(slices) // 2} decision slices, {len(complete)} spans, valid {export_ok}")
+    print("\n" + format_summary(summary))
+
+    directory = tempfile.mkdtemp()
+    try:
+        dropped_ok = check_dropped_decisions(directory)
+        toggle_ok = check_toggle_path(directory)
+    finally:
+        shutil.rmtree(directory)
+
+    results = {
+        'pause and resume traced': decisions and pause_ok and resume_ok,
+        'spans': names_ok and ordered and covered,
+        'Chrome trace export': export_ok,
+        'dropped decisions discarded': dropped_ok,
+        'toggles follow the last decision': toggle_ok,
+    }
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_tracing():
+    assert run_tracing()
+
+
+if __name__ == "__main__":
+    success = run_tracing()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test the window's view model without a display.
+
+1. Callbacks: the engine's event stream at 30 and 120 frames per second is
+   fed to the old window handler (one Tk callback per event) and to the
+   view model sampled at 10 Hz. Tk callbacks per second are reported for
+   both; with the view model they no longer follow the frame rate.
+2. Diff: writing the same status every frame updates the widget once, and
+   quick attention flips between two samples show only the final state.
+3. Threads: several writers at once; the sampled state is the last one
+   written and every binding sees consistent values.
+"""
+
+import sys
+import os
+import heapq
+import itertools
+import threading
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.events import EventBus, FrameProcessed, AttentionChanged
+from app.viewmodel import ViewModel, ViewBinder
+
+RUN_SECONDS = 2.0
+
+
+class FakeTk:
+    """Single-threaded callback loop with root.after semantics"""
+
+    def __init__(self):
+        self._queue = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self.callbacks = 0
+
+    def after(self, delay_ms, callback, *args):
+        with self._lock:
+            heapq.heappush(self._queue, (time.monotonic() + delay_ms / 1000, next(self._order), callback, args))
+
+    def run(self, seconds):
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            with self._lock:
+                due = self._queue and self._queue[0][0] <= time.monotonic()
+                item = heapq.heappop(self._queue) if due else None
+            if item is None:
+                time.sleep(0.001)
+                continue
+            self.callbacks += 1
+            item[2](*item[3])
+
+
+class StatusWidgets:
+    """Stand-ins for the status label and card; count how often they are touched"""
+
+    def __init__(self):
+        self.status = None
+        self.attentive = None
+        self.status_sets = 0
+        self.card_sets = 0
+
+    def set_status(self, value):
+        self.status = value
+        self.status_sets += 1
+
+    def set_card(self, value):
+        self.attentive = value
+        self.card_sets += 1
+
+
+def publish_frames(bus, fps, seconds):
+    """Engine stand-in: FrameProcessed every frame, an attention change every second"""
+    interval = 1.0 / fps
+    frames = int(fps * seconds)
+    for i in range(frames):
+        bus.publish(FrameProcessed(True, i, 5.0))
+        if i % fps == 0:
+            bus.publish(AttentionChanged(i // fps % 2 == 0))
+        time.sleep(interval)
+
+
+def run_window(fps, use_view_model):
+    tk = FakeTk()
+    widgets = StatusWidgets()
+    bus = EventBus()
+    if use_view_model:
+        view = ViewModel(status="Stopped", attentive=False)
+        binder = ViewBinder(view, tk.after, refresh_hz=10)
+        binder.bind('status', widgets.set_status)
+        binder.bind('attentive', widgets.set_card)
+        binder.start()
+
+        def on_event(event):
+            if isinstance(event, AttentionChanged):
+                view.set(attentive=event.attentive)
+            else:
+                view.set(status="Detecting")
+    else:
+        # The window handler before the view model
+        def on_event(event):
+            if isinstance(event, AttentionChanged):
+                tk.after(0, widgets.set_card, event.attentive)
+            else:
+                tk.after(0, lambda: widgets.set_status("Detecting"))
+
+    bus.subscribe(on_event, (FrameProcessed, AttentionChanged), name='ui', maxsize=64)
+    publisher = threading.Thread(target=publish_frames, args=(bus, fps, RUN_SECONDS))
+    publisher.start()
+    tk.run(RUN_SECONDS + 0.2)
+    publisher.join()
+    bus.close()
+    return tk.callbacks / RUN_SECONDS, widgets
+
+
+def check_callbacks():
+    ok = True
+    for fps in (30, 120):
+        before, old_widgets = run_window(fps, use_view_model=False)
+        after, new_widgets = run_window(fps, use_view_model=True)
+        print(f"Callbacks at {fps} fps: before {before:.0f}/s ({old_widgets.status_sets} status sets), "
+              f"after {after:.0f}/s ({new_widgets.status_sets} status sets, {new_widgets.card_sets} card updates)")
+        ok = ok and after <= 12 and before > fps * 0.6 and new_widgets.status_sets <= 2
+    return ok
+
+
+def check_diff():
+    tk = FakeTk()
+    widgets = StatusWidgets()
+    view = ViewModel(status="Stopped", attentive=False)
+    binder = ViewBinder(view, tk.after)
+    binder.bind('status', widgets.set_status)
+    binder.bind('attentive', widgets.set_card)
+    binder.refresh()
+    initial = (widgets.status_sets, widgets.card_sets)
+    for _ in range(1000):
+        view.set(status="Detecting")
+    binder.refresh()
+    same_status = widgets.status_sets == initial[0] + 1 and widgets.card_sets == initial[1]
+    for attentive in (True, False, True, False, True):
+        view.set(attentive=attentive)
+    binder.refresh()
+    coalesced = widgets.card_sets == initial[1] + 1 and widgets.attentive is True
+    idle = binder.refresh() == 0
+    print(f"Diff: 1000 identical writes -> {widgets.status_sets - initial[0]} status update, "
+          f"5 flips -> {widgets.card_sets - initial[1]} card update (shows {widgets.attentive}), "
+          f"idle refresh touches nothing {idle}")
+    return same_status and coalesced and idle
+
+
+def check_threads():
+    view = ViewModel(detecting=False, status="Stopped")
+    seen = []
+    binder = ViewBinder(view, lambda delay, callback: None)
+    binder.bind(('detecting', 'status'), lambda detecting, status: seen.append((detecting, status)))
+
+    def writer(n):
+        for i in range(5000):
+            view.set(detecting=True, status=f"writer {n} step {i}")
+
+    writers = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in writers:
+        thread.start()
+    while any(thread.is_alive() for thread in writers):
+        binder.refresh()
+    view.set(detecting=False, status="Stopped")
+    binder.refresh()
+    consistent = all(detecting == (status != "Stopped") for detecting, status in seen[1:])
+    print(f"Threads: {view.writes} writes from 4 threads, {len(seen)} widget updates, "
+          f"final state {seen[-1]}, detecting/status consistent {consistent}")
+    return seen[-1] == (False, "Stopped") and consistent and len(seen) < view.writes
+
+
+def run_viewmodel():
+    print("Starting view model test...")
+    results = {
+        'Tk callbacks independent of frame rate': check_callbacks(),
+        'only changed fields pushed': check_diff(),
+        'writes from many threads': check_threads(),
+    }
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_viewmodel():
+    assert run_viewmodel()
+
+
+if __name__ == "__main__":
+    success = run_viewmodel()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Test the out-of-process detector: shared-memory frame ring, result records
+over the pipe, crash recovery and the latency the handoff adds.
+
+1. Ring: a frame written by one side reads back unchanged; a slot that was
+   overwritten since the record was sent is refused.
+2. Results: a worker on a fake camera delivers verdicts at its rate, the
+   newest frame can be read from the ring, and the handoff (worker done ->
+   result in this process) is reported.
+3. Crash: the worker is killed with SIGKILL. detect_eyes waits for the
+   restarted worker, the outage is reported like a camera incident and
+   results flow again from a new process.
+4. Crash loop: a detector that crashes the worker on every frame is
+   restarted max_restarts times, then given up on.
+5. Standby: a paused worker resumes warm; cleanup stops it and removes the
+   shared memory.
+
+The detector in the worker is a stand-in ("eyes" when the frame is bright),
+so the test does not depend on Haar cascade files.
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.config import Config
+from app.frame_ring import FrameRing
+from app.worker_process import ProcessDetector
+from fake_camera import FakeCapture
+
+
+class BrightnessDetector:
+    """EyeDetector stand-in for the worker: 'eyes' when the frame is bright"""
+
+    def __init__(self, cap, crash=False):
+        self.cap = cap
+        self.crash = crash
+
+    def detect_eyes_in(self, gray, max_faces=1):
+        if self.crash:
+            os._exit(3)  # Like a segfault inside OpenCV
+        return float(gray.mean()) > 100
+
+    def standby(self, grace_seconds=30.0, keepalive_interval=0.5):
+        pass
+
+    def resume(self):
+        return self.cap.isOpened()
+
+    def cleanup(self):
+        self.cap.release()
+
+
+def brightness_detector(setup, camera_index):
+    return BrightnessDetector(setup.open_capture(camera_index))
+
+
+def crashing_detector(setup, camera_index):
+    return BrightnessDetector(setup.open_capture(camera_index), crash=True)
+
+
+def make_detector(config, factory, events, **kwargs):
+    return ProcessDetector(config, 0, max_rate=20, capture_factory=FakeCapture, detector_factory=factory,
+                           on_lost=lambda incident: events.append(('lost', incident)),
+                           on_recovered=lambda incident: events.append(('recovered', incident)),
+                           log=lambda message: events.append(('log', message)),
+                           initial_backoff=0.1, **kwargs)
+
+
+def collect(detector, seconds):
+    verdicts = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        verdicts.append(detector.detect_eyes())
+    return verdicts
+
+
+def check_ring():
+    writer = FrameRing(slots=2, slot_bytes=64 * 48)
+    reader = FrameRing(slots=2, slot_bytes=64 * 48, name=writer.name)
+    frame = np.random.randint(0, 255, (48, 64), dtype=np.uint8)
+    slot = writer.write(1, frame, 12.5)
+    seq, captured, copy = reader.read(slot, 1)
+    same = seq == 1 and captured == 12.5 and np.array_equal(copy, frame)
+    writer.write(2, frame, 13.0)
+    writer.write(3, frame, 13.5)  # Overwrites slot 0
+    stale = reader.read(slot, 1) is None
+    too_big = writer.write(4, np.zeros((480, 640), dtype=np.uint8), 14.0) == -1
+    reader.close()
+    writer.close()
+    print(f"Ring: round trip exact {same}, overwritten slot refused {stale}, oversized frame refused {too_big}")
+    return same and stale and too_big
+
+
+def check_results(config):
+    events = []
+    detector = make_detector(config, brightness_detector, events)
+    try:
+        verdicts = collect(detector, 1.5)
+        ret, gray = detector.read_gray()
+        stats = detector.process_stats()
+    finally:
+        detector.cleanup()
+    handoff = stats['handoff_ms']
+    print(f"Results: {stats['results']} in 1.5 s, eyes in {sum(verdicts)}/{len(verdicts)} verdicts, "
+          f"ring frame {gray.shape if ret else None}, handoff p50 {handoff['p50']} ms "
+          f"p95 {handoff['p95']} ms, frame age p50 {stats['frame_age_ms']['p50']} ms")
+    return (stats['results'] >= 15 and all(verdicts) and ret and gray.shape == (480, 640)
+            and handoff['p50'] is not None and handoff['p95'] < 50)
+
+
+def check_crash(config):
+    events = []
+    detector = make_detector(config, brightness_detector, events)
+    try:
+        collect(detector, 0.5)
+        first_pid = detector.process.pid
+        detector.process.kill()
+        killed_at = time.monotonic()
+        verdict = detector.detect_eyes()  # Waits for the restarted worker
+        waited = time.monotonic() - killed_at
+        collect(detector, 0.5)
+        stats = detector.process_stats()
+        working = detector.is_camera_working()
+    finally:
+        detector.cleanup()
+    kinds = [kind for kind, _ in events if kind != 'log']
+    print(f"Crash: worker {first_pid} killed, detect_eyes returned {verdict} after {waited:.2f} s "
+          f"from worker {stats['pid']}, restarts {stats['restarts']}, restart took {stats['last_restart_ms']} ms, "
+          f"incidents {kinds}")
+    return (verdict and stats['pid'] != first_pid and stats['restarts'] == 1 and working
+            and kinds == ['lost', 'recovered'] and stats['results'] > 5)
+
+
+def check_crash_loop(config):
+    events = []
+    detector = make_detector(config, crashing_detector, events, max_restarts=2)
+    try:
+        end = time.monotonic() + 15
+        while detector.is_camera_working() and time.monotonic() < end:
+            detector.detect_eyes()
+        stats = detector.process_stats()
+        working = detector.is_camera_working()
+    finally:
+        detector.cleanup()
+    gave_up = any(kind == 'log' and 'giving up' in message for kind, message in events)
+    print(f"Crash loop: restarts {stats['restarts']}, failed {stats['failed']}, camera working {working}, "
+          f"gave up logged {gave_up}")
+    return stats['restarts'] == 2 and stats['failed'] and not working and gave_up
+
+
+def check_standby(config):
+    events = []
+    detector = make_detector(config, brightness_detector, events)
+    collect(detector, 0.3)
+    detector.standby(5.0)
+    time.sleep(0.3)
+    before = detector.results
+    time.sleep(0.3)
+    paused = detector.results == before
+    warm = detector.resume()
+    resumed = detector.detect_eyes()
+    name = detector.ring.name
+    process = detector.process
+    detector.cleanup()
+    try:
+        FrameRing(name=name).close()
+        removed = False
+    except FileNotFoundError:
+        removed = True
+    print(f"Standby: no results while paused {paused}, resumed warm {warm}, verdict {resumed}, "
+          f"worker stopped {not process.is_alive()}, shared memory removed {removed}")
+    return paused and warm and resumed and not process.is_alive() and removed
+
+
+def run_worker_process():
+    print("Starting out-of-process detector test...")
+    config_dir = tempfile.mkdtemp()
+    try:
+        config = Config(os.path.join(config_dir, 'eyeremote_config.json'))
+        config.set('camera_mode_negotiation', False)
+        config.set('camera_luma_capture', False)
+        results = {
+            'frame ring': check_ring(),
+            'results and handoff latency': check_results(config),
+            'crash recovery': check_crash(config),
+            'crash loop gives up': check_crash_loop(config),
+            'standby and cleanup': check_standby(config),
+        }
+    finally:
+        shutil.rmtree(config_dir)
+
+    print("\nTest Summary:")
+    for name, ok in results.items():
+        print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return all(results.values())
+
+
+def test_worker_process():
+    assert run_worker_process()
+
+
+if __name__ == "__main__":
+    success = run_worker_process()
+    sys.exit(0 if success else 1)